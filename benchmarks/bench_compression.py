@@ -0,0 +1,88 @@
+"""Benchmark the gzip compression of request bodies on representative Automation API payloads.
+
+For each payload, reports its raw and compressed size, the time taken to compress it, the median time of the call
+against the local stand-in server with and without compression, and the time the body would take to send over a
+link of the given bandwidth. The stand-in server is local, so the call times only show the cost of compressing;
+the transfer times show what it saves over a slow link.
+
+Typical usage example:
+
+    poetry run python benchmarks/bench_compression.py --repeat 20 --link-mbps 10 --level 6
+"""
+
+import argparse
+import gzip
+import json
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.compression import CompressionOptions
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import SubmitTestCaseResultDto, TestResultStatus, TestRunCreateDto
+from applause.common_python_reporter.stand_in import StandInServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def test_names(count: int) -> List[str]:
+    """Build the names of a parametrized test suite, the way pytest reports them."""
+    return [f"tests/integration/test_module_{index // 200}.py::TestCheckout::test_payment_flow[device-{index % 50}-locale-{index % 7}]" for index in range(count)]
+
+
+def failure_reason(size: int) -> str:
+    """Build a failure reason made of a repeated Python traceback."""
+    frame = '  File "/usr/lib/python3.11/site-packages/selenium/webdriver/remote/webdriver.py", line 429, in execute\n    self.error_handler.check_response(response)\n'
+    return ("Traceback (most recent call last):\n" + frame * (size // len(frame)))[:size]
+
+
+def payloads() -> Dict[str, Tuple[object, Callable[[AutoApi], None]]]:
+    """Build the payloads to measure, by name, with their JSON body and the call sending them."""
+    cases: Dict[str, Tuple[object, Callable[[AutoApi], None]]] = {}
+    for count in (1_000, 10_000, 50_000):
+        dto = TestRunCreateDto(tests=test_names(count))
+        cases[f"test-run/create {count} tests"] = (dto.model_dump(by_alias=True), lambda auto_api, dto=dto: auto_api.start_test_run(dto))
+    for count in (10_000, 50_000):
+        ids = list(range(4_000_000, 4_000_000 + count))
+        cases[f"provider-info {count} ids"] = (ids, lambda auto_api, ids=ids: auto_api.get_provider_session_links(ids))
+    dto = SubmitTestCaseResultDto(test_result_id=1, status=TestResultStatus.FAILED, provider_session_guids=[], failure_reason=failure_reason(64 * 1024))
+    cases["test-result 64 KiB failure"] = (dto.model_dump(by_alias=True), lambda auto_api: auto_api.submit_test_case_result(dto))
+    return cases
+
+
+def median_call(auto_api: AutoApi, call: Callable[[AutoApi], None], repeat: int) -> float:
+    """Get the median time of a call in seconds, after a first call that warms up the connection."""
+    call(auto_api)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call(auto_api)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)[len(latencies) // 2]
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the gzip compression of request bodies on the local stand-in server.")
+    parser.add_argument("--repeat", type=int, default=10, help="number of calls per payload and mode")
+    parser.add_argument("--link-mbps", type=float, default=10.0, help="bandwidth of the link the transfer times are estimated for, in megabits per second")
+    parser.add_argument("--level", type=int, default=6, help="gzip compression level")
+    args = parser.parse_args(argv)
+
+    with StandInServer() as server:
+        raw_api = AutoApi(ApplauseConfig(api_key="benchmark", product_id=1, auto_api_base_url=server.base_url))
+        gzip_api = AutoApi(ApplauseConfig(api_key="benchmark", product_id=1, auto_api_base_url=server.base_url, compression=CompressionOptions(level=args.level)))
+        print(f"{'payload':<30} {'raw KiB':>9} {'gzip KiB':>9} {'ratio':>6} {'gzip ms':>8} {'call ms':>8} {'gz call':>8} {'send s':>7} {'gz send':>8}")
+        for name, (body, call) in payloads().items():
+            raw = json.dumps(body).encode("utf-8")
+            start = time.perf_counter()
+            compressed = gzip.compress(raw, compresslevel=args.level)
+            compress_ms = (time.perf_counter() - start) * 1000
+            raw_ms = median_call(raw_api, call, args.repeat) * 1000
+            gzip_ms = median_call(gzip_api, call, args.repeat) * 1000
+            bytes_per_second = args.link_mbps * 1_000_000 / 8
+            print(
+                f"{name:<30} {len(raw) / 1024:>9.1f} {len(compressed) / 1024:>9.1f} {len(compressed) / len(raw):>6.2f} {compress_ms:>8.2f} "
+                f"{raw_ms:>8.2f} {gzip_ms:>8.2f} {len(raw) / bytes_per_second:>7.3f} {len(compressed) / bytes_per_second:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark eager and incremental parsing of emails with large attachments.
+
+Compares the time and peak Python memory of parsing a multi-megabyte email with email.message_from_bytes,
+as AutoApi.get_email_content does, against reading only the headers and against streaming every part
+with StreamedEmail, as AutoApi.stream_email_content does.
+
+Typical usage example:
+
+    poetry run python benchmarks/bench_email_parsing.py --sizes 5 20 50
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+from email import message_from_bytes
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from applause.common_python_reporter.email_stream import StreamedEmail
+
+CHUNK_SIZE = 64 * 1024
+
+
+def build_email(attachment_mb: int) -> bytes:
+    """Build a raw email with a short text body and a random attachment of the given size."""
+    message = MIMEMultipart()
+    message["Subject"] = "Your invoice"
+    message["To"] = "test@example.com"
+    message.attach(MIMEText("Please find your invoice attached.", "plain", "utf-8"))
+    attachment = MIMEApplication(os.urandom(attachment_mb * 1024 * 1024), Name="invoice.pdf")
+    attachment["Content-Disposition"] = 'attachment; filename="invoice.pdf"'
+    message.attach(attachment)
+    return message.as_bytes()
+
+
+def chunks(raw: bytes):
+    """Yield the raw email in chunks, the way a streamed HTTP response is read."""
+    view = memoryview(raw)
+    for start in range(0, len(raw), CHUNK_SIZE):
+        yield bytes(view[start : start + CHUNK_SIZE])
+
+
+def eager_parse(raw: bytes):
+    """Parse the whole email and decode the attachment, like get_email_content."""
+    message = message_from_bytes(raw)
+    for part in message.walk():
+        if not part.is_multipart():
+            part.get_payload(decode=True)
+
+
+def streamed_headers(raw: bytes):
+    """Read only the subject of a streamed email."""
+    with StreamedEmail(chunks(raw)) as email:
+        email.headers["subject"]
+
+
+def streamed_parts(raw: bytes):
+    """Stream and decode every part of the email into spooled temporary files."""
+    with StreamedEmail(chunks(raw)) as email:
+        for _ in email.iter_parts():
+            pass
+
+
+def measure(func, raw: bytes):
+    """Return the wall time in seconds and the peak traced memory in MB of a single call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(raw)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    """Run the benchmark for each requested attachment size and print a table of the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20], help="attachment sizes in MB")
+    args = parser.parse_args()
+
+    print(f"{'attachment':>10} {'method':>16} {'time (s)':>10} {'peak (MB)':>10}")
+    for size in args.sizes:
+        raw = build_email(size)
+        for name, func in [("eager", eager_parse), ("stream headers", streamed_headers), ("stream parts", streamed_parts)]:
+            elapsed, peak = measure(func, raw)
+            print(f"{size:>8}MB {name:>16} {elapsed:>10.3f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
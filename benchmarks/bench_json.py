@@ -0,0 +1,95 @@
+"""Benchmark the JSON codecs on the DTOs of the Automation API calls.
+
+For each DTO, and each codec installed, reports the time to encode it as AutoApi does, from the dumped model to
+the request body, and to decode it, from the response body to the validated model, along with the size of the
+encoded body. The pydantic row encodes and decodes with the model_dump_json and model_validate_json methods of
+the models themselves, for reference. Codecs whose library is not installed are skipped.
+
+Typical usage example:
+
+    poetry run python benchmarks/bench_json.py --repeat 200 --tests 10000
+"""
+
+import argparse
+import time
+from applause.common_python_reporter.dtos import (
+    CreateTestCaseResultDto,
+    SubmitTestCaseResultDto,
+    TestResultProviderInfo,
+    TestResultStatus,
+    TestRunCreateDto,
+)
+from applause.common_python_reporter.json_codec import JsonCodec, JsonCodecType, create_json_codec
+from pydantic import BaseModel, RootModel
+from typing import Callable, Dict, List, Optional
+
+
+class ProviderInfoList(RootModel[List[TestResultProviderInfo]]):
+    """The response of the provider-info call."""
+
+
+def models(tests: int) -> Dict[str, BaseModel]:
+    """Build the DTOs to measure, by name."""
+    return {
+        "TestRunCreateDto": TestRunCreateDto(tests=[f"tests/test_checkout.py::test_payment[device-{index}]" for index in range(tests)]),
+        "CreateTestCaseResultDto": CreateTestCaseResultDto(test_run_id=123456, test_case_name="tests/test_checkout.py::test_payment[device-1]", provider_session_ids=["a1b2c3"]),
+        "SubmitTestCaseResultDto": SubmitTestCaseResultDto(
+            test_result_id=987654, status=TestResultStatus.FAILED, provider_session_guids=["a1b2c3"], failure_reason="AssertionError: expected 200, got 503\n" * 100
+        ),
+        "TestResultProviderInfo list": ProviderInfoList(
+            [
+                TestResultProviderInfo(test_result_id=index, provider_url=f"https://provider.example.com/sessions/{index}", provider_session_id=f"session-{index}")
+                for index in range(tests)
+            ]
+        ),
+    }
+
+
+def per_call(function: Callable[[], object], repeat: int) -> float:
+    """Get the median time of a call in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1_000_000
+
+
+def bench_codec(name: str, model: BaseModel, codec: JsonCodec, repeat: int):
+    """Encode and decode a DTO with a codec, and print the results."""
+    body = codec.dumps(model.model_dump(by_alias=True))
+    encode = per_call(lambda: codec.dumps(model.model_dump(by_alias=True)), repeat)
+    decode = per_call(lambda: type(model).model_validate(codec.loads(body)), repeat)
+    print(f"{name:<28} {codec.name:<9} {encode:>12.1f} {decode:>12.1f} {len(body):>10}")
+
+
+def bench_pydantic(name: str, model: BaseModel, repeat: int):
+    """Encode and decode a DTO with the JSON methods of pydantic, and print the results."""
+    body = model.model_dump_json(by_alias=True).encode("utf-8")
+    encode = per_call(lambda: model.model_dump_json(by_alias=True).encode("utf-8"), repeat)
+    decode = per_call(lambda: type(model).model_validate_json(body), repeat)
+    print(f"{name:<28} {'pydantic':<9} {encode:>12.1f} {decode:>12.1f} {len(body):>10}")
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codecs on the DTOs of the Automation API calls.")
+    parser.add_argument("--repeat", type=int, default=100, help="number of encodes and decodes per DTO and codec")
+    parser.add_argument("--tests", type=int, default=1000, help="number of tests in the run and of provider session links")
+    args = parser.parse_args(argv)
+
+    codecs = []
+    for codec_type in (JsonCodecType.STDLIB, JsonCodecType.UJSON, JsonCodecType.ORJSON):
+        try:
+            codecs.append(create_json_codec(codec_type))
+        except ImportError as e:
+            print(f"{codec_type.value:<9} skipped: {e}")
+    print(f"{'dto':<28} {'codec':<9} {'encode us':>12} {'decode us':>12} {'bytes':>10}")
+    for name, model in models(args.tests).items():
+        for codec in codecs:
+            bench_codec(name, model, codec, args.repeat)
+        bench_pydantic(name, model, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark the HTTP transports against each other on the local stand-in server.
+
+Sends many small concurrent Automation API calls through AutoApi on top of each transport, and reports the
+throughput and p50/p99 latency of each. The http2 transport is skipped when httpx is not installed. The
+stand-in server only speaks HTTP/1.1, so the http2 transport falls back to HTTP/1.1 connections here; its
+multiplexing only shows against a server that negotiates HTTP/2.
+
+Typical usage example:
+
+    poetry run python benchmarks/bench_transports.py --requests 5000 --concurrency 32 --latency 0.005
+"""
+
+import argparse
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+from applause.common_python_reporter.transport import TransportType
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Get the q-th quantile of sorted values using the nearest rank method."""
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+
+def bench(server: StandInServer, transport_type: TransportType, requests: int, concurrency: int):
+    """Send heartbeats from concurrent threads through one transport, and print the results."""
+    config = ApplauseConfig(api_key="benchmark", product_id=1, auto_api_base_url=server.base_url, transport=transport_type)
+    try:
+        auto_api = AutoApi(config)
+    except ImportError as e:
+        print(f"{transport_type.value:<10} skipped: {e}")
+        return
+
+    def call(_):
+        start = time.perf_counter()
+        auto_api.send_sdk_heartbeat(1)
+        return time.perf_counter() - start
+
+    # Warm up the connection pool before measuring
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(concurrency)))
+        start = time.perf_counter()
+        latencies = sorted(executor.map(call, range(requests)))
+        elapsed = time.perf_counter() - start
+    auto_api.transport.close()
+    p50, p99 = percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000
+    print(f"{transport_type.value:<10} {requests / elapsed:>10.1f} {p50:>9.2f} {p99:>9.2f}")
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the HTTP transports on the local stand-in server.")
+    parser.add_argument("--requests", type=int, default=2000, help="number of requests per transport")
+    parser.add_argument("--concurrency", type=int, default=16, help="number of concurrent threads")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency injected by the stand-in server, in seconds")
+    args = parser.parse_args()
+
+    with StandInServer(StandInConfig(latency=args.latency)) as server:
+        print(f"{'transport':<10} {'req/sec':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for transport_type in TransportType:
+            bench(server, transport_type, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
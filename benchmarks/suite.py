@@ -0,0 +1,213 @@
+"""End-to-end benchmark suite for the reporter, run against the local stand-in server.
+
+Each scenario drives the real AutoApi client through ApplauseReporter against a StandInServer, measuring
+every operation on the client side. The suite reports the throughput and p50/p99 latency of each operation,
+and can store the results as a baseline and compare later runs against it.
+
+Typical usage example:
+
+    # Run every scenario and print the results
+    poetry run python benchmarks/suite.py
+
+    # Run a smaller version of the scenarios with injected server latency
+    poetry run python benchmarks/suite.py --scale 0.1 --latency 0.002
+
+    # Measure the startup latency of new reporters, with and without warm-up, when connecting takes 50 ms
+    poetry run python benchmarks/suite.py --scenario "cold start" --connect-latency 0.05
+
+    # Store a baseline, then fail if a later run is more than 20% slower
+    poetry run python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    poetry run python benchmarks/suite.py --compare benchmarks/baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType, TestResultStatus
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+from contextlib import contextmanager, redirect_stdout
+from typing import Callable, Dict, List
+
+# The time a test framework spends collecting tests between building the reporter and starting the run
+COLLECTION_TIME = 0.1
+
+
+class Recorder:
+    """Collects the latency of each operation performed by a scenario."""
+
+    def __init__(self):
+        """Initialize the Recorder object."""
+        self.latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, operation: str):
+        """Time the enclosed block as one call of the operation."""
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(elapsed)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Get the q-th quantile of the values using the nearest rank method."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+def make_config(server: StandInServer, **kwargs) -> ApplauseConfig:
+    """Build a configuration pointing both clients at the stand-in server."""
+    return ApplauseConfig(api_key="benchmark", product_id=1, auto_api_base_url=server.base_url, public_api_base_url=server.base_url, **kwargs)
+
+
+def report_run(server: StandInServer, recorder: Recorder, tests: int, assets_per_test: int = 0, asset_size: int = 0):
+    """Report a complete run of passing tests, optionally attaching assets to each of them."""
+    names = [f"test {index}" for index in range(tests)]
+    asset = os.urandom(asset_size) if assets_per_test else b""
+    reporter = ApplauseReporter(make_config(server))
+    with recorder.measure("runner_start"):
+        reporter.runner_start(tests=names)
+    for index, name in enumerate(names):
+        with recorder.measure("start_test_case"):
+            reporter.start_test_case(str(index), name)
+        for asset_index in range(assets_per_test):
+            with recorder.measure("attach_test_case_asset"):
+                reporter.attach_test_case_asset(str(index), f"asset-{asset_index}.bin", "session", AssetType.SCREENSHOT, asset)
+        with recorder.measure("submit_test_case_result"):
+            reporter.submit_test_case_result(str(index), TestResultStatus.PASSED)
+    with recorder.measure("runner_end"):
+        reporter.runner_end()
+
+
+def large_run(server: StandInServer, recorder: Recorder, scale: float):
+    """Report a single run with 10k tests."""
+    report_run(server, recorder, tests=max(1, int(10_000 * scale)))
+
+
+def asset_heavy_run(server: StandInServer, recorder: Recorder, scale: float):
+    """Report a run where every test uploads three 1 MB assets."""
+    report_run(server, recorder, tests=max(1, int(200 * scale)), assets_per_test=3, asset_size=1024 * 1024)
+
+
+def concurrent_runs(server: StandInServer, recorder: Recorder, scale: float):
+    """Report 100 runs of 20 tests at the same time from separate threads."""
+    threads = [threading.Thread(target=report_run, args=(server, recorder, 20)) for _ in range(max(1, int(100 * scale)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def cold_starts(server: StandInServer, recorder: Recorder, scale: float):
+    """Start a run from a new reporter, without and with warm-up, after the tests have been collected for 100 ms."""
+    for _ in range(max(1, int(20 * scale))):
+        for mode, warm_up in (("cold", False), ("warm-up", True)):
+            with recorder.measure(f"startup ({mode})"):
+                reporter = ApplauseReporter(make_config(server, warm_up=warm_up))
+                time.sleep(COLLECTION_TIME)
+                with recorder.measure(f"runner_start ({mode})"):
+                    reporter.runner_start(tests=["test 0"])
+            reporter.runner_end()
+
+
+SCENARIOS: Dict[str, Callable[[StandInServer, Recorder, float], None]] = {
+    "10k-test run": large_run,
+    "asset-heavy run": asset_heavy_run,
+    "100 concurrent runs": concurrent_runs,
+    "cold start": cold_starts,
+}
+
+
+def run_scenario(name: str, stand_in_config: StandInConfig, scale: float) -> Dict[str, Dict[str, float]]:
+    """Run a scenario against a fresh stand-in server and summarize each operation."""
+    recorder = Recorder()
+    with StandInServer(stand_in_config) as server:
+        start = time.perf_counter()
+        SCENARIOS[name](server, recorder, scale)
+        elapsed = time.perf_counter() - start
+    results = {"total": {"ops": sum(len(values) for values in recorder.latencies.values()), "seconds": elapsed}}
+    results["total"]["ops_per_sec"] = results["total"]["ops"] / elapsed
+    for operation, values in recorder.latencies.items():
+        results[operation] = {
+            "ops": len(values),
+            "ops_per_sec": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.5) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, Dict[str, float]]]):
+    """Print a table of the results of every scenario."""
+    print(f"{'scenario':<22} {'operation':<26} {'ops':>8} {'ops/sec':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for scenario, operations in results.items():
+        for operation, stats in operations.items():
+            p50 = f"{stats['p50_ms']:>9.2f}" if "p50_ms" in stats else f"{'':>9}"
+            p99 = f"{stats['p99_ms']:>9.2f}" if "p99_ms" in stats else f"{'':>9}"
+            print(f"{scenario:<22} {operation:<26} {int(stats['ops']):>8} {stats['ops_per_sec']:>10.1f} {p50} {p99}")
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Dict[str, Dict[str, float]]], tolerance: float) -> List[str]:
+    """List every operation whose throughput dropped by more than the tolerance relative to the baseline."""
+    regressions = []
+    for scenario, operations in results.items():
+        for operation, stats in operations.items():
+            expected = baseline.get(scenario, {}).get(operation)
+            if expected is None:
+                continue
+            change = stats["ops_per_sec"] / expected["ops_per_sec"] - 1
+            marker = "REGRESSION" if change < -tolerance else "ok"
+            print(f"{scenario:<22} {operation:<26} {change:>+8.1%} {marker}")
+            if change < -tolerance:
+                regressions.append(f"{scenario} / {operation}")
+    return regressions
+
+
+def main(argv=None):
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the reporter against the local stand-in server.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only this scenario, may be repeated")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the size of every scenario by this factor")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency injected by the stand-in server, in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="random extra latency of up to this many seconds")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="latency of every new connection to the stand-in server, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected server error")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results to this file")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results against the baseline in this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative drop in throughput when comparing")
+    args = parser.parse_args(argv)
+
+    stand_in_config = StandInConfig(latency=args.latency, latency_jitter=args.latency_jitter, connect_latency=args.connect_latency, error_rate=args.error_rate, seed=0)
+    results = {}
+    # The reporter prints and writes its provider session links to the working directory, keep them out of the way
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        os.chdir(workdir)
+        try:
+            for name in args.scenario or list(SCENARIOS):
+                results[name] = run_scenario(name, stand_in_config, args.scale)
+        finally:
+            os.chdir(cwd)
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Throughput regressed beyond {args.tolerance:.0%} for: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,15 +4,35 @@ Includes modules for interacting with the Applause Public API, Applause Automati
 This
 
 Modules:
+- asset_pipeline: Background processing of assets before upload, in streaming stages keyed on the asset type.
 - auto_api: Module for interacting with the Applause Automation API.
+- bandwidth: Adaptive bandwidth caps that asset uploads are paced to, process wide and per client.
+- bundle: Offline result bundles, and their resumable upload to a test run.
+- checkpoint: Append-only checkpoints of the run and result ids, that a restarted process reattaches to the run from.
+- compression: Gzip compression of large JSON request bodies, negotiated per endpoint.
 - config: Configuration settings for the package.
 - dtos: Data Transfer Objects for the Applause Automation API.
 - email_helper: Helper for generating email inboxes for testing purposes.
+- email_stream: Incremental parsing of downloaded emails, spooling large parts to temporary files.
+- json_codec: Pluggable JSON codecs for request bodies, responses and files: orjson, ujson or the standard library.
+- junit_import: Streaming import of JUnit XML reports into test runs, from parallel workers.
+- loadgen: Command line load generator simulating a fleet of reporting clients.
+- log_stream: Bounded log streams of test cases, uploaded in parts from a background thread while they are written.
+- metrics: In-memory instrumentation of the clients and reporter, with Prometheus and JSON exporters.
+- multipart: Streaming multipart/form-data encoding of file uploads.
 - public_api: Module for interacting with the Applause Public API.
+- rate_limit: Token bucket rate limiting of the Automation API calls, shareable between threads and processes.
+- recording: Recording of HTTP traffic to a file, and offline replay of it with the original or scaled latencies.
 - reporter: A Module for easily managing the interactions with the Applause Automation API services.
             without keeping track of state or returned ids.
+- scheduler: Priority scheduling of the Automation API calls: run lifecycle and heartbeats, then results, then uploads.
+- stand_in: A local stand-in for the Applause APIs with injectable latency and errors, for benchmarks and tests.
+- submission_queue: Background submission of test results, coalescing repeated updates of the same result.
+- tracing: Optional span based tracing of reporter operations with pluggable exporters.
+- transport: Pluggable HTTP transports for the clients: requests, urllib3 and HTTP/2.
 - utils: Utility functions for the package.
 - version: Version of the package.
+- warmup: Background DNS resolution, connection and serializer warm-up of the client, with a process wide DNS cache.
 """
 
 from .auto_api import AutoApi
@@ -0,0 +1,408 @@
+"""Processing of assets before they are uploaded, on background worker threads.
+
+Assets often need some work before they can be uploaded: tokens redacted from logs, screenshots downscaled, huge
+response bodies stripped from HAR files. Doing that inline in a test adds to its duration. An AssetPipeline holds a
+list of stages for each AssetType, and the RunReporter hands the assets of those types to it instead of uploading
+them right away. Worker threads run the stages and upload the outcome, and the run waits for them when it ends.
+
+A stage is a callable taking an iterator over the chunks of an asset and returning an iterator over the chunks of
+the processed asset, usually a generator. The stages of an asset type are chained, so an asset streams from one
+stage to the next a chunk at a time. The output of the last stage is kept in memory up to the spool threshold and
+in a temporary file beyond it, as the upload needs to know its size. The time spent in each stage is recorded in
+the applause_asset_stage_duration_seconds histogram, by asset type and stage name.
+
+Typical usage example:
+
+    stages = {AssetType.CONSOLE_LOG: [redact()], AssetType.NETWORK_HAR: [strip_har_bodies(64 * 1024)], AssetType.SCREENSHOT: [downscale_image(1280)]}
+    reporter = ApplauseReporter(config, asset_stages=stages)
+    ...
+    reporter.attach_test_case_asset("test1", "console.log", "", AssetType.CONSOLE_LOG, log)  # returns once the log is queued
+"""
+
+import io
+import json
+import re
+import tempfile
+import threading
+import time
+from .dtos import AssetType
+from .metrics import ASSET_STAGE_DURATION, QUEUE_DEPTH, MetricsRegistry
+from concurrent.futures import Future, ThreadPoolExecutor
+from pydantic import BaseModel
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+Stage = Callable[[Iterator[bytes]], Iterator[bytes]]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+
+# Bearer tokens, and the values of api key, token, secret and password fields in query strings, headers and JSON
+DEFAULT_REDACTED_PATTERNS = (rb"(?i)(bearer\s+|(?:api[_-]?key|token|secret|password)[\"']?\s*[:=]\s*[\"']?)[^\s\"'&,;]+",)
+
+
+class AssetPipelineStats(BaseModel):
+    """The progress of an asset pipeline.
+
+    Attributes
+    ----------
+        queued: The number of assets handed to the pipeline
+        uploaded: The number of assets processed and uploaded successfully
+        failed: The number of assets that could not be processed or uploaded
+        pending: The number of assets waiting to be processed or uploaded
+
+    """
+
+    queued: int = 0
+    uploaded: int = 0
+    failed: int = 0
+    pending: int = 0
+
+
+def stage_name(stage: Stage) -> str:
+    """Get the name a stage is recorded under, the name of its function."""
+    return getattr(stage, "__name__", type(stage).__name__)
+
+
+class _TimedIterator:
+    """An iterator recording the time spent producing its items, including the time spent by the iterators it pulls from."""
+
+    def __init__(self, iterator: Iterator[bytes]):
+        self.iterator = iterator
+        self.seconds = 0.0
+
+    def __iter__(self) -> "_TimedIterator":
+        return self
+
+    def __next__(self) -> bytes:
+        start = time.perf_counter()
+        try:
+            return next(self.iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def _chunks(asset: Union[bytes, BinaryIO], chunk_size: int) -> Iterator[bytes]:
+    if isinstance(asset, (bytes, bytearray)):
+        for offset in range(0, len(asset), chunk_size):
+            yield bytes(asset[offset : offset + chunk_size])
+        return
+    while True:
+        chunk = asset.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _spool(chunks: Iterator[bytes], threshold: int) -> Union[bytes, BinaryIO]:
+    """Collect chunks in memory, moving them to a temporary file once they are larger than the threshold."""
+    buffered: List[bytes] = []
+    size = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size > threshold:
+            file = tempfile.TemporaryFile()
+            file.writelines(buffered)
+            buffered.clear()
+            for chunk in chunks:
+                file.write(chunk)
+            file.seek(0)
+            return file
+    return b"".join(buffered)
+
+
+class AssetPipeline:
+    """Run the stages of an asset type over the assets of that type, and upload them, on worker threads.
+
+    Attributes
+    ----------
+        stages (Dict[AssetType, List[Stage]]): The stages of each asset type, in the order they run in.
+        metrics (MetricsRegistry): The registry the stage durations and the queue depth are recorded into.
+        chunk_size (int): The size of the chunks an asset is read in.
+        spool_threshold (int): The size above which the processed asset is moved from memory to a temporary file.
+
+    """
+
+    def __init__(
+        self,
+        stages: Dict[AssetType, List[Stage]],
+        metrics: MetricsRegistry,
+        max_workers: int = 2,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    ):
+        """Initialize the AssetPipeline object.
+
+        Args:
+        ----
+            stages (Dict[AssetType, List[Stage]]): The stages of each asset type. Assets of other types are not processed.
+            metrics (MetricsRegistry): The registry to record into.
+            max_workers (int, optional): The number of assets processed concurrently. Defaults to 2.
+            chunk_size (int, optional): The size of the chunks an asset is read in. Defaults to 64 KiB.
+            spool_threshold (int, optional): The size above which the processed asset is moved from memory to a
+                temporary file. Defaults to 1 MiB.
+
+        """
+        self.stages = {AssetType(asset_type): list(asset_stages) for asset_type, asset_stages in stages.items() if asset_stages}
+        self.metrics = metrics
+        self.chunk_size = chunk_size
+        self.spool_threshold = spool_threshold
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="applause-asset")
+        self._lock = threading.Condition()
+        self._stats = AssetPipelineStats()
+        self._closed = False
+        self._abandoned = False
+
+    def handles(self, asset_type: AssetType) -> bool:
+        """Check whether the pipeline has stages for an asset type."""
+        return AssetType(asset_type) in self.stages
+
+    def process(self, asset_type: AssetType, asset: Union[bytes, BinaryIO]) -> Union[bytes, BinaryIO]:
+        """Run the stages of an asset type over an asset, on the calling thread.
+
+        Args:
+        ----
+            asset_type (AssetType): The type of the asset
+            asset (Union[bytes, BinaryIO]): The asset, or a binary file object to read it from
+
+        Returns:
+        -------
+            Union[bytes, BinaryIO]: The processed asset, or a temporary file holding it, positioned at its start, if it
+                is larger than the spool threshold. The temporary file is deleted when it is closed.
+
+        """
+        asset_type = AssetType(asset_type)
+        stages = self.stages.get(asset_type, [])
+        timed = [_TimedIterator(_chunks(asset, self.chunk_size))]
+        for stage in stages:
+            timed.append(_TimedIterator(iter(stage(timed[-1]))))
+        output = _spool(timed[-1], self.spool_threshold)
+        # The time of an iterator includes the time of the ones upstream of it, so each stage is the difference
+        for stage, upstream, downstream in zip(stages, timed, timed[1:]):
+            self.metrics.observe(ASSET_STAGE_DURATION, downstream.seconds - upstream.seconds, asset_type=asset_type.value, stage=stage_name(stage))
+        return output
+
+    def submit(self, asset_type: AssetType, asset: Union[bytes, BinaryIO], upload: Callable[[Union[bytes, BinaryIO]], None], asset_name: str = "") -> Future:
+        """Queue an asset to be processed and uploaded.
+
+        A file object is read on a worker thread, and closed once it has been read, so it must be left open by the caller.
+        An asset that fails to be processed or uploaded is reported, and its error is set on its future.
+
+        Args:
+        ----
+            asset_type (AssetType): The type of the asset
+            asset (Union[bytes, BinaryIO]): The asset, or a binary file object to read it from
+            upload (Callable[[Union[bytes, BinaryIO]], None]): Called on the worker thread with the processed asset
+            asset_name (str, optional): The name of the asset, used to report its failure. Defaults to none.
+
+        Returns:
+        -------
+            Future: Resolved once the asset has been uploaded, or with the error that prevented it
+
+        Raises:
+        ------
+            Exception: If the pipeline has been closed
+
+        """
+        with self._lock:
+            if self._closed:
+                raise Exception("Asset pipeline - Already closed")
+            self._stats.queued += 1
+            self._stats.pending += 1
+            self._record_depth()
+        return self._executor.submit(self._run, asset_type, asset, upload, asset_name)
+
+    def _run(self, asset_type: AssetType, asset: Union[bytes, BinaryIO], upload: Callable[[Union[bytes, BinaryIO]], None], asset_name: str = ""):
+        succeeded = False
+        try:
+            try:
+                with self._lock:
+                    if self._abandoned:
+                        raise Exception("Asset pipeline - Closed before the asset was processed")
+                output = self.process(asset_type, asset)
+            finally:
+                if not isinstance(asset, (bytes, bytearray)):
+                    asset.close()
+            try:
+                upload(output)
+            finally:
+                if not isinstance(output, bytes):
+                    output.close()
+            succeeded = True
+        except Exception as e:
+            # Callers may never look at the future, so the failure is reported before it is set on it
+            print(f"Could not upload {AssetType(asset_type).value} asset {asset_name}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._stats.pending -= 1
+                if succeeded:
+                    self._stats.uploaded += 1
+                else:
+                    self._stats.failed += 1
+                self._record_depth()
+                self._lock.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued asset has been processed and uploaded, or has failed.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+
+        Returns:
+        -------
+            bool: Whether every asset was done before the timeout
+
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: self._stats.pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Stop accepting assets, and wait for the queued ones.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+                Assets that have not started processing when it expires are not uploaded.
+
+        Returns:
+        -------
+            bool: Whether every queued asset was done before the timeout
+
+        """
+        with self._lock:
+            self._closed = True
+        flushed = self.flush(timeout)
+        with self._lock:
+            # Assets that have not started processing fail right away, so that the workers stop after their current asset
+            self._abandoned = not flushed
+        self._executor.shutdown(wait=flushed)
+        return flushed
+
+    def stats(self) -> AssetPipelineStats:
+        """Get the progress of the pipeline."""
+        with self._lock:
+            return self._stats.model_copy()
+
+    def _record_depth(self):
+        self.metrics.set_gauge(QUEUE_DEPTH, self._stats.pending, queue="asset_pipeline")
+
+
+def redact(patterns: Iterable[Union[str, bytes]] = DEFAULT_REDACTED_PATTERNS, replacement: bytes = rb"\1[REDACTED]", max_line_size: int = 1024 * 1024) -> Stage:
+    """Create a stage replacing the matches of regular expressions in a text asset, line by line.
+
+    Args:
+    ----
+        patterns (Iterable[Union[str, bytes]], optional): The regular expressions to redact. Defaults to bearer tokens
+            and the values of api key, token, secret and password fields.
+        replacement (bytes, optional): The replacement of each match, which can refer to the groups of the pattern.
+            Defaults to keeping the first group, the name of the field, and redacting the rest of the match.
+        max_line_size (int, optional): The size above which a line is processed without waiting for its end, so
+            that memory stays bounded. A match spanning such a split is not redacted. Defaults to 1 MiB.
+
+    Returns:
+    -------
+        Stage: The stage
+
+    """
+    compiled = [re.compile(pattern.encode("utf-8") if isinstance(pattern, str) else pattern) for pattern in patterns]
+
+    def substitute(text: bytes) -> bytes:
+        for pattern in compiled:
+            text = pattern.sub(replacement, text)
+        return text
+
+    def redact(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        pending = b""
+        for chunk in chunks:
+            pending += chunk
+            end = pending.rfind(b"\n") + 1
+            if end == 0 and len(pending) >= max_line_size:
+                end = len(pending)
+            if end:
+                yield substitute(pending[:end])
+                pending = pending[end:]
+        if pending:
+            yield substitute(pending)
+
+    return redact
+
+
+def strip_har_bodies(max_body_size: int = 64 * 1024) -> Stage:
+    """Create a stage removing the request and response bodies larger than a size from HAR files.
+
+    A removed body is replaced by a comment giving its size. The HAR file is parsed as a whole, so this stage holds
+    one file in memory at a time. A file that is not valid JSON is passed through unchanged.
+
+    Args:
+    ----
+        max_body_size (int, optional): The size in characters above which a body is removed. Defaults to 64 KiB.
+
+    Returns:
+    -------
+        Stage: The stage
+
+    """
+
+    def strip(content: Optional[dict]):
+        if isinstance(content, dict) and isinstance(content.get("text"), str) and len(content["text"]) > max_body_size:
+            size = len(content.pop("text"))
+            content["comment"] = f"Body of {size} characters removed before upload"
+
+    def strip_har_bodies(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        document = b"".join(chunks)
+        try:
+            har = json.loads(document)
+            entries = har["log"]["entries"]
+        except (ValueError, KeyError, TypeError):
+            yield document
+            return
+        for entry in entries:
+            strip(entry.get("request", {}).get("postData"))
+            strip(entry.get("response", {}).get("content"))
+        yield json.dumps(har).encode("utf-8")
+
+    return strip_har_bodies
+
+
+def downscale_image(max_size: int = 1280, format: str = "PNG") -> Stage:
+    """Create a stage shrinking images so that neither side is larger than a size, keeping their aspect ratio.
+
+    Images are decoded as a whole, so this stage holds one image in memory at a time. Smaller images are passed
+    through unchanged.
+
+    Args:
+    ----
+        max_size (int, optional): The maximum width and height in pixels. Defaults to 1280.
+        format (str, optional): The format the downscaled images are saved in. Defaults to PNG.
+
+    Returns:
+    -------
+        Stage: The stage
+
+    Raises:
+    ------
+        ImportError: If Pillow is not installed
+
+    """
+    if Image is None:
+        raise ImportError("The downscale_image stage requires Pillow: pip install Pillow")
+
+    def downscale_image(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        data = b"".join(chunks)
+        image = Image.open(io.BytesIO(data))
+        if max(image.size) <= max_size:
+            yield data
+            return
+        image.thumbnail((max_size, max_size))
+        output = io.BytesIO()
+        image.save(output, format=format)
+        yield output.getvalue()
+
+    return downscale_image
@@ -19,7 +19,12 @@ Typical usage example:
 
 """
 
+import asyncio
+import io
 import requests
+import time
+from .bandwidth import BandwidthLimiter, PacedBody
+from .compression import RequestCompressor
 from .dtos import (
     TestRunCreateDto,
     TestRunCreateResponseDto,
@@ -30,10 +35,20 @@ from .dtos import (
     EmailAddressResponse,
     EmailFetchRequest,
     AssetType,
+    TestRunEndingStatus,
 )
+from .email_stream import DEFAULT_SPOOL_THRESHOLD, StreamedEmail
 from .errors import ApplauseClientError
 from .config import ApplauseConfig
-from typing import List
+from .json_codec import create_json_codec
+from .multipart import MultipartEncoder, MultipartStream, iter_async_chunks
+from .metrics import HTTP_REQUESTS_IN_FLIGHT, RATE_LIMIT_WAIT, MetricsRegistry, record_http_request
+from .rate_limit import RateLimiter
+from .recording import RecordingAdapter, ReplayAdapter
+from .scheduler import PRIORITY_CLASSES, PriorityClass, PriorityScheduler
+from .tracing import Tracer
+from .transport import RequestsTransport, Transport, create_transport
+from typing import AsyncIterable, BinaryIO, Iterable, List, Optional, Union
 from email import message_from_bytes
 from email.message import Message
 from .version import __version__
@@ -46,20 +61,144 @@ class AutoApi:
     ----------
         config (ApplauseConfig): The configuration for the AutoApi.
         api_version (str): The version of the Automation API being used.
+        transport (Transport): The pooled HTTP transport shared by all calls.
+        metrics (MetricsRegistry): The registry that every request is recorded into.
+        tracer (Tracer): The tracer that every request is traced with.
+        rate_limiter (RateLimiter): The token buckets that calls wait for before they are sent.
+        scheduler (Optional[PriorityScheduler]): The priority scheduler granting slots to calls, if calls are scheduled.
+        bandwidth (Optional[BandwidthLimiter]): The bandwidth caps the bodies of uploads are paced to, if uploads are capped.
+        json_codec (JsonCodec): The codec that JSON request bodies are encoded with and JSON responses decoded with.
+        compressor (Optional[RequestCompressor]): The encoder compressing large JSON bodies, if bodies are compressed.
 
     """
 
-    def __init__(self, config: ApplauseConfig):
+    def __init__(self, config: ApplauseConfig, metrics: Optional[MetricsRegistry] = None, tracer: Optional[Tracer] = None):
         """Initialize the AutoApi Client with the provided configuration.
 
         Args:
         ----
             config (ApplauseConfig): The configuration for the AutoApi.
+            metrics (Optional[MetricsRegistry], optional): The registry to record requests into. Defaults to a new registry.
+            tracer (Optional[Tracer], optional): The tracer to trace requests with. Defaults to a disabled tracer.
 
         """
         self.config = config
         self.api_version = __version__
-        pass
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.tracer = tracer if tracer is not None else Tracer()
+        # A single transport is shared by every call so that connections are pooled and reused.
+        # Recording and replaying rely on transport adapters, so they always use the requests transport.
+        self.transport: Transport
+        if config.replay_file is not None:
+            self.transport = RequestsTransport(adapters={config.auto_api_base_url: ReplayAdapter(config.replay_file, latency_scale=config.replay_latency_scale)})
+        elif config.record_file is not None:
+            self.transport = RequestsTransport(adapters={config.auto_api_base_url: RecordingAdapter(config.record_file)})
+        else:
+            self.transport = create_transport(config.transport)
+        self.rate_limiter = RateLimiter(config.rate_limits)
+        self.scheduler = PriorityScheduler(config.scheduler, metrics=self.metrics) if config.scheduler is not None else None
+        self.bandwidth = BandwidthLimiter(config.bandwidth, self.metrics) if config.bandwidth is not None else None
+        self.json_codec = create_json_codec(config.json_codec)
+        self.compressor = RequestCompressor(config.compression, self.metrics, self.json_codec) if config.compression is not None else None
+
+    def close(self):
+        """Close the pooled connections of the transport and the state files of the shared rate limits.
+
+        The client must not be used once it is closed.
+        """
+        self.rate_limiter.close()
+        self.transport.close()
+
+    def _request(self, endpoint: str, method: str, path: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        """Send a request to the Automation API, encoding its JSON body with the codec and compressing it if it is large enough.
+
+        If the endpoint responds to a compressed body with 415 Unsupported Media Type, the request is sent again
+        uncompressed, and so are the later requests to the endpoint.
+
+        Args:
+        ----
+            endpoint (str): The logical name of the endpoint, used to label the metrics.
+            method (str): The HTTP method.
+            path (str): The path of the endpoint, relative to the base url.
+            headers (Optional[dict], optional): Additional headers for the request.
+            **kwargs: Additional arguments passed on to requests.
+
+        Raises:
+        ------
+            ApplauseClientError: If the server responded with an error status.
+
+        """
+        if self.compressor is None:
+            if kwargs.get("json") is not None:
+                headers = {**(headers or {}), "Content-Type": "application/json"}
+                kwargs["data"] = self.json_codec.dumps(kwargs.pop("json"))
+            return self._send(endpoint, method, path, headers=headers, **kwargs)
+        encoded_headers, encoded_kwargs, compressed = self.compressor.encode(endpoint, headers or {}, kwargs)
+        try:
+            return self._send(endpoint, method, path, headers=encoded_headers, **encoded_kwargs)
+        except ApplauseClientError as e:
+            if not compressed or e.status_code != 415:
+                raise
+            self.compressor.reject(endpoint)
+        return self._request(endpoint, method, path, headers=headers, **kwargs)
+
+    def _send(self, endpoint: str, method: str, path: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        """Send a request to the Automation API, recording it in the metrics registry and tracing it.
+
+        If the endpoint is rate limited, the request first waits for a token from its bucket. If calls are scheduled, it
+        then waits for a slot of the priority class of the endpoint, which it holds until the response has been read.
+
+        Args:
+        ----
+            endpoint (str): The logical name of the endpoint, used to label the metrics.
+            method (str): The HTTP method.
+            path (str): The path of the endpoint, relative to the base url.
+            headers (Optional[dict], optional): Additional headers for the request.
+            **kwargs: Additional arguments passed on to requests.
+
+        Raises:
+        ------
+            ApplauseClientError: If the server responded with an error status.
+
+        """
+        headers = {"X-Api-Key": self.config.api_key, **(headers or {})}
+        status = "error"
+        request_bytes = response_bytes = 0
+        limit = self.rate_limiter.bucket_for(endpoint)
+        with self.tracer.start_span(f"auto_api {endpoint}", method=method) as span:
+            if limit is not None:
+                waited = limit[1].acquire()
+                span.set_attribute("rate_limit_wait", waited)
+                self.metrics.observe(RATE_LIMIT_WAIT, waited, bucket=limit[0])
+            priority = None
+            if self.scheduler is not None:
+                priority = PRIORITY_CLASSES.get(endpoint, PriorityClass.RESULTS)
+                span.set_attribute("scheduler_wait", self.scheduler.acquire(priority))
+            if span.traceparent is not None:
+                headers["traceparent"] = span.traceparent
+            self.metrics.add_gauge(HTTP_REQUESTS_IN_FLIGHT, 1, client="auto_api")
+            start = time.perf_counter()
+            try:
+                response = self.transport.request(method, f"{self.config.auto_api_base_url}{path}", headers=headers, **kwargs)
+                status = str(response.status_code)
+                request_bytes = _body_size(response.request.body)
+                response_bytes = int(response.headers.get("Content-Length", 0)) if kwargs.get("stream") else len(response.content)
+                response.raise_for_status()
+                return response
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 429 and limit is not None:
+                    # Hold back every caller sharing the bucket until the server is ready again
+                    limit[1].drain(_retry_after(e.response))
+                raise ApplauseClientError(e.response) from e
+            finally:
+                elapsed = time.perf_counter() - start
+                if self.bandwidth is not None:
+                    self.bandwidth.observe_latency(endpoint, elapsed)
+                if priority is not None:
+                    self.scheduler.release(priority)
+                span.set_attribute("status", status)
+                self.metrics.add_gauge(HTTP_REQUESTS_IN_FLIGHT, -1, client="auto_api")
+                record_http_request(self.metrics, "auto_api", endpoint, status, elapsed, request_bytes, response_bytes)
 
     def start_test_run(self, params: TestRunCreateDto) -> TestRunCreateResponseDto:
         """Start a test run with the provided parameters.
@@ -79,7 +218,7 @@ class AutoApi:
             TestRunCreateResponseDto: The response of the test run creation request.
 
         """
-        headers = {"X-Api-Key": self.config.api_key, "Content-Type": "application/json"}
+        headers = {"Content-Type": "application/json"}
         # Dump the model to a dictionary and add the productId and sdkVersion
         request_params = params.model_dump(by_alias=True)
         request_params["productId"] = self.config.product_id
@@ -95,38 +234,32 @@ class AutoApi:
             request_params["testRailPlanName"] = self.config.test_rail_options.plan_name
             request_params["testRailRunName"] = self.config.test_rail_options.run_name
             request_params["overrideTestRailRunNameUniqueness"] = self.config.test_rail_options.override_test_rail_run_uniqueness
-        try:
-            # Post the request to Auto API
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v1.0/test-run/create",
-                json=request_params,
-                headers=headers,
-            )
-            response.raise_for_status()  # Raise an error for bad responses
-            return TestRunCreateResponseDto.model_validate(response.json())
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
-
-    def end_test_run(self, test_run_id: int) -> None:
+        response = self._request(
+            "test-run/create",
+            "POST",
+            "api/v1.0/test-run/create",
+            json=request_params,
+            headers=headers,
+        )
+        return TestRunCreateResponseDto.model_validate(self.json_codec.loads(response.content))
+
+    def end_test_run(self, test_run_id: int, ending_status: TestRunEndingStatus = TestRunEndingStatus.COMPLETE) -> None:
         """End a test run with the provided test run ID.
 
-        This HTTP Call ends the test run with the provided test run ID. The endingStatus parameter is always set to COMPLETE
-        in this case. This will finalize the test run and make the results available for fetching.
+        This HTTP Call ends the test run with the provided test run ID and ending status. This will finalize the test run
+        and make the results available for fetching.
 
         Args:
         ----
             test_run_id (int): The ID of the test run to end.
+            ending_status (TestRunEndingStatus, optional): The status to end the run with. Defaults to COMPLETE.
 
         """
-        headers = {"X-Api-Key": self.config.api_key}
-        try:
-            response = requests.delete(
-                f"{self.config.auto_api_base_url}api/v1.0/test-run/{test_run_id}?endingStatus=COMPLETE",
-                headers=headers,
-            )
-            response.raise_for_status()  # Raise an error for bad responses
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        self._request(
+            "test-run/end",
+            "DELETE",
+            f"api/v1.0/test-run/{test_run_id}?endingStatus={TestRunEndingStatus(ending_status).value}",
+        )
 
     def start_test_case(self, params: CreateTestCaseResultDto) -> CreateTestCaseResultResponseDto:
         """Start a test case with the provided parameters.
@@ -148,18 +281,16 @@ class AutoApi:
             CreateTestCaseResultResponseDto: The response of the test case creation request.
 
         """
-        headers = {"X-Api-Key": self.config.api_key, "Content-Type": "application/json"}
+        headers = {"Content-Type": "application/json"}
         request_params = params.model_dump(by_alias=True)
-        try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v1.0/test-result/create-result",
-                json=request_params,
-                headers=headers,
-            )
-            response.raise_for_status()
-            return CreateTestCaseResultResponseDto.model_validate(response.json())
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        response = self._request(
+            "create-result",
+            "POST",
+            "api/v1.0/test-result/create-result",
+            json=request_params,
+            headers=headers,
+        )
+        return CreateTestCaseResultResponseDto.model_validate(self.json_codec.loads(response.content))
 
     def submit_test_case_result(self, params: SubmitTestCaseResultDto) -> None:
         """Submit a test case result with the provided parameters.
@@ -173,17 +304,15 @@ class AutoApi:
             params (SubmitTestCaseResultDto): The parameters for the test case result.
 
         """
-        headers = {"X-Api-Key": self.config.api_key, "Content-Type": "application/json"}
+        headers = {"Content-Type": "application/json"}
         request_params = params.model_dump(by_alias=True)
-        try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v1.0/test-result",
-                json=request_params,
-                headers=headers,
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        self._request(
+            "test-result",
+            "POST",
+            "api/v1.0/test-result",
+            json=request_params,
+            headers=headers,
+        )
 
     def get_provider_session_links(self, result_ids: List[int]) -> List[TestResultProviderInfo]:
         """Fetch the provider session links for the provided result IDs.
@@ -197,17 +326,13 @@ class AutoApi:
             should be from the same test run, and are returned by the start_test_case method.
 
         """
-        headers = {"X-Api-Key": self.config.api_key}
-        try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v1.0/test-result/provider-info",
-                json=result_ids,
-                headers=headers,
-            )
-            response.raise_for_status()
-            return [TestResultProviderInfo.model_validate(result) for result in response.json()]
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        response = self._request(
+            "provider-info",
+            "POST",
+            "api/v1.0/test-result/provider-info",
+            json=result_ids,
+        )
+        return [TestResultProviderInfo.model_validate(result) for result in self.json_codec.loads(response.content)]
 
     def send_sdk_heartbeat(self, test_run_id: int) -> None:
         """Send an SDK heartbeat for the provided test run ID.
@@ -220,16 +345,12 @@ class AutoApi:
             test_run_id (int): The ID of the test run to send the SDK heartbeat for
 
         """
-        headers = {"X-Api-Key": self.config.api_key}
-        try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v2.0/sdk-heartbeat",
-                json={"testRunId": test_run_id},
-                headers=headers,
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        self._request(
+            "sdk-heartbeat",
+            "POST",
+            "api/v2.0/sdk-heartbeat",
+            json={"testRunId": test_run_id},
+        )
 
     def get_email_address(self, email_prefix: str) -> EmailAddressResponse:
         """Generate an email address with the provided email prefix.
@@ -242,16 +363,12 @@ class AutoApi:
             email_prefix (str): The email prefix to generate the email address with.
 
         """
-        headers = {"X-Api-Key": self.config.api_key}
-        try:
-            response = requests.get(
-                f"{self.config.auto_api_base_url}api/v1.0/email/get-address?prefix={email_prefix}",
-                headers=headers,
-            )
-            response.raise_for_status()
-            return EmailAddressResponse.model_validate(response.json())
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        response = self._request(
+            "email/get-address",
+            "GET",
+            f"api/v1.0/email/get-address?prefix={email_prefix}",
+        )
+        return EmailAddressResponse.model_validate(self.json_codec.loads(response.content))
 
     def get_email_content(self, request: EmailFetchRequest) -> Message:
         """Fetch the email content for the provided email address.
@@ -264,52 +381,102 @@ class AutoApi:
             request (EmailFetchRequest): The request for fetching the email content.
 
         """
-        headers = {"X-Api-Key": self.config.api_key}
-        try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v1.0/email/download-email",
-                json=request.model_dump(by_alias=True),
-                headers=headers,
-            )
-            response.raise_for_status()
-            return message_from_bytes(response.content)
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+        response = self._request(
+            "email/download-email",
+            "POST",
+            "api/v1.0/email/download-email",
+            json=request.model_dump(by_alias=True),
+        )
+        return message_from_bytes(response.content)
+
+    def stream_email_content(self, request: EmailFetchRequest, chunk_size: int = 64 * 1024, spool_threshold: int = DEFAULT_SPOOL_THRESHOLD) -> StreamedEmail:
+        """Fetch the email content for the provided email address without loading it into memory.
+
+        Unlike get_email_content, the body is downloaded as it is parsed. The headers can be read as soon
+        as the header block has arrived, and each MIME part is decoded into a spooled temporary file, so
+        large attachments do not have to fit in memory. The returned email should be closed when done.
+
+        Args:
+        ----
+            request (EmailFetchRequest): The request for fetching the email content.
+            chunk_size (int, optional): The number of bytes read from the connection at a time.
+            spool_threshold (int, optional): The size above which part content is moved from memory to a temporary file.
+
+        """
+        response = self._request(
+            "email/download-email",
+            "POST",
+            "api/v1.0/email/download-email",
+            json=request.model_dump(by_alias=True),
+            stream=True,
+        )
+        return StreamedEmail(response.iter_content(chunk_size), on_close=response.close, spool_threshold=spool_threshold)
 
     def upload_asset(
         self,
         result_id: int,
-        file: bytes,
+        file: Union[bytes, BinaryIO, Iterable[bytes], AsyncIterable[bytes]],
         asset_name: str,
         provider_session_guid: str,
         asset_type: AssetType,
+        event_loop: Optional[asyncio.AbstractEventLoop] = None,
     ) -> None:
         """Upload an asset for the provided test result ID.
 
         This HTTP Call uploads an asset for the provided test result ID. This can be used to attach screenshots
-        or other assets to the test results.
+        or other assets to the test results. A binary file object is streamed from its current position rather than
+        loaded into memory. An iterator or async iterator of chunks is sent with chunked transfer encoding, each chunk
+        being read as the body is sent, so content produced as a stream never has to be joined. If uploads are capped,
+        the body is sent at the pace allowed by the bandwidth caps.
 
         Args:
         ----
             result_id (int): The ID of the test result to upload the asset for.
-            file (bytes): The file to upload as the asset.
+            file (Union[bytes, BinaryIO, Iterable[bytes], AsyncIterable[bytes]]): The content of the asset, a binary
+                file object to read it from, or an iterator or async iterator of its chunks.
             asset_name (str): The name of the asset.
             provider_session_guid (str): The provider session GUID for the asset.
             asset_type (AssetType): The type of the asset.
+            event_loop (Optional[asyncio.AbstractEventLoop], optional): The event loop an async iterator belongs to, when
+                the upload runs in an executor thread of that loop. Defaults to iterating on a private event loop.
 
         """
-        headers = {"X-Api-Key": self.config.api_key}
+        path = f"api/v1.0/test-result/{result_id}/upload"
+        fields = {
+            "sessionId": provider_session_guid,
+            "assetType": AssetType(asset_type).value,
+            "assetName": asset_name,
+        }
+        if isinstance(file, (bytes, bytearray)):
+            if self.bandwidth is None:
+                self._request("upload", "POST", path, files={"file": (asset_name, file, "application/octet-stream")}, data=fields)
+                return
+            file = io.BytesIO(file)
+        body: Union[MultipartEncoder, MultipartStream]
+        if hasattr(file, "read"):
+            body = MultipartEncoder(fields, "file", asset_name, file)
+            data = self.bandwidth.pace(body) if self.bandwidth is not None else body
+        else:
+            chunks = iter_async_chunks(file, event_loop) if hasattr(file, "__aiter__") else file
+            body = MultipartStream(fields, "file", asset_name, chunks)
+            data = self.bandwidth.pace_chunks(body) if self.bandwidth is not None else body
         try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}api/v1.0/test-result/{result_id}/upload",
-                headers=headers,
-                files={"file": (asset_name, file, "application/octet-stream")},
-                data={
-                    "sessionId": provider_session_guid,
-                    "assetType": asset_type.value,
-                    "assetName": asset_name,
-                },
-            )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            raise ApplauseClientError(e.response) from e
+            self._request("upload", "POST", path, headers={"Content-Type": body.content_type}, data=data)
+        finally:
+            if data is not body:
+                data.close()
+            if isinstance(body, MultipartStream):
+                body.close()
+
+
+def _retry_after(response: requests.Response, default: float = 1.0) -> float:
+    """Get the number of seconds to wait from the Retry-After header of a response, if it is given in seconds."""
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return default
+
+
+def _body_size(body) -> int:
+    """Get the size of a prepared request body, or 0 if it is streamed without a known length or empty."""
+    return len(body) if isinstance(body, (bytes, str, MultipartEncoder, PacedBody)) else 0
@@ -0,0 +1,315 @@
+"""Pacing of asset uploads to a bandwidth cap that adapts to the latency of the other calls.
+
+On a shared uplink, unthrottled uploads from many device sessions saturate the link, delay heartbeats and result
+submissions, and slow down the apps under test. With ApplauseConfig.bandwidth set, the body of every upload is
+sent through token buckets counting bytes: a process wide bucket shared by every AutoApi of the process, or by
+every process on the machine when it has a shared_file, and a bucket of the client, so of the run, alone. Each
+chunk of the body waits for its bytes in both buckets before it is sent, so uploads are paced at the byte level
+instead of being let through whole.
+
+The caps adapt: when a heartbeat or a result submission of a client takes longer than the latency target, the rate
+the client sends at is halved, down to the minimum factor of the configured caps, and it grows back by a tenth of
+the caps with every call that is faster than the target. Each client adapts on its own: while its factor is
+lowered, its bytes cost more tokens of the process wide bucket, so a client whose calls are slow does not slow down
+the other clients sharing the bucket. The current caps are reported in the
+applause_upload_bandwidth_limit_bytes_per_second gauge, and the throughput achieved while uploads were being sent in
+the applause_upload_throughput_bytes_per_second gauge.
+
+Typical usage example:
+
+    config = ApplauseConfig(
+        api_key="api_key",
+        product_id=123,
+        bandwidth=BandwidthOptions(max_bytes_per_second=4_000_000, run_bytes_per_second=500_000, shared_file="/tmp/applause-uplink.bucket"),
+    )
+    auto_api = AutoApi(config)
+    ...Report the run...
+    print(auto_api.bandwidth.stats().bytes_per_second)
+"""
+
+import threading
+import time
+from .metrics import UPLOAD_BANDWIDTH_LIMIT, UPLOAD_BYTES, UPLOAD_THROUGHPUT, MetricsRegistry
+from .rate_limit import FileTokenBucket, TokenBucket
+from pydantic import BaseModel
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# The endpoints whose latency the caps adapt to
+ADAPTIVE_ENDPOINTS = ("sdk-heartbeat", "test-result")
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+class BandwidthOptions(BaseModel):
+    """The bandwidth caps of asset uploads.
+
+    Attributes
+    ----------
+        max_bytes_per_second (optional): The cap shared by the uploads of every client of the process, or of every
+            process using the shared file
+        run_bytes_per_second (optional): The cap of the uploads of a single client
+        burst_bytes: The number of bytes that can be sent at once after a quiet period
+        shared_file (optional): A file to keep the state of the shared cap in, to share it between processes
+        latency_target (optional): The heartbeat and result submission latency in seconds above which the caps are
+            lowered. The caps do not adapt when it is not set.
+        min_factor: The fraction of the configured caps that they are never lowered below
+
+    """
+
+    max_bytes_per_second: Optional[float] = None
+    run_bytes_per_second: Optional[float] = None
+    burst_bytes: float = 256 * 1024
+    shared_file: Optional[str] = None
+    latency_target: Optional[float] = 1.0
+    min_factor: float = 0.1
+
+
+class BandwidthStats(BaseModel):
+    """The uploads sent through a bandwidth limiter.
+
+    Attributes
+    ----------
+        uploads: The number of upload bodies sent
+        bytes: The number of bytes sent
+        seconds: The time spent sending upload bodies, counting concurrent uploads once
+        throttled_seconds: The time upload chunks spent waiting for the caps, summed over every upload
+        factor: The fraction of the configured caps currently applied
+
+    """
+
+    uploads: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    throttled_seconds: float = 0.0
+    factor: float = 1.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        """The throughput achieved while uploads were being sent."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+class _AdaptiveBucket:
+    """The pace of one limiter through a token bucket of bytes, cut when the latency of other calls rises, and grown back while it is low.
+
+    The rate of the bucket is left untouched, as it may be shared: the bytes cost more tokens while the factor is lowered.
+    """
+
+    def __init__(self, bucket: TokenBucket, min_factor: float):
+        self.bucket = bucket
+        self.min_factor = min_factor
+        self.factor = 1.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate * self.factor
+
+    def acquire(self, size: int) -> float:
+        return self.bucket.acquire(size / self.factor)
+
+    def adapt(self, slow: bool) -> float:
+        with self._lock:
+            self.factor = max(self.min_factor, self.factor / 2) if slow else min(1.0, self.factor + 0.1)
+            return self.rate
+
+
+# The process wide buckets, by their configuration, so that every client with the same options shares one
+_shared_buckets: Dict[Tuple[float, float, Optional[str]], TokenBucket] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_bucket(options: BandwidthOptions) -> TokenBucket:
+    key = (options.max_bytes_per_second, options.burst_bytes, options.shared_file)
+    with _shared_lock:
+        if key not in _shared_buckets:
+            if options.shared_file is not None:
+                _shared_buckets[key] = FileTokenBucket(options.shared_file, options.max_bytes_per_second, options.burst_bytes)
+            else:
+                _shared_buckets[key] = TokenBucket(options.max_bytes_per_second, options.burst_bytes)
+        return _shared_buckets[key]
+
+
+class PacedBody:
+    """An upload body whose chunks wait for the bandwidth caps before they are handed to the transport.
+
+    Attributes
+    ----------
+        limiter (BandwidthLimiter): The limiter the chunks wait for.
+
+    """
+
+    def __init__(self, body: BinaryIO, limiter: "BandwidthLimiter", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Initialize the PacedBody object.
+
+        Args:
+        ----
+            body (BinaryIO): The body to pace, with a known length, such as a MultipartEncoder
+            limiter (BandwidthLimiter): The limiter the chunks wait for
+            chunk_size (int, optional): The largest chunk handed to the transport at once. Defaults to 16 KiB.
+
+        """
+        self._body = body
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self._started = False
+        self._finished = False
+
+    def __len__(self) -> int:
+        """Get the size of the whole body in bytes."""
+        return len(self._body)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next bytes of the body, once the caps allow them to be sent.
+
+        Args:
+        ----
+            size (int, optional): The maximum number of bytes to read. Defaults to, and is capped at, the chunk size.
+
+        Returns:
+        -------
+            bytes: The bytes read, empty once the whole body has been read
+
+        """
+        if not self._started:
+            self._started = True
+            self.limiter._upload_started()
+        chunk = self._body.read(self.chunk_size if size < 0 else min(size, self.chunk_size))
+        if chunk:
+            self.limiter.acquire(len(chunk))
+        else:
+            self.close()
+        return chunk
+
+    def close(self):
+        """Stop counting the time of the upload, once it has been sent or has failed. The wrapped body is not closed."""
+        if self._started and not self._finished:
+            self._finished = True
+            self.limiter._upload_finished()
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over the rest of the body in paced chunks."""
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class BandwidthLimiter:
+    """The bandwidth caps of the uploads of a client.
+
+    Attributes
+    ----------
+        options (BandwidthOptions): The configured caps.
+        metrics (MetricsRegistry): The registry the bytes sent, the caps and the throughput are recorded into.
+
+    """
+
+    def __init__(self, options: BandwidthOptions, metrics: MetricsRegistry):
+        """Initialize the BandwidthLimiter object.
+
+        Args:
+        ----
+            options (BandwidthOptions): The configured caps.
+            metrics (MetricsRegistry): The registry to record into.
+
+        """
+        self.options = options
+        self.metrics = metrics
+        self._buckets: Dict[str, _AdaptiveBucket] = {}
+        if options.max_bytes_per_second is not None:
+            self._buckets["process"] = _AdaptiveBucket(_shared_bucket(options), options.min_factor)
+        if options.run_bytes_per_second is not None:
+            self._buckets["run"] = _AdaptiveBucket(TokenBucket(options.run_bytes_per_second, options.burst_bytes), options.min_factor)
+        self._lock = threading.Lock()
+        self._stats = BandwidthStats()
+        self._active = 0
+        self._active_since = 0.0
+        for scope, bucket in self._buckets.items():
+            self.metrics.set_gauge(UPLOAD_BANDWIDTH_LIMIT, bucket.rate, scope=scope)
+
+    def pace(self, body: BinaryIO) -> PacedBody:
+        """Wrap an upload body so that it is sent within the caps."""
+        return PacedBody(body, self)
+
+    def pace_chunks(self, chunks: Iterable[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Split an upload body of unknown length into chunks of at most the chunk size, each sent within the caps.
+
+        Args:
+        ----
+            chunks (Iterable[bytes]): The body
+            chunk_size (int, optional): The largest chunk handed to the transport at once. Defaults to 16 KiB.
+
+        Returns:
+        -------
+            Iterator[bytes]: The paced chunks
+
+        """
+        self._upload_started()
+        try:
+            for chunk in chunks:
+                for offset in range(0, len(chunk), chunk_size):
+                    piece = chunk[offset : offset + chunk_size]
+                    self.acquire(len(piece))
+                    yield piece
+        finally:
+            self._upload_finished()
+
+    def acquire(self, size: int) -> float:
+        """Wait until a chunk of a size can be sent within every cap.
+
+        Args:
+        ----
+            size (int): The size of the chunk in bytes
+
+        Returns:
+        -------
+            float: The time spent waiting, in seconds
+
+        """
+        waited = 0.0
+        for bucket in self._buckets.values():
+            waited += bucket.acquire(size)
+        self.metrics.inc(UPLOAD_BYTES, size)
+        with self._lock:
+            self._stats.bytes += size
+            self._stats.throttled_seconds += waited
+        return waited
+
+    def observe_latency(self, endpoint: str, seconds: float):
+        """Adapt the caps to the latency of a call, if the caps adapt to the latency of its endpoint.
+
+        Args:
+        ----
+            endpoint (str): The logical name of the endpoint of the call
+            seconds (float): The time the call took
+
+        """
+        if self.options.latency_target is None or endpoint not in ADAPTIVE_ENDPOINTS:
+            return
+        slow = seconds > self.options.latency_target
+        for scope, bucket in self._buckets.items():
+            self.metrics.set_gauge(UPLOAD_BANDWIDTH_LIMIT, bucket.adapt(slow), scope=scope)
+
+    def stats(self) -> BandwidthStats:
+        """Get the uploads sent through this limiter, and the fraction of the caps currently applied."""
+        with self._lock:
+            factors: List[float] = [bucket.factor for bucket in self._buckets.values()]
+            seconds = self._stats.seconds + (time.perf_counter() - self._active_since if self._active else 0.0)
+            return self._stats.model_copy(update={"seconds": seconds, "factor": min(factors, default=1.0)})
+
+    def _upload_started(self):
+        with self._lock:
+            if self._active == 0:
+                self._active_since = time.perf_counter()
+            self._active += 1
+            self._stats.uploads += 1
+
+    def _upload_finished(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._stats.seconds += time.perf_counter() - self._active_since
+            if self._stats.seconds > 0:
+                self.metrics.set_gauge(UPLOAD_THROUGHPUT, self._stats.bytes / self._stats.seconds)
@@ -0,0 +1,366 @@
+"""Offline result bundles, and their resumable upload.
+
+Machines with a slow or flaky network can write their results to a bundle directory instead of reporting them as
+the tests run, and hand the bundle to a well connected host to upload. A bundle holds a manifest.jsonl file, one
+BundleTestCase per line, and the asset files of the test cases, at paths relative to the bundle directory.
+BundleWriter appends test cases to the manifest as they finish, so a bundle is usable up to the last finished test
+case even if the test process crashes.
+
+upload_bundle reports the bundle to a new test run from a pool of worker threads, streaming the asset files from
+disk. Every step of the upload is appended to an upload-state.jsonl file in the bundle once it is done: the run,
+the result of each test case, each uploaded asset and each submitted result. Results are submitted synchronously,
+whatever ApplauseConfig.queue_submissions says, so that a step is only recorded once the server has it. If the
+upload is interrupted, running it again reattaches to the same run and only uploads what is missing, unless the
+Automation API no longer accepts the run: the bundle is then uploaded to a new run. The run is ended once every
+test case is uploaded, and left open for the next attempt otherwise.
+
+Typical usage example:
+
+    writer = BundleWriter("results")
+    writer.add(BundleTestCase(id="1", name="test_login", status=TestResultStatus.PASSED, assets=[BundleAsset(path="login.png", asset_type=AssetType.SCREENSHOT)]))
+
+    applause-upload-bundle results --api-key $APPLAUSE_API_KEY --product-id 123 --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from .auto_api import AutoApi
+from .config import ApplauseConfig
+from .dtos import AssetType, TestResultStatus
+from .errors import ApplauseClientError
+from .heartbeat import HeartbeatService
+from .reporter import RunInitializer, RunReporter
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+from typing import Callable, Dict, List, Optional, Set
+
+MANIFEST_FILE = "manifest.jsonl"
+STATE_FILE = "upload-state.jsonl"
+
+
+class BundleAsset(BaseModel):
+    """An asset file of a bundled test case.
+
+    Attributes
+    ----------
+        path: The path of the file, relative to the bundle directory
+        asset_type: The type of the asset
+        name (optional): The name of the asset. Defaults to the file name.
+        provider_session_guid: The provider session guid of the asset
+
+    """
+
+    path: str
+    asset_type: AssetType
+    name: Optional[str] = None
+    provider_session_guid: str = ""
+
+
+class BundleTestCase(BaseModel):
+    """A test case of a bundle.
+
+    Attributes
+    ----------
+        id: The id of the test case, unique within the bundle
+        name: The name of the test case
+        status: The status of the test case
+        failure_reason (optional): The reason for the failure
+        provider_session_guids: The provider session guids of the test case
+        assets: The asset files of the test case
+
+    """
+
+    id: str
+    name: str
+    status: TestResultStatus
+    failure_reason: Optional[str] = None
+    provider_session_guids: List[str] = []
+    assets: List[BundleAsset] = []
+
+
+class UploadProgress(BaseModel):
+    """The progress of a bundle upload.
+
+    Attributes
+    ----------
+        test_run_id: The id of the run the bundle is uploaded to
+        test_cases: The number of test cases in the bundle
+        uploaded: The number of test cases uploaded by this attempt
+        resumed: The number of test cases uploaded by previous attempts
+        assets: The number of asset files uploaded by this attempt
+        asset_bytes: The size of the asset files uploaded by this attempt
+        errors: The number of test cases that could not be uploaded
+        seconds: The time spent by this attempt
+        ended: Whether the run has been ended
+
+    """
+
+    test_run_id: int = 0
+    test_cases: int = 0
+    uploaded: int = 0
+    resumed: int = 0
+    assets: int = 0
+    asset_bytes: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    ended: bool = False
+
+    @property
+    def test_cases_per_second(self) -> float:
+        """The number of test cases uploaded per second by this attempt."""
+        return self.uploaded / self.seconds if self.seconds > 0 else 0.0
+
+
+class BundleWriter:
+    """Append test cases to the manifest of a bundle.
+
+    Attributes
+    ----------
+        directory (str): The bundle directory. It is created if needed.
+
+    """
+
+    def __init__(self, directory: str):
+        """Initialize the BundleWriter object.
+
+        Args:
+        ----
+            directory (str): The bundle directory. It is created if needed.
+
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def add(self, test_case: BundleTestCase):
+        """Append a finished test case to the manifest. Its asset files must already be in the bundle directory."""
+        line = test_case.model_dump_json(exclude_defaults=True) + "\n"
+        with self._lock, open(os.path.join(self.directory, MANIFEST_FILE), "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read_manifest(directory: str) -> List[BundleTestCase]:
+    """Read the test cases of a bundle, ignoring a last line cut short by a crash of the writer."""
+    test_cases = []
+    with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+        for line in f:
+            if line.endswith("\n") and line.strip():
+                test_cases.append(BundleTestCase.model_validate_json(line))
+    return test_cases
+
+
+class _UploadState:
+    """The steps of previous upload attempts, and the log that the steps of this attempt are appended to."""
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, STATE_FILE)
+        self.test_run_id: Optional[int] = None
+        self.ended = False
+        self.results: Dict[str, int] = {}
+        self.assets: Dict[str, Set[int]] = {}
+        self.submitted: Set[str] = set()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n") and line.strip():
+                        self._apply(json.loads(line))
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _apply(self, step: dict):
+        if "run" in step:
+            # The steps recorded before belong to a run that was replaced
+            self.test_run_id = step["run"]
+            self.results.clear()
+            self.assets.clear()
+            self.submitted.clear()
+        elif "ended" in step:
+            self.ended = True
+        elif "result" in step:
+            self.results[step["id"]] = step["result"]
+        elif "asset" in step:
+            self.assets.setdefault(step["id"], set()).add(step["asset"])
+        elif "submitted" in step:
+            self.submitted.add(step["id"])
+
+    def record(self, **step):
+        """Append a step to the log, flushed so that it survives a crash of the process."""
+        with self._lock:
+            self._apply(step)
+            self._file.write(json.dumps(step) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _upload(reporter: RunReporter, directory: str, test_case: BundleTestCase, state: _UploadState, progress: UploadProgress, lock: threading.Lock):
+    """Upload the missing steps of a test case."""
+    if test_case.id in state.results:
+        reporter.result_map[test_case.id] = state.results[test_case.id]
+    else:
+        result = reporter.start_test_case(test_case.id, test_case.name, provider_session_ids=test_case.provider_session_guids)
+        state.record(id=test_case.id, result=result.test_result_id)
+    for index, asset in enumerate(test_case.assets):
+        if index in state.assets.get(test_case.id, ()):
+            continue
+        path = os.path.join(directory, asset.path)
+        with open(path, "rb") as f:
+            future = reporter.attach_test_case_asset(test_case.id, asset.name or os.path.basename(asset.path), asset.provider_session_guid, asset.asset_type, f)
+            # An asset queued to a pipeline is only recorded once it has been uploaded
+            if future is not None:
+                future.result()
+        state.record(id=test_case.id, asset=index)
+        with lock:
+            progress.assets += 1
+            progress.asset_bytes += os.path.getsize(path)
+    reporter.submit_test_case_result(test_case.id, test_case.status, provider_session_guids=test_case.provider_session_guids, failure_reason=test_case.failure_reason)
+    state.record(id=test_case.id, submitted=True)
+
+
+def _resume_run(auto_api: AutoApi, test_run_id: int) -> Optional[RunReporter]:
+    """Reattach to the run of a previous attempt, or None if the Automation API no longer accepts heartbeats for it."""
+    try:
+        auto_api.send_sdk_heartbeat(test_run_id)
+    except ApplauseClientError as e:
+        print(f"Could not resume test run {test_run_id}, starting a new one: {e}")
+        return None
+    heartbeat_service = HeartbeatService(auto_api, test_run_id, metrics=auto_api.metrics)
+    heartbeat_service.start()
+    return RunReporter(test_run_id, auto_api, heartbeat_service)
+
+
+def upload_bundle(
+    directory: str,
+    config: ApplauseConfig,
+    workers: int = 4,
+    on_progress: Optional[Callable[[UploadProgress], None]] = None,
+    progress_interval: float = 1.0,
+) -> UploadProgress:
+    """Upload a bundle to a test run, resuming the previous attempt if there was one.
+
+    Args:
+    ----
+        directory (str): The bundle directory
+        config (ApplauseConfig): The configuration to report with
+        workers (int, optional): The number of test cases uploaded concurrently. Defaults to 4.
+        on_progress (Optional[Callable[[UploadProgress], None]], optional): Called with the progress of the upload at
+            most once per progress interval while test cases are uploaded.
+        progress_interval (float, optional): The minimum time between two progress calls in seconds. Defaults to 1.
+
+    Returns:
+    -------
+        UploadProgress: The outcome of this attempt
+
+    """
+    start = time.perf_counter()
+    test_cases = read_manifest(directory)
+    state = _UploadState(directory)
+    progress = UploadProgress(test_cases=len(test_cases), test_run_id=state.test_run_id or 0, ended=state.ended)
+    if state.ended:
+        state.close()
+        progress.resumed = len(test_cases)
+        return progress
+    # A queued result would be recorded as submitted before it was sent, and lost by a crash
+    auto_api = AutoApi(config.model_copy(update={"queue_submissions": False}))
+    reporter = _resume_run(auto_api, state.test_run_id) if state.test_run_id is not None else None
+    if reporter is None:
+        reporter = RunInitializer(auto_api).start_run([test_case.name for test_case in test_cases])
+        state.record(run=reporter.test_run_id)
+    progress.test_run_id = reporter.test_run_id
+    lock = threading.Lock()
+    last_report = [time.perf_counter()]
+
+    def report_progress():
+        with lock:
+            now = time.perf_counter()
+            if on_progress is None or now - last_report[0] < progress_interval:
+                return
+            last_report[0] = now
+            progress.seconds = now - start
+            snapshot = progress.model_copy()
+        on_progress(snapshot)
+
+    def upload(test_case: BundleTestCase):
+        try:
+            _upload(reporter, directory, test_case, state, progress, lock)
+            with lock:
+                progress.uploaded += 1
+        except Exception as e:
+            print(f"Could not upload test case {test_case.id}: {e}")
+            with lock:
+                progress.errors += 1
+        report_progress()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for test_case in test_cases:
+                if test_case.id in state.submitted:
+                    reporter.result_map[test_case.id] = state.results[test_case.id]
+                    progress.resumed += 1
+                else:
+                    executor.submit(upload, test_case)
+        if progress.errors == 0:
+            reporter.end_run()
+            state.record(ended=True)
+            progress.ended = True
+        else:
+            # Leave the run open, so that the next attempt can upload the missing test cases to it
+            reporter.hearbeat_service.stop()
+    finally:
+        state.close()
+        auto_api.close()
+        progress.seconds = time.perf_counter() - start
+    return progress
+
+
+def format_progress(progress: UploadProgress) -> str:
+    """Format the progress of an upload for the command line."""
+    done = progress.uploaded + progress.resumed
+    line = (
+        f"Test run {progress.test_run_id}: {done}/{progress.test_cases} test cases ({progress.resumed} from previous attempts), "
+        f"{progress.assets} assets ({progress.asset_bytes / 1024 / 1024:.1f} MiB), {progress.errors} errors, "
+        f"{progress.test_cases_per_second:.1f} test cases/s"
+    )
+    return line + (", run ended" if progress.ended else "")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Upload a bundle from the command line.
+
+    Args:
+    ----
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to the arguments of the process.
+
+    Returns:
+    -------
+        int: The exit code, 1 if any test case could not be uploaded
+
+    """
+    parser = argparse.ArgumentParser(description="Upload a bundle of results produced offline to an Applause test run, resuming a previous attempt.")
+    parser.add_argument("directory", help="the bundle directory, holding manifest.jsonl and the asset files")
+    parser.add_argument("--api-key", default=os.environ.get("APPLAUSE_API_KEY"), help="api key to report with, defaults to $APPLAUSE_API_KEY")
+    parser.add_argument("--product-id", type=int, required=True, help="product id to report to")
+    parser.add_argument("--test-cycle-id", type=int, help="applause test cycle id to associate the run with")
+    parser.add_argument("--base-url", help="base url of the Automation API")
+    parser.add_argument("--workers", type=int, default=4, help="number of test cases uploaded concurrently")
+    parser.add_argument("--progress-interval", type=float, default=1.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+    if args.api_key is None:
+        parser.error("an api key is required, pass --api-key or set APPLAUSE_API_KEY")
+
+    urls = {"auto_api_base_url": args.base_url} if args.base_url is not None else {}
+    config = ApplauseConfig(api_key=args.api_key, product_id=args.product_id, applause_test_cycle_id=args.test_cycle_id, **urls)
+    progress = upload_bundle(args.directory, config, workers=args.workers, on_progress=lambda p: print(format_progress(p), flush=True), progress_interval=args.progress_interval)
+    print(format_progress(progress))
+    if not progress.ended:
+        print("Some test cases could not be uploaded, run the upload again to resume it")
+    return 0 if progress.ended else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
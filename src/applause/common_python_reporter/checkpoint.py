@@ -0,0 +1,169 @@
+"""Checkpoints of the state of a run, so that a restarted test process can reattach to it.
+
+If a test process crashes in the middle of a run, the ids of the run and of its test results are lost with it, and
+a restarted process has to create a new run and report every test again. With ApplauseConfig.checkpoint_file set,
+the reporter appends every step that it would need to reattach to a RunCheckpoint file instead: the run, the result
+created for each test case and each result submitted, one compact JSON object per line, flushed as it is written so
+that it survives a crash of the process.
+
+When the next process starts a run with the same checkpoint file, the reporter reattaches to the run of the
+checkpoint rather than creating one, as long as the Automation API still accepts heartbeats for it. The results of
+the test cases that were started but not submitted are reused when they are started again, and the test cases that
+were already submitted are listed in RunReporter.reported_tests, for the test framework to skip. The file is removed
+once the run has ended.
+
+The file only grows with the results of the run, except when results are created or submitted again, for example
+by retries. Once the number of lines appended reaches the compaction threshold and is more than twice the number
+of steps still needed, the file is rewritten with only those, replacing the old file atomically.
+
+Typical usage example:
+
+    config = ApplauseConfig(api_key="api_key", product_id=123, checkpoint_file=".applause-run.jsonl")
+    reporter = ApplauseReporter(config)
+    reporter.runner_start(tests)  # reattaches to the run of the checkpoint, if there is one
+    remaining = [test for test in tests if test not in reporter.reporter.reported_tests]
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Set
+
+DEFAULT_COMPACT_THRESHOLD = 1000
+
+
+class RunCheckpoint:
+    """An append-only log of the run, the results created and the results submitted, that a run can be resumed from.
+
+    Attributes
+    ----------
+        path (str): The path of the checkpoint file.
+        product_id (int): The product of the run. A checkpoint of a run of another product is ignored.
+        compact_threshold (int): The number of lines appended after which the file is compacted, if it can be halved.
+        test_run_id (Optional[int]): The id of the run, if a run was started.
+        results (Dict[str, int]): The ids of the test results, by test case id.
+        submitted (Set[int]): The ids of the test results that were submitted.
+
+    """
+
+    def __init__(self, path: str, product_id: int, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        """Initialize the RunCheckpoint object, loading the checkpoint file if there is one.
+
+        A line that was only partly written when the previous process crashed is dropped, by compacting the file.
+
+        Args:
+        ----
+            path (str): The path of the checkpoint file
+            product_id (int): The product of the run
+            compact_threshold (int, optional): The number of lines appended after which the file is compacted, if
+                it can be halved. Defaults to 1000.
+
+        """
+        self.path = path
+        self.product_id = product_id
+        self.compact_threshold = compact_threshold
+        self.test_run_id: Optional[int] = None
+        self.results: Dict[str, int] = {}
+        self.submitted: Set[int] = set()
+        self._lock = threading.Lock()
+        self._lines = 0
+        torn = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        torn = True
+                    elif line.strip():
+                        self._apply(json.loads(line))
+                        self._lines += 1
+        self._file = open(path, "a", encoding="utf-8")
+        if torn:
+            self.compact()
+
+    @property
+    def reported_tests(self) -> List[str]:
+        """The ids of the test cases whose results were submitted."""
+        with self._lock:
+            return [id for id, result_id in self.results.items() if result_id in self.submitted]
+
+    def start_run(self, test_run_id: int):
+        """Record the start of a new run, replacing the steps of the previous one."""
+        with self._lock:
+            self._reset()
+            self.test_run_id = test_run_id
+            self._rewrite()
+
+    def record_result(self, id: str, result_id: int):
+        """Record the result created for a test case."""
+        self._append({"id": id, "result": result_id})
+
+    def record_submitted(self, result_id: int):
+        """Record the submission of a result."""
+        self._append({"submitted": result_id})
+
+    def compact(self):
+        """Rewrite the file with only the steps still needed to resume the run."""
+        with self._lock:
+            self._rewrite()
+
+    def remove(self):
+        """Remove the checkpoint file, once the run has ended and can no longer be resumed."""
+        with self._lock:
+            self._file.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._reset()
+
+    def close(self):
+        """Close the checkpoint file, keeping it for the next process."""
+        with self._lock:
+            self._file.close()
+
+    def _apply(self, step: dict):
+        if "run" in step:
+            # Only the steps of the latest run of the product are kept
+            self._reset()
+            if step.get("product_id") == self.product_id:
+                self.test_run_id = step["run"]
+        elif self.test_run_id is None:
+            return
+        elif "result" in step:
+            self.results[step["id"]] = step["result"]
+        elif "submitted" in step:
+            self.submitted.add(step["submitted"])
+
+    def _reset(self):
+        self.test_run_id = None
+        self.results = {}
+        self.submitted = set()
+
+    def _steps(self) -> List[dict]:
+        steps: List[dict] = [{"run": self.test_run_id, "product_id": self.product_id}] if self.test_run_id is not None else []
+        steps.extend({"id": id, "result": result_id} for id, result_id in self.results.items())
+        steps.extend({"submitted": result_id} for result_id in sorted(self.submitted))
+        return steps
+
+    def _append(self, step: dict):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._apply(step)
+            self._file.write(json.dumps(step, separators=(",", ":")) + "\n")
+            self._file.flush()
+            self._lines += 1
+            if self._lines >= self.compact_threshold and self._lines > 2 * (1 + len(self.results) + len(self.submitted)):
+                self._rewrite()
+
+    def _rewrite(self):
+        """Replace the file with the steps still needed, through a temporary file, so that a crash keeps either of them."""
+        steps = self._steps()
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            for step in steps:
+                f.write(json.dumps(step, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lines = len(steps)
@@ -0,0 +1,146 @@
+"""Gzip compression of the JSON request bodies of the Automation API calls.
+
+Some request bodies grow with the size of the run: the test names of a run created with tens of thousands of tests,
+the result ids of the provider-info lookup when the run ends, or long failure reasons. Over slow links they take
+seconds to send. With ApplauseConfig.compression set, AutoApi encodes JSON bodies itself, and sends the bodies of at
+least the minimum size with Content-Encoding: gzip.
+
+Support for compressed request bodies is negotiated per endpoint: a server that does not accept them for an endpoint
+responds with 415 Unsupported Media Type, and the request is sent again uncompressed. Later requests to that
+endpoint are then sent uncompressed for the lifetime of the client. The size of the compressed bodies before and
+after compression is recorded in the applause_request_body_raw_bytes_total and
+applause_request_body_compressed_bytes_total counters, by endpoint.
+
+Typical usage example:
+
+    config = ApplauseConfig(api_key="api_key", product_id=123, compression=CompressionOptions(min_size=4096))
+    auto_api = AutoApi(config)
+    ...Report the run...
+    print(auto_api.compressor.stats().ratio)
+"""
+
+import gzip
+import threading
+from .json_codec import JsonCodec, StdlibJsonCodec
+from .metrics import REQUEST_BODY_COMPRESSED_BYTES, REQUEST_BODY_RAW_BYTES, MetricsRegistry
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+DEFAULT_MIN_SIZE = 8 * 1024
+
+
+class CompressionOptions(BaseModel):
+    """The compression of request bodies.
+
+    Attributes
+    ----------
+        min_size: The size in bytes of the smallest JSON body that is compressed
+        level: The gzip compression level, from 1 (fastest) to 9 (smallest)
+        endpoints (optional): The names of the endpoints whose bodies may be compressed. Defaults to every endpoint.
+
+    """
+
+    min_size: int = DEFAULT_MIN_SIZE
+    level: int = 6
+    endpoints: Optional[List[str]] = None
+
+
+class CompressionStats(BaseModel):
+    """The request bodies compressed by a client.
+
+    Attributes
+    ----------
+        compressed: The number of request bodies sent compressed
+        raw_bytes: The size of those bodies before compression
+        compressed_bytes: The size of those bodies after compression
+        rejected: The endpoints that did not accept compressed bodies
+
+    """
+
+    compressed: int = 0
+    raw_bytes: int = 0
+    compressed_bytes: int = 0
+    rejected: List[str] = []
+
+    @property
+    def ratio(self) -> float:
+        """The size of the compressed bodies relative to their raw size."""
+        return self.compressed_bytes / self.raw_bytes if self.raw_bytes > 0 else 1.0
+
+
+class RequestCompressor:
+    """Encode the JSON bodies of requests, compressing the large ones for the endpoints that accept it.
+
+    Attributes
+    ----------
+        options (CompressionOptions): The compression options.
+        metrics (MetricsRegistry): The registry that the size of the compressed bodies is recorded into.
+        codec (JsonCodec): The codec the JSON bodies are encoded with.
+
+    """
+
+    def __init__(self, options: CompressionOptions, metrics: MetricsRegistry, codec: Optional[JsonCodec] = None):
+        """Initialize the RequestCompressor object.
+
+        Args:
+        ----
+            options (CompressionOptions): The compression options.
+            metrics (MetricsRegistry): The registry to record into.
+            codec (Optional[JsonCodec], optional): The codec to encode the JSON bodies with. Defaults to the json
+                module used by requests.
+
+        """
+        self.options = options
+        self.metrics = metrics
+        self.codec = codec if codec is not None else StdlibJsonCodec()
+        self._lock = threading.Lock()
+        self._rejected: Set[str] = set()
+        self._stats = CompressionStats()
+
+    def encode(self, endpoint: str, headers: Dict[str, str], kwargs: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, Any], bool]:
+        """Encode the JSON body of a request with the codec, compressing it if it is large enough.
+
+        Args:
+        ----
+            endpoint (str): The logical name of the endpoint
+            headers (Dict[str, str]): The headers of the request
+            kwargs (Dict[str, Any]): The arguments of the request, with the body as json if it is a JSON body
+
+        Returns:
+        -------
+            Tuple[Dict[str, str], Dict[str, Any], bool]: The headers and arguments to send the request with, and
+                whether the body was compressed. Requests without a JSON body are returned as they are.
+
+        """
+        if kwargs.get("json") is None:
+            return headers, kwargs, False
+        kwargs = dict(kwargs)
+        body = self.codec.dumps(kwargs.pop("json"))
+        headers = {**headers, "Content-Type": "application/json"}
+        if len(body) < self.options.min_size or not self.accepts(endpoint):
+            return headers, {**kwargs, "data": body}, False
+        compressed = gzip.compress(body, compresslevel=self.options.level)
+        with self._lock:
+            self._stats.compressed += 1
+            self._stats.raw_bytes += len(body)
+            self._stats.compressed_bytes += len(compressed)
+        self.metrics.inc(REQUEST_BODY_RAW_BYTES, len(body), endpoint=endpoint)
+        self.metrics.inc(REQUEST_BODY_COMPRESSED_BYTES, len(compressed), endpoint=endpoint)
+        return {**headers, "Content-Encoding": "gzip"}, {**kwargs, "data": compressed}, True
+
+    def accepts(self, endpoint: str) -> bool:
+        """Check whether bodies may be sent compressed to an endpoint."""
+        if self.options.endpoints is not None and endpoint not in self.options.endpoints:
+            return False
+        with self._lock:
+            return endpoint not in self._rejected
+
+    def reject(self, endpoint: str):
+        """Send the bodies of an endpoint uncompressed from now on, after it did not accept a compressed body."""
+        with self._lock:
+            self._rejected.add(endpoint)
+
+    def stats(self) -> CompressionStats:
+        """Get the request bodies compressed so far."""
+        with self._lock:
+            return self._stats.model_copy(update={"rejected": sorted(self._rejected)})
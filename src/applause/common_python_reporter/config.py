@@ -18,8 +18,14 @@ public_api = PublicApi(config)
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
+from .bandwidth import BandwidthOptions
+from .compression import CompressionOptions
 from .dtos import TestRailOptions
+from .json_codec import JsonCodecType
+from .rate_limit import RateLimitOptions
+from .scheduler import SchedulerOptions
+from .transport import TransportType
 
 
 class ApplauseConfig(BaseModel):
@@ -33,6 +39,40 @@ class ApplauseConfig(BaseModel):
         product_id: The id of the product
         test_rail_options: The test rail options
         applause_test_cycle_id: The id of the test cycle
+        metrics_file: A path to write a JSON snapshot of the client metrics to when the run ends
+        trace_file: A path to append the spans of traced reporter operations to, one JSON object per line
+        record_file: A path to record the Automation API requests and responses to, for replaying them later
+        replay_file: A path to a recording to serve the Automation API responses from, instead of the network
+        replay_latency_scale: The factor the recorded latencies are multiplied by when replaying, 0 to respond immediately
+        transport: The HTTP transport used by the clients: requests, urllib3 or http2
+        field_budgets: The maximum UTF-8 size in bytes of the failure_reason and test_case_name fields sent by the reporter.
+            Longer values are truncated, keeping their head and tail. Fields are not truncated when they have no budget.
+        divert_truncated_fields: Whether to upload the full text of a truncated failure reason as a FRAMEWORK_LOG asset
+        rate_limits: Token buckets limiting the Automation API calls, by endpoint class (runs, results, assets,
+            heartbeat or email) or endpoint name
+        queue_submissions: Whether the reporter submits test results from background threads, sending only the latest
+            update of a result that is submitted again before its previous update was sent
+        submission_workers: The number of test results submitted concurrently when queue_submissions is set
+        end_run_on_exit: Whether the reporter ends a run that is still open when the interpreter exits
+        exit_signals: The names of the signals, such as SIGTERM, on which the reporter cancels the open run before the
+            previous handler of the signal runs
+        shutdown_timeout: The time in seconds that pending reporter work is given when the run is ended on exit or on a signal
+        scheduler (optional): The slots of the priority scheduler the Automation API calls wait for, scheduling run lifecycle
+            calls and heartbeats first, then results, then asset uploads. Calls are not scheduled when it is not set.
+        asset_workers: The number of assets processed and uploaded concurrently by the asset pipeline of the reporter
+        bandwidth (optional): The bandwidth caps that asset uploads are paced to, process wide and per client, lowered
+            while heartbeats and result submissions are slow. Uploads are not paced when it is not set.
+        log_stream_buffer_size: The number of bytes a log stream buffers at most, overwriting the oldest ones beyond it
+        log_stream_flush_size: The number of bytes buffered by a log stream that triggers the upload of a part
+        log_stream_flush_interval: The time in seconds after which the bytes buffered by a log stream are uploaded
+        warm_up: Whether the reporter resolves the Automation API host, opens pooled connections to it and builds the DTO
+            serializers in the background as soon as it is built, caching DNS results for the lifetime of the process
+        checkpoint_file (optional): A path to checkpoint the ids of the run and of its results to, so that a restarted
+            process reattaches to the run instead of starting a new one. The file is removed once the run has ended.
+        compression (optional): The compression of the JSON request bodies of the Automation API calls, sent with gzip
+            above a minimum size to the endpoints that accept it. Bodies are not compressed when it is not set.
+        json_codec: The JSON codec of the Automation API requests and responses, of the Public API results and of the
+            provider session links file: stdlib, orjson, ujson, or auto for the fastest one installed
 
     """
 
@@ -42,3 +82,27 @@ class ApplauseConfig(BaseModel):
     product_id: int
     test_rail_options: Optional[TestRailOptions] = None
     applause_test_cycle_id: Optional[int] = None
+    metrics_file: Optional[str] = None
+    trace_file: Optional[str] = None
+    record_file: Optional[str] = None
+    replay_file: Optional[str] = None
+    replay_latency_scale: float = 1.0
+    transport: TransportType = TransportType.REQUESTS
+    field_budgets: Dict[str, int] = {}
+    divert_truncated_fields: bool = False
+    rate_limits: Dict[str, RateLimitOptions] = {}
+    queue_submissions: bool = False
+    submission_workers: int = 1
+    end_run_on_exit: bool = True
+    exit_signals: List[str] = []
+    shutdown_timeout: float = 10.0
+    scheduler: Optional[SchedulerOptions] = None
+    asset_workers: int = 2
+    bandwidth: Optional[BandwidthOptions] = None
+    log_stream_buffer_size: int = 8 * 1024 * 1024
+    log_stream_flush_size: int = 1024 * 1024
+    log_stream_flush_interval: float = 5.0
+    warm_up: bool = False
+    checkpoint_file: Optional[str] = None
+    compression: Optional[CompressionOptions] = None
+    json_codec: JsonCodecType = JsonCodecType.STDLIB
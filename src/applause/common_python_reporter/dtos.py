@@ -103,6 +103,19 @@ class TestResultStatus(str, Enum):
     ERROR = "ERROR"
 
 
+class TestRunEndingStatus(str, Enum):
+    """Enumeration of the statuses a test run can be ended with.
+
+    Values:
+        COMPLETE: Every test of the run has been reported
+        CANCELED: The run was interrupted before every test was reported
+    """
+
+    __test__ = False
+    COMPLETE = "COMPLETE"
+    CANCELED = "CANCELED"
+
+
 class TestResultProviderInfo(BaseModel):
     """Domain model for the provider information of a test result.
 
@@ -7,11 +7,43 @@ email_helper = EmailHelper(auto_api)
 inbox = email_helper.get_inbox("test")
 email = inbox.getEmail()
 # Perform assertions on the email content
+
+# Or wait for a matching email to arrive instead of sleeping in the test
+email = inbox.wait_for_email(timeout=30, predicate=lambda message: message["subject"] == "Welcome")
+
+# Many inboxes can be watched at once on the same pooled AutoApi client
+with InboxWatcher() as watcher:
+    futures = [watcher.watch(inbox, timeout=60) for inbox in inboxes]
+    emails = [future.result() for future in futures]
+
+# Addresses can be generated ahead of time so get_inbox does not wait on the API
+pool = InboxPool(auto_api, target_size=20)
+pool.prefill(["signup"])
+email_helper = EmailHelper(auto_api, pool=pool)
+inbox = email_helper.get_inbox("signup")
+print(pool.stats())
 """
 
+import heapq
+import itertools
+import threading
+import time
 from .auto_api import AutoApi
 from .dtos import EmailFetchRequest
+from .email_stream import StreamedEmail
+from .errors import ApplauseClientError
+from .metrics import RETRIES
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from email.message import Message
+from pydantic import BaseModel
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+EmailPredicate = Callable[[Message], bool]
+
+DEFAULT_INITIAL_POLL_INTERVAL = 0.25
+DEFAULT_MAX_POLL_INTERVAL = 5.0
+DEFAULT_POLL_BACKOFF = 2.0
 
 
 class Inbox:
@@ -46,6 +78,377 @@ class Inbox:
         """
         return self.auto_api.get_email_content(EmailFetchRequest(email_address=self.email_address))
 
+    def stream_email(self) -> StreamedEmail:
+        """Fetch the latest email from the Inbox, parsing it incrementally as it is downloaded.
+
+        Returns
+        -------
+            StreamedEmail: The email, which should be closed once it is no longer needed.
+
+        """
+        return self.auto_api.stream_email_content(EmailFetchRequest(email_address=self.email_address))
+
+    def poll_email(self, predicate: Optional[EmailPredicate] = None) -> Optional[Message]:
+        """Fetch the latest email from the Inbox, if one matching the predicate is available.
+
+        Args:
+        ----
+            predicate (Optional[EmailPredicate], optional): A filter the email must satisfy. Defaults to None.
+
+        Returns:
+        -------
+            Optional[Message]: The email message, or None if no matching email has arrived yet.
+
+        Raises:
+        ------
+            ApplauseClientError: If the Automation API responded with an error other than 404 Not Found.
+
+        """
+        try:
+            message = self.getEmail()
+        except ApplauseClientError as e:
+            if e.status_code != 404:
+                raise
+            # The inbox is still empty
+            self.auto_api.metrics.inc(RETRIES, operation="email_poll")
+            return None
+        if message is None or (predicate is not None and not predicate(message)):
+            return None
+        return message
+
+    def wait_for_email(
+        self,
+        timeout: float = 30,
+        predicate: Optional[EmailPredicate] = None,
+        initial_interval: float = DEFAULT_INITIAL_POLL_INTERVAL,
+        max_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+        backoff: float = DEFAULT_POLL_BACKOFF,
+    ) -> Message:
+        """Wait for an email matching the predicate to arrive in the Inbox.
+
+        The inbox is polled quickly at first, and the interval between polls grows exponentially
+        up to max_interval, so that fast emails are picked up with little latency while slow ones
+        do not generate a flood of requests.
+
+        Args:
+        ----
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to 30.
+            predicate (Optional[EmailPredicate], optional): A filter the email must satisfy. Defaults to None.
+            initial_interval (float, optional): The delay before the second poll.
+            max_interval (float, optional): The upper bound for the delay between polls.
+            backoff (float, optional): The factor the delay grows by after each empty poll.
+
+        Returns:
+        -------
+            Message: The email message content.
+
+        Raises:
+        ------
+            TimeoutError: If no matching email arrived within the timeout
+            ApplauseClientError: If the Automation API responded with an error other than 404 Not Found
+
+        """
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        while True:
+            message = self.poll_email(predicate)
+            if message is not None:
+                return message
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"No matching email received by {self.email_address} within {timeout} seconds")
+            time.sleep(min(interval, remaining))
+            interval = min(interval * backoff, max_interval)
+
+
+class _InboxWatch:
+    """The polling state of a single inbox registered with an InboxWatcher."""
+
+    __slots__ = ("inbox", "predicate", "deadline", "interval", "future")
+
+    def __init__(self, inbox: Inbox, predicate: Optional[EmailPredicate], deadline: float, interval: float):
+        self.inbox = inbox
+        self.predicate = predicate
+        self.deadline = deadline
+        self.interval = interval
+        self.future: Future = Future()
+
+
+class InboxWatcher:
+    """Poll many inboxes concurrently and resolve a future per inbox once its email arrives.
+
+    A single scheduler thread keeps track of when each inbox is next due to be polled, and the polls
+    themselves run on a bounded thread pool. Every poll goes through the AutoApi of the inbox, so watching
+    inboxes created from the same AutoApi shares its pooled HTTP connections.
+
+    Attributes
+    ----------
+        max_workers (int): The maximum number of inboxes polled at the same time.
+        initial_interval (float): The delay before the second poll of an inbox.
+        max_interval (float): The upper bound for the delay between polls of an inbox.
+        backoff (float): The factor the delay grows by after each empty poll.
+
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        initial_interval: float = DEFAULT_INITIAL_POLL_INTERVAL,
+        max_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+        backoff: float = DEFAULT_POLL_BACKOFF,
+    ):
+        """Initialize the InboxWatcher object.
+
+        Args:
+        ----
+            max_workers (int, optional): The maximum number of inboxes polled at the same time. Defaults to 8.
+            initial_interval (float, optional): The delay before the second poll of an inbox.
+            max_interval (float, optional): The upper bound for the delay between polls of an inbox.
+            backoff (float, optional): The factor the delay grows by after each empty poll.
+
+        """
+        self.max_workers = max_workers
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="applause-inbox-watcher")
+        self._condition = threading.Condition()
+        self._schedule: List[Tuple[float, int, _InboxWatch]] = []
+        self._counter = itertools.count()
+        self._closed = False
+        self._scheduler = threading.Thread(target=self._run, name="applause-inbox-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def watch(self, inbox: Inbox, timeout: float = 30, predicate: Optional[EmailPredicate] = None) -> "Future[Message]":
+        """Start watching an inbox for an email matching the predicate.
+
+        Args:
+        ----
+            inbox (Inbox): The inbox to watch.
+            timeout (float, optional): The maximum number of seconds to wait. Defaults to 30.
+            predicate (Optional[EmailPredicate], optional): A filter the email must satisfy. Defaults to None.
+
+        Returns:
+        -------
+            Future[Message]: A future resolved with the email, or failed with a TimeoutError.
+
+        Raises:
+        ------
+            RuntimeError: If the watcher has been closed
+
+        """
+        watch = _InboxWatch(inbox, predicate, time.monotonic() + timeout, self.initial_interval)
+        self._enqueue(watch, time.monotonic())
+        return watch.future
+
+    def close(self):
+        """Stop the watcher. Pending watches are cancelled."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            pending = [watch for _, _, watch in self._schedule]
+            self._schedule.clear()
+            self._condition.notify_all()
+        for watch in pending:
+            watch.future.cancel()
+        self._scheduler.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "InboxWatcher":
+        """Enter the context manager."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the watcher when leaving the context manager."""
+        self.close()
+
+    def _enqueue(self, watch: _InboxWatch, due: float):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Inbox watcher - Already closed")
+            heapq.heappush(self._schedule, (due, next(self._counter), watch))
+            self._condition.notify()
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if not self._schedule:
+                    self._condition.wait()
+                    continue
+                due = self._schedule[0][0]
+                now = time.monotonic()
+                if due > now:
+                    self._condition.wait(due - now)
+                    continue
+                _, _, watch = heapq.heappop(self._schedule)
+                self._executor.submit(self._poll, watch)
+
+    def _poll(self, watch: _InboxWatch):
+        if watch.future.done():
+            return
+        try:
+            message = watch.inbox.poll_email(watch.predicate)
+        except Exception as e:
+            watch.future.set_exception(e)
+            return
+        if message is not None:
+            watch.future.set_result(message)
+            return
+        now = time.monotonic()
+        if now >= watch.deadline:
+            watch.future.set_exception(TimeoutError(f"No matching email received by {watch.inbox.email_address}"))
+            return
+        due = now + min(watch.interval, watch.deadline - now)
+        watch.interval = min(watch.interval * self.backoff, self.max_interval)
+        try:
+            self._enqueue(watch, due)
+        except RuntimeError:
+            watch.future.cancel()
+
+
+class InboxPoolStats(BaseModel):
+    """Counters describing how well an InboxPool is sized.
+
+    Attributes
+    ----------
+        hits: The number of inboxes handed out straight from the pool
+        misses: The number of inboxes that had to be generated on demand
+        generated: The number of addresses generated in the background
+        failures: The number of background address generations that failed
+        available: The number of addresses currently waiting in the pool, per prefix
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+    generated: int = 0
+    failures: int = 0
+    available: Dict[str, int] = {}
+
+
+class InboxPool:
+    """A pool of pre-generated inbox addresses, kept topped up in the background.
+
+    Each prefix has its own pool. When the number of ready addresses for a prefix drops below the low
+    watermark, enough addresses to reach the target size are requested in parallel on a worker pool.
+    Addresses are never handed out twice.
+
+    Attributes
+    ----------
+        auto_api (AutoApi): An instance of the AutoApi class.
+        target_size (int): The number of addresses to keep ready for each prefix.
+        low_watermark (int): The pool size below which a refill is started.
+
+    """
+
+    def __init__(self, auto_api: AutoApi, target_size: int = 10, low_watermark: Optional[int] = None, max_workers: int = 4):
+        """Initialize the InboxPool object.
+
+        Args:
+        ----
+            auto_api (AutoApi): An instance of the AutoApi class.
+            target_size (int, optional): The number of addresses to keep ready for each prefix. Defaults to 10.
+            low_watermark (Optional[int], optional): The pool size below which a refill is started. Defaults to half the target size.
+            max_workers (int, optional): The maximum number of addresses generated at the same time. Defaults to 4.
+
+        Raises:
+        ------
+            ValueError: If the low watermark is above the target size
+
+        """
+        self.auto_api = auto_api
+        self.target_size = target_size
+        self.low_watermark = low_watermark if low_watermark is not None else target_size // 2
+        if self.low_watermark > target_size:
+            raise ValueError(f"The low watermark {self.low_watermark} is above the target size {target_size}")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="applause-inbox-pool")
+        self._lock = threading.Lock()
+        self._ready: Dict[str, Deque[str]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._stats = InboxPoolStats()
+        self._closed = False
+
+    def prefill(self, prefixes: Iterable[str]):
+        """Start generating addresses for the provided prefixes before they are first needed.
+
+        Args:
+        ----
+            prefixes (Iterable[str]): The email prefixes to generate addresses for.
+
+        """
+        for prefix in prefixes:
+            self._refill(prefix)
+
+    def acquire(self, prefix: str) -> Inbox:
+        """Take an inbox for the provided prefix out of the pool.
+
+        If the pool for the prefix is empty, the address is generated on demand instead.
+
+        Args:
+        ----
+            prefix (str): A prefix to be used when generating the email address of the inbox.
+
+        Returns:
+        -------
+            Inbox: An inbox that has not been handed out before.
+
+        """
+        with self._lock:
+            ready = self._ready.setdefault(prefix, deque())
+            address = ready.popleft() if ready else None
+            if address is not None:
+                self._stats.hits += 1
+            else:
+                self._stats.misses += 1
+        self._refill(prefix)
+        if address is None:
+            address = self.auto_api.get_email_address(prefix).email_address
+        return Inbox(email_address=address, auto_api=self.auto_api)
+
+    def stats(self) -> InboxPoolStats:
+        """Get a snapshot of the pool counters.
+
+        Returns
+        -------
+            InboxPoolStats: The current counters of the pool.
+
+        """
+        with self._lock:
+            return self._stats.model_copy(update={"available": {prefix: len(ready) for prefix, ready in self._ready.items()}})
+
+    def close(self):
+        """Stop generating addresses. Addresses still in the pool are discarded."""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+
+    def _refill(self, prefix: str):
+        with self._lock:
+            if self._closed:
+                return
+            pending = len(self._ready.setdefault(prefix, deque())) + self._in_flight.get(prefix, 0)
+            if pending >= max(self.low_watermark, 1):
+                return
+            missing = self.target_size - pending
+            self._in_flight[prefix] = self._in_flight.get(prefix, 0) + missing
+            # Submitted under the lock, so that close cannot shut the executor down in between
+            for _ in range(missing):
+                self._executor.submit(self._generate, prefix)
+
+    def _generate(self, prefix: str):
+        try:
+            address = self.auto_api.get_email_address(prefix).email_address
+        except Exception:
+            with self._lock:
+                self._in_flight[prefix] -= 1
+                self._stats.failures += 1
+            return
+        with self._lock:
+            self._in_flight[prefix] -= 1
+            self._ready[prefix].append(address)
+            self._stats.generated += 1
+
 
 class EmailHelper:
     """A helper class for generating email inboxes for testing purposes.
@@ -53,18 +456,21 @@ class EmailHelper:
     Attributes
     ----------
         auto_api (AutoApi): An instance of the AutoApi class.
+        pool (Optional[InboxPool]): A pool of pre-generated inboxes to hand out from.
 
     """
 
-    def __init__(self, auto_api: AutoApi):
+    def __init__(self, auto_api: AutoApi, pool: Optional[InboxPool] = None):
         """Initialize the EmailHelper object.
 
         Args:
         ----
             auto_api (AutoApi): An instance of the AutoApi class.
+            pool (Optional[InboxPool], optional): A pool of pre-generated inboxes to hand out from. Defaults to None.
 
         """
         self.auto_api = auto_api
+        self.pool = pool
 
     def get_inbox(self, prefix: str) -> Inbox:
         """Generate an inbox with the provided email prefix.
@@ -74,5 +480,7 @@ class EmailHelper:
             prefix (str): A prefix to be used when generating the email address of the inbox.
 
         """
+        if self.pool is not None:
+            return self.pool.acquire(prefix)
         res = self.auto_api.get_email_address(prefix)
         return Inbox(email_address=res.email_address, auto_api=self.auto_api)
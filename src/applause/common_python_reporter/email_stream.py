@@ -0,0 +1,353 @@
+"""Incremental parsing of emails fetched from the Applause Automation API.
+
+The standard library email parser needs the complete message in memory before any of it can be inspected.
+This module parses a message while it is being downloaded instead: the top level headers are available as
+soon as the header block has arrived, and each MIME part is decoded on its own into a spooled temporary file,
+so large attachments are written to disk rather than held in memory. Parts that are not needed can be skipped
+without being stored at all.
+
+Typical usage example:
+
+    with auto_api.stream_email_content(EmailFetchRequest(email_address="test@example.com")) as email:
+        assert email.headers["subject"] == "Your invoice"
+        for part in email.iter_parts():
+            if part.is_attachment:
+                assert part.filename == "invoice.pdf"
+"""
+
+import binascii
+import re
+from email.message import Message
+from email.parser import BytesHeaderParser
+from tempfile import SpooledTemporaryFile
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+MAX_LINE_LENGTH = 64 * 1024
+
+PartFilter = Callable[[Message], bool]
+
+_HEADER_LINE = re.compile(rb"^[^\s:]+:|^[ \t]")
+
+
+class _LineReader:
+    """Splits a stream of byte chunks into lines, keeping the line endings."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._eof = False
+        self.at_line_start = True
+
+    def readline(self) -> bytes:
+        """Read the next line, or a fragment of at most MAX_LINE_LENGTH bytes of an overly long line."""
+        while True:
+            index = self._buffer.find(b"\n", 0, MAX_LINE_LENGTH)
+            if index >= 0:
+                line = bytes(self._buffer[: index + 1])
+                del self._buffer[: index + 1]
+                break
+            if len(self._buffer) >= MAX_LINE_LENGTH or self._eof:
+                line = bytes(self._buffer[:MAX_LINE_LENGTH])
+                del self._buffer[:MAX_LINE_LENGTH]
+                break
+            self._fill()
+        self.at_line_start = line.endswith(b"\n")
+        return line
+
+    def readblock(self) -> bytes:
+        """Read as many complete lines as are buffered, stopping before any line that could be a boundary delimiter.
+
+        A block that starts with "--" is always a single line, so only those need to be checked for delimiters.
+        """
+        while self.at_line_start:
+            if len(self._buffer) < 2 and not self._eof:
+                self._fill()
+                continue
+            if self._buffer.startswith(b"--"):
+                break
+            index = self._buffer.find(b"\n--")
+            if index < 0:
+                index = self._buffer.rfind(b"\n")
+            if index >= 0:
+                block = bytes(self._buffer[: index + 1])
+                del self._buffer[: index + 1]
+                return block
+            if self._eof or len(self._buffer) >= MAX_LINE_LENGTH:
+                break
+            self._fill()
+        return self.readline()
+
+    def _fill(self):
+        try:
+            self._buffer += next(self._chunks)
+        except StopIteration:
+            self._eof = True
+
+    def unread(self, line: bytes):
+        """Push a complete line back so that it is returned by the next readline."""
+        self._buffer[:0] = line
+        self.at_line_start = True
+
+
+class _Base64Decoder:
+    def __init__(self):
+        self._pending = b""
+
+    def write(self, data: bytes) -> bytes:
+        data = self._pending + b"".join(data.split())
+        usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        return binascii.a2b_base64(data[:usable]) if usable else b""
+
+    def flush(self) -> bytes:
+        return binascii.a2b_base64(self._pending) if self._pending else b""
+
+
+class _QuotedPrintableDecoder:
+    def write(self, data: bytes) -> bytes:
+        return binascii.a2b_qp(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _IdentityDecoder:
+    def write(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _decoder_for(transfer_encoding: str):
+    transfer_encoding = transfer_encoding.strip().lower()
+    if transfer_encoding == "base64":
+        return _Base64Decoder()
+    if transfer_encoding == "quoted-printable":
+        return _QuotedPrintableDecoder()
+    return _IdentityDecoder()
+
+
+class EmailPart:
+    """A single, decoded, non-multipart part of a streamed email.
+
+    Attributes
+    ----------
+        headers (Message): The headers of the part.
+        size (int): The size of the decoded content in bytes, or 0 if the part was skipped.
+
+    """
+
+    def __init__(self, headers: Message, content: Optional[SpooledTemporaryFile], size: int):
+        """Initialize the EmailPart object.
+
+        Args:
+        ----
+            headers (Message): The headers of the part.
+            content (Optional[SpooledTemporaryFile]): The decoded content, or None if the part was skipped.
+            size (int): The size of the decoded content in bytes.
+
+        """
+        self.headers = headers
+        self.size = size
+        self._content = content
+
+    @property
+    def content_type(self) -> str:
+        """The content type of the part, such as text/plain."""
+        return self.headers.get_content_type()
+
+    @property
+    def filename(self) -> Optional[str]:
+        """The filename of the part, if it has one."""
+        return self.headers.get_filename()
+
+    @property
+    def is_attachment(self) -> bool:
+        """Whether the part is an attachment."""
+        return self.headers.get_content_disposition() == "attachment"
+
+    @property
+    def skipped(self) -> bool:
+        """Whether the content of the part was discarded by the part filter."""
+        return self._content is None
+
+    def open(self) -> SpooledTemporaryFile:
+        """Get a file object positioned at the start of the decoded content.
+
+        Raises
+        ------
+            ValueError: If the content of the part was skipped
+
+        """
+        if self._content is None:
+            raise ValueError("The content of this email part was skipped")
+        self._content.seek(0)
+        return self._content
+
+    def read(self) -> bytes:
+        """Read the whole decoded content of the part into memory."""
+        return self.open().read()
+
+    def get_text(self) -> str:
+        """Read the decoded content of the part as text, using the charset of the part."""
+        return self.read().decode(self.headers.get_content_charset() or "utf-8", errors="replace")
+
+    def close(self):
+        """Release the temporary file holding the content of the part."""
+        if self._content is not None:
+            self._content.close()
+
+
+class StreamedEmail:
+    """An email that is parsed incrementally while it is downloaded.
+
+    Attributes
+    ----------
+        spool_threshold (int): The size above which part content is moved from memory to a temporary file.
+
+    """
+
+    def __init__(self, chunks: Iterable[bytes], on_close: Optional[Callable[[], None]] = None, spool_threshold: int = DEFAULT_SPOOL_THRESHOLD):
+        """Initialize the StreamedEmail object.
+
+        Args:
+        ----
+            chunks (Iterable[bytes]): The raw message, as a stream of byte chunks.
+            on_close (Optional[Callable[[], None]], optional): Called when the email is closed, to release the download.
+            spool_threshold (int, optional): The size above which part content is moved from memory to a temporary file.
+
+        """
+        self.spool_threshold = spool_threshold
+        self._reader = _LineReader(chunks)
+        self._on_close = on_close
+        self._headers: Optional[Message] = None
+        self._parts: List[EmailPart] = []
+        self._consumed = False
+
+    @property
+    def headers(self) -> Message:
+        """The top level headers of the email. Only the header block is downloaded to read them."""
+        if self._headers is None:
+            self._headers = self._read_headers()
+        return self._headers
+
+    def iter_parts(self, part_filter: Optional[PartFilter] = None) -> Iterator[EmailPart]:
+        """Download the rest of the email, yielding each non-multipart part once it has been decoded.
+
+        The parts can only be iterated once, as they are parsed straight from the download.
+
+        Args:
+        ----
+            part_filter (Optional[PartFilter], optional): Decides from the headers of a part whether its content is kept.
+                Parts that are rejected are yielded with their headers only. Defaults to keeping every part.
+
+        Raises:
+        ------
+            RuntimeError: If the parts have already been iterated
+
+        """
+        if self._consumed:
+            raise RuntimeError("The parts of a streamed email can only be iterated once")
+        self._consumed = True
+        yield from self._parse_entity(self.headers, [], part_filter)
+
+    def close(self):
+        """Close the download and release the content of every part."""
+        for part in self._parts:
+            part.close()
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
+
+    def __enter__(self) -> "StreamedEmail":
+        """Enter the context manager."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the email when leaving the context manager."""
+        self.close()
+
+    def _read_headers(self) -> Message:
+        lines = []
+        while True:
+            line = self._reader.readline()
+            if not line or line in (b"\r\n", b"\n"):
+                break
+            if not _HEADER_LINE.match(line):
+                # Like the standard library parser, a line that is not a header starts the body
+                self._reader.unread(line)
+                break
+            lines.append(line)
+        return BytesHeaderParser().parsebytes(b"".join(lines) + b"\r\n")
+
+    def _read_boundary_line(self, boundaries: List[bytes]) -> Tuple[bytes, Optional[Tuple[bytes, bool]]]:
+        """Read a block of lines and check whether it is a delimiter of one of the enclosing multiparts.
+
+        Returns the block, and the matched boundary together with whether it is the closing delimiter.
+        """
+        starts_line = self._reader.at_line_start
+        line = self._reader.readblock()
+        if starts_line and line.startswith(b"--"):
+            stripped = line.rstrip()
+            for boundary in reversed(boundaries):
+                if stripped == b"--" + boundary:
+                    return line, (boundary, False)
+                if stripped == b"--" + boundary + b"--":
+                    return line, (boundary, True)
+        return line, None
+
+    def _skip_until_boundary(self, boundaries: List[bytes]) -> Optional[Tuple[bytes, bool]]:
+        while True:
+            line, delimiter = self._read_boundary_line(boundaries)
+            if delimiter is not None or not line:
+                return delimiter
+
+    def _parse_entity(self, headers: Message, boundaries: List[bytes], part_filter: Optional[PartFilter]):
+        boundary = headers.get_boundary() if headers.get_content_maintype() == "multipart" else None
+        if boundary is None:
+            return (yield from self._parse_leaf(headers, boundaries, part_filter))
+        boundary = boundary.encode("ascii", errors="replace")
+        nested = boundaries + [boundary]
+        # Skip the preamble up to the first delimiter
+        delimiter = self._skip_until_boundary(nested)
+        while delimiter is not None and delimiter == (boundary, False):
+            part_headers = self._read_headers()
+            delimiter = yield from self._parse_entity(part_headers, nested, part_filter)
+        if delimiter is not None and delimiter[0] != boundary:
+            # The delimiter of an enclosing multipart ended this one early
+            return delimiter
+        # Skip the epilogue up to the next delimiter of the enclosing multipart
+        return self._skip_until_boundary(boundaries) if boundaries else None
+
+    def _parse_leaf(self, headers: Message, boundaries: List[bytes], part_filter: Optional[PartFilter]):
+        keep = part_filter is None or part_filter(headers)
+        content = SpooledTemporaryFile(max_size=self.spool_threshold) if keep else None
+        decoder = _decoder_for(headers.get("content-transfer-encoding", ""))
+        size = 0
+
+        def write(decoded: bytes):
+            nonlocal size
+            size += len(decoded)
+            content.write(decoded)
+
+        # Blocks are written one behind, as the line ending before a delimiter belongs to the delimiter
+        previous = None
+        while True:
+            line, delimiter = self._read_boundary_line(boundaries)
+            if delimiter is not None or not line:
+                break
+            if previous is not None and keep:
+                write(decoder.write(previous))
+            previous = line
+        if keep:
+            if previous is not None and delimiter is not None:
+                previous = previous[:-2] if previous.endswith(b"\r\n") else previous[:-1] if previous.endswith(b"\n") else previous
+            if previous:
+                write(decoder.write(previous))
+            write(decoder.flush())
+        part = EmailPart(headers, content, size)
+        self._parts.append(part)
+        yield part
+        return delimiter
@@ -18,8 +18,13 @@ class ApplauseClientError(Exception):
             response (requests.Response): The response object from the HTTP request.
 
         """
-        message = response.json()["message"]
+        try:
+            message = response.json().get("message")
+        except (ValueError, AttributeError):
+            # The body was not a JSON object, fall back to the raw text of the response
+            message = None
         if message is None:
             message = response.text
         self.message = message
+        self.status_code = response.status_code
         super().__init__(self.message)
@@ -20,7 +20,9 @@ Typical usage example:
 """
 
 from .auto_api import AutoApi
+from .metrics import HEARTBEATS, MetricsRegistry
 from apscheduler.schedulers.background import BackgroundScheduler
+from typing import Optional
 
 
 class HeartbeatService:
@@ -33,10 +35,11 @@ class HeartbeatService:
         job (apscheduler.job.Job): The job for the heartbeat service.
         sleep_time (float): The time to sleep between heartbeat messages.
         scheduler (apscheduler.schedulers.background.BackgroundScheduler): The scheduler for the heartbeat service.
+        metrics (MetricsRegistry): The registry that sent and failed heartbeats are counted in.
 
     """
 
-    def __init__(self, auto_api: AutoApi, test_run_id: int, sleep_time: float = 5):
+    def __init__(self, auto_api: AutoApi, test_run_id: int, sleep_time: float = 5, metrics: Optional[MetricsRegistry] = None):
         """Initialize the HeartbeatService object.
 
         Args:
@@ -44,6 +47,7 @@ class HeartbeatService:
             auto_api (AutoApi): An instance of the AutoApi class.
             test_run_id (int): The id of the test run.
             sleep_time (float): The time to sleep between heartbeat messages.
+            metrics (Optional[MetricsRegistry], optional): The registry to count heartbeats in. Defaults to a new registry.
 
         """
         self.auto_api = auto_api
@@ -51,6 +55,7 @@ class HeartbeatService:
         self.job = None
         self.sleep_time = sleep_time
         self.scheduler = BackgroundScheduler()
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
 
     def start(self):
         """Start the heartbeat service.
@@ -62,7 +67,7 @@ class HeartbeatService:
         """
         if self.job is not None:
             raise Exception("Heartbeat worker - Already running")
-        self.job = self.scheduler.add_job(lambda: self.auto_api.send_sdk_heartbeat(self.test_run_id), "interval", seconds=self.sleep_time)
+        self.job = self.scheduler.add_job(self._send_heartbeat, "interval", seconds=self.sleep_time)
         self.scheduler.start()
         pass
 
@@ -79,3 +84,11 @@ class HeartbeatService:
         self.scheduler.shutdown()
         self.job = None
         pass
+
+    def _send_heartbeat(self):
+        try:
+            self.auto_api.send_sdk_heartbeat(self.test_run_id)
+        except Exception:
+            self.metrics.inc(HEARTBEATS, status="error")
+            raise
+        self.metrics.inc(HEARTBEATS, status="ok")
@@ -0,0 +1,197 @@
+"""Pluggable JSON codecs for the request bodies, responses and files of the reporter.
+
+AutoApi encodes the JSON bodies of its requests and decodes the JSON responses through a JsonCodec, selected with
+ApplauseConfig.json_codec, PublicApi encodes the results it submits with it, and the reporter writes the provider
+session links file with the same codec:
+
+- stdlib: The json module that requests uses, producing the same bytes as requests does for json= bodies. This is
+  the default.
+- orjson: The orjson library, encoding straight to UTF-8 bytes. It requires pip install orjson.
+- ujson: The ujson library. It requires pip install ujson.
+- auto: The fastest codec installed: orjson, then ujson, then stdlib.
+
+The fast codecs are opt-in, so that the bytes sent do not depend on the packages that happen to be installed.
+
+Every codec encodes to UTF-8 bytes and decodes bytes or text, and they all produce equivalent JSON documents. The
+bytes differ in whitespace and in the escaping of non ASCII characters, which the Applause APIs do not depend on.
+Every codec rejects NaN and infinite numbers, which orjson would otherwise encode as null.
+
+Typical usage example:
+
+    codec = create_json_codec(JsonCodecType.AUTO)
+    body = codec.dumps({"testRunId": 123})
+    assert codec.loads(body) == {"testRunId": 123}
+"""
+
+import math
+from enum import Enum
+from requests.compat import json as complexjson
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - ujson is optional
+    ujson = None
+
+
+class JsonCodecType(str, Enum):
+    """Enum representing the available JSON codecs.
+
+    Values:
+        AUTO: The fastest codec installed
+        ORJSON: The orjson library
+        UJSON: The ujson library
+        STDLIB: The json module used by requests
+    """
+
+    AUTO = "auto"
+    ORJSON = "orjson"
+    UJSON = "ujson"
+    STDLIB = "stdlib"
+
+
+class JsonCodec:
+    """Base class for the JSON codecs, encoding with the json module used by requests.
+
+    Attributes
+    ----------
+        name (str): The name of the codec.
+
+    """
+
+    name = JsonCodecType.STDLIB.value
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode a value to a JSON document.
+
+        Args:
+        ----
+            obj (Any): The value to encode, made of dicts with string keys, lists, strings, numbers, booleans and None
+
+        Returns:
+        -------
+            bytes: The UTF-8 encoded document
+
+        Raises:
+        ------
+            TypeError: If the value cannot be encoded
+            ValueError: If the value contains NaN or infinite numbers
+
+        """
+        return complexjson.dumps(obj, allow_nan=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decode a JSON document.
+
+        Args:
+        ----
+            data (Union[bytes, str]): The document, as UTF-8 bytes or text
+
+        Returns:
+        -------
+            Any: The decoded value
+
+        Raises:
+        ------
+            ValueError: If the document is not valid JSON
+
+        """
+        return complexjson.loads(data)
+
+
+class StdlibJsonCodec(JsonCodec):
+    """Encode and decode with the json module used by requests, producing the same bytes as requests does."""
+
+
+class OrjsonCodec(JsonCodec):
+    """Encode and decode with orjson."""
+
+    name = JsonCodecType.ORJSON.value
+
+    def __init__(self):
+        """Initialize the OrjsonCodec object.
+
+        Raises
+        ------
+            ImportError: If orjson is not installed
+
+        """
+        if orjson is None:
+            raise ImportError("The orjson codec requires orjson: pip install orjson")
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode a value to a JSON document with orjson, whose encoding errors are TypeErrors, rejecting NaN and infinite numbers like the other codecs."""
+        _check_finite(obj)
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decode a JSON document with orjson."""
+        return orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    """Encode and decode with ujson."""
+
+    name = JsonCodecType.UJSON.value
+
+    def __init__(self):
+        """Initialize the UjsonCodec object.
+
+        Raises
+        ------
+            ImportError: If ujson is not installed
+
+        """
+        if ujson is None:
+            raise ImportError("The ujson codec requires ujson: pip install ujson")
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode a value to a JSON document with ujson."""
+        return ujson.dumps(obj, escape_forward_slashes=False, allow_nan=False).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decode a JSON document with ujson."""
+        return ujson.loads(data)
+
+
+def _check_finite(obj: Any):
+    if isinstance(obj, float):
+        if not math.isfinite(obj):
+            raise ValueError(f"Out of range float values are not JSON compliant: {obj!r}")
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            _check_finite(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            _check_finite(value)
+
+
+def create_json_codec(codec_type: JsonCodecType = JsonCodecType.STDLIB) -> JsonCodec:
+    """Create a JSON codec of the provided type.
+
+    Args:
+    ----
+        codec_type (JsonCodecType, optional): The type of codec. Defaults to JsonCodecType.STDLIB.
+
+    Returns:
+    -------
+        JsonCodec: The new codec
+
+    Raises:
+    ------
+        ImportError: If the library of the requested codec is not installed
+
+    """
+    codec_type = JsonCodecType(codec_type)
+    if codec_type == JsonCodecType.AUTO:
+        codec_type = JsonCodecType.ORJSON if orjson is not None else JsonCodecType.UJSON if ujson is not None else JsonCodecType.STDLIB
+    if codec_type == JsonCodecType.ORJSON:
+        return OrjsonCodec()
+    if codec_type == JsonCodecType.UJSON:
+        return UjsonCodec()
+    return StdlibJsonCodec()
@@ -0,0 +1,250 @@
+"""Import of JUnit XML reports into Applause test runs.
+
+Suites that cannot embed the ApplauseReporter usually still produce JUnit XML reports. The importer reads them
+incrementally with iterparse: each testcase element is turned into a JUnitTestCase and removed from the tree as
+soon as it has been read, so memory stays flat whatever the size of the report. The test cases are reported from a
+pool of worker threads through RunInitializer and RunReporter: a run is created, each test case is started, its
+system-out log is attached as a CONSOLE_LOG asset, and its result is submitted. The provider session links of every
+result are then fetched in a single bulk call when the run ends.
+
+The status of a test case is FAILED if it has a failure element, ERROR if it has an error element, SKIPPED if it
+has a skipped element, and PASSED otherwise. The message and text of the failure, error or skipped element are
+submitted as the failure reason.
+
+Typical usage example:
+
+    applause-junit-import build/test-results/*.xml --api-key $APPLAUSE_API_KEY --product-id 123 --workers 16
+
+    stats = import_junit(["report.xml"], ApplauseConfig(api_key="api_key", product_id=123), workers=16)
+    print(f"{stats.test_cases_per_second:.1f} test cases per second")
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from .auto_api import AutoApi
+from .config import ApplauseConfig
+from .dtos import AssetType, TestResultStatus, TestRunEndingStatus
+from .reporter import RunInitializer, RunReporter
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import Element, iterparse
+
+_STATUS_ELEMENTS = (("failure", TestResultStatus.FAILED), ("error", TestResultStatus.ERROR), ("skipped", TestResultStatus.SKIPPED))
+
+
+class JUnitTestCase(BaseModel):
+    """A test case read from a JUnit XML report.
+
+    Attributes
+    ----------
+        name: The name of the test case, prefixed with its class name if it has one
+        status: The status of the test case
+        failure_reason (optional): The message and text of the failure, error or skipped element
+        system_out (optional): The output captured while the test case ran
+
+    """
+
+    name: str
+    status: TestResultStatus
+    failure_reason: Optional[str] = None
+    system_out: Optional[str] = None
+
+
+class ImportStats(BaseModel):
+    """The outcome of an import.
+
+    Attributes
+    ----------
+        test_run_id: The id of the run the test cases were reported to
+        test_cases: The number of test cases reported
+        statuses: The number of test cases reported with each status
+        assets: The number of system-out logs attached
+        errors: The number of test cases that could not be reported completely
+        seconds: The time the import took
+
+    """
+
+    test_run_id: int = 0
+    test_cases: int = 0
+    statuses: Dict[str, int] = {}
+    assets: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    @property
+    def test_cases_per_second(self) -> float:
+        """The number of test cases reported per second."""
+        return self.test_cases / self.seconds if self.seconds > 0 else 0.0
+
+
+def _to_test_case(element: Element) -> JUnitTestCase:
+    name = element.get("name", "")
+    classname = element.get("classname")
+    status, failure_reason, system_out = TestResultStatus.PASSED, None, None
+    for tag, tag_status in _STATUS_ELEMENTS:
+        child = element.find(tag)
+        if child is not None:
+            status = tag_status
+            failure_reason = "\n".join(part for part in (child.get("message"), (child.text or "").strip()) if part) or None
+            break
+    out = element.find("system-out")
+    if out is not None and out.text and out.text.strip():
+        system_out = out.text
+    return JUnitTestCase(name=f"{classname}.{name}" if classname else name, status=status, failure_reason=failure_reason, system_out=system_out)
+
+
+def iter_test_cases(path: str) -> Iterator[JUnitTestCase]:
+    """Read the test cases of a JUnit XML report one at a time, in constant memory.
+
+    Args:
+    ----
+        path (str): The path of the report
+
+    Returns:
+    -------
+        Iterator[JUnitTestCase]: The test cases, in the order they appear in the report
+
+    """
+    # The open elements, so that each one can be removed from its parent once it has been read
+    stack: List[Element] = []
+    for event, element in iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        if element.tag == "testcase":
+            yield _to_test_case(element)
+        if element.tag in ("testcase", "testsuite"):
+            if stack:
+                stack[-1].remove(element)
+            else:
+                element.clear()
+
+
+def _report(reporter: RunReporter, id: str, test_case: JUnitTestCase, attach_logs: bool) -> int:
+    """Report a test case, returning the number of assets attached."""
+    reporter.start_test_case(id, test_case.name)
+    assets = 0
+    if attach_logs and test_case.system_out is not None:
+        reporter.attach_test_case_asset(id, "system-out.txt", "", AssetType.CONSOLE_LOG, test_case.system_out.encode("utf-8"))
+        assets += 1
+    reporter.submit_test_case_result(id, test_case.status, failure_reason=test_case.failure_reason)
+    return assets
+
+
+def import_junit(paths: Iterable[str], config: ApplauseConfig, workers: int = 8, attach_logs: bool = True, register_tests: bool = False) -> ImportStats:
+    """Report the test cases of JUnit XML reports to a new test run.
+
+    At most twice as many test cases as there are workers are held in memory at a time. A test case that cannot be
+    reported is printed and counted as an error, and the import carries on with the next one. If a report cannot be
+    read, the test cases read so far are reported, and the run is ended as CANCELED.
+
+    Args:
+    ----
+        paths (Iterable[str]): The paths of the reports
+        config (ApplauseConfig): The configuration to report with
+        workers (int, optional): The number of test cases reported concurrently. Defaults to 8.
+        attach_logs (bool, optional): Whether to attach the system-out logs as assets. Defaults to True.
+        register_tests (bool, optional): Whether to read the reports twice, to create the run with the names of every
+            test case in a single call. Defaults to False.
+
+    Returns:
+    -------
+        ImportStats: The outcome of the import
+
+    Raises:
+    ------
+        xml.etree.ElementTree.ParseError: If a report is not valid XML
+
+    """
+    paths = list(paths)
+    start = time.perf_counter()
+    tests = [test_case.name for path in paths for test_case in iter_test_cases(path)] if register_tests else None
+    auto_api = AutoApi(config)
+    reporter = RunInitializer(auto_api).start_run(tests)
+    stats = ImportStats(test_run_id=reporter.test_run_id)
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    def report(id: str, test_case: JUnitTestCase):
+        try:
+            assets = _report(reporter, id, test_case, attach_logs)
+            with lock:
+                stats.test_cases += 1
+                stats.statuses[test_case.status.value] = stats.statuses.get(test_case.status.value, 0) + 1
+                stats.assets += assets
+        except Exception as e:
+            print(f"Could not report test case {test_case.name}: {e}")
+            with lock:
+                stats.errors += 1
+        finally:
+            slots.release()
+
+    # The run is only complete once every report has been read
+    ending_status = TestRunEndingStatus.CANCELED
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            index = 0
+            for path in paths:
+                for test_case in iter_test_cases(path):
+                    slots.acquire()
+                    executor.submit(report, str(index), test_case)
+                    index += 1
+        ending_status = TestRunEndingStatus.COMPLETE
+    finally:
+        try:
+            reporter.end_run(ending_status=ending_status)
+        finally:
+            auto_api.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def format_report(stats: ImportStats) -> str:
+    """Format the outcome of an import for the command line."""
+    statuses = ", ".join(f"{count} {status}" for status, count in sorted(stats.statuses.items()))
+    return (
+        f"Imported {stats.test_cases} test cases into test run {stats.test_run_id} in {stats.seconds:.1f}s "
+        f"({stats.test_cases_per_second:.1f} test cases/s): {statuses or 'none'}\n"
+        f"{stats.assets} system-out logs attached, {stats.errors} errors"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the importer from the command line.
+
+    Args:
+    ----
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to the arguments of the process.
+
+    Returns:
+    -------
+        int: The exit code, 1 if any test case could not be reported
+
+    """
+    parser = argparse.ArgumentParser(description="Report the test cases of JUnit XML reports to a new Applause test run.")
+    parser.add_argument("paths", nargs="+", help="paths of the JUnit XML reports")
+    parser.add_argument("--api-key", default=os.environ.get("APPLAUSE_API_KEY"), help="api key to report with, defaults to $APPLAUSE_API_KEY")
+    parser.add_argument("--product-id", type=int, required=True, help="product id to report to")
+    parser.add_argument("--test-cycle-id", type=int, help="applause test cycle id to associate the run with")
+    parser.add_argument("--base-url", help="base url of the Automation API")
+    parser.add_argument("--workers", type=int, default=8, help="number of test cases reported concurrently")
+    parser.add_argument("--no-logs", action="store_true", help="do not attach the system-out logs")
+    parser.add_argument("--register-tests", action="store_true", help="create the run with the names of every test case, reading the reports twice")
+    args = parser.parse_args(argv)
+    if args.api_key is None:
+        parser.error("an api key is required, pass --api-key or set APPLAUSE_API_KEY")
+
+    urls = {"auto_api_base_url": args.base_url} if args.base_url is not None else {}
+    config = ApplauseConfig(api_key=args.api_key, product_id=args.product_id, applause_test_cycle_id=args.test_cycle_id, **urls)
+    stats = import_junit(args.paths, config, workers=args.workers, attach_logs=not args.no_logs, register_tests=args.register_tests)
+    print(format_report(stats))
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
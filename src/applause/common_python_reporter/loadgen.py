@@ -0,0 +1,318 @@
+"""Load generation for simulating a fleet of reporting clients.
+
+Each client is a separate process running a number of threads, and every thread drives its own ApplauseReporter
+through complete run lifecycles: starting a run, starting each test case, attaching assets, submitting the results
+and ending the run. Every operation is timed, and failed operations are counted without stopping the client.
+Once all clients have finished, the aggregated throughput, error rate and latency distribution of each operation
+are printed, together with the CPU time and peak RSS of each client process.
+
+By default the clients report to a local StandInServer started for the duration of the load, so no network access
+or API key is needed. Pass --base-url to point them at another server instead.
+
+Typical usage example:
+
+    # 4 clients with 8 concurrent runs each, 5 runs of 50 tests per thread
+    applause-loadgen --processes 4 --threads 8 --runs 5 --tests 50
+
+    # Inject latency and errors into the local stand-in
+    applause-loadgen --processes 2 --threads 4 --latency 0.01 --error-rate 0.01
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from .config import ApplauseConfig
+from .dtos import AssetType, TestResultStatus
+from .reporter import ApplauseReporter
+from .stand_in import StandInConfig, StandInServer
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+OPERATIONS = ("runner_start", "start_test_case", "attach_test_case_asset", "submit_test_case_result", "runner_end")
+
+
+class ClientOptions(BaseModel):
+    """The workload of a single simulated client.
+
+    Attributes
+    ----------
+        base_url: The base url of both the Automation and Public APIs
+        api_key: The api key to report with
+        product_id: The product id to report to
+        threads: The number of concurrent runs reported by the client
+        runs: The number of runs reported by each thread, one after the other
+        tests: The number of test cases in each run
+        assets_per_test: The number of assets attached to each test case
+        asset_size: The size of each asset in bytes
+        failure_rate: The probability of a test case failing
+        test_duration: The time spent in each test case between starting it and submitting its result, in seconds
+
+    """
+
+    base_url: str
+    api_key: str = "loadgen"
+    product_id: int = 1
+    threads: int = 1
+    runs: int = 1
+    tests: int = 100
+    assets_per_test: int = 0
+    asset_size: int = 64 * 1024
+    failure_rate: float = 0.1
+    test_duration: float = 0.0
+
+
+class ClientStats(BaseModel):
+    """The measurements of a single simulated client.
+
+    Attributes
+    ----------
+        client: The index of the client
+        latencies: The latency of each successful call, in seconds, by operation
+        errors: The number of failed calls, by operation
+        failures: The error of the first failed call, by operation
+        wall_seconds: The time the client took to report all of its runs
+        cpu_seconds: The CPU time used by the client process
+        peak_rss_bytes (optional): The peak resident set size of the client process, if it can be measured
+
+    """
+
+    client: int
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    failures: Dict[str, str] = {}
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+
+
+class _Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.failures: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def call(self, operation: str, function, *args, **kwargs) -> bool:
+        start = time.perf_counter()
+        try:
+            function(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+                self.failures.setdefault(operation, f"{type(e).__name__}: {e}")
+            return False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(elapsed)
+        return True
+
+
+def _report_runs(options: ClientOptions, recorder: _Recorder, seed: int):
+    config = ApplauseConfig(api_key=options.api_key, product_id=options.product_id, auto_api_base_url=options.base_url, public_api_base_url=options.base_url)
+    reporter = ApplauseReporter(config)
+    rng = random.Random(seed)
+    asset = os.urandom(options.asset_size) if options.assets_per_test else b""
+    names = [f"loadgen test {index}" for index in range(options.tests)]
+    for _ in range(options.runs):
+        if not recorder.call("runner_start", reporter.runner_start, tests=names):
+            continue
+        try:
+            for index, name in enumerate(names):
+                if not recorder.call("start_test_case", reporter.start_test_case, str(index), name):
+                    continue
+                if options.test_duration > 0:
+                    time.sleep(options.test_duration)
+                for asset_index in range(options.assets_per_test):
+                    recorder.call("attach_test_case_asset", reporter.attach_test_case_asset, str(index), f"asset-{asset_index}.bin", "session", AssetType.SCREENSHOT, asset)
+                if rng.random() < options.failure_rate:
+                    recorder.call("submit_test_case_result", reporter.submit_test_case_result, str(index), TestResultStatus.FAILED, failure_reason="Simulated failure")
+                else:
+                    recorder.call("submit_test_case_result", reporter.submit_test_case_result, str(index), TestResultStatus.PASSED)
+        finally:
+            if not recorder.call("runner_end", reporter.runner_end):
+                # Make the reporter usable for the next run even though ending this one failed
+                reporter.abort()
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_client(client: int, options: ClientOptions) -> ClientStats:
+    """Simulate a single client in the current process.
+
+    The output of the reporters, such as the provider session links they print and write at the end of each run,
+    is discarded, so this is meant to be run in a dedicated process.
+
+    Args:
+    ----
+        client (int): The index of the client
+        options (ClientOptions): The workload of the client
+
+    Returns:
+    -------
+        ClientStats: The measurements of the client
+
+    """
+    recorder = _Recorder()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            threads = [threading.Thread(target=_report_runs, args=(options, recorder, client * options.threads + index)) for index in range(options.threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            os.chdir(cwd)
+    return ClientStats(
+        client=client,
+        latencies=recorder.latencies,
+        errors=recorder.errors,
+        failures=recorder.failures,
+        wall_seconds=time.perf_counter() - start,
+        cpu_seconds=time.process_time() - cpu_start,
+        peak_rss_bytes=_peak_rss_bytes(),
+    )
+
+
+def run_load(options: ClientOptions, processes: int) -> List[ClientStats]:
+    """Simulate a fleet of clients, each in its own freshly spawned process.
+
+    Args:
+    ----
+        options (ClientOptions): The workload of each client
+        processes (int): The number of clients
+
+    Returns:
+    -------
+        List[ClientStats]: The measurements of every client, in client order
+
+    """
+    # Spawned rather than forked processes keep the memory of each client separate from the load generator
+    with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn")) as executor:
+        futures = [executor.submit(run_client, client, options) for client in range(processes)]
+        return [future.result() for future in futures]
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+
+def format_report(clients: List[ClientStats], wall_seconds: float) -> str:
+    """Format the aggregated measurements of every client as a human readable report.
+
+    Args:
+    ----
+        clients (List[ClientStats]): The measurements of every client
+        wall_seconds (float): The time taken by the whole load
+
+    Returns:
+    -------
+        str: The report
+
+    """
+    lines = [f"{'operation':<26} {'calls':>8} {'errors':>7} {'error %':>8} {'calls/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    total_calls = total_errors = 0
+    for operation in OPERATIONS:
+        latencies = sorted(latency for client in clients for latency in client.latencies.get(operation, []))
+        errors = sum(client.errors.get(operation, 0) for client in clients)
+        calls = len(latencies) + errors
+        if calls == 0:
+            continue
+        total_calls += calls
+        total_errors += errors
+        if latencies:
+            distribution = " ".join(f"{_percentile(latencies, q) * 1000:>8.2f}" for q in (0.5, 0.9, 0.99)) + f" {latencies[-1] * 1000:>8.2f}"
+        else:
+            distribution = " ".join(f"{'-':>8}" for _ in range(4))
+        lines.append(f"{operation:<26} {calls:>8} {errors:>7} {errors / calls:>8.2%} {calls / wall_seconds:>9.1f} {distribution}")
+    error_rate = total_errors / total_calls if total_calls else 0.0
+    lines.append(f"{'total':<26} {total_calls:>8} {total_errors:>7} {error_rate:>8.2%} {total_calls / wall_seconds:>9.1f}")
+    lines.append("")
+    lines.append(f"{'client':>6} {'wall s':>9} {'cpu s':>9} {'cpu %':>7} {'peak rss MB':>12}")
+    for client in clients:
+        rss = f"{client.peak_rss_bytes / (1024 * 1024):>12.1f}" if client.peak_rss_bytes is not None else f"{'-':>12}"
+        lines.append(f"{client.client:>6} {client.wall_seconds:>9.2f} {client.cpu_seconds:>9.2f} {client.cpu_seconds / client.wall_seconds:>7.1%} {rss}")
+    failures = [(client.client, operation, failure) for client in clients for operation, failure in client.failures.items()]
+    if failures:
+        lines.append("")
+        lines.append("first failure of each operation, by client:")
+        for client, operation, failure in failures:
+            lines.append(f"{client:>6} {operation}: {failure}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the load generator from the command line.
+
+    Args:
+    ----
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to the arguments of the process.
+
+    Returns:
+    -------
+        int: The exit code, 1 if any operation failed
+
+    """
+    parser = argparse.ArgumentParser(description="Simulate a fleet of clients reporting test runs through ApplauseReporter.")
+    parser.add_argument("--processes", type=int, default=2, help="number of client processes")
+    parser.add_argument("--threads", type=int, default=4, help="number of concurrent runs in each client process")
+    parser.add_argument("--runs", type=int, default=1, help="number of runs reported by each thread")
+    parser.add_argument("--tests", type=int, default=100, help="number of test cases in each run")
+    parser.add_argument("--assets-per-test", type=int, default=0, help="number of assets attached to each test case")
+    parser.add_argument("--asset-size", type=int, default=64 * 1024, help="size of each asset in bytes")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="probability of a test case failing")
+    parser.add_argument("--test-duration", type=float, default=0.0, help="seconds spent in each test case")
+    parser.add_argument("--base-url", help="base url of the APIs to report to, defaults to a local stand-in server")
+    parser.add_argument("--api-key", default="loadgen", help="api key to report with")
+    parser.add_argument("--product-id", type=int, default=1, help="product id to report to")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency injected by the local stand-in server, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an error injected by the local stand-in server")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        base_url = args.base_url
+        if base_url is None:
+            base_url = stack.enter_context(StandInServer(StandInConfig(latency=args.latency, error_rate=args.error_rate))).base_url
+        options = ClientOptions(
+            base_url=base_url,
+            api_key=args.api_key,
+            product_id=args.product_id,
+            threads=args.threads,
+            runs=args.runs,
+            tests=args.tests,
+            assets_per_test=args.assets_per_test,
+            asset_size=args.asset_size,
+            failure_rate=args.failure_rate,
+            test_duration=args.test_duration,
+        )
+        print(f"Simulating {args.processes} clients x {args.threads} threads against {base_url}")
+        start = time.perf_counter()
+        clients = run_load(options, args.processes)
+        wall_seconds = time.perf_counter() - start
+    print(format_report(clients, wall_seconds))
+    return 1 if any(client.errors for client in clients) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
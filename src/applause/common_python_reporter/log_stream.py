@@ -0,0 +1,298 @@
+"""Streaming of test case logs to the Automation API while the test case runs.
+
+Device and console logs of long test cases can grow to hundreds of megabytes. Attaching them with
+attach_test_case_asset at the end of the test case means holding all of it in memory, and nothing is visible until
+the test case is over. RunReporter.open_log_stream returns a LogStream instead: a writable binary file object that
+keeps what is written in a bounded ring buffer. A background LogStreamer thread uploads the buffered bytes as the
+next part of the log whenever the buffer of a stream reaches the flush size, or its oldest byte has waited for the
+flush interval. The Automation API stores every upload as a separate asset, so the parts are named after the log
+with a sequence number: device.log is uploaded as device.part0001.log, device.part0002.log, and so on.
+
+If the parts cannot be uploaded as fast as the log is written, the oldest buffered bytes are overwritten rather
+than holding up the test, and the next part starts with a note giving the number of bytes dropped. Submitting the
+result of a test case closes its streams, and the last part of each is uploaded in the background. The run waits
+for the last parts when it ends.
+
+Typical usage example:
+
+    reporter.start_test_case("test1", "test1")
+    device_log = reporter.open_log_stream("test1", "device.log", AssetType.DEVICE_LOG)
+    for line in device.logcat():
+        device_log.write(line)
+    reporter.submit_test_case_result("test1", TestResultStatus.PASSED)  # uploads the rest of device.log
+
+    # Text, for example for a logging.StreamHandler
+    console = io.TextIOWrapper(reporter.open_log_stream("test1", "console.log"), encoding="utf-8", write_through=True)
+"""
+
+import io
+import os
+import threading
+import time
+from .metrics import LOG_STREAM_BYTES, LOG_STREAM_DROPPED_BYTES, LOG_STREAM_PARTS, MetricsRegistry
+from pydantic import BaseModel
+from typing import Callable, List, Optional
+
+DEFAULT_BUFFER_SIZE = 8 * 1024 * 1024
+DEFAULT_FLUSH_SIZE = 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+class LogStreamStats(BaseModel):
+    """The progress of a log stream.
+
+    Attributes
+    ----------
+        written: The number of bytes written to the stream
+        uploaded: The number of bytes uploaded
+        dropped: The number of bytes overwritten in the ring buffer before they could be uploaded
+        parts: The number of parts uploaded
+        failed_parts: The number of parts that could not be uploaded
+        buffered: The number of bytes waiting to be uploaded
+
+    """
+
+    written: int = 0
+    uploaded: int = 0
+    dropped: int = 0
+    parts: int = 0
+    failed_parts: int = 0
+    buffered: int = 0
+
+
+def part_name(asset_name: str, index: int) -> str:
+    """Get the asset name of a part of a log, numbering it before the extension."""
+    root, extension = os.path.splitext(asset_name)
+    return f"{root}.part{index:04d}{extension}"
+
+
+class LogStream(io.RawIOBase):
+    """A writable log of a test case, uploaded in parts by a LogStreamer.
+
+    Attributes
+    ----------
+        asset_name (str): The name of the log, that the parts are named after.
+        asset_type (str): The type the parts are uploaded as.
+
+    """
+
+    def __init__(self, streamer: "LogStreamer", asset_name: str, asset_type: str, upload: Callable[[str, bytes], None]):
+        """Initialize the LogStream object. Streams are opened with LogStreamer.open.
+
+        Args:
+        ----
+            streamer (LogStreamer): The streamer uploading the parts
+            asset_name (str): The name of the log
+            asset_type (str): The type the parts are uploaded as
+            upload (Callable[[str, bytes], None]): Called on the streamer thread with the name and content of each part
+
+        """
+        super().__init__()
+        self.asset_name = asset_name
+        self.asset_type = asset_type
+        self._streamer = streamer
+        self._upload = upload
+        self._buffer = bytearray()
+        self._first_write = 0.0
+        self._dropped_since_part = 0
+        self._uploading = False
+        self._parts_taken = 0
+        self._stats = LogStreamStats()
+
+    def writable(self) -> bool:
+        """Check whether the stream can be written to, which it can."""
+        return True
+
+    def write(self, data: bytes) -> int:
+        """Append bytes to the log, overwriting the oldest buffered bytes if the buffer is full.
+
+        Args:
+        ----
+            data (bytes): The bytes to append
+
+        Returns:
+        -------
+            int: The number of bytes written, all of them
+
+        Raises:
+        ------
+            ValueError: If the stream is closed
+
+        """
+        if self.closed:
+            raise ValueError("Log stream - Already closed")
+        size = len(data)
+        with self._streamer._condition:
+            # The streamer is woken up by the first buffered bytes, to time their flush, and by a full flush size
+            started = not self._buffer
+            if started:
+                self._first_write = time.monotonic()
+            self._buffer += data
+            overflow = len(self._buffer) - self._streamer.buffer_size
+            if overflow > 0:
+                del self._buffer[:overflow]
+                self._dropped_since_part += overflow
+                self._stats.dropped += overflow
+                self._streamer.metrics.inc(LOG_STREAM_DROPPED_BYTES, overflow, asset_type=self.asset_type)
+            self._stats.written += size
+            if started or len(self._buffer) >= self._streamer.flush_size:
+                self._streamer._condition.notify_all()
+        self._streamer.metrics.inc(LOG_STREAM_BYTES, size, asset_type=self.asset_type)
+        return size
+
+    def close(self):
+        """Close the stream. The rest of the log is uploaded as its last part in the background."""
+        if self.closed:
+            return
+        super().close()
+        with self._streamer._condition:
+            self._streamer._condition.notify_all()
+
+    def stats(self) -> LogStreamStats:
+        """Get the progress of the stream."""
+        with self._streamer._condition:
+            return self._stats.model_copy(update={"buffered": len(self._buffer)})
+
+    def _due(self, now: float) -> bool:
+        """Check whether a part should be uploaded now. Only called with the streamer condition held."""
+        if self._uploading or not self._buffer:
+            return False
+        return self.closed or len(self._buffer) >= self._streamer.flush_size or now - self._first_write >= self._streamer.flush_interval
+
+    def _take(self) -> bytes:
+        """Take the buffered bytes as the next part. Only called with the streamer condition held."""
+        part = bytes(self._buffer)
+        if self._dropped_since_part:
+            part = f"[... {self._dropped_since_part} bytes dropped ...]\n".encode("utf-8") + part
+            self._dropped_since_part = 0
+        self._buffer.clear()
+        self._uploading = True
+        self._parts_taken += 1
+        return part
+
+
+class LogStreamer:
+    """Upload the parts of log streams from a background thread.
+
+    Attributes
+    ----------
+        metrics (MetricsRegistry): The registry that written, dropped and uploaded bytes are recorded into.
+        buffer_size (int): The number of bytes a stream buffers at most.
+        flush_size (int): The number of buffered bytes that triggers the upload of a part.
+        flush_interval (float): The time in seconds after which buffered bytes are uploaded, however few there are.
+
+    """
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """Initialize the LogStreamer object and start its thread.
+
+        Args:
+        ----
+            metrics (MetricsRegistry): The registry to record into.
+            buffer_size (int, optional): The number of bytes a stream buffers at most. Defaults to 8 MiB.
+            flush_size (int, optional): The number of buffered bytes that triggers the upload of a part. Defaults to 1 MiB.
+            flush_interval (float, optional): The time in seconds after which buffered bytes are uploaded. Defaults to 5.
+
+        """
+        self.metrics = metrics
+        self.buffer_size = buffer_size
+        self.flush_size = min(flush_size, buffer_size)
+        self.flush_interval = flush_interval
+        self._condition = threading.Condition()
+        self._streams: List[LogStream] = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._work, name="applause-log-streamer", daemon=True)
+        self._thread.start()
+
+    def open(self, asset_name: str, asset_type: str, upload: Callable[[str, bytes], None]) -> LogStream:
+        """Open a new log stream.
+
+        Args:
+        ----
+            asset_name (str): The name of the log
+            asset_type (str): The type the parts are uploaded as
+            upload (Callable[[str, bytes], None]): Called on the streamer thread with the name and content of each part
+
+        Returns:
+        -------
+            LogStream: The stream
+
+        Raises:
+        ------
+            Exception: If the streamer has been closed
+
+        """
+        with self._condition:
+            if self._closed:
+                raise Exception("Log streamer - Already closed")
+            stream = LogStream(self, asset_name, asset_type, upload)
+            self._streams.append(stream)
+            return stream
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Close every stream, and wait for their last parts to be uploaded.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+
+        Returns:
+        -------
+            bool: Whether every part was uploaded before the timeout
+
+        """
+        with self._condition:
+            streams = list(self._streams)
+        for stream in streams:
+            stream.close()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _next(self) -> Optional[LogStream]:
+        """Wait for a stream with a part to upload. None once the streamer is closed and every stream is finished."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                for stream in self._streams:
+                    if stream._due(now):
+                        return stream
+                # Streams that are closed and have nothing left to upload are done with
+                self._streams = [stream for stream in self._streams if not (stream.closed and not stream._buffer and not stream._uploading)]
+                if self._closed and not self._streams:
+                    return None
+                waits = [stream._first_write + self.flush_interval - now for stream in self._streams if stream._buffer and not stream._uploading]
+                self._condition.wait(max(0.0, min(waits)) if waits else None)
+
+    def _work(self):
+        while True:
+            stream = self._next()
+            if stream is None:
+                return
+            with self._condition:
+                part = stream._take()
+                name = part_name(stream.asset_name, stream._parts_taken)
+            try:
+                stream._upload(name, part)
+                status = "ok"
+            except Exception as e:
+                # The part is lost, the next parts of the stream are still uploaded
+                print(f"Could not upload {name} of log {stream.asset_name}: {e}")
+                status = "error"
+            self.metrics.inc(LOG_STREAM_PARTS, asset_type=stream.asset_type, status=status)
+            with self._condition:
+                stream._uploading = False
+                if status == "ok":
+                    stream._stats.parts += 1
+                    stream._stats.uploaded += len(part)
+                else:
+                    stream._stats.failed_parts += 1
+                self._condition.notify_all()
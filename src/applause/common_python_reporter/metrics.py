@@ -0,0 +1,336 @@
+"""In-memory instrumentation for the Applause clients and reporter.
+
+The AutoApi, PublicApi, HeartbeatService and RunReporter record what they do into a MetricsRegistry:
+per-endpoint latency histograms, request and response byte counts, status codes, retries and queue depths.
+Recording only updates a few numbers under a lock, so the registry can stay enabled all the time.
+A snapshot of the registry can be exported in the Prometheus text format, or written to a JSON file,
+which the RunReporter does at the end of a run when ApplauseConfig.metrics_file is set.
+
+A custom registry can be plugged in by subclassing MetricsRegistry and passing it to AutoApi and PublicApi,
+for example to forward the measurements to an existing monitoring system.
+
+Typical usage example:
+
+    config = ApplauseConfig(api_key="api_key", product_id=123, metrics_file="applause_metrics.json")
+    reporter = ApplauseReporter(config)
+    ...Report the run...
+    snapshot = reporter.metrics.snapshot()
+    print(reporter.metrics.to_prometheus())
+"""
+
+import threading
+from bisect import bisect_left
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = "applause_http_requests_total"
+HTTP_REQUEST_DURATION = "applause_http_request_duration_seconds"
+HTTP_REQUEST_BYTES = "applause_http_request_bytes_total"
+HTTP_RESPONSE_BYTES = "applause_http_response_bytes_total"
+HTTP_REQUESTS_IN_FLIGHT = "applause_http_requests_in_flight"
+RETRIES = "applause_retries_total"
+RATE_LIMIT_WAIT = "applause_rate_limit_wait_seconds"
+QUEUE_DEPTH = "applause_queue_depth"
+HEARTBEATS = "applause_heartbeats_total"
+TEST_CASES_STARTED = "applause_test_cases_started_total"
+TEST_CASES_IN_PROGRESS = "applause_test_cases_in_progress"
+TEST_RESULTS_SUBMITTED = "applause_test_results_submitted_total"
+ASSETS_UPLOADED = "applause_assets_uploaded_total"
+FIELDS_TRUNCATED = "applause_fields_truncated_total"
+FIELDS_DIVERTED = "applause_fields_diverted_total"
+FIELDS_DIVERT_FAILED = "applause_fields_divert_failed_total"
+RESULTS_COALESCED = "applause_results_coalesced_total"
+SCHEDULER_WAIT = "applause_scheduler_wait_seconds"
+SCHEDULER_PROMOTIONS = "applause_scheduler_promotions_total"
+ASSET_STAGE_DURATION = "applause_asset_stage_duration_seconds"
+UPLOAD_BYTES = "applause_upload_bytes_total"
+UPLOAD_BANDWIDTH_LIMIT = "applause_upload_bandwidth_limit_bytes_per_second"
+UPLOAD_THROUGHPUT = "applause_upload_throughput_bytes_per_second"
+LOG_STREAM_BYTES = "applause_log_stream_bytes_total"
+LOG_STREAM_DROPPED_BYTES = "applause_log_stream_dropped_bytes_total"
+LOG_STREAM_PARTS = "applause_log_stream_parts_total"
+WARM_UP_DURATION = "applause_warm_up_duration_seconds"
+REQUEST_BODY_RAW_BYTES = "applause_request_body_raw_bytes_total"
+REQUEST_BODY_COMPRESSED_BYTES = "applause_request_body_compressed_bytes_total"
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class MetricSample(BaseModel):
+    """A single labelled value of a counter or gauge.
+
+    Attributes
+    ----------
+        labels: The labels identifying the sample
+        value: The current value
+
+    """
+
+    labels: Dict[str, str]
+    value: float
+
+
+class HistogramSample(BaseModel):
+    """A single labelled histogram.
+
+    Attributes
+    ----------
+        labels: The labels identifying the sample
+        buckets: The upper bounds of the buckets
+        counts: The number of observations in each bucket, with a final entry for observations above every bound
+        count: The total number of observations
+        sum: The sum of all observations
+
+    """
+
+    labels: Dict[str, str]
+    buckets: List[float]
+    counts: List[int]
+    count: int
+    sum: float
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls into.
+
+        Args:
+        ----
+            q (float): The quantile to estimate, between 0 and 1
+
+        Returns:
+        -------
+            Optional[float]: The estimate, None if there are no observations, or inf if it is above every bucket
+
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsSnapshot(BaseModel):
+    """A point in time copy of every metric in a registry.
+
+    Attributes
+    ----------
+        counters: The counters, by metric name
+        gauges: The gauges, by metric name
+        histograms: The histograms, by metric name
+
+    """
+
+    counters: Dict[str, List[MetricSample]] = {}
+    gauges: Dict[str, List[MetricSample]] = {}
+    histograms: Dict[str, List[HistogramSample]] = {}
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Get the value of a counter, summed over every sample matching the provided labels."""
+        return sum(sample.value for sample in self.counters.get(name, []) if _matches(sample.labels, labels))
+
+    def gauge(self, name: str, **labels: str) -> float:
+        """Get the value of a gauge, summed over every sample matching the provided labels."""
+        return sum(sample.value for sample in self.gauges.get(name, []) if _matches(sample.labels, labels))
+
+    def histogram(self, name: str, **labels: str) -> Optional[HistogramSample]:
+        """Get the first histogram matching the provided labels."""
+        return next((sample for sample in self.histograms.get(name, []) if _matches(sample.labels, labels)), None)
+
+
+def _matches(sample_labels: Dict[str, str], labels: Dict[str, str]) -> bool:
+    return all(sample_labels.get(key) == value for key, value in labels.items())
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """A thread safe, in-memory store of counters, gauges and histograms.
+
+    Every metric is identified by its name and a set of labels, passed as keyword arguments.
+    """
+
+    def __init__(self):
+        """Initialize the MetricsRegistry object."""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, _Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        """Increase a counter.
+
+        Args:
+        ----
+            name (str): The name of the counter
+            amount (float, optional): The amount to increase the counter by. Defaults to 1.
+            **labels (str): The labels of the counter
+
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._counters.setdefault(name, {})
+            values[key] = values.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: str):
+        """Set a gauge to a value.
+
+        Args:
+        ----
+            name (str): The name of the gauge
+            value (float): The new value of the gauge
+            **labels (str): The labels of the gauge
+
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def add_gauge(self, name: str, delta: float, **labels: str):
+        """Move a gauge up or down, for example to track the depth of a queue.
+
+        Args:
+        ----
+            name (str): The name of the gauge
+            delta (float): The amount to add to the gauge, negative to decrease it
+            **labels (str): The labels of the gauge
+
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._gauges.setdefault(name, {})
+            values[key] = values.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS, **labels: str):
+        """Record an observation in a histogram.
+
+        Args:
+        ----
+            name (str): The name of the histogram
+            value (float): The observed value
+            buckets (Tuple[float, ...], optional): The sorted bucket bounds, used when the histogram is first created
+            **labels (str): The labels of the histogram
+
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Take a consistent copy of every metric.
+
+        Returns
+        -------
+            MetricsSnapshot: The copy of the metrics
+
+        """
+        with self._lock:
+            return MetricsSnapshot(
+                counters={name: [MetricSample(labels=dict(key), value=value) for key, value in values.items()] for name, values in self._counters.items()},
+                gauges={name: [MetricSample(labels=dict(key), value=value) for key, value in values.items()] for name, values in self._gauges.items()},
+                histograms={
+                    name: [
+                        HistogramSample(labels=dict(key), buckets=list(histogram.buckets), counts=list(histogram.counts), count=histogram.count, sum=histogram.sum)
+                        for key, histogram in values.items()
+                    ]
+                    for name, values in self._histograms.items()
+                },
+            )
+
+    def reset(self):
+        """Remove every metric from the registry."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """Export the metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+            str: The metrics, one sample per line
+
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for kind, samples_by_name in (("counter", snapshot.counters), ("gauge", snapshot.gauges)):
+            for name, samples in sorted(samples_by_name.items()):
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(sample.labels)} {_format_value(sample.value)}" for sample in samples)
+        for name, samples in sorted(snapshot.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for sample in samples:
+                cumulative = 0
+                for bound, count in zip(sample.buckets + [float("inf")], sample.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(sample.labels, le=_format_value(bound))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(sample.labels)} {_format_value(sample.sum)}")
+                lines.append(f"{name}_count{_format_labels(sample.labels)} {sample.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        """Write a snapshot of the metrics to a JSON file.
+
+        Args:
+        ----
+            path (str): The path of the file to write
+
+        """
+        with open(path, "w") as f:
+            f.write(self.snapshot().model_dump_json(indent=2))
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels.keys(), escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def record_http_request(metrics: MetricsRegistry, client: str, endpoint: str, status: str, elapsed: float, request_bytes: int, response_bytes: int):
+    """Record the outcome of a single HTTP request made by one of the clients.
+
+    Args:
+    ----
+        metrics (MetricsRegistry): The registry to record into
+        client (str): The client that made the request, such as auto_api
+        endpoint (str): The logical name of the endpoint that was called
+        status (str): The HTTP status code, or "error" if no response was received
+        elapsed (float): The time taken by the request in seconds
+        request_bytes (int): The size of the request body
+        response_bytes (int): The size of the response body
+
+    """
+    metrics.inc(HTTP_REQUESTS, client=client, endpoint=endpoint, status=status)
+    metrics.observe(HTTP_REQUEST_DURATION, elapsed, client=client, endpoint=endpoint)
+    metrics.inc(HTTP_REQUEST_BYTES, request_bytes, client=client, endpoint=endpoint)
+    metrics.inc(HTTP_RESPONSE_BYTES, response_bytes, client=client, endpoint=endpoint)
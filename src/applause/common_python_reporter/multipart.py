@@ -0,0 +1,240 @@
+"""Streaming encoding of multipart/form-data request bodies.
+
+requests builds multipart bodies in memory, so uploading a file through its files argument holds the whole file,
+and a copy of it, until the upload is done. MultipartEncoder reads the form fields and the file as the body is
+sent instead, a chunk at a time. Its length is known up front, so the body is sent with a Content-Length header,
+and it can be passed as the data of a request on any transport.
+
+Content produced as a stream of chunks, such as a video capture, is sent with MultipartStream instead. Its length
+is not known up front, so the body is sent with chunked transfer encoding, and the chunks are only read as the
+body is sent. Chunks from an async iterator are pulled through iter_async_chunks.
+
+Typical usage example:
+
+    with open("video.mp4", "rb") as f:
+        body = MultipartEncoder({"assetName": "video.mp4"}, "file", "video.mp4", f)
+        requests.post(url, data=body, headers={"Content-Type": body.content_type})
+
+    body = MultipartStream({"assetName": "capture.mp4"}, "file", "capture.mp4", iter_async_chunks(recorder.chunks()))
+    requests.post(url, data=body, headers={"Content-Type": body.content_type})
+"""
+
+import asyncio
+import io
+import os
+import threading
+import uuid
+from typing import AsyncIterable, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _quote(value: str) -> str:
+    """Escape a name for a Content-Disposition header, the way browsers do."""
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+def _remaining_size(file: BinaryIO) -> int:
+    """Get the number of bytes left to read from a file, from its current position."""
+    position = file.tell()
+    try:
+        return os.fstat(file.fileno()).st_size - position
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        end = file.seek(0, io.SEEK_END)
+        file.seek(position)
+        return end - position
+
+
+def _envelope(fields: Dict[str, str], file_field: str, file_name: str, file_content_type: str, boundary: str) -> Tuple[bytes, bytes]:
+    """Encode the parts sent before the content of the file, and the end of the body sent after it."""
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'.encode("utf-8") + str(value).encode("utf-8") + b"\r\n" for name, value in fields.items()
+    )
+    disposition = f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote(file_field)}"; filename="{_quote(file_name)}"\r\n'
+    head += (disposition + f"Content-Type: {file_content_type}\r\n\r\n").encode("utf-8")
+    return head, f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+
+class MultipartEncoder:
+    """A multipart/form-data body made of form fields followed by one file, read as it is sent.
+
+    Attributes
+    ----------
+        boundary (str): The boundary between the parts of the body.
+        content_type (str): The Content-Type header of the body, including its boundary.
+
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        file_field: str,
+        file_name: str,
+        file: BinaryIO,
+        file_content_type: str = "application/octet-stream",
+        boundary: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Initialize the MultipartEncoder object.
+
+        Args:
+        ----
+            fields (Dict[str, str]): The form fields, sent before the file
+            file_field (str): The name of the form field of the file
+            file_name (str): The file name sent with the file
+            file (BinaryIO): The file to send, from its current position. It is not closed.
+            file_content_type (str, optional): The content type of the file. Defaults to application/octet-stream.
+            boundary (Optional[str], optional): The boundary between the parts. Defaults to a random boundary.
+            chunk_size (int, optional): The size of the chunks yielded when iterating over the body. Defaults to 64 KiB.
+
+        """
+        self.boundary = boundary if boundary is not None else uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.chunk_size = chunk_size
+        head, tail = _envelope(fields, file_field, file_name, file_content_type, self.boundary)
+        self._length = len(head) + _remaining_size(file) + len(tail)
+        self._parts: List[BinaryIO] = [io.BytesIO(head), file, io.BytesIO(tail)]
+
+    def __len__(self) -> int:
+        """Get the size of the whole body in bytes."""
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the next bytes of the body.
+
+        Args:
+        ----
+            size (int, optional): The maximum number of bytes to read. Defaults to reading the rest of the body.
+
+        Returns:
+        -------
+            bytes: The bytes read, empty once the whole body has been read
+
+        """
+        chunks = []
+        while self._parts and size != 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over the rest of the body in chunks."""
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class MultipartStream:
+    """A multipart/form-data body made of form fields followed by a file produced as a stream of chunks.
+
+    The body has no length, so it is sent with chunked transfer encoding. It can only be sent once.
+
+    Attributes
+    ----------
+        boundary (str): The boundary between the parts of the body.
+        content_type (str): The Content-Type header of the body, including its boundary.
+
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        file_field: str,
+        file_name: str,
+        chunks: Iterable[bytes],
+        file_content_type: str = "application/octet-stream",
+        boundary: Optional[str] = None,
+    ):
+        """Initialize the MultipartStream object.
+
+        Args:
+        ----
+            fields (Dict[str, str]): The form fields, sent before the file
+            file_field (str): The name of the form field of the file
+            file_name (str): The file name sent with the file
+            chunks (Iterable[bytes]): The content of the file, read a chunk at a time as the body is sent
+            file_content_type (str, optional): The content type of the file. Defaults to application/octet-stream.
+            boundary (Optional[str], optional): The boundary between the parts. Defaults to a random boundary.
+
+        """
+        self.boundary = boundary if boundary is not None else uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._head, self._tail = _envelope(fields, file_field, file_name, file_content_type, self.boundary)
+        self._chunks = iter(chunks)
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over the body, skipping empty chunks, which would end a chunked body early."""
+        yield self._head
+        for chunk in self._chunks:
+            if chunk:
+                yield bytes(chunk)
+        yield self._tail
+
+    def close(self):
+        """Close the iterator of the chunks, if it can be closed, for example when the body could not be sent."""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def iter_async_chunks(chunks: AsyncIterable[bytes], loop: Optional[asyncio.AbstractEventLoop] = None) -> Iterator[bytes]:
+    """Iterate over an async iterator of chunks from synchronous code, pulling one chunk at a time.
+
+    Args:
+    ----
+        chunks (AsyncIterable[bytes]): The chunks
+        loop (Optional[asyncio.AbstractEventLoop], optional): The event loop the async iterator belongs to, running in
+            another thread. This is the loop of the caller when the upload runs in one of its executor threads, for
+            example through loop.run_in_executor. Defaults to iterating on a private event loop in a helper thread.
+
+    Returns:
+    -------
+        Iterator[bytes]: The chunks, each one pulled from the async iterator when it is needed
+
+    Raises:
+    ------
+        RuntimeError: If the provided loop is running in the calling thread, which the iteration would deadlock
+
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is not None and loop is running:
+        raise RuntimeError("Async chunks cannot be read from the thread running their event loop, upload them from an executor thread")
+    thread = None
+    if loop is None:
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="applause-async-chunks", daemon=True)
+        thread.start()
+    iterator = chunks.__aiter__()
+
+    async def next_chunk() -> bytes:
+        return await iterator.__anext__()
+
+    async def close():
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+    try:
+        while True:
+            try:
+                chunk = asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        try:
+            asyncio.run_coroutine_threadsafe(close(), loop).result()
+        finally:
+            if thread is not None:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
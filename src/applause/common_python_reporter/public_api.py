@@ -7,15 +7,26 @@ config = ApplauseConfig(...)
 public_api = PublicApi(config)
 public_api.submit_result(123, TestRunAutoResultDto(...))
 # Submit additional results as needed
+
+# Or submit many results concurrently over pooled connections
+report = public_api.submit_results([(123, TestRunAutoResultDto(...)), (456, TestRunAutoResultDto(...))])
+print(f"{report.submitted} submitted, {len(report.failures)} failed at {report.throughput:.1f} results/s")
 """
 
 import requests
+import time
 from .config import ApplauseConfig
 from .dtos import to_camel
 from .errors import ApplauseClientError
+from .json_codec import create_json_codec
+from .metrics import HTTP_REQUESTS_IN_FLIGHT, QUEUE_DEPTH, MetricsRegistry, record_http_request
+from .transport import create_transport
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Iterable, List, Optional, Tuple
+
+DEFAULT_POOL_SIZE = 16
 
 
 class TestRunAutoResultStatus(str, Enum):
@@ -29,6 +40,7 @@ class TestRunAutoResultStatus(str, Enum):
         ERROR: The test result had an error
     """
 
+    __test__ = False
     PASSED = ("PASSED",)
     FAILED = ("FAILED",)
     SKIPPED = ("SKIPPED",)
@@ -96,25 +108,73 @@ class TestRunAutoResultDto(BaseModel):
     endTime: Optional[str] = None
 
 
+class BulkSubmitFailure(BaseModel):
+    """A result that could not be submitted as part of a bulk submission.
+
+    Attributes
+    ----------
+        index: The position of the result in the submitted batch
+        test_case_id: The id of the test case
+        message: The error message
+        status_code (optional): The HTTP status code, if the server responded
+
+    """
+
+    index: int
+    test_case_id: int
+    message: str
+    status_code: Optional[int] = None
+
+
+class BulkSubmitReport(BaseModel):
+    """The outcome of a bulk submission of test results.
+
+    Attributes
+    ----------
+        submitted: The number of results that were submitted successfully
+        failures: The results that could not be submitted
+        elapsed_seconds: The wall time taken by the whole batch
+
+    """
+
+    submitted: int = 0
+    failures: List[BulkSubmitFailure] = []
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """The number of results processed per second."""
+        total = self.submitted + len(self.failures)
+        return total / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
 class PublicApi:
     """HTTP Client for interacting with the Applause Public API.
 
     Attributes
     ----------
         config: The configuration for the client
+        transport: The pooled HTTP transport shared by all calls
+        metrics: The registry that every request is recorded into
+        json_codec: The codec that the submitted results are encoded with
 
     """
 
-    def __init__(self, config: ApplauseConfig):
+    def __init__(self, config: ApplauseConfig, pool_size: int = DEFAULT_POOL_SIZE, metrics: Optional[MetricsRegistry] = None):
         """Initialize the PublicApi object.
 
         Args:
         ----
             config (ApplauseConfig): The configuration for the client
+            pool_size (int, optional): The maximum number of pooled connections to the Public API
+            metrics (Optional[MetricsRegistry], optional): The registry to record requests into. Defaults to a new registry.
 
         """
         self.config = config
-        pass
+        self.pool_size = pool_size
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.transport = create_transport(config.transport, pool_size=pool_size)
+        self.json_codec = create_json_codec(config.json_codec)
 
     def submit_result(self, test_case_id: int, info: TestRunAutoResultDto) -> None:
         """Submit a test result to the Applause Public API.
@@ -126,12 +186,74 @@ class PublicApi:
 
         """
         headers = {"X-Api-Key": self.config.api_key, "Content-Type": "application/json"}
+        body = self.json_codec.dumps(info.model_dump(mode="json"))
+        status = "error"
+        response_bytes = 0
+        self.metrics.add_gauge(HTTP_REQUESTS_IN_FLIGHT, 1, client="public_api")
+        start = time.perf_counter()
         try:
-            response = requests.post(
-                f"{self.config.auto_api_base_url}v2/test-case-results/{test_case_id}/submit",
-                json=info,
+            response = self.transport.request(
+                "POST",
+                f"{self.config.public_api_base_url}v2/test-case-results/{test_case_id}/submit",
+                data=body,
                 headers=headers,
             )
+            status = str(response.status_code)
+            response_bytes = len(response.content)
             response.raise_for_status()
-        except requests.RequestException as e:
-            raise ApplauseClientError(response) from e
+        except requests.exceptions.HTTPError as e:
+            raise ApplauseClientError(e.response) from e
+        finally:
+            self.metrics.add_gauge(HTTP_REQUESTS_IN_FLIGHT, -1, client="public_api")
+            record_http_request(self.metrics, "public_api", "submit-result", status, time.perf_counter() - start, len(body), response_bytes)
+
+    def submit_results(self, results: Iterable[Tuple[int, TestRunAutoResultDto]], max_workers: Optional[int] = None) -> BulkSubmitReport:
+        """Submit many test results to the Applause Public API concurrently.
+
+        Results are serialized and posted on a bounded pool of worker threads sharing the pooled connections
+        of this client. Only a small window of results is in flight at a time, so the input can be a lazy
+        iterable of any size. A failed result is recorded in the report and does not stop the batch.
+
+        Args:
+        ----
+            results (Iterable[Tuple[int, TestRunAutoResultDto]]): Pairs of test case id and test result information
+            max_workers (Optional[int], optional): The number of concurrent submissions. Defaults to the pool size.
+
+        Returns:
+        -------
+            BulkSubmitReport: The number of submitted results, the failures and the throughput of the batch
+
+        """
+        max_workers = max_workers if max_workers is not None else self.pool_size
+        report = BulkSubmitReport()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="applause-public-api") as executor:
+            in_flight = {}
+            for index, (test_case_id, info) in enumerate(results):
+                if len(in_flight) >= max_workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record_outcome(report, future, *in_flight.pop(future))
+                in_flight[executor.submit(self.submit_result, test_case_id, info)] = (index, test_case_id)
+                self.metrics.set_gauge(QUEUE_DEPTH, len(in_flight), queue="public_api_bulk")
+            for future, (index, test_case_id) in in_flight.items():
+                self._record_outcome(report, future, index, test_case_id)
+        self.metrics.set_gauge(QUEUE_DEPTH, 0, queue="public_api_bulk")
+        report.failures.sort(key=lambda failure: failure.index)
+        report.elapsed_seconds = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def _record_outcome(report: BulkSubmitReport, future, index: int, test_case_id: int):
+        error = future.exception()
+        if error is None:
+            report.submitted += 1
+            return
+        report.failures.append(
+            BulkSubmitFailure(
+                index=index,
+                test_case_id=test_case_id,
+                message=str(error),
+                status_code=getattr(error, "status_code", None),
+            )
+        )
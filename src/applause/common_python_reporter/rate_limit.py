@@ -0,0 +1,278 @@
+"""Client side rate limiting of the Automation API calls.
+
+Every AutoApi call belongs to an endpoint class, such as results for starting test cases and submitting their
+results. A token bucket can be configured for each class through ApplauseConfig.rate_limits: the bucket allows
+bursts of up to its burst size, and refills at its rate. A call that finds the bucket empty reserves the next
+token and sleeps until it is available, so bursts are smoothed into a steady flow instead of tripping server side
+throttling. When the server does respond with 429 Too Many Requests, the bucket is drained for the Retry-After
+period so that every thread sharing it backs off together.
+
+Buckets are shared by every thread using the same AutoApi. A bucket can also be shared by every process on the
+same machine by giving it a shared_file: its state is then kept in that file, under an exclusive file lock.
+Shared buckets rely on fcntl, so they are only available on POSIX systems.
+
+Typical usage example:
+
+    config = ApplauseConfig(
+        api_key="api_key",
+        product_id=123,
+        rate_limits={"results": RateLimitOptions(rate=50, burst=100, shared_file="/tmp/applause-results.bucket")},
+    )
+    auto_api = AutoApi(config)
+    ...Report the run...
+    print(auto_api.rate_limiter.stats()["results"].mean_wait_seconds)
+"""
+
+import os
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pydantic import BaseModel
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+ENDPOINT_CLASSES = {
+    "test-run/create": "runs",
+    "test-run/end": "runs",
+    "create-result": "results",
+    "test-result": "results",
+    "provider-info": "results",
+    "upload": "assets",
+    "sdk-heartbeat": "heartbeat",
+    "email/get-address": "email",
+    "email/download-email": "email",
+}
+
+_STATE = struct.Struct("<dd")
+
+
+class RateLimitOptions(BaseModel):
+    """The token bucket of an endpoint class.
+
+    Attributes
+    ----------
+        rate: The number of calls allowed per second on average
+        burst: The number of calls that can be made at once after a quiet period
+        shared_file (optional): A file to keep the state of the bucket in, to share it between processes
+
+    """
+
+    rate: float
+    burst: float = 1
+    shared_file: Optional[str] = None
+
+
+class RateLimitStats(BaseModel):
+    """The time spent waiting for a token bucket.
+
+    Attributes
+    ----------
+        acquired: The number of calls that were let through
+        delayed: The number of calls that had to wait
+        total_wait_seconds: The time spent waiting by every call
+        max_wait_seconds: The longest time a single call waited
+
+    """
+
+    acquired: int = 0
+    delayed: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        """The average time a call waited, including the calls that did not wait."""
+        return self.total_wait_seconds / self.acquired if self.acquired else 0.0
+
+
+class TokenBucket:
+    """A token bucket shared by the threads of a process.
+
+    Attributes
+    ----------
+        rate (float): The number of tokens added per second.
+        burst (float): The maximum number of tokens the bucket holds.
+
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        """Initialize the TokenBucket object.
+
+        Args:
+        ----
+            rate (float): The number of tokens added per second.
+            burst (float, optional): The maximum number of tokens the bucket holds. Defaults to 1.
+
+        """
+        if rate <= 0:
+            raise ValueError("The rate of a token bucket must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._stamp = self._now()
+        self._stats = RateLimitStats()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Take tokens from the bucket, sleeping until they are available.
+
+        Tokens are reserved before sleeping, so concurrent callers are let through in the order they arrived.
+
+        Args:
+        ----
+            tokens (float, optional): The number of tokens to take. Defaults to 1.
+
+        Returns:
+        -------
+            float: The time spent waiting, in seconds
+
+        """
+        with self._state() as (available, stamp):
+            wait = max(0.0, (tokens - available) / self.rate)
+            self._save(available - tokens, stamp)
+        with self._lock:
+            self._stats.acquired += 1
+            if wait > 0:
+                self._stats.delayed += 1
+                self._stats.total_wait_seconds += wait
+                self._stats.max_wait_seconds = max(self._stats.max_wait_seconds, wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def drain(self, seconds: float):
+        """Empty the bucket so that no tokens are available for the provided time, for example after a 429 response.
+
+        Args:
+        ----
+            seconds (float): The time until the next token is available
+
+        """
+        with self._state() as (available, stamp):
+            self._save(min(available, -seconds * self.rate), stamp)
+
+    def stats(self) -> RateLimitStats:
+        """Get the waiting statistics of the calls made through this bucket object."""
+        with self._lock:
+            return self._stats.model_copy()
+
+    def close(self):
+        """Release the resources of the bucket. An in-memory bucket holds none."""
+        pass
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    @contextmanager
+    def _state(self) -> Iterator[Tuple[float, float]]:
+        """Lock the bucket and yield its tokens, refilled up to the current time."""
+        with self._lock:
+            now = self._now()
+            yield min(self.burst, self._tokens + (now - self._stamp) * self.rate), now
+
+    def _save(self, tokens: float, stamp: float):
+        """Store the state of the bucket. Only called within _state."""
+        self._tokens = tokens
+        self._stamp = stamp
+
+
+class FileTokenBucket(TokenBucket):
+    """A token bucket shared by every process using the same state file.
+
+    The state is read and written under an exclusive lock on the file, and timed with the wall clock, which all
+    processes on the machine agree on.
+
+    Attributes
+    ----------
+        path (str): The path of the file holding the state of the bucket.
+
+    """
+
+    def __init__(self, path: str, rate: float, burst: float = 1):
+        """Initialize the FileTokenBucket object.
+
+        Args:
+        ----
+            path (str): The path of the file holding the state of the bucket. It is created if needed.
+            rate (float): The number of tokens added per second.
+            burst (float, optional): The maximum number of tokens the bucket holds. Defaults to 1.
+
+        Raises:
+        ------
+            RuntimeError: If file locks are not available on this platform
+
+        """
+        if fcntl is None:
+            raise RuntimeError("Shared token buckets require fcntl, which is only available on POSIX systems")
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        # The file is also closed when a bucket that was not closed is garbage collected
+        self._closer = weakref.finalize(self, os.close, self._fd)
+        super().__init__(rate, burst)
+
+    def close(self):
+        """Close the state file, if it is still open."""
+        self._closer()
+
+    def _now(self) -> float:
+        return time.time()
+
+    @contextmanager
+    def _state(self) -> Iterator[Tuple[float, float]]:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                data = os.pread(self._fd, _STATE.size, 0)
+                now = self._now()
+                tokens, stamp = _STATE.unpack(data) if len(data) == _STATE.size else (self.burst, now)
+                yield min(self.burst, tokens + max(0.0, now - stamp) * self.rate), now
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _save(self, tokens: float, stamp: float):
+        os.pwrite(self._fd, _STATE.pack(tokens, stamp), 0)
+
+
+class RateLimiter:
+    """The token buckets of the endpoint classes of a client.
+
+    Endpoints are looked up by their own name first, then by the name of their endpoint class. Endpoints without
+    a bucket are not limited.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, RateLimitOptions]] = None):
+        """Initialize the RateLimiter object.
+
+        Args:
+        ----
+            limits (Optional[Dict[str, RateLimitOptions]], optional): The buckets, by endpoint or endpoint class name.
+
+        """
+        self.buckets: Dict[str, TokenBucket] = {}
+        for name, options in (limits or {}).items():
+            if options.shared_file is not None:
+                self.buckets[name] = FileTokenBucket(options.shared_file, options.rate, options.burst)
+            else:
+                self.buckets[name] = TokenBucket(options.rate, options.burst)
+
+    def bucket_for(self, endpoint: str) -> Optional[Tuple[str, TokenBucket]]:
+        """Get the name and bucket that limit an endpoint, if any."""
+        for name in (endpoint, ENDPOINT_CLASSES.get(endpoint)):
+            if name is not None and name in self.buckets:
+                return name, self.buckets[name]
+        return None
+
+    def stats(self) -> Dict[str, RateLimitStats]:
+        """Get the waiting statistics of every bucket, by name."""
+        return {name: bucket.stats() for name, bucket in self.buckets.items()}
+
+    def close(self):
+        """Close every bucket, releasing the state files of the shared ones."""
+        for bucket in self.buckets.values():
+            bucket.close()
@@ -0,0 +1,212 @@
+"""Recording and replaying of the HTTP traffic of the Applause clients.
+
+RecordingAdapter is a requests transport adapter that sends requests as usual, and appends every request and
+response pair to a JSON lines file together with its timings. ReplayAdapter serves those responses back without
+any network access, with the original latencies or scaled ones. Together they make it possible to capture the
+traffic of a real test suite once, and then profile the reporter or run performance regression tests against
+exactly the same traffic shape offline.
+
+Only what is needed to replay the responses is recorded: the method and path of each request, the size of its
+body, and the status, content type, body and latency of the response.
+
+AutoApi mounts the adapters itself when ApplauseConfig.record_file or ApplauseConfig.replay_file is set.
+
+Typical usage example:
+
+    # Record the traffic of a run
+    config = ApplauseConfig(api_key="api_key", product_id=123, record_file="traffic.jsonl")
+    ...Report the run...
+
+    # Replay it later, twice as fast
+    config = ApplauseConfig(api_key="api_key", product_id=123, replay_file="traffic.jsonl", replay_latency_scale=0.5)
+    ...Report the same run...
+"""
+
+import base64
+import threading
+import time
+from collections import deque
+from http.client import responses as reasons
+from io import BytesIO
+from pydantic import BaseModel
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class RecordedExchange(BaseModel):
+    """A single recorded request and response pair.
+
+    Attributes
+    ----------
+        offset: The time the request was sent at, in seconds since the recording started
+        elapsed: The time until the response was received, in seconds
+        method: The HTTP method of the request
+        path: The path and query of the request url
+        request_size: The size of the request body in bytes, 0 if it was streamed
+        status: The status code of the response
+        content_type (optional): The content type of the response
+        body: The body of the response, as text or base64
+        base64: Whether the body is base64 encoded
+
+    """
+
+    offset: float
+    elapsed: float
+    method: str
+    path: str
+    request_size: int = 0
+    status: int
+    content_type: Optional[str] = None
+    body: str = ""
+    base64: bool = False
+
+    def content(self) -> bytes:
+        """Get the body of the response as bytes."""
+        return base64.b64decode(self.body) if self.base64 else self.body.encode("utf-8")
+
+
+def _request_path(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def load_recording(path: str) -> List[RecordedExchange]:
+    """Load every exchange from a recording file.
+
+    Args:
+    ----
+        path (str): The path of the recording file
+
+    Returns:
+    -------
+        List[RecordedExchange]: The exchanges, in the order their responses were received
+
+    """
+    with open(path) as f:
+        return [RecordedExchange.model_validate_json(line) for line in f if line.strip()]
+
+
+class RecordingAdapter(HTTPAdapter):
+    """A transport adapter that appends every request and response pair it sends to a recording file.
+
+    Response bodies are read completely before they are returned, so streamed responses are buffered in memory
+    while recording.
+
+    Attributes
+    ----------
+        path (str): The path of the recording file the exchanges are appended to.
+
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """Initialize the RecordingAdapter object.
+
+        Args:
+        ----
+            path (str): The path of the recording file the exchanges are appended to.
+            **kwargs: Additional arguments passed on to HTTPAdapter, such as the pool size.
+
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        """Send the request and record it together with its response."""
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content
+        elapsed = time.perf_counter() - start
+        try:
+            body, encoded = content.decode("utf-8"), False
+        except UnicodeDecodeError:
+            body, encoded = base64.b64encode(content).decode("ascii"), True
+        exchange = RecordedExchange(
+            offset=start - self._start,
+            elapsed=elapsed,
+            method=request.method,
+            path=_request_path(request.url),
+            request_size=len(request.body) if isinstance(request.body, (bytes, str)) else 0,
+            status=response.status_code,
+            content_type=response.headers.get("Content-Type"),
+            body=body,
+            base64=encoded,
+        )
+        line = exchange.model_dump_json()
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """A transport adapter that serves the responses of a recording instead of sending requests.
+
+    Each request is answered with the next unused recorded response for the same method and path, in recording
+    order, so a reporter repeating the recorded run receives the same ids it did when the run was recorded.
+
+    Attributes
+    ----------
+        latency_scale (float): The factor the recorded latencies are multiplied by, 0 to respond immediately.
+
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0):
+        """Initialize the ReplayAdapter object.
+
+        Args:
+        ----
+            path (str): The path of the recording file to serve.
+            latency_scale (float, optional): The factor the recorded latencies are multiplied by. Defaults to 1.0.
+
+        """
+        super().__init__()
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._exchanges: Dict[Tuple[str, str], Deque[RecordedExchange]] = {}
+        for exchange in load_recording(path):
+            self._exchanges.setdefault((exchange.method, exchange.path), deque()).append(exchange)
+
+    def remaining(self) -> int:
+        """Get the number of recorded responses that have not been served yet."""
+        with self._lock:
+            return sum(len(exchanges) for exchanges in self._exchanges.values())
+
+    def send(self, request: PreparedRequest, stream: bool = False, timeout=None, verify=True, cert=None, proxies=None) -> Response:
+        """Serve the next recorded response for the request.
+
+        Raises
+        ------
+            ConnectionError: If there is no unused recorded response for the method and path of the request
+
+        """
+        path = _request_path(request.url)
+        with self._lock:
+            exchanges = self._exchanges.get((request.method, path))
+            exchange = exchanges.popleft() if exchanges else None
+        if exchange is None:
+            raise ConnectionError(f"No recorded response for {request.method} {path}", request=request)
+        if self.latency_scale > 0:
+            time.sleep(exchange.elapsed * self.latency_scale)
+        content = exchange.content()
+        response = Response()
+        response.status_code = exchange.status
+        response.reason = reasons.get(exchange.status)
+        response.headers = CaseInsensitiveDict({"Content-Length": str(len(content))})
+        if exchange.content_type is not None:
+            response.headers["Content-Type"] = exchange.content_type
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = BytesIO(content)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        """Release the adapter. There is nothing to release."""
+        pass
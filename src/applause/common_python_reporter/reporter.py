@@ -5,14 +5,20 @@ AutoApi HTTP Client, the user has to manage the ids of the test run, test cases,
 results and pass them into the correct hooks. This module abstracts that away and provides a
 simpler interface to report the results of a test run.
 
+A run that is still open when the interpreter exits is ended by an exit hook, and can also be ended when one of
+the configured exit signals is received, so that the run does not wait for the inactivity timeout of the server.
+
 Typical usage example:
     ApplauseReporter = ApplauseReporter(config)
     run_id = ApplauseReporter.runner_start(tests=["test1", "test2"])
     ApplauseReporter.start_test_case("test1", "test1")
     ApplauseReporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+    ApplauseReporter.runner_end()
 """
 
+from .asset_pipeline import AssetPipeline, Stage
 from .auto_api import AutoApi
+from .checkpoint import RunCheckpoint
 from .config import ApplauseConfig
 from .dtos import (
     TestRunCreateDto,
@@ -21,11 +27,24 @@ from .dtos import (
     TestResultStatus,
     SubmitTestCaseResultDto,
     AssetType,
+    TestRunEndingStatus,
 )
+from .errors import ApplauseClientError
 from .heartbeat import HeartbeatService
-from .utils import parse_test_case_names
-import json
-from typing import List, Optional
+from .log_stream import LogStream, LogStreamer
+from .metrics import ASSETS_UPLOADED, FIELDS_DIVERT_FAILED, FIELDS_DIVERTED, FIELDS_TRUNCATED, TEST_CASES_IN_PROGRESS, TEST_CASES_STARTED, TEST_RESULTS_SUBMITTED, MetricsRegistry
+from .submission_queue import SubmissionQueue
+from .tracing import JsonFileSpanExporter, Span, Tracer
+from .utils import parse_test_case_names, truncate_middle, utf8_size
+from .warmup import DEFAULT_WAIT_TIMEOUT, WarmUp
+import atexit
+import os
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, BinaryIO, Dict, List, Optional, Union
 
 
 class RunReporter:
@@ -37,10 +56,28 @@ class RunReporter:
         auto_api (AutoApi): The auto api client
         result_map (Dict[str, int]): A map of test case ids to test case result ids
         heartbeat_service (HeartbeatService): The heartbeat service
+        metrics (MetricsRegistry): The registry that the progress of the run is recorded into
+        tracer (Tracer): The tracer that the operations of the run are traced with
+        run_span (Optional[Span]): The span covering the whole run, the parent of every test case span
+        submission_queue (Optional[SubmissionQueue]): The queue test results are submitted through, if they are queued
+        asset_pipeline (Optional[AssetPipeline]): The pipeline processing the assets of the types it has stages for
+        log_streamer (Optional[LogStreamer]): The streamer uploading the parts of the log streams, once one has been opened
+        checkpoint (Optional[RunCheckpoint]): The checkpoint that the results created and submitted are recorded into
+        ended (bool): Whether the Automation API has ended the test run
 
     """
 
-    def __init__(self, test_run_id: int, auto_api: AutoApi, heartbeat_service: HeartbeatService):
+    def __init__(
+        self,
+        test_run_id: int,
+        auto_api: AutoApi,
+        heartbeat_service: HeartbeatService,
+        metrics: Optional[MetricsRegistry] = None,
+        run_span: Optional[Span] = None,
+        submission_queue: Optional[SubmissionQueue] = None,
+        asset_pipeline: Optional[AssetPipeline] = None,
+        checkpoint: Optional[RunCheckpoint] = None,
+    ):
         """Initialize the RunReporter object.
 
         Args:
@@ -48,12 +85,35 @@ class RunReporter:
             test_run_id (int): The id of the test run
             auto_api (AutoApi): The auto api client
             heartbeat_service (HeartbeatService): The heartbeat service
+            metrics (Optional[MetricsRegistry], optional): The registry to record into. Defaults to the registry of the auto api client.
+            run_span (Optional[Span], optional): The span covering the whole run. Defaults to None.
+            submission_queue (Optional[SubmissionQueue], optional): The queue to submit test results through. Defaults to
+                submitting them right away.
+            asset_pipeline (Optional[AssetPipeline], optional): The pipeline to process assets through. Defaults to
+                uploading every asset as it is.
+            checkpoint (Optional[RunCheckpoint], optional): The checkpoint to record the results into. The results of the
+                checkpoint that were not submitted are reused when their test cases are started. Defaults to None.
 
         """
         self.auto_api = auto_api
         self.test_run_id = test_run_id
         self.hearbeat_service = heartbeat_service
         self.result_map = {}
+        self.metrics = metrics if metrics is not None else auto_api.metrics
+        self.tracer: Tracer = auto_api.tracer
+        self.run_span = run_span
+        self.submission_queue = submission_queue
+        self.asset_pipeline = asset_pipeline
+        self.log_streamer: Optional[LogStreamer] = None
+        self.checkpoint = checkpoint
+        self.ended = False
+        self._resumed_results: Dict[str, int] = {}
+        if checkpoint is not None:
+            self.result_map.update(checkpoint.results)
+            self._resumed_results = {id: result_id for id, result_id in checkpoint.results.items() if result_id not in checkpoint.submitted}
+        self._case_spans: Dict[str, Span] = {}
+        self._log_streams: Dict[str, Dict[str, LogStream]] = {}
+        self._log_streams_lock = threading.Lock()
 
     def start_test_case(
         self,
@@ -65,6 +125,9 @@ class RunReporter:
     ) -> CreateTestCaseResultResponseDto:
         """Start a test case.
 
+        If the run was resumed from a checkpoint and the test case was started but not submitted before, its result
+        is reused instead of creating another one.
+
         Args:
         ----
             id (str): The id of the test case
@@ -74,18 +137,44 @@ class RunReporter:
             applause_test_case_id (Optional[str], optional): The itw test case id. Defaults to None.
 
         """
-        parsed_test_case = parse_test_case_names(test_case_name)
-        body = CreateTestCaseResultDto(
-            test_case_name=parsed_test_case.test_case_name,
-            test_run_id=self.test_run_id,
-            itw_test_case_id=applause_test_case_id if applause_test_case_id is not None else parsed_test_case.applause_test_case_id,
-            test_case_id=test_rail_test_case_id if test_rail_test_case_id is not None else parsed_test_case.test_rail_test_case_id,
-            provider_session_ids=provider_session_ids if provider_session_ids is not None else [],
-        )
-        result = self.auto_api.start_test_case(params=body)
+        case_span = self.tracer.start_span("test case", parent=self.run_span, id=id)
+        self._case_spans[id] = case_span
+        resumed_result_id = self._resumed_results.pop(id, None)
+        if resumed_result_id is not None:
+            case_span.set_attribute("test_result_id", resumed_result_id)
+            case_span.set_attribute("resumed", True)
+            self.metrics.add_gauge(TEST_CASES_IN_PROGRESS, 1)
+            return CreateTestCaseResultResponseDto(test_result_id=resumed_result_id)
+        with self.tracer.activate(case_span), self.tracer.start_span("start_test_case"):
+            with self.tracer.start_span("parse_test_case_names"):
+                parsed_test_case = parse_test_case_names(test_case_name)
+            with self.tracer.start_span("validate CreateTestCaseResultDto"):
+                body = CreateTestCaseResultDto(
+                    test_case_name=self._apply_budget("test_case_name", parsed_test_case.test_case_name),
+                    test_run_id=self.test_run_id,
+                    itw_test_case_id=applause_test_case_id if applause_test_case_id is not None else parsed_test_case.applause_test_case_id,
+                    test_case_id=test_rail_test_case_id if test_rail_test_case_id is not None else parsed_test_case.test_rail_test_case_id,
+                    provider_session_ids=provider_session_ids if provider_session_ids is not None else [],
+                )
+            result = self.auto_api.start_test_case(params=body)
         self.result_map[id] = result.test_result_id
+        if self.checkpoint is not None:
+            self.checkpoint.record_result(id, result.test_result_id)
+        case_span.set_attribute("test_result_id", result.test_result_id)
+        self.metrics.inc(TEST_CASES_STARTED)
+        self.metrics.add_gauge(TEST_CASES_IN_PROGRESS, 1)
         return result
 
+    @property
+    def in_progress_tests(self) -> List[str]:
+        """The ids of the test cases that were started but have no submitted result."""
+        return list(self._case_spans)
+
+    @property
+    def reported_tests(self) -> List[str]:
+        """The ids of the test cases whose results were submitted, including before the run was resumed. Empty without a checkpoint."""
+        return self.checkpoint.reported_tests if self.checkpoint is not None else []
+
     def submit_test_case_result(
         self,
         id: str,
@@ -97,6 +186,10 @@ class RunReporter:
     ):
         """Submit a test case result.
 
+        When submissions are queued, the result is only queued here. If the same test case is submitted again before
+        it was sent, only the latest submission is sent. The log streams of the test case are closed, and their last
+        parts uploaded in the background.
+
         Args:
         ----
             id (str): The id of the test case
@@ -114,26 +207,102 @@ class RunReporter:
         result_id = self.result_map[id]
         if result_id is None:
             raise ValueError("Test case result id not found")
-        body = SubmitTestCaseResultDto(
-            test_result_id=result_id,
-            status=status,
-            provider_session_guids=provider_session_guids if provider_session_guids is not None else [],
-            failure_reason=failure_reason,
-            itw_case_id=applause_test_case_id,
-            test_rail_case_id=test_rail_case_id,
-        )
-        self.auto_api.submit_test_case_result(params=body)
-
-    def attach_test_case_asset(self, id: str, asset_name: str, provider_session_guid: str, assetType: AssetType, asset: bytes):
+        with self._log_streams_lock:
+            log_streams = self._log_streams.pop(id, {})
+        for log_stream in log_streams.values():
+            log_stream.close()
+        case_span = self._case_spans.pop(id, None)
+        with self.tracer.activate(case_span), self.tracer.start_span("submit_test_case_result", status=TestResultStatus(status).value):
+            failure_reason = self._apply_budget("failure_reason", failure_reason, result_id=result_id, provider_session_guids=provider_session_guids)
+            with self.tracer.start_span("validate SubmitTestCaseResultDto"):
+                body = SubmitTestCaseResultDto(
+                    test_result_id=result_id,
+                    status=status,
+                    provider_session_guids=provider_session_guids if provider_session_guids is not None else [],
+                    failure_reason=failure_reason,
+                    itw_case_id=applause_test_case_id,
+                    test_rail_case_id=test_rail_case_id,
+                )
+            if self.submission_queue is not None:
+                self.submission_queue.submit(body)
+            else:
+                self.auto_api.submit_test_case_result(params=body)
+                if self.checkpoint is not None:
+                    self.checkpoint.record_submitted(result_id)
+        # A repeated submission of the test case updates its result, it is neither a new result nor one leaving progress
+        if case_span is not None:
+            case_span.end()
+            self.metrics.inc(TEST_RESULTS_SUBMITTED, status=TestResultStatus(status).value)
+            self.metrics.add_gauge(TEST_CASES_IN_PROGRESS, -1)
+
+    def _apply_budget(self, field: str, value: Optional[str], result_id: Optional[int] = None, provider_session_guids: Optional[List[str]] = None) -> Optional[str]:
+        """Truncate a field to its configured size budget, optionally uploading the full text as an asset of the result."""
+        budget = self.auto_api.config.field_budgets.get(field)
+        if value is None or budget is None or utf8_size(value) <= budget:
+            return value
+        self.metrics.inc(FIELDS_TRUNCATED, field=field)
+        note = None
+        if self.auto_api.config.divert_truncated_fields and result_id is not None:
+            asset_name = f"{field}.txt"
+            if self._divert_field(field, value, asset_name, result_id, provider_session_guids):
+                note = f"full text attached as {asset_name}"
+        return truncate_middle(value, budget, note)
+
+    def _divert_field(self, field: str, value: str, asset_name: str, result_id: int, provider_session_guids: Optional[List[str]]) -> bool:
+        """Upload the full text of a truncated field as a framework log of the result, through the asset pipeline if there is one.
+
+        A failed upload is reported and counted instead of raised, so that the result is still submitted. Returns
+        whether the text was uploaded, or queued to the asset pipeline, which reports a later failure.
+        """
+        span = self.tracer.start_span("divert_field", field=field)
+
+        def upload(file: Union[bytes, BinaryIO]):
+            with span:
+                self.auto_api.upload_asset(
+                    result_id=result_id,
+                    file=file,
+                    asset_name=asset_name,
+                    provider_session_guid=provider_session_guids[0] if provider_session_guids else "",
+                    asset_type=AssetType.FRAMEWORK_LOG,
+                )
+            self.metrics.inc(ASSETS_UPLOADED, asset_type=AssetType.FRAMEWORK_LOG.value)
+            self.metrics.inc(FIELDS_DIVERTED, field=field)
+
+        def uploaded(future: Future):
+            span.end()
+            if future.exception() is not None:
+                self.metrics.inc(FIELDS_DIVERT_FAILED, field=field)
+
+        try:
+            if self.asset_pipeline is None:
+                upload(value.encode("utf-8"))
+                return True
+            # The caller does not wait for the upload, and the pipeline reports its failure
+            self.asset_pipeline.submit(AssetType.FRAMEWORK_LOG, value.encode("utf-8"), upload, asset_name=asset_name).add_done_callback(uploaded)
+            return True
+        except Exception as e:
+            span.end()
+            print(f"Could not upload the full text of the {field} of test result {result_id}: {e}")
+            self.metrics.inc(FIELDS_DIVERT_FAILED, field=field)
+            return False
+
+    def attach_test_case_asset(self, id: str, asset_name: str, provider_session_guid: str, assetType: AssetType, asset: Union[bytes, BinaryIO]) -> Optional[Future]:
         """Attach an asset to a test case.
 
+        If the asset pipeline has stages for the type of the asset, the asset is queued to be processed and uploaded
+        on a worker thread, and a file object is closed by the pipeline once it has been read.
+
         Args:
         ----
             id (str): The id of the test case
             asset_name (str): The name of the asset
             provider_session_guid (str): The provider session guid
             assetType (AssetType): The type of the asset
-            asset (bytes): The asset to attach
+            asset (Union[bytes, BinaryIO]): The asset to attach, or a binary file object to stream it from
+
+        Returns:
+        -------
+            Optional[Future]: The future of the upload if the asset was queued to the pipeline, None once it is uploaded otherwise
 
         Raises:
         ------
@@ -143,25 +312,166 @@ class RunReporter:
         result_id = self.result_map[id]
         if result_id is None:
             raise ValueError("Test case result id not found")
-        self.auto_api.upload_asset(result_id=result_id, file=asset, asset_name=asset_name, provider_session_guid=provider_session_guid, asset_type=assetType)
+        parent = self._case_spans.get(id, self.run_span)
+
+        def upload(file: Union[bytes, BinaryIO]):
+            self._upload_asset(result_id, parent, asset_name, provider_session_guid, assetType, file)
+
+        if self.asset_pipeline is not None and self.asset_pipeline.handles(assetType):
+            return self.asset_pipeline.submit(assetType, asset, upload, asset_name=asset_name)
+        upload(asset)
+        return None
+
+    def _upload_asset(self, result_id: int, parent: Optional[Span], asset_name: str, provider_session_guid: str, assetType: AssetType, file: Union[bytes, BinaryIO]):
+        """Upload an asset of a result on the calling thread, tracing it under the span of its test case."""
+        with self.tracer.activate(parent), self.tracer.start_span("attach_test_case_asset", asset_name=asset_name):
+            self.auto_api.upload_asset(result_id=result_id, file=file, asset_name=asset_name, provider_session_guid=provider_session_guid, asset_type=assetType)
+        self.metrics.inc(ASSETS_UPLOADED, asset_type=AssetType(assetType).value)
 
-    def end_run(self):
+    def open_log_stream(self, id: str, asset_name: str, assetType: AssetType = AssetType.CONSOLE_LOG, provider_session_guid: str = "") -> LogStream:
+        """Open a log of a test case that is uploaded in parts while it is written.
+
+        The stream buffers at most ApplauseConfig.log_stream_buffer_size bytes, and a part is uploaded in the background
+        whenever log_stream_flush_size bytes are buffered, or the oldest of them has waited for log_stream_flush_interval
+        seconds. The stream is closed when the result of the test case is submitted. Opening the same log of a test
+        case again returns the stream that is already open. If the asset pipeline has stages for the type of the log,
+        they run over each part on the streamer thread, so that a part is only counted as uploaded once it is.
+
+        Args:
+        ----
+            id (str): The id of the test case
+            asset_name (str): The name of the log, that the parts are named after
+            assetType (AssetType, optional): The type of the log. Defaults to CONSOLE_LOG.
+            provider_session_guid (str, optional): The provider session guid. Defaults to none.
+
+        Returns:
+        -------
+            LogStream: A writable binary file object
+
+        Raises:
+        ------
+            ValueError: If the test case result id is not found
+
+        """
+        result_id = self.result_map.get(id)
+        if result_id is None:
+            raise ValueError("Test case result id not found")
+        with self._log_streams_lock:
+            log_stream = self._log_streams.get(id, {}).get(asset_name)
+            if log_stream is not None and not log_stream.closed:
+                return log_stream
+            if self.log_streamer is None:
+                config = self.auto_api.config
+                self.log_streamer = LogStreamer(
+                    self.metrics, buffer_size=config.log_stream_buffer_size, flush_size=config.log_stream_flush_size, flush_interval=config.log_stream_flush_interval
+                )
+
+            def upload(part_name: str, part: bytes):
+                file = part
+                if self.asset_pipeline is not None and self.asset_pipeline.handles(assetType):
+                    file = self.asset_pipeline.process(assetType, part)
+                try:
+                    self._upload_asset(result_id, self._case_spans.get(id, self.run_span), part_name, provider_session_guid, assetType, file)
+                finally:
+                    if not isinstance(file, bytes):
+                        file.close()
+
+            log_stream = self.log_streamer.open(asset_name, AssetType(assetType).value, upload)
+            self._log_streams.setdefault(id, {})[asset_name] = log_stream
+            return log_stream
+
+    def _flush_background_work(self, timeout: Optional[float]):
+        """Upload the log streams and queued assets, and submit the queued results, sharing the timeout between them."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        services = [
+            ("flush_log_streams", self.log_streamer, "Log streams were not all uploaded"),
+            ("flush_assets", self.asset_pipeline, "Queued assets were not all uploaded"),
+            ("flush_submissions", self.submission_queue, "Queued test results were not all submitted"),
+        ]
+        for span_name, service, message in services:
+            if service is None:
+                continue
+            with self.tracer.start_span(span_name):
+                if not service.close(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                    print(f"{message} within {timeout} seconds")
+
+    def suspend(self, timeout: Optional[float] = None):
+        """Upload and submit the pending work and stop the heartbeats, leaving the run open to be resumed from its checkpoint.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The time in seconds that log streams, queued assets and test results are
+                given to be uploaded and submitted. Defaults to waiting for all of them.
+
+        """
+        with self.tracer.activate(self.run_span), self.tracer.start_span("suspend_run"):
+            self._flush_background_work(timeout)
+            self.hearbeat_service.stop()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+
+    def abort(self):
+        """Stop reporting the test run without ending it, dropping the log streams, queued assets and test results still pending.
+
+        The heartbeats are stopped and the checkpoint is kept, so the Automation API eventually times the run out unless
+        another process resumes it.
+        """
+        for service in (self.log_streamer, self.asset_pipeline, self.submission_queue):
+            if service is not None:
+                service.close(0)
+        if self.hearbeat_service.job is not None:
+            self.hearbeat_service.stop()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        for case_span in self._case_spans.values():
+            case_span.end()
+        self._case_spans.clear()
+        if self.run_span is not None:
+            self.run_span.end()
+
+    def end_run(self, ending_status: TestRunEndingStatus = TestRunEndingStatus.COMPLETE, timeout: Optional[float] = None):
         """End the test run and print the provider session links.
 
-        Raises
+        Queued test results are submitted before the run is ended. If a metrics file is configured, a JSON snapshot of the metrics is written to it once the run has ended.
+        The checkpoint of the run is removed once it has ended. When ending the run is retried after the run was ended,
+        only the steps that follow are retried.
+
+        Args:
+        ----
+            ending_status (TestRunEndingStatus, optional): The status to end the run with. Defaults to COMPLETE.
+            timeout (Optional[float], optional): The time in seconds that log streams, queued assets and test results are
+                given to be uploaded and submitted. Defaults to waiting for all of them. Those that are left once it expires
+                are dropped.
+
+        Raises:
         ------
             ValueError: If the test run id is not found
 
         """
-        self.hearbeat_service.stop()
-        self.auto_api.end_test_run(test_run_id=self.test_run_id)
-        links = self.auto_api.get_provider_session_links(list(self.result_map.values()))
+        with self.tracer.activate(self.run_span), self.tracer.start_span("end_run", ending_status=TestRunEndingStatus(ending_status).value):
+            if not self.ended:
+                self._flush_background_work(timeout)
+                # The heartbeat is already stopped when ending the run is retried after a failure
+                if self.hearbeat_service.job is not None:
+                    self.hearbeat_service.stop()
+                self.auto_api.end_test_run(test_run_id=self.test_run_id, ending_status=ending_status)
+                self.ended = True
+            if self.checkpoint is not None:
+                self.checkpoint.remove()
+            links = self.auto_api.get_provider_session_links(list(self.result_map.values()))
+        for case_span in self._case_spans.values():
+            case_span.end()
+        self._case_spans.clear()
+        if self.run_span is not None:
+            self.run_span.end()
         if len(links) > 0:
             print("Provider session links:")
             for link in links:
                 print(link)
-        with open("provider_session_links.txt", "w") as f:
-            f.write(json.dumps([link.model_dump() for link in links]))
+        with open("provider_session_links.txt", "wb") as f:
+            f.write(self.auto_api.json_codec.dumps([link.model_dump() for link in links]))
+        if self.auto_api.config.metrics_file is not None:
+            self.metrics.write_json(self.auto_api.config.metrics_file)
 
 
 class RunInitializer:
@@ -174,29 +484,84 @@ class RunInitializer:
 
     """
 
-    def __init__(self, auto_api: AutoApi):
+    def __init__(self, auto_api: AutoApi, asset_stages: Optional[Dict[AssetType, List[Stage]]] = None):
         """Initialize the RunInitializer object.
 
         Args:
         ----
             auto_api (AutoApi): The auto api client
+            asset_stages (Optional[Dict[AssetType, List[Stage]]], optional): The stages the assets of each type are
+                processed by before they are uploaded, on background workers. Defaults to uploading assets as they are.
 
         """
         self.auto_api = auto_api
+        self.asset_stages = asset_stages
 
     def start_run(self, tests: Optional[List[str]] = None) -> RunReporter:
         """Start a test run and returns a RunReporter object.
 
+        If a checkpoint file is configured and holds a run that the Automation API still accepts heartbeats for, the
+        reporter reattaches to that run instead, and the tests are not sent again.
+
         Args:
         ----
         tests (Optional[List[str]], optional): The list of test case names to run. Defaults to None.
 
         """
+        checkpoint = None
+        if self.auto_api.config.checkpoint_file is not None:
+            checkpoint = RunCheckpoint(self.auto_api.config.checkpoint_file, self.auto_api.config.product_id)
+            if checkpoint.test_run_id is not None:
+                reporter = self._resume_run(checkpoint)
+                if reporter is not None:
+                    return reporter
         tests = tests if tests is not None else []
-        response = self.auto_api.start_test_run(params=TestRunCreateDto(tests=[parse_test_case_names(test).test_case_name for test in tests]))
-        heartbeat_service = HeartbeatService(self.auto_api, response.run_id)
+        run_span = self.auto_api.tracer.start_span("test run", tests=len(tests))
+        with self.auto_api.tracer.activate(run_span), self.auto_api.tracer.start_span("start_run"):
+            with self.auto_api.tracer.start_span("parse_test_case_names"):
+                test_names = [parse_test_case_names(test).test_case_name for test in tests]
+            # The tests are registered under the truncated names that their results are created with
+            budget = self.auto_api.config.field_budgets.get("test_case_name")
+            if budget is not None:
+                test_names = [truncate_middle(name, budget) for name in test_names]
+            response = self.auto_api.start_test_run(params=TestRunCreateDto(tests=test_names))
+        run_span.set_attribute("test_run_id", response.run_id)
+        if checkpoint is not None:
+            checkpoint.start_run(response.run_id)
+        return self._create_reporter(response.run_id, run_span, checkpoint)
+
+    def _resume_run(self, checkpoint: RunCheckpoint) -> Optional[RunReporter]:
+        """Reattach to the run of a checkpoint, or None if the Automation API no longer accepts heartbeats for it."""
+        run_span = self.auto_api.tracer.start_span("test run", test_run_id=checkpoint.test_run_id, resumed=True)
+        try:
+            with self.auto_api.tracer.activate(run_span), self.auto_api.tracer.start_span("resume_run"):
+                self.auto_api.send_sdk_heartbeat(checkpoint.test_run_id)
+        except ApplauseClientError as e:
+            print(f"Could not resume test run {checkpoint.test_run_id}, starting a new one: {e}")
+            run_span.end()
+            return None
+        return self._create_reporter(checkpoint.test_run_id, run_span, checkpoint)
+
+    def _create_reporter(self, test_run_id: int, run_span: Span, checkpoint: Optional[RunCheckpoint]) -> RunReporter:
+        """Start the services of a run and create its RunReporter."""
+        heartbeat_service = HeartbeatService(self.auto_api, test_run_id, metrics=self.auto_api.metrics)
         heartbeat_service.start()
-        return RunReporter(response.run_id, self.auto_api, heartbeat_service)
+        submission_queue = None
+        if self.auto_api.config.queue_submissions:
+            on_submitted = (lambda params: checkpoint.record_submitted(params.test_result_id)) if checkpoint is not None else None
+            submission_queue = SubmissionQueue(self.auto_api, max_workers=self.auto_api.config.submission_workers, on_submitted=on_submitted)
+        asset_pipeline = None
+        if self.asset_stages:
+            asset_pipeline = AssetPipeline(self.asset_stages, self.auto_api.metrics, max_workers=self.auto_api.config.asset_workers)
+        return RunReporter(
+            test_run_id,
+            self.auto_api,
+            heartbeat_service,
+            run_span=run_span,
+            submission_queue=submission_queue,
+            asset_pipeline=asset_pipeline,
+            checkpoint=checkpoint,
+        )
 
 
 class ApplauseReporter:
@@ -208,15 +573,37 @@ class ApplauseReporter:
         auto_api (AutoApi): The auto api client
         initializer (RunInitializer): The initializer object
         reporter (Optional[RunReporter]): The reporter object
+        metrics (MetricsRegistry): The registry shared by the clients and services of the reporter
+        tracer (Tracer): The tracer shared by the clients and services of the reporter
+        ending (Optional[Future]): The future of the last run ended with runner_end(wait=False)
+        warm_up (Optional[WarmUp]): The warm-up of the auto api client, started when the reporter is built if
+            ApplauseConfig.warm_up is set
 
     """
 
-    def __init__(self, config: ApplauseConfig):
-        """Initialize the ApplauseReporter object."""
+    def __init__(self, config: ApplauseConfig, tracer: Optional[Tracer] = None, asset_stages: Optional[Dict[AssetType, List[Stage]]] = None):
+        """Initialize the ApplauseReporter object.
+
+        Args:
+        ----
+            config (ApplauseConfig): The configuration for the client
+            tracer (Optional[Tracer], optional): The tracer to trace operations with. Defaults to a tracer writing to
+                the configured trace file, or a disabled tracer if there is none.
+            asset_stages (Optional[Dict[AssetType, List[Stage]]], optional): The stages the assets of each type are
+                processed by before they are uploaded, on background workers. Defaults to uploading assets as they are.
+
+        """
         self.config = config
-        self.auto_api = AutoApi(config)
-        self.initializer = RunInitializer(self.auto_api)
+        self.metrics = MetricsRegistry()
+        if tracer is None:
+            tracer = Tracer([JsonFileSpanExporter(config.trace_file)] if config.trace_file is not None else None)
+        self.tracer = tracer
+        self.auto_api = AutoApi(config, metrics=self.metrics, tracer=self.tracer)
+        self.initializer = RunInitializer(self.auto_api, asset_stages=asset_stages)
+        self.warm_up = WarmUp(self.auto_api).start() if config.warm_up else None
         self.reporter = None
+        self.ending: Optional[Future] = None
+        self._previous_handlers: Dict[int, Any] = {}
 
     def runner_start(self, tests: Optional[List[str]] = None) -> int:
         """Initialize a test run.
@@ -228,7 +615,13 @@ class ApplauseReporter:
         """
         if self.reporter is not None:
             raise ValueError("Cannot start a run - run already started or run already finished")
+        if self.warm_up is not None:
+            # Connections still being opened by the warm-up are ready sooner than new ones
+            self.warm_up.wait(DEFAULT_WAIT_TIMEOUT)
         self.reporter = self.initializer.start_run(tests)
+        if self.config.end_run_on_exit:
+            _open_reporters.add(self)
+        self._install_signal_handlers()
         return self.reporter.test_run_id
 
     def start_test_case(
@@ -296,29 +689,150 @@ class ApplauseReporter:
             failure_reason=failure_reason,
         )
 
-    def runner_end(self):
+    def runner_end(self, wait: bool = True) -> Optional[Future]:
         """End the test run and print the provider session links.
 
-        Raises
+        Args:
+        ----
+            wait (bool, optional): Whether to wait for the run to be ended. Defaults to True. Otherwise the run is ended
+                on a background thread, which the exit hook gives the configured shutdown timeout to finish. If ending
+                the run fails, either way, the run is left open for the exit hook to end. When not waiting, the exit
+                signals are no longer handled once this returns, as signal handlers can only be installed from the
+                main thread.
+
+        Returns:
+        -------
+            Optional[Future]: The future of ending the run when not waiting for it, otherwise None
+
+        Raises:
         ------
             ValueError: If the run was never initialized
 
         """
         if self.reporter is None:
             raise ValueError("Cannot end a run that was never initialized")
-        self.reporter.end_run()
-        self.reporter = None
+        if wait:
+            # The run stays open for the exit hook to cancel until it has been ended
+            self.reporter.end_run()
+            self.reporter = None
+            self._remove_signal_handlers()
+            _open_reporters.discard(self)
+            return None
+        reporter, self.reporter = self.reporter, None
+        self._remove_signal_handlers()
+        future = Future()
+        # Already running, ending the run cannot be canceled
+        future.set_running_or_notify_cancel()
+        self.ending = future
+
+        def end():
+            try:
+                reporter.end_run()
+            except BaseException as e:
+                # Hand the run back, for the exit hook to cancel
+                if self.reporter is None:
+                    self.reporter = reporter
+                future.set_exception(e)
+                return
+            _open_reporters.discard(self)
+            future.set_result(None)
+
+        threading.Thread(target=end, name="applause-end-run", daemon=True).start()
+        return future
+
+    def abort(self):
+        """Stop reporting the open run without ending it, for instance after ending it failed, see RunReporter.abort.
+
+        The exit hook and the exit signals no longer end the run, and a new run can be started afterwards.
+
+        Raises
+        ------
+            ValueError: If the run was never initialized
+
+        """
+        if self.reporter is None:
+            raise ValueError("Cannot abort a run that was never initialized")
+        reporter, self.reporter = self.reporter, None
+        self._remove_signal_handlers()
+        _open_reporters.discard(self)
+        reporter.abort()
+
+    def _shutdown(self, ending_status: Optional[TestRunEndingStatus] = None):
+        """End the open run within the shutdown timeout, or wait for the run being ended in the background.
 
-    def attach_test_case_asset(self, id: str, asset_name: str, provider_session_guid: str, assetType: AssetType, asset: bytes):
+        Without an ending status, the run is ended as COMPLETE when no test case is in progress, and as CANCELED otherwise,
+        unless the run has a checkpoint: it is then left open for the next process to resume.
+        """
+        timeout = self.config.shutdown_timeout
+        if self.reporter is not None:
+            reporter, self.reporter = self.reporter, None
+            if ending_status is None and reporter.in_progress_tests and reporter.checkpoint is not None and not reporter.ended:
+                reporter.suspend(timeout)
+                print(f"Test run {reporter.test_run_id} left open, to be resumed from {reporter.checkpoint.path}")
+                return
+            if ending_status is None:
+                ending_status = TestRunEndingStatus.CANCELED if reporter.in_progress_tests else TestRunEndingStatus.COMPLETE
+            try:
+                reporter.end_run(ending_status=ending_status, timeout=timeout)
+            except Exception as e:
+                print(f"Could not end test run {reporter.test_run_id}: {e}")
+        elif self.ending is not None:
+            try:
+                self.ending.exception(timeout)
+            except FutureTimeoutError:
+                print(f"Test run was not ended within {timeout} seconds")
+
+    def _install_signal_handlers(self):
+        # Signal handlers can only be changed from the main thread
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for name in self.config.exit_signals:
+            signum = signal.Signals[name]
+            self._previous_handlers[signum] = signal.signal(signum, self._handle_signal)
+
+    def _remove_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler if handler is not None else signal.SIG_DFL)
+        self._previous_handlers.clear()
+
+    def _handle_signal(self, signum: int, frame):
+        """Cancel the open run, then hand the signal to the handler that was installed before.
+
+        The signal may have interrupted the main thread while it held a lock that ending the run needs, so the run is
+        ended on a helper thread, which the handler waits for during the shutdown timeout at most.
+        """
+        previous = self._previous_handlers.get(signum)
+        self._remove_signal_handlers()
+        _open_reporters.discard(self)
+        shutdown = threading.Thread(target=self._shutdown, args=(TestRunEndingStatus.CANCELED,), name="applause-shutdown", daemon=True)
+        shutdown.start()
+        shutdown.join(self.config.shutdown_timeout)
+        if shutdown.is_alive():
+            print(f"Test run was not ended within {self.config.shutdown_timeout} seconds")
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            # Let the default action of the signal, such as terminating the process, take place
+            os.kill(os.getpid(), signum)
+
+    def attach_test_case_asset(self, id: str, asset_name: str, provider_session_guid: str, assetType: AssetType, asset: Union[bytes, BinaryIO]) -> Optional[Future]:
         """Attach an asset to a test case.
 
+        Assets of the types that have asset stages are processed and uploaded in the background, see RunReporter.attach_test_case_asset.
+
         Args:
         ----
             id (str): The id of the test case
             asset_name (str): The name of the asset
             provider_session_guid (str): The provider session guid
             assetType (AssetType): The type of the asset
-            asset (bytes): The asset to attach
+            asset (Union[bytes, BinaryIO]): The asset to attach, or a binary file object to stream it from
+
+        Returns:
+        -------
+            Optional[Future]: The future of the upload if the asset was queued to the asset pipeline, None once it is uploaded otherwise
 
         Raises:
         ------
@@ -327,4 +841,38 @@ class ApplauseReporter:
         """
         if self.reporter is None:
             raise ValueError("Cannot attach an asset for a run that was never initialized")
-        self.reporter.attach_test_case_asset(id, asset_name, provider_session_guid, assetType, asset)
+        return self.reporter.attach_test_case_asset(id, asset_name, provider_session_guid, assetType, asset)
+
+    def open_log_stream(self, id: str, asset_name: str, assetType: AssetType = AssetType.CONSOLE_LOG, provider_session_guid: str = "") -> LogStream:
+        """Open a log of a test case that is uploaded in parts while it is written, see RunReporter.open_log_stream.
+
+        Args:
+        ----
+            id (str): The id of the test case
+            asset_name (str): The name of the log, that the parts are named after
+            assetType (AssetType, optional): The type of the log. Defaults to CONSOLE_LOG.
+            provider_session_guid (str, optional): The provider session guid. Defaults to none.
+
+        Returns:
+        -------
+            LogStream: A writable binary file object
+
+        Raises:
+        ------
+            ValueError: If the run was never initialized
+
+        """
+        if self.reporter is None:
+            raise ValueError("Cannot open a log stream for a run that was never initialized")
+        return self.reporter.open_log_stream(id, asset_name, assetType, provider_session_guid)
+
+
+# The reporters with a run to end when the interpreter exits. Reporters that are no longer referenced are dropped.
+_open_reporters: "weakref.WeakSet[ApplauseReporter]" = weakref.WeakSet()
+
+
+@atexit.register
+def _end_open_runs():
+    """End the runs that are still open when the interpreter exits."""
+    for reporter in list(_open_reporters):
+        reporter._shutdown()
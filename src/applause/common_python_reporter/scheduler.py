@@ -0,0 +1,169 @@
+"""Priority scheduling of the Automation API calls.
+
+When ApplauseConfig.scheduler is set, every AutoApi call waits for one of a limited number of slots before it is
+sent, and waiting calls are granted slots by priority class:
+
+- lifecycle: Starting and ending the run, and heartbeats, which keep the run alive
+- results: Starting test cases and submitting their results, which the dashboard shows as they arrive
+- assets: Asset uploads, which can take minutes each
+
+Asset uploads may only hold a share of the slots at any time, so a burst of large uploads always leaves slots for
+the results of the following tests. A call that has waited longer than the starvation timeout is granted the next
+free slot whatever its class, so that uploads still make progress while results keep arriving. The number of
+calls waiting in each class, and the time they waited, are recorded in the metrics registry of the client.
+
+Typical usage example:
+
+    config = ApplauseConfig(api_key="api_key", product_id=123, scheduler=SchedulerOptions(max_concurrency=8, upload_share=0.25))
+    reporter = ApplauseReporter(config)
+"""
+
+import itertools
+import math
+import threading
+import time
+from .metrics import QUEUE_DEPTH, SCHEDULER_PROMOTIONS, SCHEDULER_WAIT, MetricsRegistry
+from enum import Enum
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+
+
+class PriorityClass(str, Enum):
+    """Enum representing the priority classes of the Automation API calls, from the most to the least urgent.
+
+    Values:
+        LIFECYCLE: Starting and ending runs, and heartbeats
+        RESULTS: Starting test cases and submitting their results
+        ASSETS: Uploading assets
+    """
+
+    LIFECYCLE = "lifecycle"
+    RESULTS = "results"
+    ASSETS = "assets"
+
+
+PRIORITY_CLASSES = {
+    "test-run/create": PriorityClass.LIFECYCLE,
+    "test-run/end": PriorityClass.LIFECYCLE,
+    "sdk-heartbeat": PriorityClass.LIFECYCLE,
+    "create-result": PriorityClass.RESULTS,
+    "test-result": PriorityClass.RESULTS,
+    "provider-info": PriorityClass.RESULTS,
+    "upload": PriorityClass.ASSETS,
+}
+
+_RANKS = {priority: rank for rank, priority in enumerate(PriorityClass)}
+
+
+class SchedulerOptions(BaseModel):
+    """The slots of the priority scheduler.
+
+    Attributes
+    ----------
+        max_concurrency: The number of calls sent at the same time
+        upload_share: The share of the slots that asset uploads may hold, rounded up to at least one slot
+        starvation_timeout: The time in seconds after which a waiting call is granted the next free slot whatever its class
+
+    """
+
+    max_concurrency: int = 8
+    upload_share: float = 0.5
+    starvation_timeout: float = 5.0
+
+
+class PriorityScheduler:
+    """Grant a limited number of concurrent calls by priority class.
+
+    Attributes
+    ----------
+        options (SchedulerOptions): The slots of the scheduler.
+        upload_slots (int): The number of slots that asset uploads may hold.
+        metrics (MetricsRegistry): The registry the waiting calls are recorded into.
+
+    """
+
+    def __init__(self, options: SchedulerOptions, metrics: Optional[MetricsRegistry] = None):
+        """Initialize the PriorityScheduler object.
+
+        Args:
+        ----
+            options (SchedulerOptions): The slots of the scheduler.
+            metrics (Optional[MetricsRegistry], optional): The registry to record into. Defaults to a new registry.
+
+        """
+        if options.max_concurrency < 1:
+            raise ValueError("The scheduler needs at least one slot")
+        self.options = options
+        self.upload_slots = min(options.max_concurrency, max(1, math.ceil(options.max_concurrency * options.upload_share)))
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        # The waiting calls, by ticket: their priority class and when they started waiting
+        self._waiting: Dict[int, Tuple[PriorityClass, float]] = {}
+        self._running: Dict[PriorityClass, int] = {priority: 0 for priority in PriorityClass}
+
+    def acquire(self, priority: PriorityClass) -> float:
+        """Wait for a slot. Every acquired slot must be released.
+
+        Args:
+        ----
+            priority (PriorityClass): The priority class of the call
+
+        Returns:
+        -------
+            float: The time spent waiting, in seconds
+
+        """
+        priority = PriorityClass(priority)
+        start = time.monotonic()
+        with self._condition:
+            ticket = next(self._sequence)
+            self._waiting[ticket] = (priority, start)
+            self._record_depth(priority)
+            while self._next_ticket() != ticket:
+                self._condition.wait()
+            del self._waiting[ticket]
+            self._running[priority] += 1
+            self._record_depth(priority)
+            # Calls that were passed over for this one may be next in line for a slot that is still free
+            self._condition.notify_all()
+            waited = time.monotonic() - start
+            if waited >= self.options.starvation_timeout and self._outranked(priority):
+                self.metrics.inc(SCHEDULER_PROMOTIONS, priority=priority.value)
+        self.metrics.observe(SCHEDULER_WAIT, waited, priority=priority.value)
+        return waited
+
+    def release(self, priority: PriorityClass):
+        """Give back a slot acquired for the provided priority class."""
+        with self._condition:
+            self._running[PriorityClass(priority)] -= 1
+            self._condition.notify_all()
+
+    def waiting(self) -> Dict[PriorityClass, int]:
+        """Get the number of waiting calls by priority class."""
+        with self._condition:
+            return {priority: self._count_waiting(priority) for priority in PriorityClass}
+
+    def _next_ticket(self) -> Optional[int]:
+        """Get the ticket to grant the next free slot to, if a slot is free. Only called under the lock."""
+        if sum(self._running.values()) >= self.options.max_concurrency:
+            return None
+        now = time.monotonic()
+        candidates: List[Tuple[int, float, int]] = []
+        for ticket, (priority, since) in self._waiting.items():
+            if priority == PriorityClass.ASSETS and self._running[priority] >= self.upload_slots:
+                continue
+            # Calls that waited too long go first, in the order they arrived
+            rank = -1 if now - since >= self.options.starvation_timeout else _RANKS[priority]
+            candidates.append((rank, since, ticket))
+        return min(candidates)[2] if candidates else None
+
+    def _outranked(self, priority: PriorityClass) -> bool:
+        """Whether calls of a higher class are waiting, so a granted call of this class was promoted. Only called under the lock."""
+        return any(_RANKS[waiting] < _RANKS[priority] for waiting, _ in self._waiting.values())
+
+    def _count_waiting(self, priority: PriorityClass) -> int:
+        return sum(1 for waiting, _ in self._waiting.values() if waiting == priority)
+
+    def _record_depth(self, priority: PriorityClass):
+        self.metrics.set_gauge(QUEUE_DEPTH, self._count_waiting(priority), queue="scheduler", priority=priority.value)
@@ -0,0 +1,297 @@
+"""A local stand-in for the Applause Automation and Public APIs.
+
+The stand-in implements the endpoints used by AutoApi and PublicApi with just enough behavior for the
+clients to run against it: ids are handed out from counters, uploads are read and discarded, and
+emails are served from a configurable raw message. Latency and error rates can be injected globally or
+per endpoint, which makes it suitable for benchmarks, load generation and conformance tests without
+network access.
+
+Typical usage example:
+
+    with StandInServer(StandInConfig(latency=0.005, error_rate=0.01)) as server:
+        config = ApplauseConfig(api_key="test", product_id=123, auto_api_base_url=server.base_url, public_api_base_url=server.base_url)
+        reporter = ApplauseReporter(config)
+        ...Report a run against the stand-in...
+        print(server.request_counts())
+"""
+
+import gzip
+import itertools
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_EMAIL = b'Subject: Stand-in email\r\nFrom: "stand-in" <stand-in@example.com>\r\nTo: "test" <test@example.com>\r\n\r\nThis is the content\r\n'
+
+_ROUTES = [
+    ("POST", re.compile(r"^/api/v1\.0/test-run/create$"), "test-run/create"),
+    ("DELETE", re.compile(r"^/api/v1\.0/test-run/(\d+)$"), "test-run/end"),
+    ("POST", re.compile(r"^/api/v1\.0/test-result/create-result$"), "create-result"),
+    ("POST", re.compile(r"^/api/v1\.0/test-result$"), "test-result"),
+    ("POST", re.compile(r"^/api/v1\.0/test-result/provider-info$"), "provider-info"),
+    ("POST", re.compile(r"^/api/v1\.0/test-result/(\d+)/upload$"), "upload"),
+    ("POST", re.compile(r"^/api/v2\.0/sdk-heartbeat$"), "sdk-heartbeat"),
+    ("GET", re.compile(r"^/api/v1\.0/email/get-address$"), "email/get-address"),
+    ("POST", re.compile(r"^/api/v1\.0/email/download-email$"), "email/download-email"),
+    ("POST", re.compile(r"^/v2/test-case-results/(\d+)/submit$"), "submit-result"),
+]
+
+# Bodies of these endpoints are counted and discarded a chunk at a time, so large uploads are never held in memory
+_DISCARDED_BODIES = {"upload"}
+_DISCARD_CHUNK_SIZE = 64 * 1024
+
+
+class StandInConfig(BaseModel):
+    """Behavior of the stand-in server.
+
+    Attributes
+    ----------
+        latency: The delay added to every response, in seconds
+        latency_jitter: A random delay of up to this many seconds added on top of the latency
+        error_rate: The probability of a request failing with the error status
+        error_status: The status code of injected errors
+        endpoint_latency: Latency overrides, by endpoint name
+        connect_latency: The delay before the first request of a new connection is read, standing in for the DNS
+            resolution, TCP connect and TLS handshake of a remote server
+        endpoint_error_rate: Error rate overrides, by endpoint name
+        gzip_unsupported: The endpoints that respond to gzip compressed bodies with 415 Unsupported Media Type. The
+            other endpoints decompress them.
+        email: The raw email served by the download-email endpoint
+        seed (optional): A seed for the random number generator, for reproducible error injection
+
+    """
+
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    endpoint_latency: Dict[str, float] = {}
+    connect_latency: float = 0.0
+    endpoint_error_rate: Dict[str, float] = {}
+    gzip_unsupported: List[str] = []
+    email: bytes = DEFAULT_EMAIL
+    seed: Optional[int] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_StandInHTTPServer"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately, so without this every response waits on a delayed ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.server.stand_in.config.connect_latency > 0:
+            time.sleep(self.server.stand_in.config.connect_latency)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def do_OPTIONS(self):
+        # Answered like most servers do, keeping the connection open for the requests that follow
+        self.server.stand_in._record("options", 0)
+        self.send_response(204)
+        self.send_header("Allow", "GET, POST, DELETE, OPTIONS")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read(self, size: int, keep: bool) -> bytes:
+        """Read a part of the body, in bounded chunks when it is not kept."""
+        if keep:
+            return self.rfile.read(size)
+        while size > 0:
+            size -= len(self.rfile.read(min(size, _DISCARD_CHUNK_SIZE)))
+        return b""
+
+    def _read_body(self, keep: bool = True) -> Tuple[bytes, int]:
+        """Read the body of the request, returning it, or nothing if it is not kept, and its size."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks, total = [], 0
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Skip any trailers up to the final empty line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks), total
+                chunks.append(self._read(size, keep))
+                total += size
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length", 0))
+        return self._read(length, keep), length
+
+    def _handle(self, method: str):
+        stand_in = self.server.stand_in
+        parsed = urlparse(self.path)
+        route = next(((name, match) for route_method, pattern, name in _ROUTES if route_method == method for match in [pattern.match(parsed.path)] if match), None)
+        body, size = self._read_body(keep=route is not None and route[0] not in _DISCARDED_BODIES)
+        if route is None:
+            self._respond(404, {"message": f"No stand-in route for {method} {parsed.path}"})
+            return
+        name, match = route
+        stand_in._record(name, size)
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            if name in stand_in.config.gzip_unsupported:
+                self._respond(415, {"message": f"Compressed bodies are not supported by {name}"})
+                return
+            body = gzip.decompress(body)
+        delay, fail = stand_in._behavior(name)
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._respond(stand_in.config.error_status, {"message": "Injected stand-in error"})
+            return
+        status, payload = stand_in._dispatch(name, match, parse_qs(parsed.query), body)
+        self._respond(status, payload)
+
+    def _respond(self, status: int, payload):
+        if isinstance(payload, bytes):
+            data, content_type = payload, "message/rfc822"
+        else:
+            data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    stand_in: "StandInServer"
+
+
+class StandInServer:
+    """A local HTTP server standing in for the Applause Automation and Public APIs.
+
+    Attributes
+    ----------
+        config (StandInConfig): The behavior of the server. It can be changed while the server is running.
+        host (str): The interface the server listens on.
+        port (int): The port the server listens on, chosen automatically when 0.
+
+    """
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """Initialize the StandInServer object.
+
+        Args:
+        ----
+            config (Optional[StandInConfig], optional): The behavior of the server. Defaults to no latency and no errors.
+            host (str, optional): The interface to listen on. Defaults to the loopback interface.
+            port (int, optional): The port to listen on. Defaults to a free port.
+
+        """
+        self.config = config if config is not None else StandInConfig()
+        self.host = host
+        self.port = port
+        self._random = random.Random(self.config.seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._bytes_received: Dict[str, int] = {}
+        self._httpd: Optional[_StandInHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The base url of the server, in the form expected by ApplauseConfig."""
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self) -> "StandInServer":
+        """Start serving requests on a background thread.
+
+        Raises
+        ------
+            Exception: If the server is already running.
+
+        """
+        if self._httpd is not None:
+            raise Exception("Stand-in server - Already running")
+        self._httpd = _StandInHTTPServer((self.host, self.port), _Handler)
+        self._httpd.stand_in = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), name="applause-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving requests.
+
+        Raises
+        ------
+            Exception: If the server is not running.
+
+        """
+        if self._httpd is None:
+            raise Exception("Stand-in server - Not running")
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+
+    def __enter__(self) -> "StandInServer":
+        """Start the server when entering the context manager."""
+        return self.start()
+
+    def __exit__(self, *args):
+        """Stop the server when leaving the context manager."""
+        self.stop()
+
+    def request_counts(self) -> Dict[str, int]:
+        """Get the number of requests received so far, by endpoint name."""
+        with self._lock:
+            return dict(self._counts)
+
+    def bytes_received(self) -> Dict[str, int]:
+        """Get the number of request body bytes received so far, by endpoint name."""
+        with self._lock:
+            return dict(self._bytes_received)
+
+    def reset_counts(self):
+        """Reset the request and byte counters."""
+        with self._lock:
+            self._counts.clear()
+            self._bytes_received.clear()
+
+    def _record(self, endpoint: str, body_size: int):
+        with self._lock:
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            self._bytes_received[endpoint] = self._bytes_received.get(endpoint, 0) + body_size
+
+    def _behavior(self, endpoint: str) -> Tuple[float, bool]:
+        config = self.config
+        with self._lock:
+            jitter = self._random.uniform(0, config.latency_jitter) if config.latency_jitter > 0 else 0.0
+            fail = self._random.random() < config.endpoint_error_rate.get(endpoint, config.error_rate)
+        return config.endpoint_latency.get(endpoint, config.latency) + jitter, fail
+
+    def _dispatch(self, endpoint: str, match, query: Dict[str, list], body: bytes):
+        if endpoint == "test-run/create":
+            return 200, {"runId": next(self._ids)}
+        if endpoint == "create-result":
+            return 200, {"testResultId": next(self._ids)}
+        if endpoint == "provider-info":
+            result_ids = json.loads(body or b"[]")
+            return 200, [{"testResultId": result_id, "providerUrl": None, "providerSessionId": None} for result_id in result_ids]
+        if endpoint == "email/get-address":
+            prefix = query.get("prefix", ["test"])[0]
+            return 200, {"emailAddress": f"{prefix}{next(self._ids)}@stand-in.example.com"}
+        if endpoint == "email/download-email":
+            return 200, self.config.email
+        return 200, {}
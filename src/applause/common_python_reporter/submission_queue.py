@@ -0,0 +1,203 @@
+"""Background submission of test results, coalescing repeated updates of the same result.
+
+Some frameworks submit the result of the same test case several times, for example from retry plugins or soft
+assertions. With ApplauseConfig.queue_submissions set, the reporter hands every result to a SubmissionQueue
+instead of posting it right away. Worker threads post the queued results in order, and an update for a result
+that is still waiting in the queue replaces the pending one: only the latest status, failure reason and session
+guids are sent. Updates of the same result are never posted concurrently, so the last one always wins.
+
+Typical usage example:
+
+    queue = SubmissionQueue(auto_api)
+    queue.submit(SubmitTestCaseResultDto(test_result_id=1, status=TestResultStatus.FAILED, provider_session_guids=[]))
+    queue.submit(SubmitTestCaseResultDto(test_result_id=1, status=TestResultStatus.PASSED, provider_session_guids=[]))
+    queue.close()
+    print(queue.stats().coalesced)  # 1, if the first result was still queued when the second one arrived
+"""
+
+import threading
+import time
+from .auto_api import AutoApi
+from .dtos import SubmitTestCaseResultDto
+from .metrics import QUEUE_DEPTH, RESULTS_COALESCED, MetricsRegistry
+from collections import OrderedDict
+from pydantic import BaseModel
+from typing import Callable, List, Optional, Set
+
+
+class SubmissionQueueStats(BaseModel):
+    """The progress of a submission queue.
+
+    Attributes
+    ----------
+        queued: The number of results handed to the queue
+        submitted: The number of results posted successfully
+        coalesced: The number of results replaced by a later update before they were posted, each one a request saved
+        failed: The number of results that could not be posted
+        pending: The number of results waiting to be posted
+
+    """
+
+    queued: int = 0
+    submitted: int = 0
+    coalesced: int = 0
+    failed: int = 0
+    pending: int = 0
+
+
+class SubmissionQueue:
+    """Post test results from background worker threads, coalescing pending updates of the same result.
+
+    Attributes
+    ----------
+        auto_api (AutoApi): The client the results are posted with.
+        metrics (MetricsRegistry): The registry the queue depth and coalesced results are recorded into.
+
+    """
+
+    def __init__(
+        self,
+        auto_api: AutoApi,
+        max_workers: int = 1,
+        metrics: Optional[MetricsRegistry] = None,
+        on_submitted: Optional[Callable[[SubmitTestCaseResultDto], None]] = None,
+    ):
+        """Initialize the SubmissionQueue object and start its workers.
+
+        Args:
+        ----
+            auto_api (AutoApi): The client the results are posted with.
+            max_workers (int, optional): The number of results posted concurrently. Defaults to 1.
+            metrics (Optional[MetricsRegistry], optional): The registry to record into. Defaults to the registry of the client.
+            on_submitted (Optional[Callable[[SubmitTestCaseResultDto], None]], optional): Called from the worker thread
+                with each result once it has been posted. Defaults to None.
+
+        """
+        self.auto_api = auto_api
+        self.metrics = metrics if metrics is not None else auto_api.metrics
+        self.on_submitted = on_submitted
+        self._condition = threading.Condition()
+        self._pending: "OrderedDict[int, SubmitTestCaseResultDto]" = OrderedDict()
+        self._in_flight: Set[int] = set()
+        self._stats = SubmissionQueueStats()
+        self._closed = False
+        self._workers: List[threading.Thread] = [threading.Thread(target=self._work, name=f"applause-submission-{index}", daemon=True) for index in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, params: SubmitTestCaseResultDto):
+        """Queue a result to be posted, replacing any update of the same result that is still waiting.
+
+        A replaced update keeps its place in the queue, so a result that keeps being updated is not postponed.
+
+        Args:
+        ----
+            params (SubmitTestCaseResultDto): The result to post
+
+        Raises:
+        ------
+            Exception: If the queue has been closed
+
+        """
+        with self._condition:
+            if self._closed:
+                raise Exception("Submission queue - Already closed")
+            self._stats.queued += 1
+            if params.test_result_id in self._pending:
+                self._stats.coalesced += 1
+                self.metrics.inc(RESULTS_COALESCED)
+            self._pending[params.test_result_id] = params
+            self._record_depth()
+            self._condition.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued result has been posted.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+
+        Returns:
+        -------
+            bool: Whether the queue was emptied before the timeout
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Stop accepting results, post the queued ones, and stop the workers.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The maximum time to wait in seconds, for the queued results and the workers
+                alike. Defaults to waiting indefinitely. Results still queued when it expires are not posted.
+
+        Returns:
+        -------
+            bool: Whether every queued result was posted before the timeout
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        flushed = self.flush(timeout)
+        with self._condition:
+            # Drop whatever is left, so that the workers stop after their current result
+            self._pending.clear()
+            self._record_depth()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return flushed
+
+    def stats(self) -> SubmissionQueueStats:
+        """Get the progress of the queue."""
+        with self._condition:
+            return self._stats.model_copy(update={"pending": len(self._pending) + len(self._in_flight)})
+
+    def _record_depth(self):
+        self.metrics.set_gauge(QUEUE_DEPTH, len(self._pending), queue="result_submissions")
+
+    def _next(self) -> Optional[SubmitTestCaseResultDto]:
+        """Take the oldest result that is not already being posted, waiting for one. None once the queue is closed and empty."""
+        with self._condition:
+            while True:
+                result_id = next((result_id for result_id in self._pending if result_id not in self._in_flight), None)
+                if result_id is not None:
+                    self._in_flight.add(result_id)
+                    params = self._pending.pop(result_id)
+                    self._record_depth()
+                    return params
+                if self._closed and not self._pending:
+                    return None
+                self._condition.wait()
+
+    def _work(self):
+        while True:
+            params = self._next()
+            if params is None:
+                return
+            try:
+                self.auto_api.submit_test_case_result(params=params)
+                if self.on_submitted is not None:
+                    self.on_submitted(params)
+                succeeded = True
+            except Exception as e:
+                # The failure is also recorded in the HTTP metrics of the client, the queue carries on with the next result
+                print(f"Could not submit test result {params.test_result_id}: {e}")
+                succeeded = False
+            with self._condition:
+                self._in_flight.discard(params.test_result_id)
+                if succeeded:
+                    self._stats.submitted += 1
+                else:
+                    self._stats.failed += 1
+                self._condition.notify_all()
@@ -0,0 +1,276 @@
+"""Optional span based tracing of reporter operations.
+
+A Tracer records a Span around each reporter and client operation. Spans form a tree per test run:
+the run span is the parent of a span per test case, which is in turn the parent of the spans for
+submitting its result and uploading its assets, down to the individual Automation API requests.
+Outgoing requests carry a W3C traceparent header, so server side traces can be joined to the client ones.
+
+Finished spans are handed to pluggable exporters. InMemorySpanExporter keeps them in a list for tests,
+and JsonFileSpanExporter appends them to a JSON lines file. A Tracer without exporters is disabled:
+it hands out a shared no-op span, so tracing costs next to nothing unless it is turned on.
+
+Typical usage example:
+
+    exporter = InMemorySpanExporter()
+    reporter = ApplauseReporter(config, tracer=Tracer([exporter]))
+    ...Report the run...
+    for span in exporter.spans:
+        print(span.name, span.duration)
+
+    # Or write the spans to a file through the configuration
+    config = ApplauseConfig(api_key="api_key", product_id=123, trace_file="applause_trace.jsonl")
+"""
+
+import json
+import random
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("applause_current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace.
+
+    Attributes
+    ----------
+        name (str): The name of the operation.
+        trace_id (str): The 32 hex digit id of the trace the span belongs to.
+        span_id (str): The 16 hex digit id of the span.
+        parent_id (Optional[str]): The id of the parent span, if any.
+        attributes (Dict[str, Any]): Additional details about the operation.
+        start_time (float): The wall clock time the span started at, in seconds since the epoch.
+        duration (Optional[float]): The duration of the span in seconds, once it has ended.
+        error (Optional[str]): The error that ended the span, if any.
+
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_time", "duration", "error", "_tracer", "_start", "_tokens")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        """Initialize the Span object. Spans are created through Tracer.start_span."""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._tracer = tracer
+        self._start = time.perf_counter()
+        self._tokens: List[Any] = []
+
+    @property
+    def traceparent(self) -> Optional[str]:
+        """The W3C traceparent header value identifying this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any):
+        """Add a detail about the operation to the span."""
+        self.attributes[key] = value
+
+    def end(self):
+        """End the span and hand it to the exporters of its tracer. Ending a span twice has no effect."""
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        self._tracer._export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the span as a JSON serializable dictionary."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self) -> "Span":
+        """Make the span the current span, so that spans started inside it become its children."""
+        self._tokens.append(_current_span.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Restore the previous current span and end this one, recording any error."""
+        _current_span.reset(self._tokens.pop())
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.end()
+
+
+class _NoopSpan:
+    """The span handed out by a disabled tracer. Every operation on it does nothing."""
+
+    __slots__ = ()
+
+    name = trace_id = span_id = parent_id = error = duration = traceparent = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(ABC):
+    """Base class for receivers of finished spans. Subclasses must implement export."""
+
+    @abstractmethod
+    def export(self, span: Span):
+        """Receive a finished span. Called from the thread that ended the span."""
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keep finished spans in a list, for use in tests.
+
+    Attributes
+    ----------
+        spans (List[Span]): The finished spans, in the order they ended.
+
+    """
+
+    def __init__(self):
+        """Initialize the InMemorySpanExporter object."""
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        """Store the finished span."""
+        with self._lock:
+            self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        """Get every finished span with the provided name."""
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def clear(self):
+        """Remove every stored span."""
+        with self._lock:
+            self.spans.clear()
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Append finished spans to a file, one JSON object per line.
+
+    Attributes
+    ----------
+        path (str): The path of the file the spans are appended to.
+
+    """
+
+    def __init__(self, path: str):
+        """Initialize the JsonFileSpanExporter object.
+
+        Args:
+        ----
+            path (str): The path of the file the spans are appended to.
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # The file stays open, line buffered so that each span reaches it as it ends, and is closed on garbage collection
+        self._file = open(path, "a", buffering=1)
+        self._closer = weakref.finalize(self, self._file.close)
+
+    def export(self, span: Span):
+        """Append the finished span to the file."""
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        """Close the file, if it is still open."""
+        with self._lock:
+            self._closer()
+
+
+class Tracer:
+    """Create spans and hand the finished ones to the exporters.
+
+    Attributes
+    ----------
+        exporters (List[SpanExporter]): The exporters that receive finished spans.
+        enabled (bool): Whether spans are recorded. A tracer is enabled when it has at least one exporter.
+
+    """
+
+    def __init__(self, exporters: Optional[List[SpanExporter]] = None):
+        """Initialize the Tracer object.
+
+        Args:
+        ----
+            exporters (Optional[List[SpanExporter]], optional): The exporters that receive finished spans.
+                Defaults to None, which disables tracing.
+
+        """
+        self.exporters = exporters if exporters is not None else []
+        self.enabled = len(self.exporters) > 0
+        self._failed_exporters: Set[int] = set()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        """Start a new span.
+
+        The span should be ended either by using it as a context manager, or by calling end on it.
+
+        Args:
+        ----
+            name (str): The name of the operation.
+            parent (Optional[Span], optional): The parent of the span. Defaults to the current span.
+            **attributes (Any): Additional details about the operation.
+
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None or parent is NOOP_SPAN:
+            parent = _current_span.get()
+        if parent is None:
+            return Span(self, name, f"{random.getrandbits(128):032x}", None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    @contextmanager
+    def activate(self, span: Optional[Span]) -> Iterator[Optional[Span]]:
+        """Make a long lived span the current span for a block, without ending it.
+
+        Args:
+        ----
+            span (Optional[Span]): The span to make current. None leaves the current span unchanged.
+
+        """
+        if span is None or span is NOOP_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                # Tracing must not break reporting, so a failing exporter only loses its spans, and is reported once
+                if id(exporter) not in self._failed_exporters:
+                    self._failed_exporters.add(id(exporter))
+                    print(f"Could not export spans to {type(exporter).__name__}: {e}")
@@ -0,0 +1,326 @@
+"""Pluggable HTTP transports for the Applause clients.
+
+AutoApi and PublicApi send every request through a Transport, selected with ApplauseConfig.transport:
+
+- requests: A pooled requests.Session. This is the default, and the only transport that supports transport
+  adapters such as the ones used to record and replay traffic.
+- urllib3: A urllib3 PoolManager used directly, skipping the per request overhead of a Session such as cookie
+  handling, hooks and environment lookups.
+- http2: An httpx client with HTTP/2 enabled, so concurrent requests to the same host are multiplexed over a
+  single connection. It requires the http2 extra: pip install "applause-common-reporter[http2]".
+  Servers that do not negotiate HTTP/2 are spoken to over HTTP/1.1.
+
+Every transport accepts the request arguments of requests (json, data, files, params), and returns a
+requests.Response, so the clients handle responses and errors the same way whichever transport is used.
+
+Typical usage example:
+
+    config = ApplauseConfig(api_key="api_key", product_id=123, transport=TransportType.HTTP2)
+    auto_api = AutoApi(config)
+"""
+
+import requests
+import urllib3
+from abc import ABC, abstractmethod
+from enum import Enum
+from http.client import responses as reasons
+from requests.adapters import DEFAULT_POOLSIZE, BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError, ConnectTimeout, ReadTimeout
+from requests.structures import CaseInsensitiveDict
+from requests.utils import default_headers, get_encoding_from_headers
+from typing import Dict, Iterator, Optional
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is optional
+    httpx = None
+
+
+class TransportType(str, Enum):
+    """Enum representing the available HTTP transports.
+
+    Values:
+        REQUESTS: A pooled requests session
+        URLLIB3: A urllib3 connection pool used directly
+        HTTP2: An httpx client multiplexing requests over HTTP/2 connections
+    """
+
+    REQUESTS = "requests"
+    URLLIB3 = "urllib3"
+    HTTP2 = "http2"
+
+
+class Transport(ABC):
+    """Base class for the HTTP transports of the clients. Subclasses must implement request."""
+
+    @abstractmethod
+    def request(self, method: str, url: str, headers: Optional[dict] = None, stream: bool = False, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """Send a request.
+
+        Args:
+        ----
+            method (str): The HTTP method
+            url (str): The absolute url of the request
+            headers (Optional[dict], optional): Additional headers for the request
+            stream (bool, optional): Whether to leave the body unread, to be read through iter_content. Defaults to False.
+            timeout (Optional[float], optional): The connect and read timeout in seconds. Defaults to no timeout.
+            **kwargs: The body and query of the request, as accepted by requests: json, data, files or params.
+
+        Returns:
+        -------
+            requests.Response: The response, whatever its status code
+
+        Raises:
+        ------
+            requests.exceptions.ConnectionError: If no response was received
+
+        """
+
+    def preconnect(self, url: str, connections: int = 1) -> int:
+        """Open pooled connections to the host of a url ahead of the first request to it.
+
+        Args:
+        ----
+            url (str): A url on the host to connect to
+            connections (int, optional): The number of connections to open. Defaults to 1.
+
+        Returns:
+        -------
+            int: The number of connections opened, 0 if the transport does not pool connections to the url
+
+        Raises:
+        ------
+            requests.exceptions.ConnectionError: If a connection could not be opened
+
+        """
+        return 0
+
+    def close(self):
+        """Close every pooled connection. The base transport holds none."""
+        return None
+
+
+class RequestsTransport(Transport):
+    """Send requests through a pooled requests.Session.
+
+    Attributes
+    ----------
+        session (requests.Session): The session every request is sent through.
+
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOLSIZE, adapters: Optional[Dict[str, BaseAdapter]] = None):
+        """Initialize the RequestsTransport object.
+
+        Args:
+        ----
+            pool_size (int, optional): The maximum number of pooled connections per host.
+            adapters (Optional[Dict[str, BaseAdapter]], optional): Transport adapters to mount, by url prefix.
+
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        for prefix, prefix_adapter in (adapters or {}).items():
+            self.session.mount(prefix, prefix_adapter)
+
+    def request(self, method: str, url: str, headers: Optional[dict] = None, stream: bool = False, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """Send a request through the session."""
+        return self.session.request(method, url, headers=headers, stream=stream, timeout=timeout, **kwargs)
+
+    def preconnect(self, url: str, connections: int = 1) -> int:
+        """Open pooled connections to the host of a url, unless the url is served by an adapter without a pool."""
+        adapter = self.session.get_adapter(url)
+        if not isinstance(adapter, HTTPAdapter):
+            return 0
+        # The pool is looked up the way the session sends a request, as its key includes the TLS and proxy settings
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        prepared = self.session.prepare_request(requests.Request("GET", url))
+        pool = adapter.get_connection_with_tls_context(prepared, settings["verify"], settings["proxies"], settings["cert"])
+        return _open_connections(pool, connections)
+
+    def close(self):
+        """Close the session and its pooled connections."""
+        self.session.close()
+
+
+def _open_connections(pool: urllib3.HTTPConnectionPool, connections: int) -> int:
+    """Connect idle connections of a urllib3 pool, up to its size, and put them back for the next requests."""
+    taken = []
+    try:
+        for _ in range(min(connections, pool.pool.maxsize)):
+            connection = pool._get_conn()
+            taken.append(connection)
+            if not connection.is_connected:
+                connection.connect()
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        raise ConnectionError(e) from e
+    finally:
+        for connection in taken:
+            pool._put_conn(connection)
+    return len(taken)
+
+
+def _prepare(method: str, url: str, headers: Optional[dict], **kwargs) -> requests.PreparedRequest:
+    """Encode the body and query of a request the way requests does, on top of its default headers."""
+    return requests.Request(method, url, headers={**default_headers(), **(headers or {})}, **kwargs).prepare()
+
+
+class Urllib3Transport(Transport):
+    """Send requests through a urllib3 PoolManager, without the overhead of a requests.Session.
+
+    Redirects are not followed and cookies are not kept, neither of which the Applause APIs rely on.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOLSIZE):
+        """Initialize the Urllib3Transport object.
+
+        Args:
+        ----
+            pool_size (int, optional): The maximum number of pooled connections per host.
+
+        """
+        self._pool = urllib3.PoolManager(maxsize=pool_size)
+        # Only used to turn urllib3 responses into requests responses
+        self._adapter = HTTPAdapter()
+
+    def request(self, method: str, url: str, headers: Optional[dict] = None, stream: bool = False, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """Send a request through the connection pool."""
+        prepared = _prepare(method, url, headers, **kwargs)
+        try:
+            raw = self._pool.urlopen(
+                method=prepared.method,
+                url=prepared.url,
+                body=prepared.body,
+                headers=prepared.headers,
+                redirect=False,
+                retries=False,
+                preload_content=False,
+                decode_content=False,
+                timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                chunked="Transfer-Encoding" in prepared.headers,
+            )
+        except urllib3.exceptions.ConnectTimeoutError as e:
+            raise ConnectTimeout(e, request=prepared) from e
+        except urllib3.exceptions.ReadTimeoutError as e:
+            raise ReadTimeout(e, request=prepared) from e
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            raise ConnectionError(e, request=prepared) from e
+        response = self._adapter.build_response(prepared, raw)
+        if not stream:
+            # Read the body now and release the connection, like requests does
+            _ = response.content
+        return response
+
+    def preconnect(self, url: str, connections: int = 1) -> int:
+        """Open pooled connections to the host of a url."""
+        return _open_connections(self._pool.connection_from_url(url), connections)
+
+    def close(self):
+        """Close every pooled connection."""
+        self._pool.clear()
+
+
+class _HttpxRaw:
+    """Exposes the body of an httpx response the way requests reads the body of a urllib3 response."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def stream(self, chunk_size: int, decode_content: bool = True) -> Iterator[bytes]:
+        yield from self._response.iter_bytes(chunk_size)
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Transport(Transport):
+    """Send requests through an httpx client with HTTP/2 enabled.
+
+    Concurrent requests to the same host share a single multiplexed connection once HTTP/2 has been negotiated.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOLSIZE):
+        """Initialize the Http2Transport object.
+
+        Args:
+        ----
+            pool_size (int, optional): The maximum number of connections, only reached when HTTP/2 is not negotiated.
+
+        Raises:
+        ------
+            ImportError: If httpx with HTTP/2 support is not installed
+
+        """
+        if httpx is None:
+            raise ImportError('The http2 transport requires httpx with HTTP/2 support: pip install "applause-common-reporter[http2]"')
+        self._client = httpx.Client(http2=True, limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size), timeout=None)
+
+    def request(self, method: str, url: str, headers: Optional[dict] = None, stream: bool = False, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """Send a request through the httpx client."""
+        prepared = _prepare(method, url, headers, **kwargs)
+        # Connection specific headers are not allowed in HTTP/2, and httpx frames the body itself
+        request_headers = {name: value for name, value in prepared.headers.items() if name.lower() not in ("connection", "transfer-encoding")}
+        request = self._client.build_request(prepared.method, prepared.url, headers=request_headers, content=prepared.body, timeout=timeout)
+        try:
+            raw = self._client.send(request, stream=True)
+        except httpx.ConnectTimeout as e:
+            raise ConnectTimeout(e, request=prepared) from e
+        except httpx.TimeoutException as e:
+            raise ReadTimeout(e, request=prepared) from e
+        except httpx.TransportError as e:
+            raise ConnectionError(e, request=prepared) from e
+        response = requests.Response()
+        response.status_code = raw.status_code
+        response.reason = raw.reason_phrase or reasons.get(raw.status_code)
+        # httpx decodes the content encoding itself, so the header no longer describes the body
+        response.headers = CaseInsensitiveDict({name: value for name, value in raw.headers.items() if name.lower() != "content-encoding"})
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _HttpxRaw(raw)
+        response.url = prepared.url
+        response.request = prepared
+        if not stream:
+            try:
+                _ = response.content
+            finally:
+                raw.close()
+        return response
+
+    def preconnect(self, url: str, connections: int = 1) -> int:
+        """Open a connection to the host of a url with an OPTIONS request to the url, whose response is discarded.
+
+        httpx does not connect without a request, and one connection carries every request once HTTP/2 is negotiated.
+        OPTIONS asks the server for the methods of the url: it carries no credentials and has no effect on the
+        server, and is usually answered without reaching the API itself.
+        """
+        try:
+            self._client.options(url)
+        except httpx.TransportError as e:
+            raise ConnectionError(e) from e
+        return 1
+
+    def close(self):
+        """Close the client and its connections."""
+        self._client.close()
+
+
+def create_transport(transport_type: TransportType = TransportType.REQUESTS, pool_size: int = DEFAULT_POOLSIZE) -> Transport:
+    """Create a transport of the provided type.
+
+    Args:
+    ----
+        transport_type (TransportType, optional): The type of transport. Defaults to TransportType.REQUESTS.
+        pool_size (int, optional): The maximum number of pooled connections per host.
+
+    Returns:
+    -------
+        Transport: The new transport
+
+    """
+    transport_type = TransportType(transport_type)
+    if transport_type == TransportType.URLLIB3:
+        return Urllib3Transport(pool_size=pool_size)
+    if transport_type == TransportType.HTTP2:
+        return Http2Transport(pool_size=pool_size)
+    return RequestsTransport(pool_size=pool_size)
@@ -7,6 +7,9 @@ Typical usage example:
         print(parsed_test_case.test_case_name) # "Test Case Name"
         print(parsed_test_case.test_rail_test_case_id) # 123
         print(parsed_test_case.applause_test_case_id) # 456
+
+        # Keep the start and end of a long stack trace within 64 KiB
+        failure_reason = utils.truncate_middle(stack_trace, 64 * 1024)
 """
 
 from pydantic import BaseModel
@@ -98,3 +101,51 @@ def parse_test_case_names(test_case_name: str) -> TestCaseNameMatches:
         test_rail_test_case_id=test_rail_test_case_id,
         applause_test_case_id=applause_test_case_id,
     )
+
+
+def utf8_size(text: str) -> int:
+    """Get the size of a string encoded as UTF-8, without encoding ASCII strings.
+
+    Args:
+    ----
+        text: The string to measure
+
+    Returns:
+    -------
+        int: The size in bytes
+
+    """
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def truncate_middle(text: str, max_bytes: int, note: Optional[str] = None) -> str:
+    """Shorten a string to a UTF-8 size budget, keeping its head and tail.
+
+    The start of a stack trace usually holds the error and the end holds the innermost frames, so both are kept
+    and the middle is replaced by a marker stating how many bytes were left out.
+
+    Args:
+    ----
+        text: The string to shorten
+        max_bytes: The maximum size of the result in bytes, when encoded as UTF-8
+        note: Additional information added to the marker, such as where the full text can be found
+
+    Returns:
+    -------
+        str: The string itself if it fits the budget, or its head and tail joined by the marker
+
+    """
+    if utf8_size(text) <= max_bytes:
+        return text
+    encoded = text.encode("utf-8")
+    suffix = f", {note}" if note else ""
+    # The marker is sized for the largest possible number of omitted bytes, so the result always fits
+    marker_size = len(f"\n... [{len(encoded)} bytes truncated{suffix}] ...\n".encode("utf-8"))
+    keep = max_bytes - marker_size
+    if keep <= 0:
+        return encoded[:max_bytes].decode("utf-8", errors="ignore")
+    # Cutting through a multi-byte character drops the partial character rather than failing
+    head = encoded[: keep // 2].decode("utf-8", errors="ignore")
+    tail = encoded[len(encoded) - (keep - keep // 2) :].decode("utf-8", errors="ignore")
+    omitted = len(encoded) - utf8_size(head) - utf8_size(tail)
+    return f"{head}\n... [{omitted} bytes truncated{suffix}] ...\n{tail}"
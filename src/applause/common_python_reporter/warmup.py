@@ -0,0 +1,272 @@
+"""Warm-up of the Automation API client while the test framework starts.
+
+The first runner_start of a process resolves the host of the Automation API, opens a TCP connection and makes a TLS
+handshake before the run can be created, one after the other, adding seconds to the startup of short jobs. With
+ApplauseConfig.warm_up set, ApplauseReporter starts a WarmUp as soon as it is built instead. A background thread
+resolves the host, opens pooled connections to it through the transport of the client and runs the DTOs through
+their serializers once, while the test framework collects the tests. runner_start then waits for the warm-up to
+finish, if it has not already, rather than opening connections of its own.
+
+The warm-up installs a process wide DnsCache in place of socket.getaddrinfo, so that every connection to the
+Automation and Public API hosts, whichever transport opens it, resolves them once for the lifetime of the process.
+Other hosts are passed straight to the resolver, so the addresses of other services are never held past their TTL.
+Failed lookups are not cached. The time of each step of the warm-up is recorded in the applause_warm_up_duration_seconds histogram.
+
+Typical usage example:
+
+    config = ApplauseConfig(api_key="api_key", product_id=123, warm_up=True)
+    reporter = ApplauseReporter(config)  # connects in the background
+    tests = collect_tests()
+    reporter.runner_start(tests)
+"""
+
+import socket
+import threading
+import time
+from .auto_api import AutoApi
+from .dtos import (
+    CreateTestCaseResultDto,
+    CreateTestCaseResultResponseDto,
+    SubmitTestCaseResultDto,
+    TestResultProviderInfo,
+    TestResultStatus,
+    TestRunCreateDto,
+    TestRunCreateResponseDto,
+)
+from .json_codec import JsonCodec, StdlibJsonCodec
+from .metrics import WARM_UP_DURATION
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_CONNECTIONS = 2
+DEFAULT_WAIT_TIMEOUT = 5.0
+
+
+class DnsCacheStats(BaseModel):
+    """The lookups answered by a DNS cache.
+
+    Attributes
+    ----------
+        hits: The number of lookups answered from the cache
+        misses: The number of lookups passed on to the resolver
+        entries: The number of cached results
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+
+
+class DnsCache:
+    """A cache of getaddrinfo results, kept for the lifetime of the process.
+
+    Attributes
+    ----------
+        resolver (Callable[..., List[Tuple[Any, ...]]]): The function that lookups missing from the cache are passed on to.
+        hosts (Optional[Set[str]]): The lowercase hosts whose lookups are cached, or None to cache every host.
+
+    """
+
+    def __init__(self, resolver: Callable[..., List[Tuple[Any, ...]]] = socket.getaddrinfo, hosts: Optional[Iterable[str]] = None):
+        """Initialize the DnsCache object.
+
+        Args:
+        ----
+            resolver (Callable[..., List[Tuple[Any, ...]]], optional): The function that lookups missing from the cache
+                are passed on to. Defaults to socket.getaddrinfo.
+            hosts (Optional[Iterable[str]], optional): The hosts whose lookups are cached. The lookups of other hosts
+                are passed on to the resolver every time. Defaults to caching every host.
+
+        """
+        self.resolver = resolver
+        self.hosts: Optional[Set[str]] = None if hosts is None else {host.lower() for host in hosts}
+        self._results: Dict[Tuple[Any, ...], List[Tuple[Any, ...]]] = {}
+        self._lock = threading.Lock()
+        self._stats = DnsCacheStats()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0) -> List[Tuple[Any, ...]]:
+        """Resolve a host, with the arguments and results of socket.getaddrinfo, answering from the cache if possible."""
+        hosts = self.hosts
+        if hosts is not None and not (isinstance(host, str) and host.lower() in hosts):
+            return self.resolver(host, port, family, type, proto, flags)
+        key = (host, port, family, type, proto, flags)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._stats.hits += 1
+                return list(result)
+            self._stats.misses += 1
+        # Lookups are not made under the lock, so a slow one does not hold up the others
+        result = self.resolver(host, port, family, type, proto, flags)
+        with self._lock:
+            self._results[key] = list(result)
+        return result
+
+    def stats(self) -> DnsCacheStats:
+        """Get the lookups answered so far, and the number of cached results."""
+        with self._lock:
+            return self._stats.model_copy(update={"entries": len(self._results)})
+
+    def clear(self):
+        """Forget every cached result."""
+        with self._lock:
+            self._results.clear()
+
+
+_dns_cache: Optional[DnsCache] = None
+_dns_lock = threading.Lock()
+
+
+def install_dns_cache(hosts: Iterable[str] = ()) -> DnsCache:
+    """Install the process wide DnsCache in place of socket.getaddrinfo, if it is not installed yet, and cache the lookups of hosts.
+
+    Args:
+    ----
+        hosts (Iterable[str], optional): The hosts whose lookups are cached, on top of the hosts of the previous calls.
+            The lookups of other hosts are passed on to the resolver. Defaults to none.
+
+    Returns:
+    -------
+        DnsCache: The installed cache
+
+    """
+    global _dns_cache
+    with _dns_lock:
+        if _dns_cache is None:
+            _dns_cache = DnsCache(socket.getaddrinfo, hosts=())
+            socket.getaddrinfo = _dns_cache.getaddrinfo
+        _dns_cache.hosts = _dns_cache.hosts | {host.lower() for host in hosts}
+        return _dns_cache
+
+
+def uninstall_dns_cache():
+    """Restore the resolver that the process wide DnsCache replaced, dropping its results.
+
+    If socket.getaddrinfo was replaced again since the cache was installed, the replacement is left in place, and the
+    cache it may call passes every lookup on to the resolver.
+    """
+    global _dns_cache
+    with _dns_lock:
+        if _dns_cache is not None:
+            # Bound methods are created on each access, so they are compared by equality
+            if socket.getaddrinfo == _dns_cache.getaddrinfo:
+                socket.getaddrinfo = _dns_cache.resolver
+            else:
+                _dns_cache.hosts = set()
+            _dns_cache.clear()
+            _dns_cache = None
+
+
+def prebuild_serializers(codec: Optional[JsonCodec] = None):
+    """Run the DTOs of the reporter calls through their serializers, the JSON codec and their validators once, with placeholder values.
+
+    Args:
+    ----
+        codec (Optional[JsonCodec], optional): The codec of the client. Defaults to the json module used by requests.
+
+    """
+    codec = codec if codec is not None else StdlibJsonCodec()
+    request_dtos: List[BaseModel] = [
+        TestRunCreateDto(tests=[]),
+        CreateTestCaseResultDto(test_run_id=0, test_case_name="", provider_session_ids=[]),
+        SubmitTestCaseResultDto(test_result_id=0, status=TestResultStatus.PASSED, provider_session_guids=[]),
+    ]
+    for dto in request_dtos:
+        codec.dumps(dto.model_dump(by_alias=True))
+    TestRunCreateResponseDto.model_validate(codec.loads(b'{"runId": 0}'))
+    CreateTestCaseResultResponseDto.model_validate(codec.loads(b'{"testResultId": 0}'))
+    TestResultProviderInfo.model_validate(codec.loads(b'{"testResultId": 0}'))
+
+
+class WarmUpStats(BaseModel):
+    """The outcome of a warm-up.
+
+    Attributes
+    ----------
+        connections: The number of connections opened
+        seconds: The time the warm-up took
+        errors: The errors of the steps that failed, a failed step does not stop the next ones
+
+    """
+
+    connections: int = 0
+    seconds: float = 0.0
+    errors: List[str] = []
+
+
+class WarmUp:
+    """Resolve the host of the Automation API, connect to it and build the serializers from a background thread.
+
+    Attributes
+    ----------
+        auto_api (AutoApi): The client whose connections are opened.
+        connections (int): The number of connections opened.
+
+    """
+
+    def __init__(self, auto_api: AutoApi, connections: int = DEFAULT_CONNECTIONS):
+        """Initialize the WarmUp object. The warm-up runs once it is started.
+
+        Args:
+        ----
+            auto_api (AutoApi): The client whose connections are opened
+            connections (int, optional): The number of connections to open. Defaults to 2.
+
+        """
+        self.auto_api = auto_api
+        self.connections = connections
+        self._done = threading.Event()
+        self._stats = WarmUpStats()
+        self._thread = threading.Thread(target=self._run, name="applause-warm-up", daemon=True)
+
+    def start(self) -> "WarmUp":
+        """Start the warm-up on a background thread."""
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish.
+
+        Args:
+        ----
+            timeout (Optional[float], optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+
+        Returns:
+        -------
+            bool: Whether the warm-up finished before the timeout
+
+        """
+        return self._done.wait(timeout)
+
+    def stats(self) -> WarmUpStats:
+        """Get the outcome of the warm-up, once it has finished."""
+        return self._stats.model_copy()
+
+    def _resolve(self):
+        config = self.auto_api.config
+        parsed = urlparse(config.auto_api_base_url)
+        hosts = [host for host in (parsed.hostname, urlparse(config.public_api_base_url).hostname) if host]
+        install_dns_cache(hosts).getaddrinfo(parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80), 0, socket.SOCK_STREAM)
+
+    def _connect(self):
+        self._stats.connections = self.auto_api.transport.preconnect(self.auto_api.config.auto_api_base_url, self.connections)
+
+    def _serializers(self):
+        prebuild_serializers(self.auto_api.json_codec)
+
+    def _run(self):
+        start = time.perf_counter()
+        steps: List[Tuple[str, Callable[[], None]]] = [("resolve", self._resolve), ("connect", self._connect), ("serializers", self._serializers)]
+        try:
+            for name, step in steps:
+                step_start = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    self._stats.errors.append(f"{name}: {e}")
+                self.auto_api.metrics.observe(WARM_UP_DURATION, time.perf_counter() - step_start, step=name)
+        finally:
+            self._stats.seconds = time.perf_counter() - start
+            self._done.set()
@@ -0,0 +1,152 @@
+"""Tests for the asset_pipeline module."""
+
+import io
+import json
+import threading
+import time
+from applause.common_python_reporter.asset_pipeline import AssetPipeline, redact, strip_har_bodies
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType, TestResultStatus
+from applause.common_python_reporter.metrics import ASSET_STAGE_DURATION, ASSETS_UPLOADED, MetricsRegistry
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.stand_in import StandInServer
+
+
+def run_stage(stage, chunks):
+    return b"".join(stage(iter(chunks)))
+
+
+def slow(chunks):
+    for chunk in chunks:
+        time.sleep(0.05)
+        yield chunk
+
+
+def upper(chunks):
+    for chunk in chunks:
+        yield chunk.upper()
+
+
+class TestStages:
+    """Tests for the built-in stages."""
+
+    def test_redact(self):
+        """Test that tokens are redacted, even when a line is split between chunks, keeping the field names."""
+        log = [b"GET /items?api_key=abc", b"123&page=2\nAuthorization: Bearer eyJhbGciOi.x-y\n", b'{"password": "hunter2"}']
+
+        assert run_stage(redact(), log) == b'GET /items?api_key=[REDACTED]&page=2\nAuthorization: Bearer [REDACTED]\n{"password": "[REDACTED]"}'
+
+    def test_redact_bounds_long_lines(self):
+        """Test that a line longer than the maximum is processed without waiting for its end."""
+        stage = redact(max_line_size=10)
+        chunks = stage(iter([b"x" * 8, b"x" * 8, b"x" * 8]))
+
+        assert next(chunks) == b"x" * 16
+
+    def test_strip_har_bodies(self):
+        """Test that large bodies are removed, small ones kept, and other files passed through."""
+        har = {"log": {"entries": [{"request": {"postData": {"text": "small"}}, "response": {"content": {"size": 100, "text": "y" * 100}}}]}}
+
+        stripped = json.loads(run_stage(strip_har_bodies(max_body_size=10), [json.dumps(har).encode("utf-8")]))
+
+        entry = stripped["log"]["entries"][0]
+        assert entry["request"]["postData"] == {"text": "small"}
+        assert entry["response"]["content"] == {"size": 100, "comment": "Body of 100 characters removed before upload"}
+        assert run_stage(strip_har_bodies(), [b"not json"]) == b"not json"
+
+
+class TestAssetPipeline:
+    """Tests for the AssetPipeline class."""
+
+    def test_process_chains_stages_and_times_them(self):
+        """Test that the stages run in order over the chunks, and that the time of each stage is recorded on its own."""
+        metrics = MetricsRegistry()
+        pipeline = AssetPipeline({AssetType.CONSOLE_LOG: [slow, upper]}, metrics, chunk_size=4)
+
+        output = pipeline.process(AssetType.CONSOLE_LOG, io.BytesIO(b"abcdefgh"))
+
+        assert output == b"ABCDEFGH"
+        slow_stage = metrics.snapshot().histogram(ASSET_STAGE_DURATION, asset_type="CONSOLE_LOG", stage="slow")
+        upper_stage = metrics.snapshot().histogram(ASSET_STAGE_DURATION, asset_type="CONSOLE_LOG", stage="upper")
+        assert slow_stage.count == 1 and slow_stage.sum >= 0.1
+        assert upper_stage.count == 1 and upper_stage.sum < slow_stage.sum / 4
+
+    def test_process_spools_large_output(self):
+        """Test that output larger than the spool threshold is returned as a temporary file."""
+        pipeline = AssetPipeline({AssetType.CONSOLE_LOG: [upper]}, MetricsRegistry(), chunk_size=1024, spool_threshold=2048)
+
+        output = pipeline.process(AssetType.CONSOLE_LOG, b"a" * 5000)
+
+        with output:
+            assert output.read() == b"A" * 5000
+
+    def test_failures_are_counted(self, capsys):
+        """Test that an asset whose stage fails is not uploaded, reported, and that the error is set on its future."""
+
+        def broken(chunks):
+            raise ValueError("cannot process")
+            yield b""
+
+        uploads = []
+        pipeline = AssetPipeline({AssetType.SCREENSHOT: [broken], AssetType.CONSOLE_LOG: [upper]}, MetricsRegistry())
+
+        failed = pipeline.submit(AssetType.SCREENSHOT, b"png", uploads.append, asset_name="screen.png")
+        uploaded = pipeline.submit(AssetType.CONSOLE_LOG, b"log", uploads.append)
+
+        assert pipeline.close(timeout=5)
+        assert isinstance(failed.exception(), ValueError)
+        assert uploaded.result() is None
+        assert uploads == [b"LOG"]
+        assert "Could not upload SCREENSHOT asset screen.png: cannot process" in capsys.readouterr().out
+        assert (pipeline.stats().queued, pipeline.stats().uploaded, pipeline.stats().failed, pipeline.stats().pending) == (2, 1, 1, 0)
+
+    def test_abandoned_assets_are_closed(self):
+        """Test that a file object left queued when the pipeline gives up on it is closed all the same."""
+        release = threading.Event()
+
+        def gated(chunks):
+            release.wait(5)
+            yield from chunks
+
+        pipeline = AssetPipeline({AssetType.CONSOLE_LOG: [gated]}, MetricsRegistry(), max_workers=1)
+        pipeline.submit(AssetType.CONSOLE_LOG, b"first", lambda output: None)
+        file = io.BytesIO(b"second")
+        abandoned = pipeline.submit(AssetType.CONSOLE_LOG, file, lambda output: None)
+
+        assert not pipeline.close(timeout=0.1)
+        release.set()
+
+        assert "Closed before the asset was processed" in str(abandoned.exception(timeout=5))
+        assert file.closed
+
+
+class TestReporterAssetPipeline:
+    """Tests for the asset pipeline of the reporter."""
+
+    def test_assets_are_processed_in_the_background(self, tmp_path, monkeypatch):
+        """Test that attaching an asset with stages returns before its stages ran, and that the run waits for its upload."""
+        monkeypatch.chdir(tmp_path)
+        release = threading.Event()
+
+        def gated(chunks):
+            release.wait(5)
+            yield from chunks
+
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+            reporter = ApplauseReporter(config, asset_stages={AssetType.CONSOLE_LOG: [gated]})
+            reporter.runner_start(["test1"])
+            reporter.start_test_case("test1", "test1")
+
+            future = reporter.attach_test_case_asset("test1", "console.log", "", AssetType.CONSOLE_LOG, b"log")
+            direct = reporter.attach_test_case_asset("test1", "page.html", "", AssetType.PAGE_SOURCE, b"<html/>")
+            reporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+
+            assert not future.done()
+            assert direct is None
+            release.set()
+            reporter.runner_end()
+
+            assert future.done() and future.exception() is None
+            assert server.request_counts()["upload"] == 2
+        assert reporter.metrics.snapshot().counter(ASSETS_UPLOADED) == 2
@@ -0,0 +1,101 @@
+"""Tests for the bandwidth module."""
+
+import io
+import pytest
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.bandwidth import BandwidthLimiter, BandwidthOptions
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType
+from applause.common_python_reporter.metrics import UPLOAD_BANDWIDTH_LIMIT, UPLOAD_BYTES, UPLOAD_THROUGHPUT, MetricsRegistry
+from applause.common_python_reporter.stand_in import StandInServer
+
+
+class TestBandwidthLimiter:
+    """Tests for the BandwidthLimiter class."""
+
+    def test_paces_body(self):
+        """Test that a body is read at the pace of the cap, in bounded chunks, and that the throughput is reported."""
+        metrics = MetricsRegistry()
+        limiter = BandwidthLimiter(BandwidthOptions(run_bytes_per_second=100_000, burst_bytes=10_000), metrics)
+        body = limiter.pace(io.BytesIO(b"x" * 50_000))
+
+        start = time.perf_counter()
+        chunks = list(body)
+        elapsed = time.perf_counter() - start
+
+        assert b"".join(chunks) == b"x" * 50_000
+        assert max(len(chunk) for chunk in chunks) <= 16 * 1024
+        assert elapsed >= 0.35
+        stats = limiter.stats()
+        assert (stats.uploads, stats.bytes) == (1, 50_000)
+        assert stats.bytes_per_second <= 150_000
+        assert metrics.snapshot().counter(UPLOAD_BYTES) == 50_000
+        assert metrics.snapshot().gauge(UPLOAD_THROUGHPUT) == stats.bytes_per_second
+
+    def test_adapts_to_latency(self):
+        """Test that the caps are halved while heartbeats or submissions are slow, down to the minimum, and grow back."""
+        metrics = MetricsRegistry()
+        limiter = BandwidthLimiter(BandwidthOptions(max_bytes_per_second=1_000_001, run_bytes_per_second=100_000, latency_target=0.5, min_factor=0.2), metrics)
+
+        limiter.observe_latency("upload", 10.0)
+        assert limiter.stats().factor == 1.0
+        limiter.observe_latency("sdk-heartbeat", 2.0)
+        limiter.observe_latency("test-result", 2.0)
+        assert limiter.stats().factor == 0.25
+        assert metrics.snapshot().gauge(UPLOAD_BANDWIDTH_LIMIT, scope="run") == 25_000
+        limiter.observe_latency("sdk-heartbeat", 2.0)
+        assert limiter.stats().factor == 0.2
+        limiter.observe_latency("sdk-heartbeat", 0.1)
+        assert limiter.stats().factor == pytest.approx(0.3)
+        assert metrics.snapshot().gauge(UPLOAD_BANDWIDTH_LIMIT, scope="process") == pytest.approx(1_000_001 * 0.3)
+
+    def test_process_cap_is_shared(self):
+        """Test that clients with the same options share the process wide cap, and each have their own run cap."""
+        options = BandwidthOptions(max_bytes_per_second=1_000_002, run_bytes_per_second=100_000)
+        first, second = BandwidthLimiter(options, MetricsRegistry()), BandwidthLimiter(options, MetricsRegistry())
+
+        assert first._buckets["process"].bucket is second._buckets["process"].bucket
+        assert first._buckets["run"].bucket is not second._buckets["run"].bucket
+
+    def test_clients_adapt_on_their_own(self):
+        """Test that the slow calls of a client lower its own pace through the shared cap, with its own minimum, and not the pace of the others."""
+        slow = BandwidthLimiter(BandwidthOptions(max_bytes_per_second=1_000_003, min_factor=0.5), MetricsRegistry())
+        fast = BandwidthLimiter(BandwidthOptions(max_bytes_per_second=1_000_003, min_factor=0.1), MetricsRegistry())
+
+        for _ in range(3):
+            slow.observe_latency("sdk-heartbeat", 10.0)
+            fast.observe_latency("sdk-heartbeat", 10.0)
+        fast.observe_latency("sdk-heartbeat", 0.1)
+        fast.observe_latency("sdk-heartbeat", 0.1)
+
+        assert slow.stats().factor == 0.5
+        assert fast.stats().factor == pytest.approx(0.325)
+        assert slow._buckets["process"].bucket is fast._buckets["process"].bucket
+        assert slow._buckets["process"].bucket.rate == 1_000_003
+
+
+class TestPacedUploads:
+    """Tests for the uploads of a client with bandwidth caps."""
+
+    def test_upload_asset_is_paced(self, tmp_path):
+        """Test that bytes and files are uploaded as multipart bodies at the pace of the cap."""
+        with StandInServer() as server:
+            config = ApplauseConfig(
+                api_key="test", product_id=1, auto_api_base_url=server.base_url, bandwidth=BandwidthOptions(run_bytes_per_second=200_000, burst_bytes=16 * 1024)
+            )
+            auto_api = AutoApi(config)
+            path = tmp_path / "video.mp4"
+            path.write_bytes(b"v" * 50_000)
+
+            start = time.perf_counter()
+            auto_api.upload_asset(1, b"x" * 50_000, "log.txt", "", AssetType.CONSOLE_LOG)
+            with open(path, "rb") as f:
+                auto_api.upload_asset(1, f, "video.mp4", "", AssetType.VIDEO)
+            elapsed = time.perf_counter() - start
+
+            received = server.bytes_received()["upload"]
+        assert received > 100_000
+        assert elapsed >= 0.35
+        assert auto_api.bandwidth.stats().uploads == 2
+        assert auto_api.bandwidth.stats().bytes == received
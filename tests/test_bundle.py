@@ -0,0 +1,150 @@
+"""Tests for the bundle module."""
+
+import json
+import os
+import tracemalloc
+from applause.common_python_reporter.bundle import MANIFEST_FILE, STATE_FILE, BundleAsset, BundleTestCase, BundleWriter, main, read_manifest, upload_bundle
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType, TestResultStatus
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+
+def write_bundle(directory, test_cases: int = 3, asset_size: int = 1000) -> BundleWriter:
+    writer = BundleWriter(str(directory))
+    for index in range(test_cases):
+        with open(os.path.join(writer.directory, f"log-{index}.txt"), "wb") as f:
+            f.write(b"x" * asset_size)
+        writer.add(
+            BundleTestCase(
+                id=str(index),
+                name=f"test_{index}",
+                status=TestResultStatus.FAILED if index == 0 else TestResultStatus.PASSED,
+                failure_reason="boom" if index == 0 else None,
+                assets=[BundleAsset(path=f"log-{index}.txt", asset_type=AssetType.CONSOLE_LOG)],
+            )
+        )
+    return writer
+
+
+class TestBundleWriter:
+    """Tests for writing and reading bundles."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that the test cases written to a bundle are read back, ignoring a line cut short by a crash."""
+        write_bundle(tmp_path, test_cases=2)
+        with open(tmp_path / MANIFEST_FILE, "a") as f:
+            f.write('{"id": "2", "na')
+
+        test_cases = read_manifest(str(tmp_path))
+
+        assert [test_case.id for test_case in test_cases] == ["0", "1"]
+        assert test_cases[0].failure_reason == "boom"
+        assert test_cases[1].assets[0].asset_type == AssetType.CONSOLE_LOG
+
+
+class TestUploadBundle:
+    """Tests for uploading bundles."""
+
+    def test_uploads_every_test_case(self, tmp_path, monkeypatch):
+        """Test that every test case, asset and result is uploaded, and that a finished upload is not repeated."""
+        monkeypatch.chdir(tmp_path)
+        write_bundle(tmp_path / "bundle", test_cases=5)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+            updates = []
+
+            progress = upload_bundle(str(tmp_path / "bundle"), config, workers=3, on_progress=updates.append, progress_interval=0)
+            again = upload_bundle(str(tmp_path / "bundle"), config)
+
+            counts = server.request_counts()
+        assert (progress.uploaded, progress.assets, progress.asset_bytes, progress.errors, progress.ended) == (5, 5, 5000, 0, True)
+        assert updates and updates[-1].uploaded <= 5
+        assert (again.uploaded, again.resumed, again.ended) == (0, 5, True)
+        assert counts["test-run/create"] == 1
+        assert counts["create-result"] == 5
+        assert counts["upload"] == 5
+        assert counts["test-result"] == 5
+        assert counts["test-run/end"] == 1
+
+    def test_resumes_interrupted_upload(self, tmp_path, monkeypatch):
+        """Test that a failed upload leaves the run open, and the next attempt only uploads what is missing to it."""
+        monkeypatch.chdir(tmp_path)
+        write_bundle(tmp_path / "bundle", test_cases=4)
+        with StandInServer(StandInConfig(endpoint_error_rate={"upload": 1.0})) as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+
+            first = upload_bundle(str(tmp_path / "bundle"), config, workers=2)
+            server.config = StandInConfig()
+            second = upload_bundle(str(tmp_path / "bundle"), config, workers=2)
+
+            counts = server.request_counts()
+        assert (first.uploaded, first.errors, first.ended) == (0, 4, False)
+        assert (second.uploaded, second.errors, second.ended) == (4, 0, True)
+        assert second.test_run_id == first.test_run_id
+        assert counts["test-run/create"] == 1
+        assert counts["create-result"] == 4
+        assert counts["test-result"] == 4
+        assert counts["test-run/end"] == 1
+        with open(tmp_path / "bundle" / STATE_FILE) as f:
+            assert json.loads(f.readlines()[-1]) == {"ended": True}
+
+    def test_queued_submissions_are_recorded_once_sent(self, tmp_path, monkeypatch, capsys):
+        """Test that results are submitted before they are recorded, even when the configuration queues submissions."""
+        monkeypatch.chdir(tmp_path)
+        write_bundle(tmp_path / "bundle", test_cases=2)
+        with StandInServer(StandInConfig(endpoint_error_rate={"test-result": 1.0})) as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, queue_submissions=True)
+
+            first = upload_bundle(str(tmp_path / "bundle"), config)
+            server.config = StandInConfig()
+            second = upload_bundle(str(tmp_path / "bundle"), config)
+
+        assert (first.uploaded, first.errors, first.ended) == (0, 2, False)
+        assert "Could not upload test case 0:" in capsys.readouterr().out
+        assert (second.uploaded, second.resumed, second.ended) == (2, 0, True)
+
+    def test_closed_run_is_replaced(self, tmp_path, monkeypatch):
+        """Test that an upload whose run the Automation API no longer accepts is resumed on a new run."""
+        monkeypatch.chdir(tmp_path)
+        write_bundle(tmp_path / "bundle", test_cases=2)
+        with StandInServer(StandInConfig(endpoint_error_rate={"test-result": 1.0})) as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+
+            first = upload_bundle(str(tmp_path / "bundle"), config)
+            server.config = StandInConfig(endpoint_error_rate={"sdk-heartbeat": 1.0}, error_status=404)
+            second = upload_bundle(str(tmp_path / "bundle"), config)
+
+            counts = server.request_counts()
+        assert not first.ended
+        assert second.ended and second.test_run_id != first.test_run_id
+        assert (second.uploaded, second.resumed) == (2, 0)
+        assert counts["test-run/create"] == 2
+        assert counts["create-result"] == 4
+
+    def test_streams_assets_from_disk(self, tmp_path, monkeypatch):
+        """Test that asset files are not loaded into memory."""
+        monkeypatch.chdir(tmp_path)
+        write_bundle(tmp_path / "bundle", test_cases=1, asset_size=16 * 1024 * 1024)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+
+            tracemalloc.start()
+            try:
+                progress = upload_bundle(str(tmp_path / "bundle"), config)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            assert server.bytes_received()["upload"] > 16 * 1024 * 1024
+        assert progress.ended
+        assert peak < 4 * 1024 * 1024
+
+    def test_main(self, tmp_path, monkeypatch, capsys):
+        """Test the uploader from the command line."""
+        monkeypatch.chdir(tmp_path)
+        write_bundle(tmp_path / "bundle", test_cases=2)
+        with StandInServer() as server:
+            exit_code = main([str(tmp_path / "bundle"), "--api-key", "test", "--product-id", "1", "--base-url", server.base_url])
+
+        assert exit_code == 0
+        assert "2/2 test cases" in capsys.readouterr().out.splitlines()[-1]
@@ -0,0 +1,122 @@
+"""Tests for the checkpoint module."""
+
+import json
+from applause.common_python_reporter import reporter as reporter_module
+from applause.common_python_reporter.checkpoint import RunCheckpoint
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import TestResultStatus
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+
+def crash(reporter: ApplauseReporter):
+    """Drop a reporter without ending its run, the way a crashed process would."""
+    reporter.reporter.hearbeat_service.stop()
+    reporter.reporter.checkpoint.close()
+    reporter_module._open_reporters.discard(reporter)
+
+
+class TestRunCheckpoint:
+    """Tests for the RunCheckpoint class."""
+
+    def test_steps_are_reloaded(self, tmp_path):
+        """Test that the run, results and submissions are read back, ignoring a line torn by a crash."""
+        path = str(tmp_path / "run.jsonl")
+        checkpoint = RunCheckpoint(path, product_id=1)
+        checkpoint.start_run(10)
+        checkpoint.record_result("t1", 11)
+        checkpoint.record_result("t2", 12)
+        checkpoint.record_submitted(11)
+        checkpoint.close()
+        with open(path, "a") as f:
+            f.write('{"id":"t3","res')
+
+        reloaded = RunCheckpoint(path, product_id=1)
+
+        assert (reloaded.test_run_id, reloaded.results, reloaded.submitted) == (10, {"t1": 11, "t2": 12}, {11})
+        assert reloaded.reported_tests == ["t1"]
+        with open(path) as f:
+            assert f.read().endswith("\n")
+        assert RunCheckpoint(path, product_id=2).test_run_id is None
+
+    def test_compaction(self, tmp_path):
+        """Test that the file is rewritten with the steps still needed once enough redundant lines were appended."""
+        path = tmp_path / "run.jsonl"
+        checkpoint = RunCheckpoint(str(path), product_id=1, compact_threshold=10)
+        checkpoint.start_run(10)
+        checkpoint.record_result("t1", 11)
+        for _ in range(7):
+            checkpoint.record_submitted(11)
+        assert len(path.read_text().splitlines()) == 9
+
+        checkpoint.record_submitted(11)
+
+        assert [json.loads(line) for line in path.read_text().splitlines()] == [{"run": 10, "product_id": 1}, {"id": "t1", "result": 11}, {"submitted": 11}]
+        checkpoint.record_result("t2", 12)
+        assert RunCheckpoint(str(path), product_id=1).results == {"t1": 11, "t2": 12}
+        checkpoint.remove()
+        assert not path.exists()
+
+
+class TestReporterCheckpoint:
+    """Tests for the resumption of runs by the reporter."""
+
+    def test_restarted_reporter_resumes_the_run(self, tmp_path, monkeypatch):
+        """Test that a restarted reporter reattaches to the run, reusing results that were started and skipping submitted ones."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, checkpoint_file=str(tmp_path / "run.jsonl"))
+            first = ApplauseReporter(config)
+            run_id = first.runner_start(["t1", "t2", "t3"])
+            first.start_test_case("t1", "t1")
+            first.submit_test_case_result("t1", TestResultStatus.PASSED)
+            started = first.start_test_case("t2", "t2")
+            crash(first)
+
+            second = ApplauseReporter(config)
+            assert second.runner_start(["t1", "t2", "t3"]) == run_id
+            assert second.reporter.reported_tests == ["t1"]
+            assert second.start_test_case("t2", "t2").test_result_id == started.test_result_id
+            second.start_test_case("t3", "t3")
+            second.submit_test_case_result("t2", TestResultStatus.PASSED)
+            second.submit_test_case_result("t3", TestResultStatus.FAILED)
+            second.runner_end()
+
+            counts = server.request_counts()
+        assert (counts["test-run/create"], counts["create-result"], counts["test-result"], counts["test-run/end"]) == (1, 3, 3, 1)
+        assert not (tmp_path / "run.jsonl").exists()
+        assert len(json.loads((tmp_path / "provider_session_links.txt").read_text())) == 3
+
+    def test_run_that_cannot_be_resumed_is_replaced(self, tmp_path, monkeypatch):
+        """Test that a new run is started when the Automation API rejects the heartbeat of the checkpointed run."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, checkpoint_file=str(tmp_path / "run.jsonl"))
+            first = ApplauseReporter(config)
+            run_id = first.runner_start(["t1"])
+            first.start_test_case("t1", "t1")
+            crash(first)
+            server.config = StandInConfig(endpoint_error_rate={"sdk-heartbeat": 1.0}, error_status=404)
+
+            second = ApplauseReporter(config)
+            new_run_id = second.runner_start(["t1"])
+            second.reporter.hearbeat_service.stop()
+
+        assert new_run_id != run_id
+        assert second.reporter.result_map == {}
+        assert RunCheckpoint(str(tmp_path / "run.jsonl"), product_id=1).test_run_id == new_run_id
+
+    def test_exit_hook_leaves_the_run_open(self, tmp_path, monkeypatch):
+        """Test that a run with a checkpoint and test cases in progress is left open on exit, for the next process to resume."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, checkpoint_file=str(tmp_path / "run.jsonl"))
+            reporter = ApplauseReporter(config)
+            run_id = reporter.runner_start(["t1"])
+            reporter.start_test_case("t1", "t1")
+
+            reporter._shutdown()
+            reporter_module._open_reporters.discard(reporter)
+
+            assert "test-run/end" not in server.request_counts()
+        assert RunCheckpoint(str(tmp_path / "run.jsonl"), product_id=1).test_run_id == run_id
@@ -0,0 +1,74 @@
+"""Tests for the compression module."""
+
+import gzip
+import json
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.compression import CompressionOptions, RequestCompressor
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import TestRunCreateDto
+from applause.common_python_reporter.metrics import HTTP_REQUESTS, REQUEST_BODY_COMPRESSED_BYTES, REQUEST_BODY_RAW_BYTES, MetricsRegistry
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+
+class TestRequestCompressor:
+    """Tests for the RequestCompressor class."""
+
+    def test_encode(self):
+        """Test that large JSON bodies are compressed, small ones and other bodies left alone, and the sizes recorded."""
+        metrics = MetricsRegistry()
+        compressor = RequestCompressor(CompressionOptions(min_size=100), metrics)
+        names = {"tests": [f"test_{index}" for index in range(100)]}
+
+        headers, kwargs, compressed = compressor.encode("test-run/create", {"X-Api-Key": "key"}, {"json": names, "timeout": 5})
+        assert compressed
+        assert headers == {"X-Api-Key": "key", "Content-Type": "application/json", "Content-Encoding": "gzip"}
+        assert kwargs["timeout"] == 5 and "json" not in kwargs
+        assert json.loads(gzip.decompress(kwargs["data"])) == names
+
+        headers, kwargs, compressed = compressor.encode("sdk-heartbeat", {}, {"json": {"testRunId": 1}})
+        assert not compressed and kwargs == {"data": b'{"testRunId": 1}'} and "Content-Encoding" not in headers
+        assert compressor.encode("upload", {}, {"data": b"x" * 1000}) == ({}, {"data": b"x" * 1000}, False)
+
+        stats = compressor.stats()
+        assert stats.compressed == 1 and stats.compressed_bytes < stats.raw_bytes / 3
+        assert metrics.snapshot().counter(REQUEST_BODY_RAW_BYTES, endpoint="test-run/create") == stats.raw_bytes
+        assert metrics.snapshot().counter(REQUEST_BODY_COMPRESSED_BYTES, endpoint="test-run/create") == stats.compressed_bytes
+
+    def test_endpoints_option(self):
+        """Test that only the listed endpoints are compressed when endpoints are given."""
+        compressor = RequestCompressor(CompressionOptions(min_size=0, endpoints=["provider-info"]), MetricsRegistry())
+
+        assert compressor.encode("provider-info", {}, {"json": [1, 2]})[2]
+        assert not compressor.encode("test-result", {}, {"json": {}})[2]
+
+
+class TestCompressedRequests:
+    """Tests for the compressed requests of AutoApi."""
+
+    def test_compressed_bodies_are_sent(self):
+        """Test that large bodies are sent compressed and understood by the stand-in, with fewer bytes on the wire."""
+        result_ids = list(range(100_000, 105_000))
+        with StandInServer() as server:
+            auto_api = AutoApi(ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, compression=CompressionOptions()))
+
+            links = auto_api.get_provider_session_links(result_ids)
+            received = server.bytes_received()["provider-info"]
+
+        assert [link.test_result_id for link in links] == result_ids
+        assert received == auto_api.compressor.stats().compressed_bytes
+        assert received < len(json.dumps(result_ids)) / 3
+
+    def test_falls_back_when_unsupported(self):
+        """Test that a 415 response is retried uncompressed, and that the endpoint is no longer compressed."""
+        tests = [f"test_{index}" for index in range(5000)]
+        with StandInServer(StandInConfig(gzip_unsupported=["test-run/create"])) as server:
+            auto_api = AutoApi(ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, compression=CompressionOptions()))
+
+            auto_api.start_test_run(TestRunCreateDto(tests=tests))
+            auto_api.start_test_run(TestRunCreateDto(tests=tests))
+
+            counts = server.request_counts()
+        assert counts["test-run/create"] == 3
+        assert auto_api.compressor.stats().rejected == ["test-run/create"]
+        assert auto_api.compressor.stats().compressed == 1
+        assert auto_api.metrics.snapshot().counter(HTTP_REQUESTS, client="auto_api", endpoint="test-run/create", status="415") == 1
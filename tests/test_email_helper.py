@@ -1,7 +1,15 @@
 """Tests for the utils module."""
+import pytest
 import responses
+import threading
+import time
+from email import message_from_string
+from unittest.mock import Mock
 from applause.common_python_reporter.auto_api import AutoApi, ApplauseConfig
-from applause.common_python_reporter.email_helper import EmailHelper
+from applause.common_python_reporter.dtos import EmailAddressResponse
+from applause.common_python_reporter.email_helper import EmailHelper, Inbox, InboxPool, InboxWatcher
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.metrics import RETRIES, MetricsRegistry
 
 class TestEmailHelper:
     """Tests for the parse_test_case_names function."""
@@ -47,3 +55,181 @@ class TestEmailHelper:
         assert len(text_body_parts) == 1
         assert text_body_parts[0].get_payload() == 'This is the content'
 
+
+    @responses.activate
+    def test_wait_for_email_polls_until_email_arrives(self):
+        """Test that wait_for_email keeps polling while the inbox is empty."""
+        auto_api = AutoApi(config=ApplauseConfig(api_key='test', product_id=123))
+        download_url = 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/email/download-email'
+        responses.add('POST', download_url, status=404, body='Not Found')
+        responses.add('POST', download_url, status=404, json={'message': 'No email found'})
+        with open('tests/data/test_email.eml') as f:
+            responses.add('POST', download_url, body=f.read())
+        inbox = Inbox('test123@test.com', auto_api)
+
+        email = inbox.wait_for_email(timeout=5, initial_interval=0.01)
+
+        assert email['subject'] == 'The Subject Line'
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_wait_for_email_applies_predicate(self):
+        """Test that emails which do not match the predicate are ignored."""
+        auto_api = AutoApi(config=ApplauseConfig(api_key='test', product_id=123))
+        download_url = 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/email/download-email'
+        responses.add('POST', download_url, body='Subject: Something else\n\nbody')
+        with open('tests/data/test_email.eml') as f:
+            responses.add('POST', download_url, body=f.read())
+        inbox = Inbox('test123@test.com', auto_api)
+
+        email = inbox.wait_for_email(timeout=5, predicate=lambda message: message['subject'] == 'The Subject Line', initial_interval=0.01)
+
+        assert email['subject'] == 'The Subject Line'
+
+    @responses.activate
+    def test_wait_for_email_times_out(self):
+        """Test that a TimeoutError is raised when no email arrives."""
+        auto_api = AutoApi(config=ApplauseConfig(api_key='test', product_id=123))
+        responses.add('POST', 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/email/download-email', status=404, body='Not Found')
+        inbox = Inbox('test123@test.com', auto_api)
+
+        with pytest.raises(TimeoutError):
+            inbox.wait_for_email(timeout=0.1, initial_interval=0.01)
+
+    @responses.activate
+    def test_wait_for_email_raises_other_errors(self):
+        """Test that an error other than an empty inbox is raised right away rather than polled until the timeout."""
+        auto_api = AutoApi(config=ApplauseConfig(api_key='test', product_id=123))
+        responses.add('POST', 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/email/download-email', status=403, json={'message': 'Forbidden'})
+        inbox = Inbox('test123@test.com', auto_api)
+
+        start = time.monotonic()
+        with pytest.raises(ApplauseClientError) as error:
+            inbox.wait_for_email(timeout=5, initial_interval=0.01)
+
+        assert error.value.status_code == 403
+        assert time.monotonic() - start < 1
+        assert len(responses.calls) == 1
+
+
+class TestInboxWatcher:
+    """Tests for the InboxWatcher class."""
+
+    def test_watch_resolves_each_inbox(self):
+        """Test that every watched inbox gets its own email."""
+        auto_api = Mock(spec=AutoApi)
+        attempts = {}
+
+        def get_email_content(request):
+            attempts[request.email_address] = attempts.get(request.email_address, 0) + 1
+            if attempts[request.email_address] < 3:
+                raise ApplauseClientError(Mock(status_code=404, text='Not Found', json=Mock(side_effect=ValueError)))
+            return message_from_string(f'Subject: {request.email_address}\n\nbody')
+
+        auto_api.get_email_content.side_effect = get_email_content
+        auto_api.metrics = MetricsRegistry()
+        inboxes = [Inbox(f'inbox{i}@test.com', auto_api) for i in range(5)]
+
+        with InboxWatcher(max_workers=2, initial_interval=0.01) as watcher:
+            futures = [watcher.watch(inbox, timeout=5) for inbox in inboxes]
+            emails = [future.result(timeout=5) for future in futures]
+
+        assert [email['subject'] for email in emails] == [inbox.email_address for inbox in inboxes]
+        assert all(count == 3 for count in attempts.values())
+        assert auto_api.metrics.snapshot().counter(RETRIES, operation='email_poll') == 10
+
+    def test_watch_times_out(self):
+        """Test that the future fails with a TimeoutError when no email arrives."""
+        auto_api = Mock(spec=AutoApi)
+        auto_api.get_email_content.side_effect = ApplauseClientError(Mock(status_code=404, text='Not Found', json=Mock(side_effect=ValueError)))
+        auto_api.metrics = MetricsRegistry()
+
+        with InboxWatcher(initial_interval=0.01) as watcher:
+            future = watcher.watch(Inbox('test@test.com', auto_api), timeout=0.1)
+            with pytest.raises(TimeoutError):
+                future.result(timeout=5)
+
+
+class TestInboxPool:
+    """Tests for the InboxPool class."""
+
+    @staticmethod
+    def _auto_api():
+        auto_api = Mock(spec=AutoApi)
+        counter = iter(range(1000))
+        auto_api.get_email_address.side_effect = lambda prefix: EmailAddressResponse(email_address=f'{prefix}{next(counter)}@test.com')
+        return auto_api
+
+    @staticmethod
+    def _wait_for_ready(pool, prefix, count):
+        deadline = time.monotonic() + 5
+        while pool.stats().available.get(prefix, 0) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_prefill_generates_target_size(self):
+        """Test that prefilling generates the target number of addresses in the background."""
+        auto_api = self._auto_api()
+        pool = InboxPool(auto_api, target_size=4)
+        pool.prefill(['signup'])
+        self._wait_for_ready(pool, 'signup', 4)
+        pool.close()
+
+        stats = pool.stats()
+        assert stats.generated == 4
+        assert stats.available == {'signup': 4}
+        assert auto_api.get_email_address.call_count == 4
+
+    def test_low_watermark_above_target_size(self):
+        """Test that a pool cannot start refilling below a watermark it would never reach."""
+        with pytest.raises(ValueError):
+            InboxPool(self._auto_api(), target_size=4, low_watermark=5)
+
+    def test_acquire_counts_hits_and_misses(self):
+        """Test that pooled inboxes are hits and on-demand inboxes are misses."""
+        auto_api = self._auto_api()
+        pool = InboxPool(auto_api, target_size=4, low_watermark=1)
+        email_helper = EmailHelper(auto_api, pool=pool)
+
+        first = email_helper.get_inbox('signup')
+        self._wait_for_ready(pool, 'signup', 4)
+        second = email_helper.get_inbox('signup')
+        pool.close()
+
+        stats = pool.stats()
+        assert stats.misses == 1
+        assert stats.hits == 1
+        assert first.email_address != second.email_address
+        assert stats.available == {'signup': 3}
+
+    def test_close_during_refill(self):
+        """Test that a pool closed while it is refilling neither fails the caller nor loses track of addresses."""
+        auto_api = self._auto_api()
+        pool = InboxPool(auto_api, target_size=2)
+        submit = pool._executor.submit
+        closing = []
+
+        def close_then_submit(*args):
+            if not closing:
+                closing.append(threading.Thread(target=pool.close))
+                closing[0].start()
+                # Give close the chance to shut the executor down before the refill submits
+                closing[0].join(0.1)
+            return submit(*args)
+
+        pool._executor.submit = close_then_submit
+        inbox = pool.acquire('signup')
+        closing[0].join(5)
+
+        assert inbox.email_address.startswith('signup')
+        assert not closing[0].is_alive()
+        assert pool.stats().generated == 2
+
+    def test_failed_generation_is_counted(self):
+        """Test that background failures are counted instead of raised."""
+        auto_api = Mock(spec=AutoApi)
+        auto_api.get_email_address.side_effect = RuntimeError('boom')
+        pool = InboxPool(auto_api, target_size=2)
+        pool.prefill(['signup'])
+        pool.close()
+
+        assert pool.stats().failures == 2
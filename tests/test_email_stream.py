@@ -0,0 +1,82 @@
+"""Tests for the email_stream module."""
+
+import base64
+import responses
+from email import message_from_bytes
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from applause.common_python_reporter.auto_api import AutoApi, ApplauseConfig
+from applause.common_python_reporter.dtos import EmailFetchRequest
+from applause.common_python_reporter.email_stream import StreamedEmail
+
+
+def _chunks(data: bytes, size: int = 7):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+class TestStreamedEmail:
+    """Tests for the StreamedEmail class."""
+
+    def test_parts_match_stdlib_parser(self):
+        """Test that every leaf part decodes to the same content as the standard library parser."""
+        with open('tests/data/test_email.eml', 'rb') as f:
+            raw = f.read()
+        expected = [part for part in message_from_bytes(raw).walk() if not part.is_multipart()]
+
+        with StreamedEmail(_chunks(raw)) as email:
+            assert email.headers['subject'] == 'The Subject Line'
+            parts = list(email.iter_parts())
+
+            assert [part.content_type for part in parts] == [part.get_content_type() for part in expected]
+            assert [part.read() for part in parts] == [part.get_payload(decode=True) for part in expected]
+            attachments = [part for part in parts if part.is_attachment]
+            assert len(attachments) == 1
+            assert attachments[0].filename == 'cat.jpg'
+
+    def test_headers_do_not_consume_body(self):
+        """Test that reading the headers only pulls the header block from the download."""
+        consumed = []
+
+        def chunks():
+            for chunk in [b'Subject: Hi\r\n', b'To: a@b.com\r\n\r\n', b'body line\r\n', b'more body\r\n']:
+                consumed.append(chunk)
+                yield chunk
+
+        email = StreamedEmail(chunks())
+        assert email.headers['subject'] == 'Hi'
+        assert len(consumed) == 2
+        parts = list(email.iter_parts())
+        assert len(parts) == 1
+        assert parts[0].read() == b'body line\r\nmore body\r\n'
+
+    def test_large_attachment_is_spooled_and_filter_skips_parts(self):
+        """Test that large parts are spooled to disk and filtered parts are not stored."""
+        payload = bytes(range(256)) * 4096
+        message = MIMEMultipart()
+        message['Subject'] = 'Invoice'
+        message.attach(MIMEText('quoted = printable text that is long enough to be wrapped ' * 4, 'plain', 'utf-8'))
+        attachment = MIMEApplication(payload, Name='invoice.pdf')
+        attachment['Content-Disposition'] = 'attachment; filename="invoice.pdf"'
+        message.attach(attachment)
+        message.attach(MIMEApplication(b'skipped', Name='other.bin'))
+        raw = message.as_bytes()
+
+        with StreamedEmail(_chunks(raw, 4096), spool_threshold=1024) as email:
+            parts = list(email.iter_parts(part_filter=lambda headers: headers.get_filename() != 'other.bin'))
+            assert parts[0].get_text() == 'quoted = printable text that is long enough to be wrapped ' * 4
+            assert parts[1].size == len(payload)
+            assert parts[1].open()._rolled
+            assert parts[1].read() == payload
+            assert parts[2].skipped
+
+    @responses.activate
+    def test_stream_email_content(self):
+        """Test that AutoApi streams the download-email response into a StreamedEmail."""
+        body = b'Subject: Hi\r\nContent-Transfer-Encoding: base64\r\n\r\n' + base64.encodebytes(b'hello world')
+        responses.add('POST', 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/email/download-email', body=body)
+        auto_api = AutoApi(config=ApplauseConfig(api_key='test', product_id=123))
+
+        with auto_api.stream_email_content(EmailFetchRequest(email_address='test@example.com')) as email:
+            assert email.headers['subject'] == 'Hi'
+            assert [part.read() for part in email.iter_parts()] == [b'hello world']
@@ -0,0 +1,159 @@
+"""Tests for the json_codec module."""
+
+import json
+import pytest
+import requests
+from applause.common_python_reporter import json_codec
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import TestResultStatus
+from applause.common_python_reporter.json_codec import JsonCodecType, OrjsonCodec, StdlibJsonCodec, UjsonCodec, create_json_codec
+from applause.common_python_reporter.public_api import PublicApi, TestRunAutoResultDto, TestRunAutoResultStatus
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.stand_in import StandInServer
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+PAYLOADS = [
+    {"testRunId": 1},
+    {"tests": ["tests/test_a.py::test_one[param-1]", "tests/test_b.py::test_two"], "productId": 123, "itwTestCycleId": None},
+    {"failureReason": 'AssertionError: "é" != "e"\n\tat line 3 — 💥', "status": TestResultStatus.FAILED, "duration": 1.5},
+    [4_000_000, 4_000_001, 4_000_002],
+]
+
+
+class RecordingCodec(StdlibJsonCodec):
+    """A stdlib codec counting the documents it encodes and decodes."""
+
+    def __init__(self):
+        self.encoded = 0
+        self.decoded = 0
+
+    def dumps(self, obj) -> bytes:
+        self.encoded += 1
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.decoded += 1
+        return super().loads(data)
+
+
+def fake_library(encoded_as_bytes: bool):
+    """A stand-in for the orjson module, encoding to bytes, or for the ujson module, encoding to text."""
+
+    def dumps(obj, **kwargs):
+        document = json.dumps(obj, separators=(",", ":"))
+        return document.encode("utf-8") if encoded_as_bytes else document
+
+    return SimpleNamespace(dumps=dumps, loads=json.loads)
+
+
+class TestJsonCodecs:
+    """Tests for the JSON codecs."""
+
+    @pytest.mark.parametrize("payload", PAYLOADS)
+    def test_stdlib_matches_requests(self, payload):
+        """Test that the stdlib codec encodes the same bytes as requests does for a json= body, and decodes them back."""
+        codec = StdlibJsonCodec()
+        expected = requests.Request("POST", "http://localhost/", json=payload).prepare().body
+
+        assert codec.dumps(payload) == expected
+        assert codec.loads(expected) == json.loads(expected)
+        assert codec.loads(expected.decode("utf-8")) == json.loads(expected)
+
+    def test_stdlib_rejects_nan(self):
+        """Test that NaN is rejected, like requests does."""
+        with pytest.raises(ValueError):
+            StdlibJsonCodec().dumps({"duration": float("nan")})
+
+    @pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+    def test_orjson_rejects_non_finite_numbers(self, value, monkeypatch):
+        """Test that orjson rejects NaN and infinite numbers, nested or not, like the other codecs, rather than encoding them as null."""
+        monkeypatch.setattr(json_codec, "orjson", fake_library(encoded_as_bytes=True))
+        codec = OrjsonCodec()
+
+        for payload in (value, {"duration": value}, {"durations": [1.0, (2.0, value)]}):
+            with pytest.raises(ValueError):
+                codec.dumps(payload)
+        assert codec.dumps({"durations": [1.0, 2]}) == b'{"durations":[1.0,2]}'
+
+    @pytest.mark.parametrize("codec_type", [JsonCodecType.ORJSON, JsonCodecType.UJSON])
+    def test_fast_codecs_round_trip(self, codec_type):
+        """Test that the fast codecs decode what every codec encodes to the same values."""
+        pytest.importorskip(codec_type.value)
+        codec = create_json_codec(codec_type)
+
+        for payload in PAYLOADS:
+            assert codec.loads(codec.dumps(payload)) == json.loads(json.dumps(payload))
+            assert codec.loads(StdlibJsonCodec().dumps(payload)) == json.loads(json.dumps(payload))
+            assert StdlibJsonCodec().loads(codec.dumps(payload)) == json.loads(json.dumps(payload))
+
+
+class TestCreateJsonCodec:
+    """Tests for the create_json_codec function."""
+
+    def test_auto_prefers_the_fastest_installed(self, monkeypatch):
+        """Test that auto picks orjson, then ujson, then stdlib, depending on what is installed."""
+        monkeypatch.setattr(json_codec, "orjson", None)
+        monkeypatch.setattr(json_codec, "ujson", None)
+        assert isinstance(create_json_codec(JsonCodecType.AUTO), StdlibJsonCodec)
+
+        monkeypatch.setattr(json_codec, "ujson", fake_library(encoded_as_bytes=False))
+        codec = create_json_codec(JsonCodecType.AUTO)
+        assert isinstance(codec, UjsonCodec) and codec.dumps({"testRunId": 1}) == b'{"testRunId":1}'
+
+        monkeypatch.setattr(json_codec, "orjson", fake_library(encoded_as_bytes=True))
+        codec = create_json_codec("auto")
+        assert isinstance(codec, OrjsonCodec) and codec.name == "orjson"
+        assert codec.dumps({"testRunId": 1}) == b'{"testRunId":1}'
+
+    def test_default_is_stdlib(self, monkeypatch):
+        """Test that the stdlib codec is used unless a fast codec is asked for, even when one is installed."""
+        monkeypatch.setattr(json_codec, "orjson", fake_library(encoded_as_bytes=True))
+
+        assert isinstance(create_json_codec(), StdlibJsonCodec)
+        assert ApplauseConfig(api_key="test", product_id=1).json_codec == JsonCodecType.STDLIB
+
+    def test_missing_library(self, monkeypatch):
+        """Test that a codec whose library is not installed cannot be created."""
+        monkeypatch.setattr(json_codec, "orjson", None)
+
+        with pytest.raises(ImportError, match="pip install orjson"):
+            create_json_codec(JsonCodecType.ORJSON)
+        with pytest.raises(ImportError):
+            ApplauseReporter(ApplauseConfig(api_key="test", product_id=1, json_codec=JsonCodecType.ORJSON))
+
+
+class TestCodecUsage:
+    """Tests for the use of the codec by the client and the reporter."""
+
+    def test_requests_responses_and_links_file(self, tmp_path, monkeypatch):
+        """Test that request bodies, responses and the provider session links file all go through the codec."""
+        monkeypatch.chdir(tmp_path)
+        codec = RecordingCodec()
+        with StandInServer() as server:
+            reporter = ApplauseReporter(ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url))
+            reporter.auto_api.json_codec = codec
+            reporter.runner_start(["t1"])
+            result_id = reporter.start_test_case("t1", "t1").test_result_id
+            reporter.submit_test_case_result("t1", TestResultStatus.PASSED)
+            reporter.runner_end()
+
+        # Encoded: run creation, result creation, submission, provider-info lookup and the links file
+        assert codec.encoded >= 5
+        # Decoded: run creation, result creation and provider-info lookup
+        assert codec.decoded == 3
+        links = (tmp_path / "provider_session_links.txt").read_bytes()
+        assert links == json.dumps(json.loads(links)).encode("utf-8")
+        assert [link["test_result_id"] for link in json.loads(links)] == [result_id]
+
+    def test_public_api_results(self, monkeypatch):
+        """Test that the Public API encodes the results it submits with the configured codec."""
+        monkeypatch.setattr(json_codec, "orjson", fake_library(encoded_as_bytes=True))
+        public_api = PublicApi(ApplauseConfig(api_key="test", product_id=1, json_codec=JsonCodecType.ORJSON))
+        public_api.transport = MagicMock()
+
+        public_api.submit_result(123, TestRunAutoResultDto(testCycleId=1, status=TestRunAutoResultStatus.PASSED))
+
+        assert isinstance(public_api.json_codec, OrjsonCodec)
+        body = public_api.transport.request.call_args.kwargs["data"]
+        assert body.startswith(b'{"testCycleId":1,"status":"PASSED"')
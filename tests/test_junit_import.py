@@ -0,0 +1,141 @@
+"""Tests for the junit_import module."""
+
+import pytest
+import tracemalloc
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import TestResultStatus, TestRunEndingStatus
+from applause.common_python_reporter.junit_import import ImportStats, format_report, import_junit, iter_test_cases, main
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+from xml.etree.ElementTree import ParseError
+
+REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="suite" tests="4">
+    <testcase classname="pkg.TestLogin" name="test_ok" time="0.1">
+      <system-out>logged in</system-out>
+    </testcase>
+    <testcase classname="pkg.TestLogin" name="test_bad_password" time="0.2">
+      <failure message="assert 401 == 200">Traceback line 1</failure>
+    </testcase>
+    <testcase name="test_crash"><error message="boom"/></testcase>
+    <testcase classname="pkg.TestLogin" name="test_later"><skipped/></testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def write_report(path, test_cases: int) -> str:
+    with open(path, "w") as f:
+        f.write('<testsuites><testsuite name="suite">')
+        for index in range(test_cases):
+            f.write(f'<testcase classname="pkg.Test" name="test_{index}"><system-out>{"x" * 200}</system-out></testcase>')
+        f.write("</testsuite></testsuites>")
+    return str(path)
+
+
+class TestIterTestCases:
+    """Tests for reading JUnit XML reports."""
+
+    def test_reads_statuses_and_output(self, tmp_path):
+        """Test that the status, failure reason, name and output of each test case are read."""
+        path = tmp_path / "report.xml"
+        path.write_text(REPORT)
+
+        test_cases = list(iter_test_cases(str(path)))
+
+        assert [test_case.name for test_case in test_cases] == ["pkg.TestLogin.test_ok", "pkg.TestLogin.test_bad_password", "test_crash", "pkg.TestLogin.test_later"]
+        assert [test_case.status for test_case in test_cases] == [TestResultStatus.PASSED, TestResultStatus.FAILED, TestResultStatus.ERROR, TestResultStatus.SKIPPED]
+        assert test_cases[0].system_out == "logged in"
+        assert test_cases[1].failure_reason == "assert 401 == 200\nTraceback line 1"
+        assert test_cases[2].failure_reason == "boom"
+        assert test_cases[3].failure_reason is None
+
+    def test_constant_memory(self, tmp_path):
+        """Test that test cases are released once read, so memory does not grow with the size of the report."""
+        path = write_report(tmp_path / "large.xml", 20_000)
+
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in iter_test_cases(path))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert count == 20_000
+        assert peak < 1024 * 1024
+
+
+class TestImportJunit:
+    """Tests for importing JUnit XML reports."""
+
+    def test_reports_every_test_case(self, tmp_path, monkeypatch):
+        """Test that every test case is started, has its output attached and its result submitted."""
+        monkeypatch.chdir(tmp_path)
+        path = tmp_path / "report.xml"
+        path.write_text(REPORT)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+
+            stats = import_junit([str(path), write_report(tmp_path / "more.xml", 20)], config, workers=4, register_tests=True)
+
+            counts = server.request_counts()
+        assert (stats.test_cases, stats.assets, stats.errors) == (24, 21, 0)
+        assert stats.statuses == {"PASSED": 21, "FAILED": 1, "ERROR": 1, "SKIPPED": 1}
+        assert counts["test-run/create"] == 1
+        assert counts["create-result"] == 24
+        assert counts["upload"] == 21
+        assert counts["test-result"] == 24
+        assert counts["test-run/end"] == 1
+        assert counts["provider-info"] == 1
+
+    def test_counts_errors_and_continues(self, tmp_path, monkeypatch, capsys):
+        """Test that test cases that cannot be reported are reported and counted without stopping the import."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer(StandInConfig(endpoint_error_rate={"upload": 1.0})) as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+
+            stats = import_junit([write_report(tmp_path / "report.xml", 5)], config, workers=2)
+
+            assert server.request_counts()["test-run/end"] == 1
+        assert (stats.test_cases, stats.errors) == (0, 5)
+        assert capsys.readouterr().out.count("Could not report test case") == 5
+
+    def test_unreadable_report_cancels_the_run(self, tmp_path, monkeypatch):
+        """Test that a report that cannot be parsed ends the run as CANCELED, and that its error is raised."""
+        monkeypatch.chdir(tmp_path)
+        broken = tmp_path / "broken.xml"
+        broken.write_text('<testsuite><testcase name="cut short">')
+        ending_statuses = []
+        end_test_run = AutoApi.end_test_run
+
+        def record_ending(self, test_run_id, ending_status):
+            ending_statuses.append(ending_status)
+            return end_test_run(self, test_run_id, ending_status)
+
+        monkeypatch.setattr(AutoApi, "end_test_run", record_ending)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url)
+
+            with pytest.raises(ParseError):
+                import_junit([write_report(tmp_path / "report.xml", 3), str(broken)], config, workers=2)
+
+            counts = server.request_counts()
+        assert counts["test-result"] == 3
+        assert ending_statuses == [TestRunEndingStatus.CANCELED]
+
+    def test_format_report(self):
+        """Test that the report shows the throughput and the statuses."""
+        report = format_report(ImportStats(test_run_id=7, test_cases=10, statuses={"PASSED": 9, "FAILED": 1}, assets=3, seconds=2.0))
+
+        assert report.splitlines() == ["Imported 10 test cases into test run 7 in 2.0s (5.0 test cases/s): 1 FAILED, 9 PASSED", "3 system-out logs attached, 0 errors"]
+
+    def test_main(self, tmp_path, monkeypatch, capsys):
+        """Test the importer from the command line."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer() as server:
+            exit_code = main([write_report(tmp_path / "report.xml", 3), "--api-key", "test", "--product-id", "1", "--base-url", server.base_url, "--no-logs"])
+
+            assert server.request_counts().get("upload", 0) == 0
+        assert exit_code == 0
+        assert "Imported 3 test cases" in capsys.readouterr().out
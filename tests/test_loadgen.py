@@ -0,0 +1,65 @@
+"""Tests for the loadgen module."""
+
+from applause.common_python_reporter.loadgen import ClientOptions, ClientStats, format_report, main, run_client
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+
+class TestLoadgen:
+    """Tests for the load generator."""
+
+    def test_run_client_reports_every_run(self):
+        """Test that every thread of a client reports its runs against the server."""
+        with StandInServer() as server:
+            options = ClientOptions(base_url=server.base_url, threads=2, runs=2, tests=3, assets_per_test=1, asset_size=10)
+            stats = run_client(0, options)
+
+            assert stats.errors == {}
+            assert len(stats.latencies['runner_start']) == 4
+            assert len(stats.latencies['start_test_case']) == 12
+            assert len(stats.latencies['attach_test_case_asset']) == 12
+            assert len(stats.latencies['submit_test_case_result']) == 12
+            assert len(stats.latencies['runner_end']) == 4
+            assert server.request_counts()['test-run/create'] == 4
+            assert stats.cpu_seconds > 0
+
+    def test_run_client_counts_errors_and_continues(self):
+        """Test that failed operations are counted without stopping the client."""
+        with StandInServer(StandInConfig(endpoint_error_rate={'create-result': 1.0})) as server:
+            stats = run_client(0, ClientOptions(base_url=server.base_url, runs=2, tests=3))
+
+            assert stats.errors['start_test_case'] == 6
+            assert 'submit_test_case_result' not in stats.latencies
+            assert len(stats.latencies['runner_end']) == 2
+
+    def test_run_client_continues_after_failed_runner_end(self):
+        """Test that a run whose end failed is aborted, and that the reason is reported."""
+        with StandInServer(StandInConfig(endpoint_error_rate={'test-run/end': 1.0})) as server:
+            stats = run_client(0, ClientOptions(base_url=server.base_url, runs=2, tests=1))
+
+            assert stats.errors['runner_end'] == 2
+            assert len(stats.latencies['runner_start']) == 2
+            assert stats.failures['runner_end'].startswith('ApplauseClientError')
+            assert 'runner_end: ApplauseClientError' in format_report([stats], wall_seconds=1.0)
+
+    def test_format_report_aggregates_clients(self):
+        """Test that the report aggregates calls and errors over every client."""
+        clients = [
+            ClientStats(client=0, latencies={'start_test_case': [0.001, 0.002]}, errors={'start_test_case': 1}, wall_seconds=1.0, cpu_seconds=0.5, peak_rss_bytes=10 * 1024 * 1024),
+            ClientStats(client=1, latencies={'start_test_case': [0.003]}, wall_seconds=1.0, cpu_seconds=0.25),
+        ]
+
+        report = format_report(clients, wall_seconds=2.0).splitlines()
+
+        assert report[1].split() == ['start_test_case', '4', '1', '25.00%', '2.0', '2.00', '3.00', '3.00', '3.00']
+        assert report[2].split()[:4] == ['total', '4', '1', '25.00%']
+        assert report[-2].split() == ['0', '1.00', '0.50', '50.0%', '10.0']
+        assert report[-1].split() == ['1', '1.00', '0.25', '25.0%', '-']
+
+    def test_main_against_local_stand_in(self, capsys):
+        """Test a complete load against the local stand-in server."""
+        exit_code = main(['--processes', '1', '--threads', '2', '--tests', '5'])
+
+        output = capsys.readouterr().out
+        assert exit_code == 0
+        assert 'Simulating 1 clients x 2 threads' in output
+        assert 'submit_test_case_result' in output
@@ -0,0 +1,173 @@
+"""Tests for the log_stream module."""
+
+import io
+import threading
+import time
+import tracemalloc
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType, TestResultStatus
+from applause.common_python_reporter.log_stream import LogStreamer, part_name
+from applause.common_python_reporter.metrics import LOG_STREAM_BYTES, LOG_STREAM_PARTS, MetricsRegistry
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+
+class TestLogStreamer:
+    """Tests for the LogStreamer class."""
+
+    def test_part_name(self):
+        """Test that parts are numbered before the extension of the log."""
+        assert part_name("device.log", 1) == "device.part0001.log"
+        assert part_name("logcat", 12) == "logcat.part0012"
+
+    def test_flushes_on_size(self):
+        """Test that a part is uploaded as soon as the flush size is buffered, and the rest when the stream is closed."""
+        parts = []
+        streamer = LogStreamer(MetricsRegistry(), flush_size=100, flush_interval=60)
+        stream = streamer.open("console.log", "CONSOLE_LOG", lambda name, part: parts.append((name, part)))
+
+        stream.write(b"a" * 150)
+        deadline = time.monotonic() + 5
+        while not parts and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stream.write(b"b" * 10)
+        assert streamer.close(timeout=5)
+
+        assert parts == [("console.part0001.log", b"a" * 150), ("console.part0002.log", b"b" * 10)]
+        assert (stream.stats().written, stream.stats().uploaded, stream.stats().parts, stream.stats().buffered) == (160, 160, 2, 0)
+
+    def test_flushes_on_interval(self):
+        """Test that a few buffered bytes are uploaded once they have waited for the flush interval."""
+        uploaded = threading.Event()
+        metrics = MetricsRegistry()
+        streamer = LogStreamer(metrics, flush_interval=0.1)
+        stream = streamer.open("device.log", "DEVICE_LOG", lambda name, part: uploaded.set())
+
+        stream.write(b"boot\n")
+
+        assert uploaded.wait(5)
+        assert not stream.closed
+        assert streamer.close(timeout=5)
+        assert metrics.snapshot().counter(LOG_STREAM_BYTES, asset_type="DEVICE_LOG") == 5
+        assert metrics.snapshot().counter(LOG_STREAM_PARTS, asset_type="DEVICE_LOG", status="ok") == 1
+
+    def test_ring_buffer_drops_oldest_bytes(self):
+        """Test that the oldest bytes are overwritten while a part is uploading, and that the next part notes it."""
+        parts = []
+        release = threading.Event()
+
+        def upload(name, part):
+            release.wait(5)
+            parts.append(part)
+
+        streamer = LogStreamer(MetricsRegistry(), buffer_size=100, flush_size=10, flush_interval=60)
+        stream = streamer.open("console.log", "CONSOLE_LOG", upload)
+        stream.write(b"first part")
+        deadline = time.monotonic() + 5
+        while stream.stats().buffered and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        for index in range(50):
+            stream.write(f"{index:09d}\n".encode("utf-8"))
+        release.set()
+        assert streamer.close(timeout=5)
+
+        assert parts[0] == b"first part"
+        assert parts[1] == b"[... 400 bytes dropped ...]\n" + b"".join(f"{index:09d}\n".encode("utf-8") for index in range(40, 50))
+        assert stream.stats().dropped == 400
+
+    def test_failed_parts_are_counted(self, capsys):
+        """Test that a part that cannot be uploaded is reported and counted, and later parts are still uploaded."""
+        parts = []
+
+        def upload(name, part):
+            if not parts:
+                parts.append(None)
+                raise ValueError("upload failed")
+            parts.append(part)
+
+        streamer = LogStreamer(MetricsRegistry(), flush_size=5)
+        stream = streamer.open("console.log", "CONSOLE_LOG", upload)
+        stream.write(b"lost!")
+        deadline = time.monotonic() + 5
+        while not parts and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stream.write(b"kept")
+        assert streamer.close(timeout=5)
+
+        assert parts == [None, b"kept"]
+        assert (stream.stats().parts, stream.stats().failed_parts) == (1, 1)
+        assert capsys.readouterr().out == "Could not upload console.part0001.log of log console.log: upload failed\n"
+
+
+class TestReporterLogStreams:
+    """Tests for the log streams of the reporter."""
+
+    def test_streams_are_uploaded_and_closed_on_submit(self, tmp_path, monkeypatch):
+        """Test that log streams are uploaded in parts, closed when the result is submitted, and written as text."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, log_stream_flush_size=1024)
+            reporter = ApplauseReporter(config)
+            reporter.runner_start(["test1"])
+            reporter.start_test_case("test1", "test1")
+
+            device_log = reporter.open_log_stream("test1", "device.log", AssetType.DEVICE_LOG)
+            console = io.TextIOWrapper(reporter.open_log_stream("test1", "console.log"), encoding="utf-8", write_through=True)
+            assert reporter.open_log_stream("test1", "device.log", AssetType.DEVICE_LOG) is device_log
+            for index in range(100):
+                device_log.write(f"line {index:04d} {'x' * 40}\n".encode("utf-8"))
+                console.write(f"step {index}\n")
+            reporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+
+            assert device_log.closed and console.closed
+            reporter.runner_end()
+
+            uploads = server.request_counts()["upload"]
+        assert device_log.stats().uploaded == device_log.stats().written == 5100
+        assert console.buffer.stats().uploaded == console.buffer.stats().written == 790
+        assert uploads == device_log.stats().parts + console.buffer.stats().parts
+
+    def test_parts_with_asset_stages_are_counted_once_uploaded(self, tmp_path, monkeypatch, capsys):
+        """Test that parts of a log type with asset stages are processed and uploaded before they are counted."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer(StandInConfig(endpoint_error_rate={"upload": 1.0})) as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, log_stream_flush_size=1024)
+            reporter = ApplauseReporter(config, asset_stages={AssetType.CONSOLE_LOG: [lambda chunks: (chunk.upper() for chunk in chunks)]})
+            reporter.runner_start(["test1"])
+            reporter.start_test_case("test1", "test1")
+
+            console = reporter.open_log_stream("test1", "console.log")
+            console.write(b"x" * 2000)
+            reporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+            reporter.runner_end()
+
+        assert (console.stats().parts, console.stats().uploaded) == (0, 0)
+        assert console.stats().failed_parts >= 1
+        assert capsys.readouterr().out.count("Could not upload console.part") == console.stats().failed_parts
+
+    def test_memory_stays_flat(self, tmp_path, monkeypatch):
+        """Test that writing a log much larger than the buffer does not grow memory with the size of the log."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer() as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, log_stream_buffer_size=1024 * 1024, log_stream_flush_size=256 * 1024)
+            reporter = ApplauseReporter(config)
+            reporter.runner_start(["test1"])
+            reporter.start_test_case("test1", "test1")
+            chunk = b"y" * 64 * 1024
+
+            tracemalloc.start()
+            try:
+                device_log = reporter.open_log_stream("test1", "device.log", AssetType.DEVICE_LOG)
+                for _ in range(512):
+                    device_log.write(chunk)
+                reporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+                reporter.runner_end()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        stats = device_log.stats()
+        assert stats.written == 32 * 1024 * 1024
+        assert stats.uploaded >= stats.written - stats.dropped
+        assert peak < 8 * 1024 * 1024
@@ -0,0 +1,108 @@
+"""Tests for the metrics module."""
+
+import json
+import responses
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import TestResultStatus
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUEST_BYTES,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    TEST_RESULTS_SUBMITTED,
+    MetricsRegistry,
+)
+from applause.common_python_reporter.reporter import ApplauseReporter
+import pytest
+
+AUTO_API_URL = 'https://prod-auto-api.cloud.applause.com:443/api'
+
+
+class TestMetricsRegistry:
+    """Tests for the MetricsRegistry class."""
+
+    def test_counters_gauges_and_histograms(self):
+        """Test that recorded values show up in the snapshot."""
+        registry = MetricsRegistry()
+        registry.inc('requests', endpoint='a')
+        registry.inc('requests', 2, endpoint='a')
+        registry.inc('requests', endpoint='b')
+        registry.add_gauge('depth', 3, queue='q')
+        registry.add_gauge('depth', -1, queue='q')
+        for value in [0.001, 0.02, 0.02, 3.0]:
+            registry.observe('latency', value, endpoint='a')
+
+        snapshot = registry.snapshot()
+        assert snapshot.counter('requests', endpoint='a') == 3
+        assert snapshot.counter('requests') == 4
+        assert snapshot.gauge('depth', queue='q') == 2
+        histogram = snapshot.histogram('latency', endpoint='a')
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(3.041)
+        assert histogram.quantile(0.5) == 0.025
+        assert histogram.quantile(0.99) == 5.0
+
+    def test_prometheus_export(self):
+        """Test the Prometheus text format of each kind of metric."""
+        registry = MetricsRegistry()
+        registry.inc('requests_total', endpoint='create')
+        registry.set_gauge('in_flight', 2)
+        registry.observe('latency_seconds', 0.2, buckets=(0.1, 1.0), endpoint='create')
+
+        assert registry.to_prometheus().splitlines() == [
+            '# TYPE requests_total counter',
+            'requests_total{endpoint="create"} 1',
+            '# TYPE in_flight gauge',
+            'in_flight 2',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{endpoint="create",le="0.1"} 0',
+            'latency_seconds_bucket{endpoint="create",le="1"} 1',
+            'latency_seconds_bucket{endpoint="create",le="+Inf"} 1',
+            'latency_seconds_sum{endpoint="create"} 0.2',
+            'latency_seconds_count{endpoint="create"} 1',
+        ]
+
+
+class TestInstrumentation:
+    """Tests for the metrics recorded by the clients and reporter."""
+
+    @responses.activate
+    def test_auto_api_records_requests(self):
+        """Test that status codes, latencies and byte counts are recorded per endpoint."""
+        responses.add(responses.POST, f'{AUTO_API_URL}/v2.0/sdk-heartbeat', json={})
+        responses.add(responses.DELETE, f'{AUTO_API_URL}/v1.0/test-run/123?endingStatus=COMPLETE', status=404, json={'message': 'Not found'})
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123))
+
+        auto_api.send_sdk_heartbeat(123)
+        with pytest.raises(ApplauseClientError):
+            auto_api.end_test_run(123)
+
+        snapshot = auto_api.metrics.snapshot()
+        assert snapshot.counter(HTTP_REQUESTS, endpoint='sdk-heartbeat', status='200') == 1
+        assert snapshot.counter(HTTP_REQUESTS, endpoint='test-run/end', status='404') == 1
+        assert snapshot.counter(HTTP_REQUEST_BYTES, endpoint='sdk-heartbeat') == len(b'{"testRunId": 123}')
+        assert snapshot.histogram(HTTP_REQUEST_DURATION, endpoint='sdk-heartbeat').count == 1
+        assert snapshot.gauge(HTTP_REQUESTS_IN_FLIGHT) == 0
+
+    @responses.activate
+    def test_metrics_file_written_at_end_run(self, tmp_path, monkeypatch):
+        """Test that the reporter writes the metrics snapshot to the configured file when the run ends."""
+        monkeypatch.chdir(tmp_path)
+        responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-run/create', json={'runId': 123})
+        responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result/create-result', json={'testResultId': 456})
+        responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result', json={})
+        responses.add(responses.DELETE, f'{AUTO_API_URL}/v1.0/test-run/123?endingStatus=COMPLETE', json={})
+        responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result/provider-info', json=[])
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, metrics_file=str(tmp_path / 'metrics.json')))
+
+        reporter.runner_start(tests=['test1'])
+        reporter.start_test_case('test1', 'test1')
+        reporter.submit_test_case_result('test1', TestResultStatus.PASSED)
+        reporter.runner_end()
+
+        with open(tmp_path / 'metrics.json') as f:
+            written = json.load(f)
+        assert written['counters'][TEST_RESULTS_SUBMITTED] == [{'labels': {'status': 'PASSED'}, 'value': 1.0}]
+        assert {sample['labels']['endpoint'] for sample in written['counters'][HTTP_REQUESTS]} == {'test-run/create', 'create-result', 'test-result', 'test-run/end', 'provider-info'}
@@ -0,0 +1,135 @@
+"""Tests for the multipart module."""
+
+import asyncio
+import io
+import pytest
+import requests
+import tracemalloc
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.bandwidth import BandwidthOptions
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType
+from applause.common_python_reporter.multipart import MultipartEncoder, MultipartStream, iter_async_chunks
+from applause.common_python_reporter.stand_in import StandInServer
+from unittest.mock import AsyncMock
+
+
+class TestMultipartEncoder:
+    """Tests for the MultipartEncoder class."""
+
+    def test_matches_requests_encoding(self):
+        """Test that the body is the one requests builds in memory, with the same length."""
+        fields = {"sessionId": "session", "assetType": "VIDEO", "assetName": 'clip "1".mp4'}
+        body = MultipartEncoder(fields, "file", 'clip "1".mp4', io.BytesIO(b"video bytes"), boundary="boundary")
+        prepared = requests.Request("POST", "http://localhost/", data=fields, files={"file": ('clip "1".mp4', b"video bytes", "application/octet-stream")}).prepare()
+        boundary = prepared.headers["Content-Type"].split("boundary=")[1]
+
+        content = body.read()
+
+        assert content == prepared.body.replace(boundary.encode(), b"boundary")
+        assert len(body) == len(content)
+        assert body.content_type == "multipart/form-data; boundary=boundary"
+        assert body.read() == b""
+
+    def test_reads_in_chunks_from_the_file_position(self):
+        """Test that the file is sent from its current position, in chunks of the requested size."""
+        file = io.BytesIO(b"skipped" + b"x" * 1000)
+        file.seek(7)
+        body = MultipartEncoder({}, "file", "x.bin", file, boundary="b", chunk_size=100)
+
+        chunks = list(body)
+
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        content = b"".join(chunks)
+        assert len(content) == len(body)
+        assert b"x" * 1000 in content and b"skipped" not in content
+
+
+class TestMultipartStream:
+    """Tests for the MultipartStream class and iter_async_chunks."""
+
+    def test_matches_the_encoder_body(self):
+        """Test that the chunks are sent between the same parts as a MultipartEncoder body, skipping empty chunks."""
+        fields = {"sessionId": "session", "assetName": "capture.mp4"}
+        encoder = MultipartEncoder(fields, "file", "capture.mp4", io.BytesIO(b"frame1frame2"), boundary="b")
+        stream = MultipartStream(fields, "file", "capture.mp4", iter([b"frame1", b"", b"frame2"]), boundary="b")
+
+        chunks = list(stream)
+
+        assert b"".join(chunks) == encoder.read()
+        assert b"" not in chunks
+        assert stream.content_type == "multipart/form-data; boundary=b"
+        assert not hasattr(stream, "__len__")
+
+    def test_iter_async_chunks(self):
+        """Test that an async iterator is pulled on a private event loop, or on a given loop running in another thread."""
+
+        async def chunks():
+            for index in range(3):
+                await asyncio.sleep(0)
+                yield f"chunk{index}".encode("utf-8")
+
+        assert list(iter_async_chunks(chunks())) == [b"chunk0", b"chunk1", b"chunk2"]
+
+        async def upload_in_executor():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, lambda: b"".join(iter_async_chunks(chunks(), loop)))
+
+        assert asyncio.run(upload_in_executor()) == b"chunk0chunk1chunk2"
+
+    def test_iter_async_chunks_rejects_the_running_loop(self):
+        """Test that iterating on the loop running in the calling thread fails instead of blocking it."""
+
+        async def iterate():
+            with pytest.raises(RuntimeError):
+                next(iter_async_chunks(AsyncMock(), asyncio.get_running_loop()))
+
+        asyncio.run(iterate())
+
+
+class TestStreamedUploads:
+    """Tests for uploads of chunk iterators through AutoApi.upload_asset."""
+
+    def test_uploads_generators(self):
+        """Test that sync and async generators are uploaded chunked, and that uploads with a cap are paced as they go."""
+
+        def chunks():
+            yield b"a" * 1000
+            yield b"b" * 1000
+
+        async def async_chunks():
+            yield b"c" * 1000
+
+        with StandInServer() as server:
+            auto_api = AutoApi(ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url))
+            auto_api.upload_asset(1, chunks(), "capture.mp4", "", AssetType.VIDEO)
+            auto_api.upload_asset(1, async_chunks(), "capture.mp4", "", AssetType.VIDEO)
+            paced = AutoApi(ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, bandwidth=BandwidthOptions(run_bytes_per_second=10**9)))
+            paced.upload_asset(1, chunks(), "capture.mp4", "", AssetType.VIDEO)
+
+            assert server.request_counts()["upload"] == 3
+            received = server.bytes_received()["upload"]
+        assert received > 5000
+        assert paced.bandwidth.stats().uploads == 1
+        assert paced.bandwidth.stats().bytes > 2000
+
+    def test_memory_stays_flat_for_multi_gigabyte_streams(self):
+        """Test that streaming gigabytes of chunks does not grow memory with the size of the stream."""
+        chunk = b"v" * 1024 * 1024
+        count = 2 * 1024
+
+        def chunks():
+            for _ in range(count):
+                yield chunk
+
+        with StandInServer() as server:
+            auto_api = AutoApi(ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url))
+            tracemalloc.start()
+            try:
+                auto_api.upload_asset(1, chunks(), "capture.mp4", "", AssetType.VIDEO)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            received = server.bytes_received()["upload"]
+        assert received > count * len(chunk)
+        assert peak < 8 * 1024 * 1024
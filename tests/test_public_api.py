@@ -0,0 +1,52 @@
+"""Tests for the public_api module."""
+
+import json
+import responses
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.public_api import PublicApi, TestRunAutoResultDto, TestRunAutoResultStatus
+
+BASE_URL = 'https://prod-public-api.cloud.applause.com:443/v2/test-case-results'
+
+
+class TestPublicApi:
+    """Tests for the PublicApi class."""
+
+    @responses.activate
+    def test_submit_result_serializes_body(self):
+        """Test that the result is sent as a serialized JSON body."""
+        submit_call = responses.add(responses.POST, f'{BASE_URL}/123/submit', json={})
+        public_api = PublicApi(ApplauseConfig(api_key='test', product_id=123))
+
+        public_api.submit_result(123, TestRunAutoResultDto(testCycleId=1, status=TestRunAutoResultStatus.PASSED))
+
+        assert submit_call.call_count == 1
+        assert json.loads(submit_call.calls[0].request.body) == {
+            'testCycleId': 1,
+            'status': 'PASSED',
+            'failureReason': None,
+            'sessionDetailsJson': None,
+            'startTime': None,
+            'endTime': None,
+        }
+
+    @responses.activate
+    def test_submit_results_reports_failures_without_aborting(self):
+        """Test that a failed result is reported and the rest of the batch is still submitted."""
+        for test_case_id in range(10):
+            if test_case_id == 3:
+                responses.add(responses.POST, f'{BASE_URL}/{test_case_id}/submit', status=400, json={'message': 'Invalid status'})
+            else:
+                responses.add(responses.POST, f'{BASE_URL}/{test_case_id}/submit', json={})
+        public_api = PublicApi(ApplauseConfig(api_key='test', product_id=123))
+        results = ((test_case_id, TestRunAutoResultDto(testCycleId=1, status=TestRunAutoResultStatus.FAILED)) for test_case_id in range(10))
+
+        report = public_api.submit_results(results, max_workers=2)
+
+        assert report.submitted == 9
+        assert len(report.failures) == 1
+        assert report.failures[0].index == 3
+        assert report.failures[0].test_case_id == 3
+        assert report.failures[0].message == 'Invalid status'
+        assert report.failures[0].status_code == 400
+        assert len(responses.calls) == 10
+        assert report.throughput > 0
@@ -0,0 +1,139 @@
+"""Tests for the rate_limit module."""
+
+import gc
+import pytest
+import responses
+import threading
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.metrics import RATE_LIMIT_WAIT
+from applause.common_python_reporter.rate_limit import FileTokenBucket, RateLimiter, RateLimitOptions, TokenBucket
+
+HEARTBEAT_URL = 'https://prod-auto-api.cloud.applause.com:443/api/v2.0/sdk-heartbeat'
+
+
+class TestTokenBucket:
+    """Tests for the TokenBucket class."""
+
+    def test_allows_burst_then_smooths(self):
+        """Test that a burst goes through at once and later calls are spaced by the rate."""
+        bucket = TokenBucket(rate=20, burst=5)
+
+        start = time.perf_counter()
+        waits = [bucket.acquire() for _ in range(8)]
+        elapsed = time.perf_counter() - start
+
+        assert waits[:5] == [0.0] * 5
+        assert all(wait > 0 for wait in waits[5:])
+        assert elapsed >= 0.14
+        stats = bucket.stats()
+        assert stats.acquired == 8
+        assert stats.delayed == 3
+        assert 0 < stats.max_wait_seconds <= 0.05
+        assert stats.mean_wait_seconds == pytest.approx(stats.total_wait_seconds / 8)
+
+    def test_shared_between_threads(self):
+        """Test that threads sharing a bucket are limited together."""
+        bucket = TokenBucket(rate=200, burst=1)
+        threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(4)]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert time.perf_counter() - start >= 19 / 200 - 0.005
+        assert bucket.stats().acquired == 20
+
+    def test_drain(self):
+        """Test that a drained bucket makes the next call wait."""
+        bucket = TokenBucket(rate=1000, burst=10)
+
+        bucket.drain(0.05)
+
+        assert bucket.acquire() >= 0.04
+
+    def test_invalid_rate(self):
+        """Test that a bucket needs a positive rate."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestFileTokenBucket:
+    """Tests for the FileTokenBucket class."""
+
+    def test_state_is_shared_through_the_file(self, tmp_path):
+        """Test that buckets using the same file share their tokens, as separate processes would."""
+        path = str(tmp_path / 'results.bucket')
+        first = FileTokenBucket(path, rate=20, burst=2)
+        second = FileTokenBucket(path, rate=20, burst=2)
+
+        assert first.acquire() == 0.0
+        assert second.acquire() == 0.0
+        assert first.acquire() > 0
+        assert second.acquire() > 0.02
+        first.close()
+        second.close()
+
+
+class TestRateLimiter:
+    """Tests for the rate limiting of AutoApi calls."""
+
+    def test_bucket_lookup(self, tmp_path):
+        """Test that endpoints use their own bucket before the bucket of their class."""
+        limiter = RateLimiter(
+            {
+                'results': RateLimitOptions(rate=10),
+                'provider-info': RateLimitOptions(rate=1),
+                'assets': RateLimitOptions(rate=1, shared_file=str(tmp_path / 'assets.bucket')),
+            }
+        )
+
+        assert limiter.bucket_for('create-result')[0] == 'results'
+        assert limiter.bucket_for('provider-info')[0] == 'provider-info'
+        assert isinstance(limiter.bucket_for('upload')[1], FileTokenBucket)
+        assert limiter.bucket_for('sdk-heartbeat') is None
+
+    def test_close_releases_shared_files(self, tmp_path):
+        """Test that closing the client closes the state files of its shared buckets, and that dropped buckets close theirs."""
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, rate_limits={'assets': RateLimitOptions(rate=1, shared_file=str(tmp_path / 'assets.bucket'))}))
+        bucket = auto_api.rate_limiter.buckets['assets']
+
+        auto_api.close()
+        auto_api.close()
+
+        assert not bucket._closer.alive
+        closer = FileTokenBucket(str(tmp_path / 'other.bucket'), rate=1)._closer
+        gc.collect()
+        assert not closer.alive
+
+    @responses.activate
+    def test_auto_api_waits_for_tokens(self):
+        """Test that AutoApi calls wait for their bucket and record the wait."""
+        responses.add(responses.POST, HEARTBEAT_URL, json={})
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, rate_limits={'heartbeat': RateLimitOptions(rate=10)}))
+
+        start = time.perf_counter()
+        for _ in range(3):
+            auto_api.send_sdk_heartbeat(1)
+
+        assert time.perf_counter() - start >= 0.19
+        assert auto_api.rate_limiter.stats()['heartbeat'].delayed == 2
+        assert auto_api.metrics.snapshot().histogram(RATE_LIMIT_WAIT, bucket='heartbeat').count == 3
+
+    @responses.activate
+    def test_auto_api_backs_off_after_429(self):
+        """Test that a 429 response drains the bucket for the Retry-After period."""
+        responses.add(responses.POST, HEARTBEAT_URL, status=429, headers={'Retry-After': '0.1'}, json={'message': 'Slow down'})
+        responses.add(responses.POST, HEARTBEAT_URL, json={})
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, rate_limits={'heartbeat': RateLimitOptions(rate=1000, burst=10)}))
+
+        with pytest.raises(ApplauseClientError):
+            auto_api.send_sdk_heartbeat(1)
+        start = time.perf_counter()
+        auto_api.send_sdk_heartbeat(1)
+
+        assert time.perf_counter() - start >= 0.09
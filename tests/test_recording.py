@@ -0,0 +1,99 @@
+"""Tests for the recording module."""
+
+import pytest
+import requests
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import CreateTestCaseResultDto, EmailFetchRequest, TestRunCreateDto
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.recording import ReplayAdapter, load_recording
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+REPLAY_URL = 'http://replay.invalid/'
+
+
+def record_run(path: str, stand_in_config: StandInConfig = None):
+    """Report a short run against a stand-in server while recording it."""
+    with StandInServer(stand_in_config) as server:
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=server.base_url, record_file=path))
+        run_id = auto_api.start_test_run(TestRunCreateDto(tests=['test1'])).run_id
+        result_id = auto_api.start_test_case(CreateTestCaseResultDto(test_run_id=run_id, test_case_name='test1', provider_session_ids=[])).test_result_id
+        auto_api.get_email_content(EmailFetchRequest(email_address='test@example.com'))
+        auto_api.end_test_run(run_id)
+    return run_id, result_id
+
+
+class TestRecording:
+    """Tests for recording and replaying the traffic of the AutoApi client."""
+
+    def test_records_every_exchange(self, tmp_path):
+        """Test that every request is recorded with its response and timings."""
+        path = str(tmp_path / 'traffic.jsonl')
+        run_id, _ = record_run(path)
+
+        exchanges = load_recording(path)
+
+        assert [(exchange.method, exchange.path) for exchange in exchanges] == [
+            ('POST', '/api/v1.0/test-run/create'),
+            ('POST', '/api/v1.0/test-result/create-result'),
+            ('POST', '/api/v1.0/email/download-email'),
+            ('DELETE', f'/api/v1.0/test-run/{run_id}?endingStatus=COMPLETE'),
+        ]
+        assert exchanges[0].status == 200
+        assert exchanges[0].content() == f'{{"runId": {run_id}}}'.encode()
+        assert exchanges[0].request_size > 0
+        assert all(exchange.elapsed > 0 for exchange in exchanges)
+        assert exchanges[1].offset >= exchanges[0].offset
+
+    def test_replays_without_network(self, tmp_path):
+        """Test that a recorded run is replayed with the same responses and no server."""
+        path = str(tmp_path / 'traffic.jsonl')
+        run_id, result_id = record_run(path)
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=REPLAY_URL, replay_file=path, replay_latency_scale=0))
+
+        assert auto_api.start_test_run(TestRunCreateDto(tests=['test1'])).run_id == run_id
+        assert auto_api.start_test_case(CreateTestCaseResultDto(test_run_id=run_id, test_case_name='test1', provider_session_ids=[])).test_result_id == result_id
+        with auto_api.stream_email_content(EmailFetchRequest(email_address='test@example.com')) as email:
+            assert email.headers['Subject'] == 'Stand-in email'
+        auto_api.end_test_run(run_id)
+
+    def test_replays_errors(self, tmp_path):
+        """Test that recorded error responses are replayed as errors."""
+        path = str(tmp_path / 'traffic.jsonl')
+        with StandInServer(StandInConfig(error_rate=1.0, error_status=503)) as server:
+            auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=server.base_url, record_file=path))
+            with pytest.raises(ApplauseClientError):
+                auto_api.send_sdk_heartbeat(1)
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=REPLAY_URL, replay_file=path, replay_latency_scale=0))
+
+        with pytest.raises(ApplauseClientError) as error:
+            auto_api.send_sdk_heartbeat(1)
+
+        assert error.value.status_code == 503
+        assert error.value.message == 'Injected stand-in error'
+
+    def test_scales_latency(self, tmp_path):
+        """Test that the recorded latencies are scaled when replaying."""
+        path = str(tmp_path / 'traffic.jsonl')
+        with StandInServer(StandInConfig(latency=0.05)) as server:
+            AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=server.base_url, record_file=path)).send_sdk_heartbeat(1)
+            AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=server.base_url, record_file=path)).send_sdk_heartbeat(1)
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=REPLAY_URL, replay_file=path, replay_latency_scale=2))
+
+        start = time.perf_counter()
+        auto_api.send_sdk_heartbeat(1)
+
+        assert time.perf_counter() - start >= 0.1
+
+    def test_unrecorded_request(self, tmp_path):
+        """Test that a request without an unused recorded response fails like a connection error."""
+        path = str(tmp_path / 'traffic.jsonl')
+        record_run(path)
+        adapter = ReplayAdapter(path, latency_scale=0)
+        session = requests.Session()
+        session.mount(REPLAY_URL, adapter)
+
+        with pytest.raises(requests.exceptions.ConnectionError, match='No recorded response for GET /api/v1.0/unknown'):
+            session.get(f'{REPLAY_URL}api/v1.0/unknown')
+        assert adapter.remaining() == 4
@@ -1,4 +1,13 @@
+import json
+import os
+import pytest
 import responses
+import signal
+import threading
+import time
+from applause.common_python_reporter import reporter as reporter_module
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.metrics import FIELDS_DIVERT_FAILED, FIELDS_DIVERTED, FIELDS_TRUNCATED
 from unittest.mock import patch, MagicMock
 from applause.common_python_reporter.reporter import ApplauseReporter, ApplauseConfig, AutoApi
 from applause.common_python_reporter.dtos import TestRunCreateResponseDto, AssetType, CreateTestCaseResultResponseDto, TestResultStatus
@@ -117,4 +126,285 @@ class TestApplauseReporter:
         reporter.submit_test_case_result("test1", TestResultStatus.PASSED, applause_test_case_id="123")
         assert submit_result_call.call_count == 1
         print(submit_result_call.calls[0].request.body)
-        assert submit_result_call.calls[0].request.body == b'{"testResultId": 456, "status": "PASSED", "providerSessionGuids": [], "testRailCaseId": null, "itwCaseId": "123", "failureReason": null}', "Submit result request body should be formatted properly"
\ No newline at end of file
+        assert submit_result_call.calls[0].request.body == b'{"testResultId": 456, "status": "PASSED", "providerSessionGuids": [], "testRailCaseId": null, "itwCaseId": "123", "failureReason": null}', "Submit result request body should be formatted properly"
+    @responses.activate
+    def test_submit_test_case_result_truncates_failure_reason(self):
+        # Test that a failure reason over its budget is truncated and counted
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-run/create', json={"runId": 123})
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/create-result', json={"testResultId": 456})
+        submit_result_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result', json={})
+        upload_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/456/upload', json={})
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, field_budgets={"failure_reason": 1000}))
+        reporter.runner_start()
+        reporter.start_test_case("test1", "Test Case 1")
+
+        reporter.submit_test_case_result("test1", TestResultStatus.FAILED, failure_reason="Error" + "x" * 100_000 + "at line 1")
+
+        failure_reason = json.loads(submit_result_call.calls[0].request.body)["failureReason"]
+        assert len(failure_reason) <= 1000
+        assert failure_reason.startswith("Error") and failure_reason.endswith("at line 1")
+        assert upload_call.call_count == 0
+        assert reporter.metrics.snapshot().counter(FIELDS_TRUNCATED, field="failure_reason") == 1
+        assert reporter.metrics.snapshot().counter(FIELDS_DIVERTED) == 0
+        reporter.reporter.hearbeat_service.stop()
+
+    @responses.activate
+    def test_test_case_name_budget_applies_to_run_and_result(self):
+        # Test that an over-budget test case name is registered on the run under the name its result is created with
+        create_run_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-run/create', json={"runId": 123})
+        create_result_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/create-result', json={"testResultId": 456})
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, field_budgets={"test_case_name": 100}))
+        long_name = "test_checkout[" + "x" * 1000 + "]"
+        reporter.runner_start([long_name, "short"])
+        reporter.start_test_case("test1", long_name)
+
+        registered = json.loads(create_run_call.calls[0].request.body)["tests"]
+        created = json.loads(create_result_call.calls[0].request.body)["testCaseName"]
+        assert len(registered[0].encode()) <= 100 and registered[1] == "short"
+        assert created == registered[0]
+        reporter.reporter.hearbeat_service.stop()
+
+    @responses.activate
+    def test_submit_test_case_result_diverts_failure_reason(self):
+        # Test that the full text of a truncated failure reason is uploaded as a framework log
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-run/create', json={"runId": 123})
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/create-result', json={"testResultId": 456})
+        submit_result_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result', json={})
+        upload_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/456/upload', json={})
+        config = ApplauseConfig(api_key='test', product_id=123, field_budgets={"failure_reason": 1000}, divert_truncated_fields=True)
+        reporter = ApplauseReporter(config)
+        reporter.runner_start()
+        reporter.start_test_case("test1", "Test Case 1")
+        full_text = "Error" + "x" * 100_000
+
+        reporter.submit_test_case_result("test1", TestResultStatus.FAILED, provider_session_guids=["session"], failure_reason=full_text)
+
+        assert upload_call.call_count == 1
+        upload_body = upload_call.calls[0].request.body
+        assert full_text.encode() in upload_body
+        assert b'name="assetType"\r\n\r\nFRAMEWORK_LOG' in upload_body
+        assert b'name="sessionId"\r\n\r\nsession' in upload_body
+        assert "full text attached as failure_reason.txt" in json.loads(submit_result_call.calls[0].request.body)["failureReason"]
+        assert reporter.metrics.snapshot().counter(FIELDS_DIVERTED, field="failure_reason") == 1
+        reporter.reporter.hearbeat_service.stop()
+
+    @responses.activate
+    def test_failed_divert_still_submits_result(self, capsys):
+        # Test that a result is submitted with its truncated failure reason when the full text cannot be uploaded
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-run/create', json={"runId": 123})
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/create-result', json={"testResultId": 456})
+        submit_result_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result', json={})
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/456/upload', status=500)
+        config = ApplauseConfig(api_key='test', product_id=123, field_budgets={"failure_reason": 1000}, divert_truncated_fields=True)
+        reporter = ApplauseReporter(config)
+        reporter.runner_start()
+        reporter.start_test_case("test1", "Test Case 1")
+
+        reporter.submit_test_case_result("test1", TestResultStatus.FAILED, failure_reason="Error" + "x" * 100_000)
+
+        assert submit_result_call.call_count == 1
+        failure_reason = json.loads(submit_result_call.calls[0].request.body)["failureReason"]
+        assert len(failure_reason) <= 1000 and "full text attached" not in failure_reason
+        assert "Could not upload the full text of the failure_reason of test result 456" in capsys.readouterr().out
+        snapshot = reporter.metrics.snapshot()
+        assert snapshot.counter(FIELDS_DIVERT_FAILED, field="failure_reason") == 1
+        assert snapshot.counter(FIELDS_DIVERTED) == 0
+        assert reporter.reporter.in_progress_tests == []
+        reporter.reporter.hearbeat_service.stop()
+
+    @responses.activate
+    def test_divert_goes_through_asset_pipeline(self):
+        # Test that the full text is uploaded by the asset pipeline, so that submitting the result does not wait for it
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-run/create', json={"runId": 123})
+        responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/create-result', json={"testResultId": 456})
+        submit_result_call = responses.add(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result', json={})
+        release = threading.Event()
+
+        def upload_callback(request):
+            release.wait(5)
+            return 200, {}, "{}"
+
+        upload_call = responses.add_callback(responses.POST, 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/test-result/456/upload', callback=upload_callback)
+        config = ApplauseConfig(api_key='test', product_id=123, field_budgets={"failure_reason": 1000}, divert_truncated_fields=True)
+        reporter = ApplauseReporter(config, asset_stages={AssetType.CONSOLE_LOG: [lambda chunks: chunks]})
+        reporter.runner_start()
+        reporter.start_test_case("test1", "Test Case 1")
+
+        reporter.submit_test_case_result("test1", TestResultStatus.FAILED, failure_reason="Error" + "x" * 100_000)
+
+        assert submit_result_call.call_count == 1
+        assert "full text attached as failure_reason.txt" in json.loads(submit_result_call.calls[0].request.body)["failureReason"]
+        release.set()
+        assert reporter.reporter.asset_pipeline.flush(5)
+        assert upload_call.call_count == 1
+        assert reporter.metrics.snapshot().counter(FIELDS_DIVERTED, field="failure_reason") == 1
+        reporter.reporter.hearbeat_service.stop()
+
+
+AUTO_API_URL = 'https://prod-auto-api.cloud.applause.com:443/api/v1.0/'
+
+
+def add_run_responses(status="COMPLETE"):
+    responses.add(responses.POST, AUTO_API_URL + 'test-run/create', json={"runId": 123})
+    responses.add(responses.POST, AUTO_API_URL + 'test-result/create-result', json={"testResultId": 456})
+    responses.add(responses.POST, AUTO_API_URL + 'test-result/provider-info', json=[])
+    return responses.add(responses.DELETE, AUTO_API_URL + f'test-run/123?endingStatus={status}', json={})
+
+
+class TestShutdown:
+    """Tests for ending runs on exit, on signals, and in the background."""
+
+    @responses.activate
+    def test_runner_end_without_waiting(self):
+        """Test that the run can be ended on a background thread."""
+        end_run_call = add_run_responses()
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123))
+        reporter.runner_start()
+
+        future = reporter.runner_end(wait=False)
+
+        assert future.result(timeout=5) is None
+        assert end_run_call.call_count == 1
+        assert reporter.reporter is None
+        assert reporter not in reporter_module._open_reporters
+
+    @responses.activate
+    def test_failed_runner_end_leaves_run_to_exit_hook(self):
+        """Test that a run whose end call failed stays open, and is ended by the exit hook."""
+        for _ in range(2):
+            responses.add(responses.DELETE, AUTO_API_URL + 'test-run/123?endingStatus=COMPLETE', status=500, json={"message": "unavailable"})
+        end_run_call = add_run_responses("COMPLETE")
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123))
+        reporter.runner_start()
+
+        with pytest.raises(ApplauseClientError):
+            reporter.runner_end()
+        assert reporter.reporter is not None
+        assert reporter in reporter_module._open_reporters
+
+        with pytest.raises(ApplauseClientError):
+            reporter.runner_end(wait=False).result(timeout=5)
+        assert reporter.reporter is not None
+
+        reporter_module._end_open_runs()
+
+        assert end_run_call.call_count == 1
+        assert reporter.reporter is None
+
+    @responses.activate
+    def test_abort_leaves_the_run_open(self):
+        """Test that an aborted run is no longer ended by the exit hook, and that a new run can be started afterwards."""
+        end_run_call = add_run_responses()
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123))
+        reporter.runner_start()
+        heartbeat = reporter.reporter.hearbeat_service
+
+        reporter.abort()
+        reporter_module._end_open_runs()
+
+        assert end_run_call.call_count == 0
+        assert heartbeat.job is None
+        assert reporter.reporter is None
+        assert reporter not in reporter_module._open_reporters
+        with pytest.raises(ValueError):
+            reporter.abort()
+        reporter.runner_start()
+        reporter.runner_end()
+        assert end_run_call.call_count == 1
+
+    @responses.activate
+    def test_failed_links_do_not_end_the_run_again(self):
+        """Test that retrying a run whose end call succeeded only retries fetching the provider session links."""
+        end_run_call = add_run_responses("COMPLETE")
+        responses.replace(responses.POST, AUTO_API_URL + 'test-result/provider-info', status=500, json={"message": "unavailable"})
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123))
+        reporter.runner_start()
+
+        with pytest.raises(ApplauseClientError):
+            reporter.runner_end()
+        assert reporter.reporter.ended
+        responses.replace(responses.POST, AUTO_API_URL + 'test-result/provider-info', json=[])
+        reporter_module._end_open_runs()
+
+        assert end_run_call.call_count == 1
+        assert reporter.reporter is None
+
+    @responses.activate
+    def test_exit_completes_open_run(self):
+        """Test that a run left open with every test reported is ended as COMPLETE on exit."""
+        end_run_call = add_run_responses("COMPLETE")
+        responses.add(responses.POST, AUTO_API_URL + 'test-result', json={})
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123))
+        reporter.runner_start()
+        reporter.start_test_case("test1", "Test Case 1")
+        reporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+
+        reporter_module._end_open_runs()
+
+        assert end_run_call.call_count == 1
+        assert reporter.reporter is None
+
+    @responses.activate
+    def test_exit_cancels_run_within_deadline(self):
+        """Test that a run with a test in progress is canceled on exit, giving up on queued results after the deadline."""
+        end_run_call = add_run_responses("CANCELED")
+        release = threading.Event()
+        responses.add_callback(responses.POST, AUTO_API_URL + 'test-result', callback=lambda request: (release.wait(5), (200, {}, "{}"))[1])
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, queue_submissions=True, shutdown_timeout=0.2))
+        reporter.runner_start()
+        reporter.start_test_case("test1", "Test Case 1")
+        reporter.submit_test_case_result("test1", TestResultStatus.PASSED)
+        reporter.start_test_case("test2", "Test Case 2")
+
+        start = time.monotonic()
+        reporter_module._end_open_runs()
+        elapsed = time.monotonic() - start
+        release.set()
+
+        assert end_run_call.call_count == 1
+        assert 0.2 <= elapsed < 2
+
+    @responses.activate
+    def test_signal_cancels_run(self):
+        """Test that an exit signal cancels the run, then reaches the handler installed before."""
+        end_run_call = add_run_responses("CANCELED")
+        calls = []
+        previous = signal.signal(signal.SIGUSR1, lambda signum, frame: calls.append(signum))
+        try:
+            reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, exit_signals=["SIGUSR1"]))
+            reporter.runner_start()
+
+            os.kill(os.getpid(), signal.SIGUSR1)
+
+            assert end_run_call.call_count == 1
+            assert calls == [signal.SIGUSR1]
+            assert reporter.reporter is None
+            assert signal.getsignal(signal.SIGUSR1) is not reporter._handle_signal
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+
+    @responses.activate
+    def test_signal_does_not_wait_for_a_held_lock(self):
+        """Test that a signal arriving while the main thread holds a lock needed to end the run waits for the shutdown timeout at most."""
+        end_run_call = add_run_responses("CANCELED")
+        calls = []
+        previous = signal.signal(signal.SIGUSR1, lambda signum, frame: calls.append(signum))
+        try:
+            reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, exit_signals=["SIGUSR1"], shutdown_timeout=0.2))
+            reporter.runner_start()
+
+            start = time.monotonic()
+            with reporter.metrics._lock:
+                os.kill(os.getpid(), signal.SIGUSR1)
+                elapsed = time.monotonic() - start
+                assert end_run_call.call_count == 0
+
+            assert 0.2 <= elapsed < 2
+            assert calls == [signal.SIGUSR1]
+            # The run is ended once the lock is released
+            deadline = time.monotonic() + 5
+            while end_run_call.call_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert end_run_call.call_count == 1
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
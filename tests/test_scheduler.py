@@ -0,0 +1,116 @@
+"""Tests for the scheduler module."""
+
+import pytest
+import responses
+import threading
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.metrics import QUEUE_DEPTH, SCHEDULER_PROMOTIONS, SCHEDULER_WAIT
+from applause.common_python_reporter.scheduler import PriorityClass, PriorityScheduler, SchedulerOptions
+
+HEARTBEAT_URL = 'https://prod-auto-api.cloud.applause.com:443/api/v2.0/sdk-heartbeat'
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the condition"
+        time.sleep(0.005)
+
+
+class Caller:
+    """Acquires a slot on a thread, records the order slots were granted in, and holds the slot until released."""
+
+    def __init__(self, scheduler: PriorityScheduler, priority: PriorityClass, granted: list):
+        self.release = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(scheduler, priority, granted), daemon=True)
+        self.thread.start()
+
+    def _run(self, scheduler, priority, granted):
+        scheduler.acquire(priority)
+        granted.append(priority)
+        self.release.wait(5)
+        scheduler.release(priority)
+
+
+class TestPriorityScheduler:
+    """Tests for the PriorityScheduler class."""
+
+    def test_grants_by_priority(self):
+        """Test that waiting calls are granted slots by priority class, whatever the order they arrived in."""
+        scheduler = PriorityScheduler(SchedulerOptions(max_concurrency=1))
+        granted = []
+        holder = Caller(scheduler, PriorityClass.RESULTS, granted)
+        wait_until(lambda: granted)
+        callers = []
+        for priority in (PriorityClass.ASSETS, PriorityClass.RESULTS, PriorityClass.LIFECYCLE):
+            callers.append(Caller(scheduler, priority, granted))
+            wait_until(lambda priority=priority: scheduler.waiting()[priority] == 1)
+        assert scheduler.metrics.snapshot().gauge(QUEUE_DEPTH, queue="scheduler", priority="assets") == 1
+
+        for caller in callers:
+            caller.release.set()
+        holder.release.set()
+        for caller in callers:
+            caller.thread.join(5)
+
+        assert granted == [PriorityClass.RESULTS, PriorityClass.LIFECYCLE, PriorityClass.RESULTS, PriorityClass.ASSETS]
+        assert scheduler.metrics.snapshot().histogram(SCHEDULER_WAIT, priority="assets").count == 1
+
+    def test_uploads_limited_to_their_share(self):
+        """Test that uploads cannot take the slots beyond their share, which stay free for results."""
+        scheduler = PriorityScheduler(SchedulerOptions(max_concurrency=4, upload_share=0.25))
+        granted = []
+        upload = Caller(scheduler, PriorityClass.ASSETS, granted)
+        wait_until(lambda: granted)
+
+        second_upload = Caller(scheduler, PriorityClass.ASSETS, granted)
+        wait_until(lambda: scheduler.waiting()[PriorityClass.ASSETS] == 1)
+        results = [Caller(scheduler, PriorityClass.RESULTS, granted) for _ in range(3)]
+        wait_until(lambda: len(granted) == 4)
+        assert scheduler.waiting()[PriorityClass.ASSETS] == 1
+
+        upload.release.set()
+        wait_until(lambda: len(granted) == 5)
+        assert granted[-1] == PriorityClass.ASSETS
+        for caller in [second_upload, *results]:
+            caller.release.set()
+            caller.thread.join(5)
+
+    def test_starvation_protection(self):
+        """Test that a call that waited too long goes before calls of a higher class."""
+        scheduler = PriorityScheduler(SchedulerOptions(max_concurrency=1, starvation_timeout=0.1))
+        granted = []
+        holder = Caller(scheduler, PriorityClass.RESULTS, granted)
+        wait_until(lambda: granted)
+        upload = Caller(scheduler, PriorityClass.ASSETS, granted)
+        wait_until(lambda: scheduler.waiting()[PriorityClass.ASSETS] == 1)
+        time.sleep(0.15)
+        result = Caller(scheduler, PriorityClass.RESULTS, granted)
+        wait_until(lambda: scheduler.waiting()[PriorityClass.RESULTS] == 1)
+
+        holder.release.set()
+        upload.release.set()
+        result.release.set()
+        result.thread.join(5)
+
+        assert granted == [PriorityClass.RESULTS, PriorityClass.ASSETS, PriorityClass.RESULTS]
+        assert scheduler.metrics.snapshot().counter(SCHEDULER_PROMOTIONS, priority="assets") == 1
+
+    def test_needs_a_slot(self):
+        """Test that a scheduler without slots is rejected."""
+        with pytest.raises(ValueError):
+            PriorityScheduler(SchedulerOptions(max_concurrency=0))
+
+    @responses.activate
+    def test_auto_api_calls_are_scheduled(self):
+        """Test that AutoApi calls wait for a slot of their class and give it back."""
+        responses.add(responses.POST, HEARTBEAT_URL, json={})
+        auto_api = AutoApi(ApplauseConfig(api_key='test', product_id=123, scheduler=SchedulerOptions(max_concurrency=1)))
+
+        auto_api.send_sdk_heartbeat(1)
+        auto_api.send_sdk_heartbeat(1)
+
+        assert auto_api.metrics.snapshot().histogram(SCHEDULER_WAIT, priority="lifecycle").count == 2
+        assert auto_api.scheduler.waiting()[PriorityClass.LIFECYCLE] == 0
@@ -0,0 +1,99 @@
+"""Tests for the stand_in module."""
+
+import pytest
+import requests
+import time
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import (
+    AssetType,
+    CreateTestCaseResultDto,
+    EmailFetchRequest,
+    SubmitTestCaseResultDto,
+    TestResultStatus,
+    TestRunCreateDto,
+)
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+
+
+def make_config(server: StandInServer) -> ApplauseConfig:
+    return ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=server.base_url, public_api_base_url=server.base_url)
+
+
+class TestStandInServer:
+    """Tests for the StandInServer class."""
+
+    def test_serves_a_complete_run(self):
+        """Test that the AutoApi client can report a run against the stand-in."""
+        with StandInServer() as server:
+            auto_api = AutoApi(make_config(server))
+            run_id = auto_api.start_test_run(TestRunCreateDto(tests=['test1'])).run_id
+            result_id = auto_api.start_test_case(CreateTestCaseResultDto(test_run_id=run_id, test_case_name='test1', provider_session_ids=[])).test_result_id
+            auto_api.upload_asset(result_id, b'content', 'asset.txt', 'session', AssetType.CONSOLE_LOG)
+            auto_api.submit_test_case_result(SubmitTestCaseResultDto(test_result_id=result_id, status=TestResultStatus.PASSED, provider_session_guids=[]))
+            links = auto_api.get_provider_session_links([result_id])
+            auto_api.end_test_run(run_id)
+
+            assert links[0].test_result_id == result_id
+            assert server.request_counts() == {
+                'test-run/create': 1,
+                'create-result': 1,
+                'upload': 1,
+                'test-result': 1,
+                'provider-info': 1,
+                'test-run/end': 1,
+            }
+
+    def test_serves_emails(self):
+        """Test that generated addresses and the configured email are served."""
+        with StandInServer() as server:
+            auto_api = AutoApi(make_config(server))
+            address = auto_api.get_email_address('prefix').email_address
+            email = auto_api.get_email_content(EmailFetchRequest(email_address=address))
+
+            assert address.startswith('prefix')
+            assert email['Subject'] == 'Stand-in email'
+
+    def test_injects_errors_per_endpoint(self):
+        """Test that an endpoint error rate overrides the global one."""
+        config = StandInConfig(endpoint_error_rate={'test-run/create': 1.0}, error_status=503)
+        with StandInServer(config) as server:
+            auto_api = AutoApi(make_config(server))
+
+            with pytest.raises(ApplauseClientError) as error:
+                auto_api.start_test_run(TestRunCreateDto(tests=[]))
+            auto_api.send_sdk_heartbeat(1)
+
+            assert error.value.status_code == 503
+            assert error.value.message == 'Injected stand-in error'
+
+    def test_injects_latency(self):
+        """Test that the configured latency delays the responses."""
+        with StandInServer(StandInConfig(latency=0.05)) as server:
+            start = time.perf_counter()
+            AutoApi(make_config(server)).send_sdk_heartbeat(1)
+
+            assert time.perf_counter() - start >= 0.05
+
+    def test_reads_chunked_bodies(self):
+        """Test that request bodies sent with chunked transfer encoding are read completely."""
+        with StandInServer() as server:
+            response = requests.post(f'{server.base_url}api/v1.0/test-result/1/upload', data=iter([b'a' * 10, b'b' * 20]))
+
+            assert response.status_code == 200
+            assert server.bytes_received() == {'upload': 30}
+
+    def test_unknown_route(self):
+        """Test that requests without a stand-in route are rejected."""
+        with StandInServer() as server:
+            response = requests.get(f'{server.base_url}api/v1.0/unknown')
+
+            assert response.status_code == 404
+            assert server.request_counts() == {}
+
+    def test_start_twice(self):
+        """Test that starting a running server raises an error."""
+        with StandInServer() as server:
+            with pytest.raises(Exception, match='Already running'):
+                server.start()
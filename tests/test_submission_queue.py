@@ -0,0 +1,179 @@
+"""Tests for the submission_queue module."""
+
+import json
+import pytest
+import responses
+import threading
+import time
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import SubmitTestCaseResultDto, TestResultStatus
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.metrics import RESULTS_COALESCED, TEST_CASES_IN_PROGRESS, TEST_RESULTS_SUBMITTED, MetricsRegistry
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.submission_queue import SubmissionQueue
+from unittest.mock import Mock
+
+BASE_URL = 'https://prod-auto-api.cloud.applause.com:443/'
+
+
+def result(result_id: int, status: TestResultStatus, failure_reason=None) -> SubmitTestCaseResultDto:
+    return SubmitTestCaseResultDto(test_result_id=result_id, status=status, provider_session_guids=[], failure_reason=failure_reason)
+
+
+class BlockingApi:
+    """A stand-in for AutoApi whose submissions block until released, recording what was submitted."""
+
+    def __init__(self):
+        self.metrics = MetricsRegistry()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.submitted = []
+        self.max_concurrent = {}
+        self._lock = threading.Lock()
+        self._active = {}
+
+    def submit_test_case_result(self, params: SubmitTestCaseResultDto):
+        with self._lock:
+            self._active[params.test_result_id] = self._active.get(params.test_result_id, 0) + 1
+            self.max_concurrent[params.test_result_id] = max(self.max_concurrent.get(params.test_result_id, 0), self._active[params.test_result_id])
+        self.started.set()
+        self.release.wait(5)
+        with self._lock:
+            self._active[params.test_result_id] -= 1
+            self.submitted.append(params)
+
+
+class TestSubmissionQueue:
+    """Tests for the SubmissionQueue class."""
+
+    def test_coalesces_pending_updates(self):
+        """Test that only the latest update of a queued result is submitted."""
+        api = BlockingApi()
+        queue = SubmissionQueue(api)
+        queue.submit(result(1, TestResultStatus.PASSED))
+        assert api.started.wait(5)
+
+        # The worker is busy with result 1, so these updates of result 2 wait in the queue
+        queue.submit(result(2, TestResultStatus.FAILED, failure_reason="first"))
+        queue.submit(result(2, TestResultStatus.FAILED, failure_reason="second"))
+        queue.submit(result(2, TestResultStatus.PASSED))
+        api.release.set()
+        assert queue.close(timeout=5)
+
+        assert [(params.test_result_id, params.status) for params in api.submitted] == [(1, TestResultStatus.PASSED), (2, TestResultStatus.PASSED)]
+        stats = queue.stats()
+        assert (stats.queued, stats.submitted, stats.coalesced, stats.failed, stats.pending) == (4, 2, 2, 0, 0)
+        assert api.metrics.snapshot().counter(RESULTS_COALESCED) == 2
+
+    def test_update_during_submission_is_sent_after(self):
+        """Test that an update of a result being submitted is sent once that submission is done, never concurrently."""
+        api = BlockingApi()
+        queue = SubmissionQueue(api, max_workers=4)
+        queue.submit(result(1, TestResultStatus.FAILED))
+        assert api.started.wait(5)
+
+        queue.submit(result(1, TestResultStatus.PASSED))
+        assert queue.stats().coalesced == 0
+        api.release.set()
+        assert queue.close(timeout=5)
+
+        assert [params.status for params in api.submitted] == [TestResultStatus.FAILED, TestResultStatus.PASSED]
+        assert api.max_concurrent[1] == 1
+
+    def test_failed_submission_does_not_stop_the_queue(self, capsys):
+        """Test that the queue carries on after a result fails to be submitted, reporting the failed result."""
+        api = Mock()
+        api.metrics = MetricsRegistry()
+        api.submit_test_case_result.side_effect = [ApplauseClientError(Mock(status_code=500, text="error")), None]
+        queue = SubmissionQueue(api)
+
+        queue.submit(result(1, TestResultStatus.PASSED))
+        queue.submit(result(2, TestResultStatus.PASSED))
+        assert queue.close(timeout=5)
+
+        stats = queue.stats()
+        assert (stats.submitted, stats.failed) == (1, 1)
+        assert api.submit_test_case_result.call_count == 2
+        assert "Could not submit test result 1" in capsys.readouterr().out
+
+    def test_close_timeout(self):
+        """Test that closing gives up on the queued results once the timeout expires."""
+        api = BlockingApi()
+        queue = SubmissionQueue(api)
+        queue.submit(result(1, TestResultStatus.PASSED))
+        queue.submit(result(2, TestResultStatus.PASSED))
+        assert api.started.wait(5)
+
+        assert not queue.close(timeout=0.05)
+        api.release.set()
+        for worker in queue._workers:
+            worker.join(5)
+        assert [params.test_result_id for params in api.submitted] == [1]
+
+    def test_close_timeout_is_shared_by_the_workers(self):
+        """Test that closing with busy workers takes the timeout once, not once more per worker."""
+        api = BlockingApi()
+        queue = SubmissionQueue(api, max_workers=4)
+        for result_id in range(1, 5):
+            queue.submit(result(result_id, TestResultStatus.PASSED))
+        assert api.started.wait(5)
+
+        start = time.monotonic()
+        assert not queue.close(timeout=0.2)
+        elapsed = time.monotonic() - start
+        api.release.set()
+
+        assert 0.2 <= elapsed < 0.5
+
+    def test_submit_after_close(self):
+        """Test that a closed queue rejects results."""
+        queue = SubmissionQueue(Mock(metrics=MetricsRegistry()))
+        queue.close()
+
+        with pytest.raises(Exception, match="Already closed"):
+            queue.submit(result(1, TestResultStatus.PASSED))
+
+
+class TestQueuedReporter:
+    """Tests for reporting with queued submissions."""
+
+    @responses.activate
+    def test_runner_end_submits_latest_result(self):
+        """Test that repeated submissions of a test case are sent once, with the latest status, before the run ends."""
+        responses.add(responses.POST, BASE_URL + 'api/v1.0/test-run/create', json={"runId": 123})
+        result_ids = iter([456, 789])
+        responses.add_callback(responses.POST, BASE_URL + 'api/v1.0/test-result/create-result', callback=lambda request: (200, {}, json.dumps({"testResultId": next(result_ids)})))
+        responses.add(responses.POST, BASE_URL + 'api/v2.0/sdk-heartbeat', json={})
+        responses.add(responses.POST, BASE_URL + 'api/v1.0/test-result/provider-info', json=[])
+        end_run_call = responses.add(responses.DELETE, BASE_URL + 'api/v1.0/test-run/123?endingStatus=COMPLETE', json={})
+        release = threading.Event()
+        submit_bodies = []
+
+        def submit_callback(request):
+            release.wait(5)
+            submit_bodies.append(json.loads(request.body))
+            return 200, {}, "{}"
+
+        responses.add_callback(responses.POST, BASE_URL + 'api/v1.0/test-result', callback=submit_callback)
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123, queue_submissions=True))
+        reporter.runner_start()
+        reporter.start_test_case("test0", "Test Case 0")
+        reporter.submit_test_case_result("test0", TestResultStatus.PASSED)
+        # The first submission keeps the worker busy, so the updates of the retried test case are coalesced
+        reporter.start_test_case("test1", "Test Case 1")
+        reporter.submit_test_case_result("test1", TestResultStatus.FAILED, failure_reason="attempt 1", provider_session_guids=["a"])
+        reporter.submit_test_case_result("test1", TestResultStatus.PASSED, provider_session_guids=["b"])
+        assert end_run_call.call_count == 0
+        release.set()
+        reporter.runner_end()
+
+        assert end_run_call.call_count == 1
+        assert [body["testResultId"] for body in submit_bodies] == [456, 789]
+        assert submit_bodies[1]["status"] == "PASSED"
+        assert submit_bodies[1]["failureReason"] is None
+        assert submit_bodies[1]["providerSessionGuids"] == ["b"]
+        snapshot = reporter.metrics.snapshot()
+        assert snapshot.counter(RESULTS_COALESCED) == 1
+        # The repeated submission is neither a new result nor a test case leaving progress
+        assert snapshot.counter(TEST_RESULTS_SUBMITTED) == 2
+        assert snapshot.gauge(TEST_CASES_IN_PROGRESS) == 0
@@ -0,0 +1,158 @@
+"""Tests for the tracing module."""
+
+import json
+import pytest
+import responses
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import AssetType, TestResultStatus
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.tracing import NOOP_SPAN, InMemorySpanExporter, JsonFileSpanExporter, SpanExporter, Tracer
+
+AUTO_API_URL = 'https://prod-auto-api.cloud.applause.com:443/api'
+
+
+def _add_run_responses():
+    responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-run/create', json={'runId': 123})
+    responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result/create-result', json={'testResultId': 456})
+    responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result', json={})
+    responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result/456/upload', json={})
+    responses.add(responses.DELETE, f'{AUTO_API_URL}/v1.0/test-run/123?endingStatus=COMPLETE', json={})
+    responses.add(responses.POST, f'{AUTO_API_URL}/v1.0/test-result/provider-info', json=[])
+
+
+class TestTracer:
+    """Tests for the Tracer class."""
+
+    def test_disabled_tracer_hands_out_noop_span(self):
+        """Test that a tracer without exporters does not record anything."""
+        tracer = Tracer()
+        with tracer.start_span('operation') as span:
+            span.set_attribute('key', 'value')
+        assert span is NOOP_SPAN
+        assert span.traceparent is None
+
+    def test_nested_spans_share_the_trace(self):
+        """Test that spans started inside another span become its children."""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer([exporter])
+        with tracer.start_span('parent') as parent:
+            with tracer.start_span('child') as child:
+                pass
+        with tracer.start_span('other') as other:
+            pass
+
+        assert [span.name for span in exporter.spans] == ['child', 'parent', 'other']
+        assert child.trace_id == parent.trace_id
+        assert child.parent_id == parent.span_id
+        assert parent.parent_id is None
+        assert other.trace_id != parent.trace_id
+        assert child.duration <= parent.duration
+
+    def test_error_is_recorded(self):
+        """Test that an exception raised inside a span is recorded on it."""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer([exporter])
+        try:
+            with tracer.start_span('failing'):
+                raise ValueError('boom')
+        except ValueError:
+            pass
+        assert exporter.spans[0].error == 'ValueError: boom'
+
+    def test_json_file_exporter(self, tmp_path):
+        """Test that each finished span is appended to the file as a JSON line."""
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer([JsonFileSpanExporter(str(path))])
+        with tracer.start_span('parent', key='value'):
+            with tracer.start_span('child'):
+                pass
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line['name'] for line in lines] == ['child', 'parent']
+        assert lines[1]['attributes'] == {'key': 'value'}
+        assert lines[0]['parent_id'] == lines[1]['span_id']
+
+    def test_failing_exporter_does_not_break_the_traced_code(self, capsys):
+        """Test that an exporter error is reported once, without replacing the error of the span or stopping other exporters."""
+        class Failing(SpanExporter):
+            def export(self, span):
+                raise OSError(28, 'No space left on device')
+
+        exporter = InMemorySpanExporter()
+        tracer = Tracer([Failing(), exporter])
+        with pytest.raises(ValueError, match='boom'):
+            with tracer.start_span('failing'):
+                raise ValueError('boom')
+        with tracer.start_span('next'):
+            pass
+
+        assert [span.name for span in exporter.spans] == ['failing', 'next']
+        assert capsys.readouterr().out.count('Could not export spans to Failing') == 1
+
+    def test_closed_json_file_exporter(self, tmp_path):
+        """Test that a closed file exporter drops the spans ending afterwards."""
+        path = tmp_path / 'trace.jsonl'
+        exporter = JsonFileSpanExporter(str(path))
+        tracer = Tracer([exporter])
+        with tracer.start_span('before'):
+            pass
+        exporter.close()
+        with tracer.start_span('after'):
+            pass
+
+        assert [json.loads(line)['name'] for line in path.read_text().splitlines()] == ['before']
+
+    def test_exporter_must_implement_export(self):
+        """Test that an exporter without an export method cannot be constructed."""
+        class Incomplete(SpanExporter):
+            pass
+
+        with pytest.raises(TypeError, match='export'):
+            Incomplete()
+
+
+class TestReporterTracing:
+    """Tests for the spans recorded by the reporter."""
+
+    @responses.activate
+    def test_run_case_and_request_spans_form_a_tree(self, tmp_path, monkeypatch):
+        """Test the run -> case -> submit/upload -> request span hierarchy and traceparent propagation."""
+        monkeypatch.chdir(tmp_path)
+        _add_run_responses()
+        exporter = InMemorySpanExporter()
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123), tracer=Tracer([exporter]))
+
+        reporter.runner_start(tests=['test1'])
+        reporter.start_test_case('test1', 'test1')
+        reporter.attach_test_case_asset('test1', 'screenshot.png', 'guid', AssetType.SCREENSHOT, b'...')
+        reporter.submit_test_case_result('test1', TestResultStatus.PASSED)
+        reporter.runner_end()
+
+        spans = {span.name: span for span in exporter.spans}
+        run = spans['test run']
+        case = spans['test case']
+        assert run.parent_id is None
+        assert case.parent_id == run.span_id
+        assert spans['start_run'].parent_id == run.span_id
+        assert spans['end_run'].parent_id == run.span_id
+        assert spans['submit_test_case_result'].parent_id == case.span_id
+        assert spans['attach_test_case_asset'].parent_id == case.span_id
+        assert spans['parse_test_case_names'].trace_id == run.trace_id
+        assert spans['auto_api test-result'].parent_id == spans['submit_test_case_result'].span_id
+        assert spans['auto_api upload'].parent_id == spans['attach_test_case_asset'].span_id
+        assert all(span.trace_id == run.trace_id for span in exporter.spans)
+
+        submit_request = next(call.request for call in responses.calls if call.request.url.endswith('/v1.0/test-result'))
+        assert submit_request.headers['traceparent'] == f'00-{run.trace_id}-{spans["auto_api test-result"].span_id}-01'
+
+    @responses.activate
+    def test_no_traceparent_when_disabled(self, tmp_path, monkeypatch):
+        """Test that requests carry no traceparent header when tracing is disabled."""
+        monkeypatch.chdir(tmp_path)
+        _add_run_responses()
+        reporter = ApplauseReporter(ApplauseConfig(api_key='test', product_id=123))
+
+        reporter.runner_start(tests=['test1'])
+        reporter.runner_end()
+
+        assert all('traceparent' not in call.request.headers for call in responses.calls)
@@ -0,0 +1,163 @@
+"""Conformance tests for the transport module, run against the local stand-in server."""
+
+import pytest
+import requests
+import socket
+from applause.common_python_reporter.auto_api import AutoApi
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.dtos import CreateTestCaseResultDto, EmailFetchRequest, TestRunCreateDto
+from applause.common_python_reporter.errors import ApplauseClientError
+from applause.common_python_reporter.public_api import PublicApi, TestRunAutoResultDto, TestRunAutoResultStatus
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+from applause.common_python_reporter.transport import Http2Transport, RequestsTransport, Transport, TransportType, create_transport
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+TRANSPORTS = [
+    TransportType.REQUESTS,
+    TransportType.URLLIB3,
+    pytest.param(TransportType.HTTP2, marks=pytest.mark.skipif(httpx is None, reason='httpx is not installed')),
+]
+
+
+@pytest.fixture
+def server():
+    """Returns a running stand-in server."""
+    with StandInServer() as stand_in:
+        yield stand_in
+
+
+@pytest.mark.parametrize('transport_type', TRANSPORTS)
+class TestTransportConformance:
+    """Tests that every transport behaves the same way."""
+
+    def test_json_request(self, server: StandInServer, transport_type: TransportType):
+        """Test that a JSON body is sent and the JSON response is read."""
+        transport = create_transport(transport_type)
+
+        response = transport.request('POST', f'{server.base_url}api/v1.0/test-result/provider-info', json=[1, 2], headers={'X-Api-Key': 'test'})
+
+        assert response.status_code == 200
+        assert [info['testResultId'] for info in response.json()] == [1, 2]
+        assert response.request.body == b'[1, 2]'
+        assert server.bytes_received() == {'provider-info': 6}
+        transport.close()
+
+    def test_multipart_request(self, server: StandInServer, transport_type: TransportType):
+        """Test that files and form data are sent as a multipart body."""
+        transport = create_transport(transport_type)
+
+        response = transport.request('POST', f'{server.base_url}api/v1.0/test-result/1/upload', files={'file': ('a.bin', b'x' * 1000)}, data={'assetName': 'a.bin'})
+
+        assert response.status_code == 200
+        assert server.bytes_received()['upload'] > 1000
+
+    def test_chunked_request(self, server: StandInServer, transport_type: TransportType):
+        """Test that an iterable body is streamed with chunked encoding."""
+        transport = create_transport(transport_type)
+
+        response = transport.request('POST', f'{server.base_url}api/v1.0/test-result/1/upload', data=iter([b'a' * 100, b'b' * 200]))
+
+        assert response.status_code == 200
+        assert server.bytes_received() == {'upload': 300}
+
+    def test_streamed_response(self, server: StandInServer, transport_type: TransportType):
+        """Test that a streamed response body is read in chunks and released on close."""
+        server.config = StandInConfig(email=b'Subject: streamed\r\n\r\n' + b'x' * 100_000)
+        transport = create_transport(transport_type)
+
+        response = transport.request('POST', f'{server.base_url}api/v1.0/email/download-email', json={'emailAddress': 'a'}, stream=True)
+        chunks = list(response.iter_content(16 * 1024))
+        response.close()
+
+        assert len(chunks) > 1
+        assert b''.join(chunks).endswith(b'x' * 100_000)
+
+    def test_error_status(self, server: StandInServer, transport_type: TransportType):
+        """Test that an error status is returned as a response, which raises HTTPError on request."""
+        server.config = StandInConfig(error_rate=1.0, error_status=503)
+        transport = create_transport(transport_type)
+
+        response = transport.request('POST', f'{server.base_url}api/v2.0/sdk-heartbeat', json={})
+
+        assert response.status_code == 503
+        assert response.json() == {'message': 'Injected stand-in error'}
+        with pytest.raises(requests.exceptions.HTTPError):
+            response.raise_for_status()
+
+    def test_connection_refused(self, transport_type: TransportType):
+        """Test that a failed connection raises a requests ConnectionError."""
+        with socket.socket() as unused:
+            unused.bind(('127.0.0.1', 0))
+            port = unused.getsockname()[1]
+        transport = create_transport(transport_type)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            transport.request('GET', f'http://127.0.0.1:{port}/')
+
+    def test_concurrent_requests(self, server: StandInServer, transport_type: TransportType):
+        """Test that the transport can be shared by many threads."""
+        transport = create_transport(transport_type, pool_size=4)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(lambda _: transport.request('POST', f'{server.base_url}api/v2.0/sdk-heartbeat', json={}).status_code, range(50)))
+
+        assert statuses == [200] * 50
+        assert server.request_counts() == {'sdk-heartbeat': 50}
+
+    def test_clients(self, server: StandInServer, transport_type: TransportType):
+        """Test that both clients work on top of the transport."""
+        config = ApplauseConfig(api_key='test', product_id=123, auto_api_base_url=server.base_url, public_api_base_url=server.base_url, transport=transport_type)
+        auto_api = AutoApi(config)
+
+        run_id = auto_api.start_test_run(TestRunCreateDto(tests=['test1'])).run_id
+        auto_api.start_test_case(CreateTestCaseResultDto(test_run_id=run_id, test_case_name='test1', provider_session_ids=[]))
+        with auto_api.stream_email_content(EmailFetchRequest(email_address='test@example.com')) as email:
+            assert email.headers['Subject'] == 'Stand-in email'
+        PublicApi(config).submit_result(1, TestRunAutoResultDto(testCycleId=1, status=TestRunAutoResultStatus.PASSED))
+        server.config = StandInConfig(error_rate=1.0)
+        with pytest.raises(ApplauseClientError) as error:
+            auto_api.end_test_run(run_id)
+
+        assert error.value.status_code == 500
+        assert server.request_counts()['submit-result'] == 1
+
+
+class TestCreateTransport:
+    """Tests for the create_transport function."""
+
+    def test_default_transport(self):
+        """Test that the requests transport is the default of the configuration."""
+        assert isinstance(AutoApi(ApplauseConfig(api_key='test', product_id=123)).transport, RequestsTransport)
+
+    def test_http2_requires_httpx(self, monkeypatch):
+        """Test that the HTTP/2 transport explains how to install its optional dependency."""
+        monkeypatch.setattr('applause.common_python_reporter.transport.httpx', None)
+
+        with pytest.raises(ImportError, match='httpx'):
+            Http2Transport()
+
+    @pytest.mark.skipif(httpx is None, reason='httpx is not installed')
+    def test_http2_preconnect_sends_options(self, server: StandInServer):
+        """Test that the HTTP/2 transport opens its connection with an OPTIONS request rather than a request to the API."""
+        transport = Http2Transport()
+
+        assert transport.preconnect(server.base_url) == 1
+        response = transport.request('POST', f'{server.base_url}api/v1.0/test-result/provider-info', json=[1])
+
+        assert response.status_code == 200
+        assert server.request_counts() == {'options': 1, 'provider-info': 1}
+        transport.close()
+
+    def test_transport_must_implement_request(self):
+        """Test that a transport without a request method cannot be constructed."""
+
+        class Incomplete(Transport):
+            pass
+
+        with pytest.raises(TypeError, match='request'):
+            Incomplete()
@@ -1,7 +1,7 @@
 """Tests for the utils module."""
 
 import pytest
-from applause.common_python_reporter.utils import parse_test_case_names, TestCaseNameMatches
+from applause.common_python_reporter.utils import parse_test_case_names, truncate_middle, utf8_size, TestCaseNameMatches
 
 class TestParseTestCaseNames:
     """Tests for the parse_test_case_names function."""
@@ -30,3 +30,37 @@ class TestParseTestCaseNames:
             applause_test_case_id=expected_applause_id,
         )
         assert parse_test_case_names(test_case_name) == expected_result
+
+
+class TestTruncateMiddle:
+    """Tests for the truncate_middle function."""
+
+    def test_within_budget(self):
+        """Test that a string within the budget is returned unchanged."""
+        assert truncate_middle("short", 5) == "short"
+
+    def test_keeps_head_and_tail(self):
+        """Test that the head and tail are kept around a marker of the omitted size."""
+        text = "HEAD" + "x" * 10_000 + "TAIL"
+
+        result = truncate_middle(text, 200, note="full text attached as failure_reason.txt")
+
+        assert utf8_size(result) <= 200
+        assert result.startswith("HEAD")
+        assert result.endswith("TAIL")
+        head, _, rest = result.partition("\n... [")
+        marker, _, tail = rest.partition("] ...\n")
+        assert marker == f"{len(text) - len(head) - len(tail)} bytes truncated, full text attached as failure_reason.txt"
+
+    @pytest.mark.parametrize("max_bytes", [60, 61, 62, 63, 100])
+    def test_multibyte_characters(self, max_bytes: int):
+        """Test that the budget is respected in bytes and partial characters are dropped."""
+        result = truncate_middle("é" * 1000, max_bytes)
+
+        assert utf8_size(result) <= max_bytes
+        assert result.startswith("é")
+        assert result.endswith("é")
+
+    def test_budget_smaller_than_marker(self):
+        """Test that a budget too small for the marker keeps only the head."""
+        assert truncate_middle("x" * 100, 10) == "x" * 10
@@ -0,0 +1,143 @@
+"""Tests for the warmup module."""
+
+import pytest
+import socket
+import time
+from applause.common_python_reporter.config import ApplauseConfig
+from applause.common_python_reporter.metrics import WARM_UP_DURATION
+from applause.common_python_reporter.reporter import ApplauseReporter
+from applause.common_python_reporter.stand_in import StandInConfig, StandInServer
+from applause.common_python_reporter.transport import TransportType, create_transport
+from applause.common_python_reporter.warmup import DnsCache, install_dns_cache, uninstall_dns_cache
+from unittest.mock import Mock
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+TRANSPORTS = [
+    TransportType.REQUESTS,
+    TransportType.URLLIB3,
+    pytest.param(TransportType.HTTP2, marks=pytest.mark.skipif(httpx is None, reason="httpx is not installed")),
+]
+
+
+@pytest.fixture
+def dns_cache():
+    """Installs the process wide DNS cache, and uninstalls it after the test."""
+    try:
+        yield install_dns_cache()
+    finally:
+        uninstall_dns_cache()
+
+
+class TestDnsCache:
+    """Tests for the DnsCache class."""
+
+    def test_caches_results(self):
+        """Test that a lookup is resolved once, that other arguments are resolved apart, and that failures are not cached."""
+        resolver = Mock(side_effect=[[("result",)], [("other",)], OSError("no such host"), [("later",)]])
+        cache = DnsCache(resolver)
+
+        assert cache.getaddrinfo("example.com", 443) == [("result",)]
+        assert cache.getaddrinfo("example.com", 443) == [("result",)]
+        assert cache.getaddrinfo("example.com", 443, 0, socket.SOCK_STREAM) == [("other",)]
+        with pytest.raises(OSError):
+            cache.getaddrinfo("missing.example.com", 443)
+        assert cache.getaddrinfo("missing.example.com", 443) == [("later",)]
+
+        assert resolver.call_count == 4
+        assert cache.stats().model_dump() == {"hits": 1, "misses": 4, "entries": 3}
+
+    def test_only_caches_its_hosts(self):
+        """Test that the lookups of the hosts that are not cached are passed on to the resolver every time."""
+        resolver = Mock(return_value=[("result",)])
+        cache = DnsCache(resolver, hosts=["API.example.com"])
+
+        cache.getaddrinfo("api.example.com", 443)
+        cache.getaddrinfo("api.example.com", 443)
+        cache.getaddrinfo("other.example.com", 443)
+        cache.getaddrinfo("other.example.com", 443)
+
+        assert resolver.call_count == 3
+        assert cache.stats().model_dump() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_install_replaces_getaddrinfo(self):
+        """Test that the cache is installed once in place of socket.getaddrinfo, and that uninstalling restores it."""
+        original = socket.getaddrinfo
+        try:
+            cache = install_dns_cache(["localhost"])
+            assert install_dns_cache(["127.0.0.1"]) is cache
+            assert socket.getaddrinfo == cache.getaddrinfo
+            assert cache.hosts == {"localhost", "127.0.0.1"}
+
+            socket.getaddrinfo("localhost", 80)
+            socket.getaddrinfo("localhost", 80)
+            socket.getaddrinfo("::1", 80)
+            assert cache.stats().hits == 1 and cache.stats().entries == 1
+        finally:
+            uninstall_dns_cache()
+        assert socket.getaddrinfo is original
+
+    def test_uninstall_keeps_a_later_replacement(self):
+        """Test that uninstalling leaves a getaddrinfo installed over the cache in place, with the cache passing lookups through."""
+        original = socket.getaddrinfo
+        try:
+            cache = install_dns_cache(["localhost"])
+            wrapper = Mock(side_effect=cache.getaddrinfo)
+            socket.getaddrinfo = wrapper
+
+            uninstall_dns_cache()
+
+            assert socket.getaddrinfo is wrapper
+            socket.getaddrinfo("localhost", 80)
+            assert cache.stats().entries == 0
+        finally:
+            socket.getaddrinfo = original
+
+
+@pytest.mark.parametrize("transport_type", TRANSPORTS)
+class TestWarmUp:
+    """Tests for the warm-up of the reporter."""
+
+    def test_runner_start_reuses_warm_connections(self, transport_type, dns_cache, tmp_path, monkeypatch):
+        """Test that the connections opened by the warm-up spare runner_start the connection latency."""
+        monkeypatch.chdir(tmp_path)
+        with StandInServer(StandInConfig(connect_latency=0.3)) as server:
+            config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=server.base_url, transport=transport_type, warm_up=True)
+            reporter = ApplauseReporter(config)
+            assert reporter.warm_up.wait(5)
+            # The connect latency of the stand-in starts when the connection is accepted
+            time.sleep(0.4)
+
+            start = time.perf_counter()
+            reporter.runner_start(["test1"])
+            elapsed = time.perf_counter() - start
+            reporter.runner_end()
+
+        stats = reporter.warm_up.stats()
+        assert stats.errors == [] and stats.connections >= 1
+        assert elapsed < 0.3
+        assert reporter.metrics.snapshot().histogram(WARM_UP_DURATION, step="connect").count == 1
+        assert dns_cache.stats().entries >= 1
+
+    def test_preconnect_failure_is_recorded(self, transport_type, dns_cache):
+        """Test that a host that cannot be connected to is recorded as an error of the warm-up, which still finishes."""
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        config = ApplauseConfig(api_key="test", product_id=1, auto_api_base_url=f"http://127.0.0.1:{port}/", transport=transport_type, warm_up=True)
+
+        reporter = ApplauseReporter(config)
+
+        assert reporter.warm_up.wait(5)
+        assert [error.split(":")[0] for error in reporter.warm_up.stats().errors] == ["connect"]
+
+
+def test_requests_transport_without_pool_does_not_connect():
+    """Test that urls served by an adapter without a connection pool, such as a replay, are not connected to."""
+    transport = create_transport(TransportType.REQUESTS)
+    transport.session.mount("http://replayed/", Mock(spec=["send", "close"]))
+
+    assert transport.preconnect("http://replayed/", 2) == 0